@@ -0,0 +1,243 @@
+"""
+Seeded synthetic pharmacy dataset for benchmarks and load tests.
+
+The same seed always produces the same medicines, bills and orders, so timings from
+different versions are measured against identical data. Rows are bulk-inserted through
+the application's own models, into whatever database db.py is bound to: set
+MEDIBIT_DB_PATH before db is first imported to keep the real database untouched.
+
+Usage:
+    python -m benchmarks.dataset --db /tmp/bench.db --scale 10k [--seed 42]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# Row counts per named scale; bill items average ITEMS_PER_BILL per bill
+SCALES = {
+    "1k": {"medicines": 1_000, "bills": 1_000, "orders": 100},
+    "10k": {"medicines": 10_000, "bills": 10_000, "orders": 1_000},
+    "100k": {"medicines": 100_000, "bills": 100_000, "orders": 10_000},
+}
+ITEMS_PER_BILL = 3
+DEFAULT_SEED = 42
+# Fixed "today" so expiry dates and bill history do not drift between runs
+REFERENCE_DATE = datetime.date(2025, 1, 1)
+INSERT_CHUNK = 10_000
+
+DRUGS = (
+    "Paracetamol", "Amoxicillin", "Azithromycin", "Cetirizine", "Metformin", "Atorvastatin",
+    "Amlodipine", "Omeprazole", "Pantoprazole", "Ibuprofen", "Diclofenac", "Losartan",
+    "Telmisartan", "Levocetirizine", "Montelukast", "Dolo", "Ciprofloxacin", "Doxycycline",
+    "Ondansetron", "Ranitidine", "Vitamin D3", "Calcium Carbonate", "Folic Acid", "Aspirin",
+    "Clopidogrel", "Glimepiride", "Insulin Glargine", "Salbutamol", "Prednisolone", "Ferrous Sulfate",
+)
+STRENGTHS = ("5mg", "10mg", "20mg", "40mg", "100mg", "250mg", "500mg", "650mg", "1g")
+FORMS = ("Tablet", "Capsule", "Syrup", "Injection", "Drops", "Cream", "Suspension")
+MANUFACTURERS = (
+    "Cipla", "Sun Pharma", "Dr. Reddy's", "Lupin", "Zydus", "Mankind", "Alkem",
+    "Torrent", "Glenmark", "Abbott", "Intas", "Micro Labs",
+)
+CUSTOMERS = ("Walk-in", "A. Sharma", "R. Patel", "S. Iyer", "M. Khan", "P. Singh", "K. Das", "N. Rao")
+
+
+def ean13(body: str) -> str:
+    """
+    Append the EAN-13 check digit to a 12-digit body.
+    :param body: 12 digits
+    :return: 13-digit barcode
+    """
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def _expiry(rng: random.Random, today: datetime.date) -> datetime.date:
+    # A few expired and near-expiry items so expiry alerts have work to do
+    roll = rng.random()
+    if roll < 0.03:
+        days = -rng.randint(1, 180)
+    elif roll < 0.10:
+        days = rng.randint(0, 30)
+    elif roll < 0.25:
+        days = rng.randint(31, 90)
+    else:
+        days = rng.randint(91, 1095)
+    return today + datetime.timedelta(days=days)
+
+
+def medicine_rows(count: int, seed: int = DEFAULT_SEED, today: datetime.date = REFERENCE_DATE) -> list:
+    """
+    Build medicine rows with unique Indian-prefix (890) EAN-13 barcodes, realistic names,
+    skewed prices and ~10% of items at or below their stock threshold.
+    :param count: Number of medicines
+    :param seed: Random seed
+    :param today: Reference date for expiry dates
+    :return: List of dicts matching the Medicine columns
+    """
+    rng = random.Random(seed)
+    products = rng.sample(range(10 ** 9), count)
+    rows = []
+    for product in products:
+        threshold = rng.choice((5, 10, 10, 10, 20, 25))
+        quantity = rng.randint(0, threshold) if rng.random() < 0.10 else int(min(2000, rng.lognormvariate(4.5, 0.8)))
+        rows.append({
+            "barcode": ean13(f"890{product:09d}"),
+            "name": f"{rng.choice(DRUGS)} {rng.choice(STRENGTHS)} {rng.choice(FORMS)}",
+            "quantity": quantity,
+            "expiry": _expiry(rng, today),
+            "manufacturer": rng.choice(MANUFACTURERS),
+            "price": max(1, min(5000, int(rng.lognormvariate(4.0, 1.0)))),
+            "threshold": threshold,
+        })
+    return rows
+
+
+def _popular_index(rng: random.Random, count: int) -> int:
+    # Pareto-skewed pick: a small share of medicines accounts for most sales
+    return min(count - 1, int(rng.paretovariate(1.2)) - 1) if rng.random() < 0.8 else rng.randrange(count)
+
+
+def bill_rows(medicines: list, count: int, first_id: int = 1, seed: int = DEFAULT_SEED,
+              today: datetime.date = REFERENCE_DATE):
+    """
+    Yield (bill, items) row pairs spread over the year before `today`, with business-hour
+    timestamps and popularity-skewed line items.
+    :param medicines: Medicine rows from medicine_rows()
+    :param count: Number of bills
+    :param first_id: ID of the first bill (items reference it)
+    :param seed: Random seed
+    :param today: Reference date
+    """
+    rng = random.Random(seed + 1)
+    order = list(range(len(medicines)))
+    rng.shuffle(order)
+    for offset in range(count):
+        bill_id = first_id + offset
+        when = datetime.datetime.combine(today, datetime.time(9)) - datetime.timedelta(
+            days=rng.randint(1, 365), minutes=rng.randint(0, 12 * 60), seconds=rng.randint(0, 59))
+        lines = min(len(medicines), max(1, int(rng.expovariate(1 / ITEMS_PER_BILL)) + 1))
+        items, seen = [], set()
+        while len(items) < lines:
+            med = medicines[order[_popular_index(rng, len(order))]]
+            if med["barcode"] in seen:
+                continue
+            seen.add(med["barcode"])
+            quantity = rng.choice((1, 1, 1, 2, 2, 3, 5, 10))
+            items.append({
+                "bill_id": bill_id, "barcode": med["barcode"], "name": med["name"], "price": med["price"],
+                "quantity": quantity, "subtotal": med["price"] * quantity, "discount": 0,
+            })
+        bill = {"id": bill_id, "timestamp": when.strftime("%Y-%m-%d %H:%M:%S"),
+                "total": sum(i["subtotal"] for i in items), "file_path": None}
+        yield bill, items
+
+
+def order_rows(medicines: list, count: int, first_id: int = 1, seed: int = DEFAULT_SEED,
+               today: datetime.date = REFERENCE_DATE):
+    """
+    Yield (order, items) row pairs; orders favour medicines at or below threshold.
+    :param medicines: Medicine rows from medicine_rows()
+    :param count: Number of orders
+    :param first_id: ID of the first order
+    :param seed: Random seed
+    :param today: Reference date
+    """
+    rng = random.Random(seed + 2)
+    low = [m for m in medicines if m["quantity"] <= m["threshold"]] or medicines
+    for offset in range(count):
+        order_id = first_id + offset
+        when = datetime.datetime.combine(today, datetime.time(18)) - datetime.timedelta(days=rng.randint(0, 365))
+        picks = rng.sample(low, min(len(low), rng.randint(1, 15)))
+        order = {"id": order_id, "timestamp": when.strftime("%Y-%m-%d %H:%M:%S"), "file_path": "",
+                 "status": "pending" if rng.random() < 0.3 else "completed"}
+        items = [{
+            "order_id": order_id, "barcode": m["barcode"], "name": m["name"], "quantity": m["quantity"],
+            "expiry": str(m["expiry"]), "manufacturer": m["manufacturer"],
+            "order_quantity": max(m["threshold"] * 2, 10),
+        } for m in picks]
+        yield order, items
+
+
+def _insert_chunked(conn, model, rows):
+    from sqlalchemy import insert
+    for start in range(0, len(rows), INSERT_CHUNK):
+        conn.execute(insert(model), rows[start:start + INSERT_CHUNK])
+
+
+def generate(medicines: int = 1_000, bills: int = 1_000, orders: int = 100, seed: int = DEFAULT_SEED,
+             today: datetime.date = REFERENCE_DATE) -> dict:
+    """
+    Insert a synthetic dataset into the database db.py is bound to (tables are created if missing).
+    :param medicines: Number of medicines
+    :param bills: Number of bills
+    :param orders: Number of purchase orders
+    :param seed: Random seed
+    :param today: Reference date
+    :return: Dict of row counts and generation time
+    """
+    import db
+    from sqlalchemy import func, select
+
+    db.init_db()
+    start = time.perf_counter()
+    meds = medicine_rows(medicines, seed, today)
+    counts = {"medicines": len(meds), "bills": 0, "bill_items": 0, "orders": 0, "order_items": 0}
+    with db.engine.begin() as conn:
+        _insert_chunked(conn, db.Medicine, meds)
+        first_bill = (conn.execute(select(func.max(db.Bill.id))).scalar() or 0) + 1
+        first_order = (conn.execute(select(func.max(db.Order.id))).scalar() or 0) + 1
+        for parent_model, child_model, rows, prefix in (
+            (db.Bill, db.BillItem, bill_rows(meds, bills, first_bill, seed, today), "bill"),
+            (db.Order, db.OrderMedicine, order_rows(meds, orders, first_order, seed, today), "order"),
+        ):
+            parents, children = [], []
+            for parent, items in rows:
+                parents.append(parent)
+                children.extend(items)
+                if len(children) >= INSERT_CHUNK:
+                    _insert_chunked(conn, parent_model, parents)
+                    _insert_chunked(conn, child_model, children)
+                    counts[f"{prefix}s"] += len(parents)
+                    counts[f"{prefix}_items"] += len(children)
+                    parents, children = [], []
+            if parents:
+                _insert_chunked(conn, parent_model, parents)
+                _insert_chunked(conn, child_model, children)
+                counts[f"{prefix}s"] += len(parents)
+                counts[f"{prefix}_items"] += len(children)
+    counts["seconds"] = round(time.perf_counter() - start, 3)
+    return counts
+
+
+def generate_scale(scale: str, seed: int = DEFAULT_SEED) -> dict:
+    """
+    Insert one of the named SCALES.
+    :param scale: '1k', '10k' or '100k'
+    :param seed: Random seed
+    :return: Row counts (see generate())
+    """
+    return generate(seed=seed, **SCALES[scale])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic pharmacy database")
+    parser.add_argument("--db", required=True, help="SQLite file to create or extend")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="1k")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+    if "db" in sys.modules:
+        parser.error("db was imported before MEDIBIT_DB_PATH could be set")
+    os.environ["MEDIBIT_DB_PATH"] = os.path.abspath(args.db)
+    counts = generate_scale(args.scale, args.seed)
+    print(", ".join(f"{k}={v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
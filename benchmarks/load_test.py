@@ -0,0 +1,303 @@
+"""
+Headless multi-till checkout load test.
+
+N simulated tills (threads in one process, or separate processes like separate
+counter PCs) share one SQLite database and run the real service layer: scan each
+item (barcode lookup), sometimes search by name, then BillingService.finalize_bill.
+Failed sales (e.g. "database is locked") are retried with backoff.
+
+Reported: sales/sec, sale and lookup latency percentiles, write-lock wait, retries,
+failed sales and stock-consistency violations (stock that did not drop by exactly
+the quantities sold, or bills that were lost or duplicated).
+
+The run uses a temporary copy of the database (a generated dataset by default), so
+the real database is never touched.
+
+Usage:
+    python -m benchmarks.load_test [--tills 4] [--duration 30] [--profile busy]
+                                   [--mode thread|process] [--scale 1k | --db existing.db]
+                                   [--output result.json]
+"""
+import argparse
+import collections
+import datetime
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+# Mean seconds between customers, mean seconds between item scans, basket size range,
+# share of baskets that start with a name search
+PROFILES = {
+    "stress": {"think": 0.0, "scan": 0.0, "items": (1, 5), "search": 0.2},
+    "busy": {"think": 1.0, "scan": 0.2, "items": (1, 6), "search": 0.2},
+    "normal": {"think": 5.0, "scan": 1.0, "items": (1, 8), "search": 0.3},
+}
+MAX_RETRIES = 5
+RETRY_BACKOFF = 0.05  # Seconds, doubled per attempt
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+_lock_wait = {"seconds": 0.0}
+_lock_wait_lock = threading.Lock()
+_commit_start = threading.local()
+_timer_installed = False
+
+
+def _install_lock_timer(engine, session_factory):
+    """
+    Accumulate, for the whole process, the time spent in write statements and COMMIT
+    on any thread (including the DB writer thread). SQLite blocks there while another
+    connection holds the write lock, so under load this is the lock wait (with a
+    single writer it is just the write cost).
+    """
+    global _timer_installed
+    if _timer_installed:
+        return
+    from sqlalchemy import event
+
+    def add(seconds):
+        with _lock_wait_lock:
+            _lock_wait["seconds"] += seconds
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(WRITE_PREFIXES):
+            conn.info["lock_timer"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("lock_timer", None)
+        if start is not None:
+            add(time.perf_counter() - start)
+
+    @event.listens_for(engine, "commit")
+    def before_commit(conn):
+        _commit_start.at = time.perf_counter()
+
+    @event.listens_for(session_factory, "after_commit")
+    def after_commit(session):
+        start = getattr(_commit_start, "at", None)
+        if start is not None:
+            add(time.perf_counter() - start)
+            _commit_start.at = None
+
+    _timer_installed = True
+
+
+def _pause(rng, mean):
+    if mean > 0:
+        time.sleep(rng.expovariate(1 / mean))
+
+
+def run_till(till_id, duration, profile, seed, barcodes):
+    """
+    Run one till until `duration` seconds have passed.
+    :param till_id: Till number (used in customer names and the seed)
+    :param duration: Seconds to run
+    :param profile: Name from PROFILES
+    :param seed: Base random seed
+    :param barcodes: Barcodes the till may sell
+    :return: Dict of raw measurements for this till
+    """
+    import logging
+    logging.disable(logging.WARNING)  # Also needed in spawned till processes
+    import db
+    from billing_service import BillingService
+    from inventory_service import InventoryService
+
+    _install_lock_timer(db.engine, db.Session)
+    settings = PROFILES[profile]
+    rng = random.Random(seed * 1000 + till_id)
+    billing = BillingService()
+    inventory = InventoryService()
+    result = {"sales": 0, "failed": 0, "retries": 0, "sale_ms": [], "lookup_ms": [],
+              "pid": os.getpid(), "lock_wait_ms": 0.0, "sold": collections.Counter(), "errors": collections.Counter()}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        _pause(rng, settings["think"])
+        basket = rng.sample(barcodes, min(len(barcodes), rng.randint(*settings["items"])))
+        items = []
+        for position, barcode in enumerate(basket):
+            start = time.perf_counter()
+            if position == 0 and rng.random() < settings["search"]:
+                inventory.search(barcode[-4:])
+            medicine = db.get_medicine_by_barcode(barcode)
+            result["lookup_ms"].append((time.perf_counter() - start) * 1000)
+            if medicine is not None and medicine.quantity > 0:
+                items.append({"barcode": medicine.barcode, "name": medicine.name,
+                              "price": medicine.price, "quantity": 1})
+            _pause(rng, settings["scan"])
+        if not items:
+            continue
+        start = time.perf_counter()
+        for attempt in range(MAX_RETRIES + 1):
+            outcome = billing.finalize_bill(items, {"name": f"Till {till_id} customer"}, 0, 0)
+            if outcome["success"]:
+                break
+            result["errors"][str(outcome["error"])[:80]] += 1
+            if attempt < MAX_RETRIES:
+                result["retries"] += 1
+                time.sleep(RETRY_BACKOFF * (2 ** attempt))
+        result["sale_ms"].append((time.perf_counter() - start) * 1000)
+        if outcome["success"]:
+            result["sales"] += 1
+            for item in items:
+                result["sold"][item["barcode"]] += item["quantity"]
+        else:
+            result["failed"] += 1
+    # Process-wide total so far; run() keeps the largest value per process
+    with _lock_wait_lock:
+        result["lock_wait_ms"] = _lock_wait["seconds"] * 1000
+    return result
+
+
+def _percentiles(values):
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 3)
+
+    return {"count": len(ordered), "mean_ms": round(statistics.mean(ordered), 3),
+            "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "max_ms": round(ordered[-1], 3)}
+
+
+def check_consistency(before, sold, bills_before, sales):
+    """
+    Compare stock and bill counts after the run with what the tills recorded.
+    :param before: {barcode: quantity} before the run
+    :param sold: Counter of quantities sold per barcode by successful sales
+    :param bills_before: Number of bills before the run
+    :param sales: Number of successful sales
+    :return: List of violation descriptions
+    """
+    from db import Bill, Medicine, Session
+
+    session = Session()
+    try:
+        after = dict(session.query(Medicine.barcode, Medicine.quantity).all())
+        bill_count = session.query(Bill).count()
+    finally:
+        session.close()
+    violations = []
+    for barcode, quantity in sold.items():
+        expected = before[barcode] - quantity
+        # commit_bill clamps stock at zero, so oversold items legitimately end at 0
+        if after.get(barcode) != expected and not (expected < 0 and after.get(barcode) == 0):
+            violations.append(f"{barcode}: stock {before[barcode]} - sold {quantity} = {expected}, found {after.get(barcode)}")
+    if bill_count - bills_before != sales:
+        violations.append(f"bills: {sales} sales recorded but {bill_count - bills_before} bills written")
+    return violations
+
+
+def run(tills=4, duration=30.0, profile="busy", mode="thread", scale="1k", source_db=None, seed=42):
+    """
+    Prepare a database in a temporary directory, run the tills and aggregate the results.
+    Must be called before db is imported in this process.
+    :param tills: Number of simulated tills
+    :param duration: Seconds each till runs
+    :param profile: Name from PROFILES
+    :param mode: 'thread' (tills share one process) or 'process' (one process per till)
+    :param scale: Dataset scale when no source_db is given
+    :param source_db: Existing database file to copy instead of generating one
+    :param seed: Random seed for the dataset and the tills
+    :return: Report dict
+    """
+    if "db" in sys.modules:
+        raise RuntimeError("run() must point MEDIBIT_DB_PATH at its own database before db is imported")
+    workdir = tempfile.mkdtemp(prefix="medibit-load-")
+    db_path = os.path.join(workdir, "load.db")
+    os.environ["MEDIBIT_DB_PATH"] = db_path
+    os.environ["MEDIBIT_ARTIFACT_ROOT"] = workdir
+    for path in (SRC_DIR, ROOT_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    if source_db:
+        shutil.copyfile(source_db, db_path)
+        import db
+        db.init_db()
+    else:
+        from benchmarks import dataset
+        dataset.generate(seed=seed, **dataset.SCALES[scale])
+    from db import Bill, Medicine, Session
+
+    session = Session()
+    try:
+        before = dict(session.query(Medicine.barcode, Medicine.quantity).all())
+        bills_before = session.query(Bill).count()
+    finally:
+        session.close()
+    barcodes = sorted(b for b, q in before.items() if q > 0)
+
+    if mode == "process":
+        executor = ProcessPoolExecutor(max_workers=tills, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = ThreadPoolExecutor(max_workers=tills)
+    started = time.perf_counter()
+    with executor:
+        futures = [executor.submit(run_till, i, duration, profile, seed, barcodes) for i in range(tills)]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - started
+
+    sold = collections.Counter()
+    errors = collections.Counter()
+    for r in results:
+        sold.update(r["sold"])
+        errors.update(r["errors"])
+    sales = sum(r["sales"] for r in results)
+    lock_wait_ms = {}
+    for r in results:
+        lock_wait_ms[r["pid"]] = max(lock_wait_ms.get(r["pid"], 0.0), r["lock_wait_ms"])
+    lock_wait_total = sum(lock_wait_ms.values())
+    violations = check_consistency(before, sold, bills_before, sales)
+    return {
+        "config": {"tills": tills, "duration_s": duration, "profile": profile, "mode": mode,
+                   "dataset": source_db or scale, "seed": seed,
+                   "started_at": datetime.datetime.now().isoformat(timespec="seconds")},
+        "sales": sales,
+        "sales_per_sec": round(sales / elapsed, 2) if elapsed else 0.0,
+        "failed_sales": sum(r["failed"] for r in results),
+        "retries": sum(r["retries"] for r in results),
+        "sale_latency": _percentiles([ms for r in results for ms in r["sale_ms"]]),
+        "lookup_latency": _percentiles([ms for r in results for ms in r["lookup_ms"]]),
+        "lock_wait_ms": {"total": round(lock_wait_total, 3),
+                         "per_sale": round(lock_wait_total / sales, 3) if sales else 0.0},
+        "per_till_sales": [r["sales"] for r in results],
+        "errors": dict(errors.most_common(10)),
+        "consistency_violations": violations,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-till checkout load test")
+    parser.add_argument("--tills", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per till")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="busy")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--scale", default="1k", help="Generated dataset scale (see benchmarks.dataset)")
+    parser.add_argument("--db", help="Copy this database instead of generating one")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run(args.tills, args.duration, args.profile, args.mode, args.scale, args.db, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 1 if report["consistency_violations"] or report["failed_sales"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
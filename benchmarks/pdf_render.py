@@ -0,0 +1,157 @@
+"""
+Microbenchmark for receipt and purchase-order PDF rendering.
+
+Compares a cold render (template cache invalidated before every document, which is
+what every render paid before templates were cached) with a warm render that reuses
+the cached styles and pharmacy header. Documents are rendered into memory so disk
+speed does not skew the numbers.
+
+Usage:
+    python -m benchmarks.pdf_render [--iterations 50] [--items 20] [--json]
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import pdf_templates  # noqa: E402
+from order_manager import OrderManager  # noqa: E402
+from receipt_manager import ReceiptManager  # noqa: E402
+
+
+class _Pharmacy:
+    name = "Benchmark Pharmacy"
+    address = "12 Market Road, Pune"
+    phone = "9876543210"
+    email = "bench@example.com"
+    gst_number = "27ABCDE1234F1Z5"
+    license_number = "MH-PUN-0001"
+    website = "https://example.com"
+
+
+def _receipt_args(item_count):
+    items = [
+        {
+            "barcode": f"890100000{i:04d}",
+            "name": f"Medicine {i}",
+            "price": 12.5 + i,
+            "quantity": 1 + i % 3,
+            "subtotal": (12.5 + i) * (1 + i % 3),
+        }
+        for i in range(item_count)
+    ]
+    customer = {"name": "Bench Customer", "phone": "9999999999", "email": "customer@example.com"}
+    total = sum(item["subtotal"] for item in items)
+    return customer, items, total, datetime.datetime(2024, 1, 1, 10, 0, 0), "1001", _Pharmacy()
+
+
+def _order_args(item_count):
+    items = [
+        {
+            "barcode": f"890100000{i:04d}",
+            "name": f"Medicine {i}",
+            "quantity": i % 7,
+            "order_quantity": 10 + i,
+            "manufacturer": "Bench Labs",
+        }
+        for i in range(item_count)
+    ]
+    return items, "2001", "2024-01-01 10:00:00"
+
+
+def _summary(timings, peaks, retained):
+    return {
+        "mean_ms": round(statistics.mean(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "peak_kib": round(statistics.mean(peaks) / 1024, 1),
+        "retained_kib": round(statistics.mean(retained) / 1024, 1),
+    }
+
+
+def _measure(render, iterations):
+    """
+    Time cold and cached renders, interleaved so drift affects both equally,
+    then measure allocations of each with tracemalloc in a separate pass.
+    :return: (cold summary, cached summary)
+    """
+    render()  # warm imports and fonts outside the measurement
+    timings = {True: [], False: []}
+    for _ in range(iterations):
+        for cold in (True, False):
+            if cold:
+                pdf_templates.invalidate()
+            gc.collect()
+            start = time.perf_counter()
+            render()
+            timings[cold].append((time.perf_counter() - start) * 1000)
+    memory = {True: ([], []), False: ([], [])}
+    for _ in range(max(1, iterations // 5)):
+        for cold in (True, False):
+            if cold:
+                pdf_templates.invalidate()
+            gc.collect()
+            tracemalloc.start()
+            render()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory[cold][0].append(peak)
+            memory[cold][1].append(current)
+    return (
+        _summary(timings[True], *memory[True]),
+        _summary(timings[False], *memory[False]),
+    )
+
+
+def run(iterations=50, item_count=20):
+    """
+    Run the benchmark. Order renders load pharmacy details through the template
+    cache, so the cold scenario includes the database lookup each order used to make.
+    :param iterations: Documents rendered per scenario
+    :param item_count: Line items per document
+    :return: Dict of results keyed by scenario
+    """
+    receipt_manager = ReceiptManager()
+    order_manager = OrderManager()
+    receipt_args = _receipt_args(item_count)
+    order_args = _order_args(item_count)
+
+    def render_receipt():
+        receipt_manager.render_pdf_receipt(io.BytesIO(), *receipt_args)
+
+    def render_order():
+        order_manager.render_pdf_order(io.BytesIO(), *order_args)
+
+    results = {}
+    for name, render in (("receipt", render_receipt), ("order", render_order)):
+        results[f"{name}_cold"], results[f"{name}_cached"] = _measure(render, iterations)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark receipt/order PDF rendering")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+    results = run(args.iterations, args.items)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<16}{'mean ms':>10}{'median ms':>12}{'min ms':>10}{'peak KiB':>11}{'retained KiB':>14}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['mean_ms']:>10}{r['median_ms']:>12}{r['min_ms']:>10}{r['peak_kib']:>11}{r['retained_kib']:>14}")
+
+
+if __name__ == "__main__":
+    main()
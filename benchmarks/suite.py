@@ -0,0 +1,287 @@
+"""
+Benchmark suite: times the hot paths of the app against seeded synthetic datasets.
+
+Each scale runs in its own process with MEDIBIT_DB_PATH and MEDIBIT_ARTIFACT_ROOT
+pointing into a temporary directory, so the real database and receipts are never
+touched and every scale starts from the same generated data. Results are written as
+JSON (one file per run) so two versions can be compared with --compare.
+
+Usage:
+    python -m benchmarks.suite [--scales 1k 10k 100k] [--repeat 5] [--only monthly_sales ...]
+    python -m benchmarks.suite --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+SEARCH_TERMS = ("para", "890", "cipla", "500mg", "zzz-no-match")
+INVENTORY_FILTERS = ({"stock": "low"}, {"expiry": "expiring"}, {"stock": "in", "expiry": "valid"},
+                     {"stock": "out"}, {"expiry": "expired"})
+# Scenarios that touch every row run fewer times than the rest
+HEAVY = {"excel_export", "excel_import", "sales_export"}
+SCENARIOS = (
+    "inventory_search", "billing_finalize", "monthly_sales", "get_all_orders",
+    "excel_export", "excel_import", "receipt_pdf", "reorder_forecast", "list_medicines", "recent_bills",
+    "inventory_filter", "sales_export", "tax_summary", "receipt_escpos",
+)
+
+
+def _summary(timings):
+    ordered = sorted(timings)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "min_ms": round(ordered[0], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def _time(func, repeat):
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return _summary(timings)
+
+
+def _scenarios(workdir, seed):
+    """
+    Build the scenario callables. Imports happen here, after the worker has pointed
+    the database and artifact root at its temporary directory.
+    :return: Dict of name -> callable(iteration)
+    """
+    import random
+
+    import pandas as pd
+
+    from billing_service import BillingService
+    from db import get_all_medicines, get_all_orders, get_monthly_sales, get_tax_summary
+    from escpos_printer import EscPosPrinter, render_receipt
+    from inventory_service import InventoryService
+    from inventory_ui import ExportWorker, ImportWorker
+    from receipt_manager import ReceiptManager
+    from reorder_engine import ReorderEngine
+    from sales_export import SalesExportService
+    from benchmarks.dataset import REFERENCE_DATE
+    from benchmarks.pdf_render import _receipt_args
+
+    inventory = InventoryService()
+    billing = BillingService()
+    receipts = ReceiptManager()
+    reorder = ReorderEngine()
+    rng = random.Random(seed)
+    in_stock = [m for m in get_all_medicines() if m.quantity > 10]
+    excel_path = os.path.join(workdir, "inventory.xlsx")
+    sales_path = os.path.join(workdir, "sales.csv.gz")
+    sales_export = SalesExportService()
+    month_start = REFERENCE_DATE - datetime.timedelta(days=30)
+    receipt_args = _receipt_args(20)
+    spool = EscPosPrinter(os.path.join(workdir, "receipts.prn"))
+
+    def finalize(_):
+        items = [{"barcode": m.barcode, "name": m.name, "price": m.price, "quantity": 1}
+                 for m in rng.sample(in_stock, min(3, len(in_stock)))]
+        result = billing.finalize_bill(items, {"name": "Benchmark Customer"}, 5, 0)
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+
+    def print_escpos(_):
+        customer, items, total, timestamp, bill_id, pharmacy = receipt_args
+        spool.send(render_receipt(bill_id, timestamp, items, {"subtotal": total, "total": total}, pharmacy, customer))
+
+    def filter_inventory(i):
+        inventory.filter_barcodes(**INVENTORY_FILTERS[i % len(INVENTORY_FILTERS)])
+        inventory.get_summary()
+
+    def export(_):
+        ExportWorker(get_all_medicines(), excel_path).run()
+
+    def import_(_):
+        if not os.path.exists(excel_path):
+            export(0)
+        ImportWorker(pd.read_excel(excel_path)).run()
+
+    return {
+        "inventory_search": lambda i: inventory.search(SEARCH_TERMS[i % len(SEARCH_TERMS)]),
+        "billing_finalize": finalize,
+        "monthly_sales": lambda i: get_monthly_sales(),
+        "get_all_orders": lambda i: get_all_orders(),
+        "excel_export": export,
+        "excel_import": import_,
+        "receipt_pdf": lambda i: receipts.render_pdf_receipt(io.BytesIO(), *receipt_args),
+        "reorder_forecast": lambda i: reorder.forecast(REFERENCE_DATE),
+        "list_medicines": lambda i: get_all_medicines(),
+        "recent_bills": lambda i: billing.get_recent_bills(1000),
+        "inventory_filter": filter_inventory,
+        "sales_export": lambda i: sales_export.export_lines(None, None, sales_path),
+        "tax_summary": lambda i: get_tax_summary(month_start, REFERENCE_DATE),
+        "receipt_escpos": print_escpos,
+    }
+
+
+def run_scale(scale, repeat=5, only=None, seed=None, counts=None):
+    """
+    Generate a dataset and time every scenario against it. Must run in a fresh process
+    (see run()), because db.py binds its engine on import.
+    :param scale: Name from dataset.SCALES (ignored when counts is given)
+    :param repeat: Timed runs per scenario (heavy scenarios use a fifth of this)
+    :param only: Optional iterable of scenario names
+    :param seed: Dataset seed
+    :param counts: Optional explicit {medicines, bills, orders}
+    :return: {"dataset": row counts, "scenarios": {name: timing summary}}
+    """
+    workdir = tempfile.mkdtemp(prefix=f"medibit-bench-{scale}-")
+    os.environ["MEDIBIT_DB_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["MEDIBIT_ARTIFACT_ROOT"] = workdir
+    for path in (SRC_DIR, ROOT_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    logging.disable(logging.WARNING)  # Service logging would dominate the timings
+
+    from benchmarks import dataset
+
+    seed = dataset.DEFAULT_SEED if seed is None else seed
+    dataset_counts = dataset.generate(seed=seed, **(counts or dataset.SCALES[scale]))
+    scenarios = _scenarios(workdir, seed)
+    results = {}
+    for name in SCENARIOS:
+        if only and name not in only:
+            continue
+        scenarios[name](0)  # Warm caches and imports outside the measurement
+        results[name] = _time(scenarios[name], max(1, repeat // 5) if name in HEAVY else repeat)
+    return {"dataset": dataset_counts, "scenarios": results}
+
+
+def _version():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def run(scales=("1k", "10k", "100k"), repeat=5, only=None, seed=None, output=None):
+    """
+    Run each scale in a subprocess and write the combined results to JSON.
+    :param scales: Scale names
+    :param repeat: Timed runs per scenario
+    :param only: Optional list of scenario names
+    :param seed: Dataset seed
+    :param output: Result file (defaults to benchmarks/results/<version>_<timestamp>.json)
+    :return: (path written, results dict)
+    """
+    version = _version()
+    results = {
+        "meta": {
+            "version": version,
+            "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "scales": {},
+    }
+    for scale in scales:
+        cmd = [sys.executable, "-m", "benchmarks.suite", "--worker", scale, "--repeat", str(repeat)]
+        if only:
+            cmd += ["--only", *only]
+        if seed is not None:
+            cmd += ["--seed", str(seed)]
+        proc = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True,
+                              env=dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen")))
+        if proc.returncode != 0:
+            raise RuntimeError(f"Scale {scale} failed:\n{proc.stderr[-2000:]}")
+        results["scales"][scale] = json.loads(proc.stdout.strip().splitlines()[-1])
+    if output is None:
+        output = os.path.join(RESULTS_DIR, f"{version}_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return output, results
+
+
+def compare(baseline, current, tolerance=0.20):
+    """
+    Compare median timings of two result files.
+    :param baseline: Path or results dict of the reference run
+    :param current: Path or results dict of the new run
+    :param tolerance: Relative slowdown allowed before a scenario counts as a regression
+    :return: (rows, regressions) where rows are (scale, scenario, base_ms, new_ms, change)
+    """
+    def load(source):
+        if isinstance(source, dict):
+            return source
+        with open(source, encoding="utf-8") as f:
+            return json.load(f)
+
+    base, new = load(baseline), load(current)
+    rows, regressions = [], []
+    for scale, data in new["scales"].items():
+        base_scenarios = base["scales"].get(scale, {}).get("scenarios", {})
+        for name, summary in data["scenarios"].items():
+            if name not in base_scenarios:
+                continue
+            base_ms, new_ms = base_scenarios[name]["median_ms"], summary["median_ms"]
+            change = (new_ms - base_ms) / base_ms if base_ms else 0.0
+            row = (scale, name, base_ms, new_ms, change)
+            rows.append(row)
+            if change > tolerance:
+                regressions.append(row)
+    return rows, regressions
+
+
+def _print_results(results):
+    print(f"{'scale':<7}{'scenario':<20}{'runs':>5}{'median ms':>12}{'p95 ms':>11}{'max ms':>11}")
+    for scale, data in results["scales"].items():
+        for name, r in data["scenarios"].items():
+            print(f"{scale:<7}{name:<20}{r['runs']:>5}{r['median_ms']:>12}{r['p95_ms']:>11}{r['max_ms']:>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Medibit benchmark suite")
+    parser.add_argument("--scales", nargs="+", default=["1k", "10k", "100k"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="Result JSON path")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--tolerance", type=float, default=0.20)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_scale(args.worker, args.repeat, args.only, args.seed)))
+        return 0
+    if args.compare:
+        rows, regressions = compare(*args.compare, tolerance=args.tolerance)
+        print(f"{'scale':<7}{'scenario':<20}{'base ms':>11}{'new ms':>11}{'change':>9}")
+        for scale, name, base_ms, new_ms, change in rows:
+            flag = "  REGRESSION" if (scale, name, base_ms, new_ms, change) in regressions else ""
+            print(f"{scale:<7}{name:<20}{base_ms:>11}{new_ms:>11}{change:>+9.1%}{flag}")
+        return 1 if regressions else 0
+    path, results = run(args.scales, args.repeat, args.only, args.seed, args.output)
+    _print_results(results)
+    print(f"Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import datetime
+import logging
+import math
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import db
+from config import get_alert_settings
+from event_bus import MedicineChanged, StockAdjusted, bus
+from notifications import NotificationManager
+from watchlist import watchlist
+
+# Logging is configured in main_window.py
+scheduler_logger = logging.getLogger("medibit.alert_scheduler")
+
+POLL_SECONDS = 30  # Longest sleep between checks of the configured times
+MAX_DELAY_SECONDS = 15 * 60  # A steady stream of writes still gets checked this often
+# Digest sections, most urgent first: watchlist category -> heading
+CONDITIONS = {
+    "out_of_stock": "Out of stock",
+    "low_stock": "Low stock",
+    "expired": "Expired",
+    "expiring_soon": "Expiring soon",
+}
+STOCK_CONDITIONS = frozenset(("out_of_stock", "low_stock"))
+
+
+def _scheduled_today(hhmm: str, now: datetime.datetime) -> Optional[datetime.datetime]:
+    try:
+        return datetime.datetime.combine(now.date(), datetime.datetime.strptime(hhmm, "%H:%M").time())
+    except (TypeError, ValueError):
+        scheduler_logger.warning(f"Ignoring invalid alert time {hhmm!r}")
+        return None
+
+
+def _is_due(times, last_run: Optional[str], now: datetime.datetime) -> bool:
+    """
+    :return: True if one of the 'HH:MM' times has passed today since last_run
+    """
+    try:
+        last = datetime.datetime.fromisoformat(last_run) if last_run else None
+    except ValueError:
+        last = None
+    for hhmm in times:
+        scheduled = _scheduled_today(hhmm, now)
+        if scheduled and scheduled <= now and (last is None or last < scheduled):
+            return True
+    return False
+
+
+def restock_level(threshold: int, margin: float) -> int:
+    """
+    :return: Stock a medicine must reach before its stock alerts clear (threshold plus margin, at least +1)
+    """
+    return threshold + max(1, math.ceil(threshold * margin))
+
+
+class AlertScheduler:
+    """
+    Sends stock and expiry alerts on its own thread, without anyone clicking "Send Alerts":
+      - MedicineChanged/StockAdjusted events wake it, and it checks once the writes have
+        been quiet for debounce_seconds, so a busy hour of sales costs one check;
+      - it also checks at the configured check_times (expiry moves with the date, not with
+        writes) and sends the daily sales summary at summary_time.
+
+    Each check compares the watchlist categories with the conditions already notified
+    (db.AlertState) and sends one digest of the new ones only. A notified condition stays
+    recorded until it clears, so it fires once; stock conditions clear only after stock
+    is back to restock_level(), so a quantity hovering around the threshold stays quiet.
+    Conditions are recorded only when a channel delivered the digest.
+    """
+
+    def __init__(self, alert_service=None, notifier_factory: Callable = NotificationManager,
+                 clock: Callable[[], datetime.datetime] = datetime.datetime.now):
+        self.alert_service = alert_service
+        self.notifier_factory = notifier_factory
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._changed_at = None  # Monotonic time of the first write since the last check
+        self._last_change = None  # Monotonic time of the latest write
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        bus.subscribe(MedicineChanged, self._on_change)
+        bus.subscribe(StockAdjusted, self._on_change)
+
+    # --- Thread -----------------------------------------------------------------------------
+    def start(self) -> None:
+        """Start the scheduler thread (once)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="medibit-alerts", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the thread and stop listening for writes."""
+        bus.unsubscribe(MedicineChanged, self._on_change)
+        bus.unsubscribe(StockAdjusted, self._on_change)
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _on_change(self, event) -> None:
+        # Writer thread: note the change and let the scheduler thread decide when to check
+        now = time.monotonic()
+        with self._lock:
+            self._changed_at = self._changed_at or now
+            self._last_change = now
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_due()
+            except Exception:
+                scheduler_logger.error("Scheduled alert run failed", exc_info=True)
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+
+    def _next_wait(self) -> float:
+        with self._lock:
+            if self._last_change is None:
+                return POLL_SECONDS
+            quiet_until = min(self._last_change + get_alert_settings()["debounce_seconds"],
+                              self._changed_at + MAX_DELAY_SECONDS)
+        return min(POLL_SECONDS, max(quiet_until - time.monotonic(), 0.05))
+
+    # --- Scheduling -------------------------------------------------------------------------
+    def run_due(self) -> None:
+        """Run whatever is due now: a check after writes went quiet or at a check time, and the daily summary."""
+        settings = get_alert_settings()
+        if not settings["enabled"]:
+            with self._lock:
+                self._changed_at = self._last_change = None
+            return
+        now = self.clock()
+        with self._lock:
+            elapsed = time.monotonic()
+            quiet = self._last_change is not None and (elapsed - self._last_change >= settings["debounce_seconds"]
+                                                       or elapsed - self._changed_at >= MAX_DELAY_SECONDS)
+        # Run times live in the database: the UI owns config.json, and this thread must not race its writes
+        runs = db.get_alert_runs()
+        scheduled = _is_due(settings["check_times"], runs.get("check"), now)
+        if quiet or scheduled:
+            self.check()
+            if scheduled:  # Debounced checks do not count as the scheduled one
+                db.record_alert_run("check", now.isoformat(timespec="seconds"))
+        if settings["summary_time"] and self.alert_service is not None \
+                and _is_due([settings["summary_time"]], runs.get("summary"), now):
+            success, msg = self.alert_service.send_daily_sales_summary(now.date())
+            scheduler_logger.info(f"Daily sales summary: success={success}, msg={msg}")
+            db.record_alert_run("summary", now.isoformat(timespec="seconds"))
+
+    def check(self) -> Tuple[bool, str]:
+        """
+        Compare current conditions with the notified ones and send a digest of the new ones.
+        :return: (success, summary message)
+        """
+        with self._lock:
+            self._changed_at = self._last_change = None
+        margin = get_alert_settings()["restock_margin"]
+        active = {(barcode, condition) for condition in CONDITIONS for barcode in watchlist.barcodes(condition)}
+        notified = db.get_alert_states()
+        new = active - notified.keys()
+        gone = notified.keys() - active
+        # Stock conditions clear only once stock is back past the margin; deleted medicines have no row
+        levels = {row[0]: row for row in db.get_watch_levels({b for b, c in gone if c in STOCK_CONDITIONS})}
+        cleared = [(barcode, condition) for barcode, condition in gone
+                   if condition not in STOCK_CONDITIONS or barcode not in levels
+                   or levels[barcode][1] >= restock_level(levels[barcode][2], margin)]
+
+        result = (True, "No new alerts.")
+        fired = []
+        if new:
+            result, fired = self._send_digest(new)
+        if fired or cleared:
+            db.update_alert_states(fired, cleared)
+        scheduler_logger.info("Alert check", extra={"active": len(active), "new": len(new),
+                                                    "sent": len(fired), "cleared": len(cleared)})
+        return result
+
+    def _send_digest(self, new) -> Tuple[Tuple[bool, str], list]:
+        medicines = {m.barcode: m for m in db.get_medicines_by_barcodes({barcode for barcode, _ in new})}
+        listed = set()
+        sections = []
+        for condition, heading in CONDITIONS.items():
+            # Out-of-stock medicines are low on stock too; list each medicine once, under the most urgent heading
+            barcodes = sorted(b for b, c in new if c == condition and b in medicines
+                              and (c not in STOCK_CONDITIONS or b not in listed))
+            listed.update(barcodes)
+            sections.append((heading, [medicines[b] for b in barcodes]))
+        results = self.notifier_factory().send_alert_digest(sections)
+        if not results:
+            return (False, "No alert channels enabled."), []
+        summary = "\n".join(f"{channel}: {'Success' if ok else 'Failed'} - {msg}" for channel, ok, msg in results)
+        if not any(ok for _, ok, _ in results):
+            scheduler_logger.warning(f"Alert digest failed on every channel:\n{summary}")
+            return (False, summary), []  # Not recorded, so the next check retries
+        return (True, summary), sorted(new)
@@ -1,9 +1,15 @@
-from typing import List, Any, Tuple
-from db import get_low_stock_medicines
+import datetime
+from typing import List, Any, Dict, Optional, Tuple
+from db import get_bills_between
+from watchlist import watchlist
 from notifications import NotificationManager
 import logging
+from metrics import instrumented
+from query_monitor import counted
 logger = logging.getLogger("medibit")
 
+@instrumented("alerts")
+@counted("alerts")
 class AlertService:
     """
     Service class for all alert-related business logic.
@@ -18,7 +24,14 @@ class AlertService:
         Return all medicines that are low in stock.
         :return: List of medicine objects
         """
-        return get_low_stock_medicines()
+        return watchlist.medicines("low_stock")
+
+    def get_alert_counts(self) -> Dict[str, int]:
+        """
+        Number of low-stock, out-of-stock, expired and expiring-soon medicines, for badges.
+        :return: Dict category -> count
+        """
+        return watchlist.counts()
 
     def send_alerts(self, alert_data):
         logger.debug(f"[send_alerts] ENTRY: alert_count={len(alert_data) if alert_data else 0}")
@@ -52,4 +65,23 @@ class AlertService:
             return True, "No alert channels enabled."
         success = any(r[1] for r in results)
         summary = "\n".join([f"{r[0]}: {'Success' if r[1] else 'Failed'} - {r[2]}" for r in results])
-        return success, summary 
\ No newline at end of file
+        return success, summary
+
+    def send_daily_sales_summary(self, day: Optional[datetime.date] = None) -> Tuple[bool, str]:
+        """
+        Send the sales summary of one day by email and WhatsApp.
+        :param day: (optional) Date to summarize, defaults to today
+        :return: (success, per-channel messages)
+        """
+        day = day or datetime.date.today()
+        bills = get_bills_between(day, day)
+        total = sum(bill.total for bill in bills)
+        count = len(bills)
+        sales_summary = {"total": total, "count": count, "avg": total / count if count else 0}
+        # Timestamps are 'YYYY-MM-DD HH:MM:SS'; show anything shorter as stored
+        bill_details = [{"time": bill.timestamp[11:16] if len(bill.timestamp) >= 16 else bill.timestamp,
+                         "total": bill.total} for bill in bills]
+        notif = NotificationManager()
+        email_success, email_msg = notif.send_daily_sales_summary_email(sales_summary, bill_details)
+        whatsapp_success, whatsapp_msg = notif.send_daily_sales_summary_whatsapp(sales_summary, bill_details)
+        return email_success or whatsapp_success, f"Email: {email_msg}\nWhatsApp: {whatsapp_msg}"
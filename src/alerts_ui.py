@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QHeaderView, QSizePolicy, QMessageBox, QTableWidgetItem, QFrame, QProgressDialog, QApplication, QMenu, QDialog, QDialogButtonBox, QFormLayout)
 from PyQt5.QtCore import Qt, QTimer
 from theme import theme_manager, create_animated_button
+from event_bus import MedicineChanged, QtEventRelay, StockAdjusted, changed_barcodes
+from watchlist import watchlist
 import logging
 logger = logging.getLogger("medibit")
 
@@ -29,6 +31,7 @@ class AlertsUi(QWidget):
         self.init_ui()
         self.refresh_alerts_table()
         self.send_alerts_btn.clicked.connect(self.send_alerts)
+        self.event_relay = QtEventRelay(self._on_stock_events, (MedicineChanged, StockAdjusted), parent=self)
         # Feedback banner
         self.feedback_banner = QLabel("")
         self.feedback_banner.setStyleSheet("padding: 8px; border-radius: 4px; font-weight: bold; font-size: 14px;")
@@ -67,11 +70,11 @@ class AlertsUi(QWidget):
         table_layout = QVBoxLayout(table_frame)
         table_layout.setContentsMargins(12, 12, 12, 12)
         table_layout.setSpacing(10)
-        table_title = QLabel("Low Stock Items")
-        table_title.setStyleSheet(theme_manager.get_section_title_stylesheet())
-        table_title.setToolTip("Section: Low Stock Items")
-        table_title.setAccessibleName("Low Stock Items Title")
-        table_layout.addWidget(table_title)
+        self.table_title = QLabel("Low Stock Items")
+        self.table_title.setStyleSheet(theme_manager.get_section_title_stylesheet())
+        self.table_title.setToolTip("Section: Low Stock Items")
+        self.table_title.setAccessibleName("Low Stock Items Title")
+        table_layout.addWidget(self.table_title)
         self.alerts_table = QTableWidget(0, 6)
         self.alerts_table.setSelectionBehavior(QTableWidget.SelectRows)
         self.alerts_table.setSelectionMode(QTableWidget.MultiSelection)
@@ -271,6 +274,22 @@ class AlertsUi(QWidget):
         self.page_label.setText(f"Page {self.current_page + 1} of {total_pages}")
         self.prev_page_btn.setEnabled(self.current_page > 0)
         self.next_page_btn.setEnabled((self.current_page + 1) * self.page_size < total_alerts)
+        self.update_alert_count()
+
+    def update_alert_count(self):
+        count = watchlist.count("low_stock")
+        self.table_title.setText(f"Low Stock Items ({count})" if count else "Low Stock Items")
+
+    def _on_stock_events(self, events):
+        barcodes = changed_barcodes(events)
+        if barcodes is None:
+            self.refresh_alerts_table()
+            return
+        shown = {self.alerts_table.item(row, 0).text() for row in range(self.alerts_table.rowCount())
+                 if self.alerts_table.item(row, 0)}
+        # Only rebuild the page when a changed medicine is listed now or has just become low
+        if barcodes & (shown | watchlist.barcodes("low_stock")):
+            self.refresh_alerts_table()
     def _generate_order_for_meds(self, meds):
         if not meds:
             self.show_banner("No medicines selected for order.", success=False)
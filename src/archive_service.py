@@ -0,0 +1,163 @@
+import datetime
+import logging
+import sqlite3
+from typing import Optional, Tuple
+
+from sqlalchemy import create_engine
+
+import db
+from config import get_archive_settings, set_archive_settings
+
+# Logging is configured in main_window.py
+archive_logger = logging.getLogger("medibit.archive")
+
+BATCH_SIZE = 500
+BUSY_TIMEOUT = 30  # Seconds to wait for the counter's writes before a batch gives up
+ARCHIVE_INTERVAL = datetime.timedelta(days=1)
+
+# (parent table, child table, child foreign key, extra condition for a parent to be closed)
+ARCHIVED_TABLES = {
+    "bills": ("bills", "bill_items", "bill_id", ""),
+    "orders": ("orders", "order_medicines", "order_id", "AND status = 'completed'"),
+}
+
+
+class ArchiveService:
+    """
+    Moves closed bills and completed orders older than the configured age out of the
+    live database into a separate archive database, so the tables the counter works
+    with stay small. Reads reach the archive through db.archive_session() only when a
+    date range goes back past the archive watermark.
+
+    Rows are moved in small batches, each one short transaction on the live database
+    with the archive ATTACHed: copy parents and their children, delete them from the
+    live tables and advance the watermark. Copies are idempotent (INSERT OR IGNORE on
+    the parent, children replaced), so a batch interrupted between the two files is
+    simply redone by the next run.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, archive_path: Optional[str] = None,
+                 batch_size: int = BATCH_SIZE):
+        self.db_path = db_path or db.DB_FILENAME
+        self.archive_path = archive_path or db.ARCHIVE_FILENAME
+        self.batch_size = batch_size
+
+    def ensure_archive(self) -> None:
+        """Create the archive database and its tables (same schema as the live ones) if missing."""
+        engine = create_engine(f"sqlite:///{self.archive_path}")
+        try:
+            tables = [db.Bill.__table__, db.BillItem.__table__, db.Order.__table__, db.OrderMedicine.__table__]
+            db.Base.metadata.create_all(engine, tables=tables)
+            # Archive reads are always by date range or parent ID (the bill tables bring their own indexes)
+            with engine.begin() as conn:
+                for table, column in (("orders", "timestamp"), ("order_medicines", "order_id")):
+                    conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_archive_{table}_{column} ON {table} ({column})")
+        finally:
+            engine.dispose()
+
+    def archive(self, older_than_days: Optional[int] = None,
+                now: Optional[datetime.datetime] = None) -> Tuple[bool, object]:
+        """
+        Move closed bills and completed orders older than the cutoff into the archive.
+        :param older_than_days: Age in days (defaults to the configured archive_after_days)
+        :param now: Reference time (defaults to now)
+        :return: (True, {'bills': moved, 'orders': moved}) or (False, error message)
+        """
+        if older_than_days is None:
+            older_than_days = get_archive_settings()["archive_after_days"]
+        now = now or datetime.datetime.now()
+        # Timestamps are stored in a few string formats that all start with the date
+        cutoff = (now - datetime.timedelta(days=older_than_days)).date().isoformat()
+        try:
+            self.ensure_archive()
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        except Exception as e:
+            archive_logger.error("Could not open databases for archiving: %s", e, exc_info=True)
+            return False, str(e)
+        moved = {}
+        try:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            for name in ARCHIVED_TABLES:
+                moved[name] = self._archive_table(conn, name, cutoff, now)
+        except sqlite3.Error as e:
+            archive_logger.error("Archiving failed: %s", e, exc_info=True)
+            return False, str(e)
+        finally:
+            conn.close()
+        set_archive_settings(last_run=now.isoformat(timespec="seconds"))
+        archive_logger.info("Archived old records", extra={"cutoff": cutoff, **moved})
+        return True, moved
+
+    def _archive_table(self, conn: sqlite3.Connection, name: str, cutoff: str, now: datetime.datetime) -> int:
+        parent, child, fk, closed = ARCHIVED_TABLES[name]
+        for table in (parent, child):
+            _add_missing_columns(conn, table)
+        parent_columns = [c[0] for c in _columns(conn, parent)]
+        child_columns = [c[0] for c in _columns(conn, child) if c[0] != "id"]
+        total = 0
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # The newest row always stays hot so SQLite never hands out an archived ID again
+                ids = [row[0] for row in conn.execute(
+                    f"SELECT id FROM main.{parent} WHERE timestamp < ? {closed} "
+                    f"AND id < (SELECT MAX(id) FROM main.{parent}) ORDER BY id LIMIT ?",
+                    (cutoff, self.batch_size))]
+                if ids:
+                    marks = ",".join("?" * len(ids))
+                    cols = ", ".join(parent_columns)
+                    conn.execute(f"INSERT OR IGNORE INTO archive.{parent} ({cols}) "
+                                 f"SELECT {cols} FROM main.{parent} WHERE id IN ({marks})", ids)
+                    conn.execute(f"DELETE FROM archive.{child} WHERE {fk} IN ({marks})", ids)
+                    cols = ", ".join(child_columns)
+                    conn.execute(f"INSERT INTO archive.{child} ({cols}) "
+                                 f"SELECT {cols} FROM main.{child} WHERE {fk} IN ({marks})", ids)
+                    conn.execute(f"DELETE FROM main.{child} WHERE {fk} IN ({marks})", ids)
+                    conn.execute(f"DELETE FROM main.{parent} WHERE id IN ({marks})", ids)
+                    conn.execute(
+                        "INSERT INTO main.archive_state (name, archived_before, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET archived_before = MAX(archived_before, excluded.archived_before), "
+                        "updated_at = excluded.updated_at",
+                        (name, cutoff, now.isoformat(timespec="seconds")))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            total += len(ids)
+            if len(ids) < self.batch_size:
+                return total
+
+    # --- Scheduling -----------------------------------------------------------------------
+    def is_archive_due(self, now: Optional[datetime.datetime] = None) -> bool:
+        settings = get_archive_settings()
+        if not settings["enabled"]:
+            return False
+        if not settings["last_run"]:
+            return True
+        now = now or datetime.datetime.now()
+        try:
+            last = datetime.datetime.fromisoformat(settings["last_run"])
+        except ValueError:
+            return True
+        return now - last >= ARCHIVE_INTERVAL
+
+    def run_scheduled_archive(self) -> Tuple[bool, object]:
+        """
+        Archive old records if a run is due (intended for a timer on a background thread).
+        :return: (success, counts or reason)
+        """
+        if not self.is_archive_due():
+            return False, "No archive run due."
+        return self.archive()
+
+
+def _columns(conn: sqlite3.Connection, table: str, schema: str = "main") -> list:
+    return [(row[1], row[2]) for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _add_missing_columns(conn: sqlite3.Connection, table: str) -> None:
+    # Columns added to the live tables by later migrations are added to the archive copy as well
+    archived = {name for name, _ in _columns(conn, table, "archive")}
+    for name, column_type in _columns(conn, table):
+        if name not in archived:
+            conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {column_type}")
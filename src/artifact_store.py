@@ -0,0 +1,162 @@
+import datetime
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+from db import (
+    add_artifact,
+    get_latest_artifact,
+    get_latest_artifact_by_label,
+    get_latest_artifacts,
+    get_uncompressed_artifacts_before,
+    mark_artifact_compressed,
+)
+
+# Logging is configured in main_window.py
+artifact_logger = logging.getLogger("medibit.artifacts")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# MEDIBIT_ARTIFACT_ROOT keeps generated PDFs out of the project (benchmarks, load tests)
+ARTIFACT_ROOT = os.environ.get("MEDIBIT_ARTIFACT_ROOT") or PROJECT_ROOT
+KIND_DIRS = {"receipt": "receipts", "order": "orders"}
+CHUNK_SIZE = 1024 * 1024
+
+
+class ArtifactStore:
+    """
+    Index of generated PDFs. Files are sharded into <kind dir>/YYYY/MM/ and every
+    file is recorded in the artifacts table, so lookups by bill or order ID are a
+    single indexed query instead of a directory scan.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or ARTIFACT_ROOT
+
+    def path_for(self, kind: str, filename: str, when: Optional[datetime.datetime] = None) -> str:
+        """
+        Return the sharded path for a new artifact, creating its directory.
+        :param kind: Artifact kind ('receipt' or 'order')
+        :param filename: File name
+        :param when: Date used for the shard (defaults to now)
+        :return: Absolute file path
+        """
+        when = when or datetime.datetime.now()
+        directory = os.path.join(self.root, KIND_DIRS.get(kind, kind), f"{when:%Y}", f"{when:%m}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
+
+    @staticmethod
+    def _digest(path: str) -> str:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def register(self, kind: str, ref_id, path: str, label: Optional[str] = None) -> Optional[int]:
+        """
+        Record an already-written file in the index.
+        :param kind: Artifact kind
+        :param ref_id: Bill or order ID
+        :param path: File path
+        :param label: Optional label (customer name for receipts)
+        :return: Artifact ID, or None if it could not be recorded
+        """
+        try:
+            artifact_id = add_artifact(kind, int(ref_id), path, os.path.getsize(path), self._digest(path), label)
+            artifact_logger.info(f"Registered {kind} artifact {artifact_id} for {ref_id}: {path}")
+            return artifact_id
+        except Exception as e:
+            artifact_logger.error(f"Failed to register {kind} artifact for {ref_id}: {e}")
+            return None
+
+    def lookup(self, kind: str, ref_id):
+        """
+        Return the latest artifact record for a bill or order.
+        :return: Artifact or None
+        """
+        return get_latest_artifact(kind, int(ref_id))
+
+    def lookup_many(self, kind: str, ref_ids) -> dict:
+        """
+        Return the latest artifact record for each bill or order ID.
+        :return: Dict of ref_id -> Artifact
+        """
+        return get_latest_artifacts(kind, [int(ref_id) for ref_id in ref_ids])
+
+    def lookup_by_label(self, kind: str, label: str):
+        """
+        Return the latest artifact with the given label.
+        :return: Artifact or None
+        """
+        return get_latest_artifact_by_label(kind, label) if label else None
+
+    def open_path(self, artifact) -> Optional[str]:
+        """
+        Return a readable path to the artifact's original contents, decompressing
+        compressed artifacts into a temporary file.
+        :param artifact: Artifact record
+        :return: File path, or None if the file is missing
+        """
+        if artifact is None or not os.path.exists(artifact.path):
+            return None
+        if not artifact.compressed:
+            return artifact.path
+        name = os.path.basename(artifact.path)[:-len(".gz")] if artifact.path.endswith(".gz") else os.path.basename(artifact.path)
+        target = os.path.join(tempfile.mkdtemp(prefix="medibit_"), name)
+        with gzip.open(artifact.path, "rb") as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        return target
+
+    def path_for_ref(self, kind: str, ref_id) -> Optional[str]:
+        """
+        Return a readable path for the latest artifact of a bill or order.
+        :return: File path or None
+        """
+        return self.open_path(self.lookup(kind, ref_id))
+
+    def compress_older_than(self, days: int, kind: Optional[str] = None) -> int:
+        """
+        Gzip artifacts older than the given age and repoint their index rows.
+        The recorded hash stays that of the original contents.
+        :param days: Minimum age in days
+        :param kind: Optional artifact kind filter
+        :return: Number of artifacts compressed
+        """
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat(timespec="seconds")
+        compressed = 0
+        for artifact in get_uncompressed_artifacts_before(cutoff, kind):
+            if not os.path.exists(artifact.path):
+                continue
+            gz_path = artifact.path + ".gz"
+            try:
+                with open(artifact.path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                mark_artifact_compressed(artifact.id, gz_path, os.path.getsize(gz_path))
+                os.remove(artifact.path)
+                compressed += 1
+            except Exception as e:
+                artifact_logger.error(f"Failed to compress artifact {artifact.id}: {e}")
+                if os.path.exists(gz_path) and os.path.exists(artifact.path):
+                    os.remove(gz_path)
+        artifact_logger.info(f"Compressed {compressed} artifacts older than {days} days")
+        return compressed
+
+    def verify(self, artifact) -> bool:
+        """
+        Check that an artifact's contents still match the recorded hash.
+        :param artifact: Artifact record
+        :return: True if the file exists and its hash matches
+        """
+        path = self.open_path(artifact)
+        if not path:
+            return False
+        try:
+            return self._digest(path) == artifact.sha256
+        finally:
+            if artifact.compressed:
+                shutil.rmtree(os.path.dirname(path), ignore_errors=True)
@@ -0,0 +1,288 @@
+import datetime
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import db
+from config import get_backup_settings, set_backup_settings
+
+# Logging is configured in main_window.py
+backup_logger = logging.getLogger("medibit.backup")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKUP_DIR = os.path.join(PROJECT_ROOT, "backups")
+FILENAME_PREFIX = "medibit_"
+# Pages copied per backup step (4 KiB pages: ~1 MiB) and pause between steps, so
+# writers get the database between steps instead of waiting for the whole copy
+PAGES_PER_STEP = 256
+STEP_PAUSE = 0.005
+PRE_RESTORE_KEEP = 3
+REQUIRED_TABLES = ("medicines", "bills", "bill_items", "orders", "pharmacy_details")
+CHUNK_SIZE = 1024 * 1024
+
+# One backup or restore at a time per process (manual and scheduled runs share it)
+_backup_lock = threading.Lock()
+
+
+class BackupCanceled(Exception):
+    """Raised from the backup progress callback when the user cancels."""
+
+
+class BackupService:
+    """
+    Online backups of the SQLite database. Backups use sqlite3's backup API in small
+    page steps, so the app keeps working while they run, and a backup taken during a
+    write is still consistent. Each copy is integrity-checked before it is gzipped
+    into the backups directory; old backups are pruned to the configured retention.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, backup_dir: Optional[str] = None,
+                 pages_per_step: int = PAGES_PER_STEP, step_pause: float = STEP_PAUSE):
+        self.db_path = db_path or db.DB_FILENAME
+        self.backup_dir = backup_dir or BACKUP_DIR
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+
+    # --- Backup ---------------------------------------------------------------------------
+    def create_backup(self, dest_path: Optional[str] = None, label: str = "backup",
+                      progress: Optional[Callable] = None, cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """
+        Back up the database. Safe to call from any thread.
+        :param dest_path: Output file (.db.gz is compressed, anything else is a plain copy);
+                          defaults to backups/medibit_<label>_<timestamp>.db.gz
+        :param label: Name part for files in the backups directory ('backup' files are pruned by retention)
+        :param progress: Optional callable(done_pages, total_pages, message)
+        :param cancel_event: Optional threading.Event that cancels the backup when set
+        :return: (success, backup path or error message)
+        """
+        if not _backup_lock.acquire(blocking=False):
+            return False, "A backup or restore is already running."
+        try:
+            return self._create_backup(dest_path, label, progress, cancel_event)
+        finally:
+            _backup_lock.release()
+
+    def _create_backup(self, dest_path, label, progress=None, cancel_event=None) -> Tuple[bool, str]:
+        now = datetime.datetime.now()
+        managed = dest_path is None
+        if managed:
+            dest_path = os.path.join(self.backup_dir, f"{FILENAME_PREFIX}{label}_{now:%Y%m%d-%H%M%S}.db.gz")
+        dest_dir = os.path.dirname(os.path.abspath(dest_path))
+        os.makedirs(dest_dir, exist_ok=True)
+        fd, raw_path = tempfile.mkstemp(suffix=".db", dir=dest_dir)
+        os.close(fd)
+        try:
+            self._copy(self.db_path, raw_path, progress, cancel_event)
+            ok, message = self._check(raw_path)
+            if not ok:
+                backup_logger.error("Backup failed verification: %s", message)
+                return False, f"Backup failed verification: {message}"
+            if progress:
+                progress(0, 0, "Compressing backup...")
+            if dest_path.endswith(".gz"):
+                self._compress(raw_path, dest_path)
+            else:
+                os.replace(raw_path, dest_path)
+        except BackupCanceled:
+            backup_logger.info("Backup canceled")
+            return False, "Backup canceled."
+        except Exception as e:
+            backup_logger.error("Backup failed: %s", e, exc_info=True)
+            return False, str(e)
+        finally:
+            if os.path.exists(raw_path):
+                os.remove(raw_path)
+        set_backup_settings(last_backup=now.isoformat(timespec="seconds"))
+        if managed:
+            keep = PRE_RESTORE_KEEP if label == "pre-restore" else get_backup_settings()["retention"]
+            self.prune(label, keep)
+        backup_logger.info("Backup written", extra={"path": dest_path, "size": os.path.getsize(dest_path)})
+        return True, dest_path
+
+    def _copy(self, source_path, dest_path, progress=None, cancel_event=None) -> None:
+        source = sqlite3.connect(source_path)
+        dest = sqlite3.connect(dest_path)
+
+        def step(status, remaining, total):
+            if cancel_event is not None and cancel_event.is_set():
+                raise BackupCanceled()
+            if progress:
+                progress(total - remaining, total, f"Copied {total - remaining} of {total} pages")
+
+        try:
+            source.backup(dest, pages=self.pages_per_step, progress=step, sleep=self.step_pause)
+        finally:
+            dest.close()
+            source.close()
+
+    @staticmethod
+    def _check(path: str) -> Tuple[bool, str]:
+        """
+        Integrity-check a database file and make sure it is a Medibit database.
+        Also switches the copy to a rollback journal so it is a single self-contained file.
+        :return: (ok, 'ok' or problem description)
+        """
+        try:
+            conn = sqlite3.connect(path)
+        except sqlite3.Error as e:
+            return False, str(e)
+        try:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+            if result != ["ok"]:
+                return False, "; ".join(result[:5])
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            missing = [t for t in REQUIRED_TABLES if t not in tables]
+            if missing:
+                return False, f"not a Medibit database (missing tables: {', '.join(missing)})"
+            return True, "ok"
+        except sqlite3.Error as e:
+            return False, str(e)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _compress(raw_path: str, dest_path: str) -> None:
+        tmp_path = dest_path + ".tmp"
+        with open(raw_path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as out:
+            shutil.copyfileobj(src, out, CHUNK_SIZE)
+        os.replace(tmp_path, dest_path)
+
+    # --- Listing and retention -----------------------------------------------------------
+    def list_backups(self, label: Optional[str] = None) -> List[Dict]:
+        """
+        List backups in the backups directory, newest first.
+        :param label: Optional label filter ('backup', 'pre-restore')
+        :return: List of dicts (path, name, size, created)
+        """
+        if not os.path.isdir(self.backup_dir):
+            return []
+        prefix = f"{FILENAME_PREFIX}{label}_" if label else FILENAME_PREFIX
+        backups = []
+        for entry in os.scandir(self.backup_dir):
+            if entry.is_file() and entry.name.startswith(prefix) and entry.name.endswith((".db.gz", ".db")):
+                stat = entry.stat()
+                backups.append({
+                    "path": entry.path,
+                    "name": entry.name,
+                    "size": stat.st_size,
+                    "created": datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+                })
+        # Names embed the timestamp, so name order is creation order
+        return sorted(backups, key=lambda b: b["name"], reverse=True)
+
+    def prune(self, label: str = "backup", keep: Optional[int] = None) -> List[str]:
+        """
+        Delete the oldest backups with a label beyond the newest `keep`.
+        :param label: Backup label
+        :param keep: Backups to keep (defaults to the configured retention)
+        :return: Paths removed
+        """
+        keep = get_backup_settings()["retention"] if keep is None else keep
+        removed = []
+        for backup in self.list_backups(label)[max(0, keep):]:
+            try:
+                os.remove(backup["path"])
+                removed.append(backup["path"])
+            except OSError as e:
+                backup_logger.warning("Could not remove old backup %s: %s", backup["path"], e)
+        if removed:
+            backup_logger.info("Pruned %d old backups", len(removed))
+        return removed
+
+    # --- Scheduling -----------------------------------------------------------------------
+    def is_backup_due(self, now: Optional[datetime.datetime] = None) -> bool:
+        settings = get_backup_settings()
+        if not settings["enabled"]:
+            return False
+        if not settings["last_backup"]:
+            return True
+        now = now or datetime.datetime.now()
+        try:
+            last = datetime.datetime.fromisoformat(settings["last_backup"])
+        except ValueError:
+            return True
+        return now - last >= datetime.timedelta(hours=settings["interval_hours"])
+
+    def run_scheduled_backup(self) -> Tuple[bool, str]:
+        """
+        Take a backup if one is due (intended for a timer on a background thread).
+        :return: (success, path or reason)
+        """
+        if not self.is_backup_due():
+            return False, "No backup due."
+        return self.create_backup()
+
+    # --- Verify and restore ---------------------------------------------------------------
+    def _extract(self, path: str) -> str:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rb") as src, open(tmp_path, "wb") as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def verify_backup(self, path: str) -> Tuple[bool, str]:
+        """
+        Check that a backup file decompresses and passes the integrity check.
+        :param path: Backup file (.db.gz or .db)
+        :return: (ok, 'ok' or problem description)
+        """
+        try:
+            tmp_path = self._extract(path)
+        except Exception as e:
+            return False, f"Could not read backup: {e}"
+        try:
+            return self._check(tmp_path)
+        finally:
+            os.remove(tmp_path)
+
+    def restore(self, path: str, progress: Optional[Callable] = None) -> Tuple[bool, str]:
+        """
+        Replace the database with a backup. The backup is validated first and the
+        current database is backed up (label 'pre-restore') before anything changes.
+        The app should be restarted afterwards.
+        :param path: Backup file (.db.gz or .db)
+        :param progress: Optional callable(done_pages, total_pages, message)
+        :return: (success, message)
+        """
+        if not _backup_lock.acquire(blocking=False):
+            return False, "A backup or restore is already running."
+        tmp_path = None
+        try:
+            try:
+                tmp_path = self._extract(path)
+            except Exception as e:
+                return False, f"Could not read backup: {e}"
+            ok, message = self._check(tmp_path)
+            if not ok:
+                return False, f"Backup is not valid, nothing was changed: {message}"
+            ok, safety_path = self._create_backup(None, "pre-restore")
+            if not ok:
+                return False, f"Could not back up the current database before restoring: {safety_path}"
+            live = os.path.abspath(self.db_path) == os.path.abspath(db.DB_FILENAME)
+            if live:
+                # Finish queued writes and close pooled connections before replacing pages
+                db.writer.stop()
+                db.engine.dispose()
+            self._copy(tmp_path, self.db_path, progress)
+            if live:
+                db.engine.dispose()
+            backup_logger.info("Database restored", extra={"source": path, "pre_restore": safety_path})
+            return True, f"Database restored from {path}. The previous database was saved to {safety_path}."
+        except Exception as e:
+            backup_logger.error("Restore failed: %s", e, exc_info=True)
+            return False, str(e)
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            _backup_lock.release()
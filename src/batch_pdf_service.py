@@ -0,0 +1,257 @@
+import io
+import logging
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Logging is configured in main_window.py
+batch_logger = logging.getLogger("medibit.batch_pdf")
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # Merged PDF output is optional; zip output always works
+    PdfReader = None
+    PdfWriter = None
+
+RECEIPT_NAME_PATTERN = re.compile(r"receipt_(.+?)_id\d+_")
+
+
+def customer_name_from_path(file_path: Optional[str]) -> Optional[str]:
+    """
+    :param file_path: Receipt PDF path (receipt_<name>_id<bill>_<timestamp>.pdf)
+    :return: Customer name from the file name, or None if it does not follow the pattern
+    """
+    match = RECEIPT_NAME_PATTERN.search(os.path.basename(file_path or ""))
+    return match.group(1).replace("_", " ") if match else None
+
+
+# --- Worker-side rendering ------------------------------------------------------
+# These run in pool processes, so they are module-level and take only picklable data.
+
+def _render_receipt_job(job: Dict[str, Any]) -> Tuple[int, str, bytes]:
+    from receipt_manager import ReceiptManager
+    buffer = io.BytesIO()
+    ReceiptManager.render_pdf_receipt(
+        buffer, job["customer"], job["items"], job["total"], job["timestamp"],
+        job["ref_id"], job["pharmacy"]
+    )
+    return job["index"], job["filename"], buffer.getvalue()
+
+
+def _render_order_job(job: Dict[str, Any]) -> Tuple[int, str, bytes]:
+    from order_manager import OrderManager
+    buffer = io.BytesIO()
+    OrderManager.render_pdf_order(
+        buffer, job["items"], job["ref_id"], job["timestamp"], pharmacy_details=job["pharmacy"]
+    )
+    return job["index"], job["filename"], buffer.getvalue()
+
+
+class BatchCancelled(Exception):
+    pass
+
+
+class BatchPdfService:
+    """
+    Render many receipt or purchase-order PDFs in parallel and stream them into
+    a single zip archive (or a merged PDF when pypdf is installed).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or max(1, min(8, (os.cpu_count() or 2) - 1))
+
+    # --- Job building -------------------------------------------------------------
+    @staticmethod
+    def _pharmacy_snapshot():
+        import pdf_templates
+        return pdf_templates.get_pharmacy_details()
+
+    @staticmethod
+    def _customer_for(bill, artifact=None, customers=None) -> Dict[str, str]:
+        # Bills from before customers were saved have no customer; the receipt artifact label
+        # carries the name, and receipts from before the artifact index have it in their filename
+        customer = (customers or {}).get(bill.customer_id)
+        if customer is not None:
+            return {"name": customer.name, "phone": customer.phone, "email": customer.email or "N/A"}
+        if artifact is not None and artifact.label:
+            return {"name": artifact.label}
+        return {"name": customer_name_from_path(bill.file_path) or "Customer"}
+
+    def build_receipt_jobs(self, start_date=None, end_date=None) -> List[Dict[str, Any]]:
+        """
+        Build render jobs for every bill in a date range.
+        :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+        :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+        :return: List of job dicts
+        """
+        from db import get_bills_between, get_customers_by_ids, get_latest_artifacts
+        pharmacy = self._pharmacy_snapshot()
+        bills = get_bills_between(start_date, end_date)
+        artifacts = get_latest_artifacts("receipt", [bill.id for bill in bills])
+        customers = get_customers_by_ids(bill.customer_id for bill in bills)
+        jobs = []
+        for index, bill in enumerate(bills):
+            items = [
+                {
+                    "barcode": item.barcode,
+                    "name": item.name,
+                    "price": item.price,
+                    "quantity": item.quantity,
+                    "subtotal": item.subtotal,
+                }
+                for item in bill.items
+            ]
+            ts = str(bill.timestamp)
+            jobs.append({
+                "index": index,
+                "filename": f"receipt_id{bill.id}_{ts[:19].replace(':', '-').replace(' ', '_')}.pdf",
+                "customer": self._customer_for(bill, artifacts.get(bill.id), customers),
+                "items": items,
+                "total": bill.total,
+                "timestamp": ts,
+                "ref_id": str(bill.id),
+                "pharmacy": pharmacy,
+            })
+        return jobs
+
+    def build_order_jobs(self, status: Optional[str] = "pending") -> List[Dict[str, Any]]:
+        """
+        Build render jobs for orders, by default all pending ones.
+        :param status: Order status filter, or None for all orders
+        :return: List of job dicts
+        """
+        from db import get_orders_by_status
+        pharmacy = self._pharmacy_snapshot()
+        jobs = []
+        for index, order in enumerate(get_orders_by_status(status)):
+            items = [
+                {
+                    "barcode": med.barcode,
+                    "name": med.name,
+                    "quantity": med.quantity,
+                    "order_quantity": med.order_quantity or 1,
+                    "manufacturer": med.manufacturer or "N/A",
+                }
+                for med in order.medicines
+            ]
+            jobs.append({
+                "index": index,
+                "filename": f"order_{order.id}_{order.timestamp.replace(':', '-').replace(' ', '_')}.pdf",
+                "items": items,
+                "ref_id": order.id,
+                "timestamp": order.timestamp,
+                "pharmacy": pharmacy,
+            })
+        return jobs
+
+    # --- Rendering ------------------------------------------------------------------
+    def _results(self, render: Callable, jobs: List[Dict[str, Any]], cancel_event):
+        """Yield (index, filename, pdf bytes) as workers finish. Falls back to in-process rendering."""
+        executor = None
+        if self.max_workers > 1 and len(jobs) > 1:
+            try:
+                executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            except (OSError, NotImplementedError) as e:
+                batch_logger.warning(f"Process pool unavailable, rendering in-process: {e}")
+        if executor is None:
+            for job in jobs:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise BatchCancelled()
+                yield render(job)
+            return
+        try:
+            futures = [executor.submit(render, job) for job in jobs]
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise BatchCancelled()
+                yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def render_batch(self, render: Callable, jobs: List[Dict[str, Any]], output_path: str,
+                     merge: bool = False, progress: Optional[Callable[[int, int, str], None]] = None,
+                     cancel_event=None) -> Tuple[bool, str]:
+        """
+        Render jobs in parallel and stream them into output_path.
+        :param render: Module-level render function (_render_receipt_job or _render_order_job)
+        :param jobs: Job dicts from build_receipt_jobs/build_order_jobs
+        :param output_path: Destination .zip (or .pdf when merge is True)
+        :param merge: Write one merged PDF instead of a zip archive (requires pypdf)
+        :param progress: Optional callback(done, total, filename)
+        :param cancel_event: Optional threading.Event; set it to cancel
+        :return: (success, output path or error message)
+        """
+        total = len(jobs)
+        if total == 0:
+            return False, "No documents to render."
+        if merge and PdfWriter is None:
+            return False, "Merged PDF output requires the 'pypdf' package. Export as a zip archive instead."
+        batch_logger.info(f"Rendering {total} PDFs with {self.max_workers} workers into {output_path}")
+        try:
+            if merge:
+                self._write_merged(render, jobs, output_path, progress, cancel_event)
+            else:
+                self._write_zip(render, jobs, output_path, progress, cancel_event)
+        except BatchCancelled:
+            self._discard(output_path)
+            batch_logger.info("Batch PDF rendering cancelled")
+            return False, "Cancelled"
+        except Exception as e:
+            self._discard(output_path)
+            batch_logger.error(f"Batch PDF rendering failed: {e}", exc_info=True)
+            return False, str(e)
+        return True, output_path
+
+    def _write_zip(self, render, jobs, output_path, progress, cancel_event):
+        total = len(jobs)
+        with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for done, (_, filename, data) in enumerate(self._results(render, jobs, cancel_event), 1):
+                archive.writestr(filename, data)
+                if progress:
+                    progress(done, total, filename)
+
+    def _write_merged(self, render, jobs, output_path, progress, cancel_event):
+        # Results arrive out of order; append pages as soon as the next document in sequence is ready
+        total = len(jobs)
+        writer = PdfWriter()
+        pending = {}
+        next_index = 0
+        for done, (index, filename, data) in enumerate(self._results(render, jobs, cancel_event), 1):
+            pending[index] = data
+            while next_index in pending:
+                for page in PdfReader(io.BytesIO(pending.pop(next_index))).pages:
+                    writer.add_page(page)
+                next_index += 1
+            if progress:
+                progress(done, total, filename)
+        with open(output_path, "wb") as f:
+            writer.write(f)
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            batch_logger.warning(f"Could not remove partial output {path}: {e}")
+
+    # --- Entry points -----------------------------------------------------------------
+    def reprint_receipts(self, start_date, end_date, output_path: str, merge: bool = False,
+                         progress=None, cancel_event=None) -> Tuple[bool, str]:
+        """
+        Re-render the receipts of all bills in a date range into one archive.
+        :return: (success, output path or error message)
+        """
+        jobs = self.build_receipt_jobs(start_date, end_date)
+        return self.render_batch(_render_receipt_job, jobs, output_path, merge, progress, cancel_event)
+
+    def export_orders(self, output_path: str, status: Optional[str] = "pending", merge: bool = False,
+                      progress=None, cancel_event=None) -> Tuple[bool, str]:
+        """
+        Render purchase-order PDFs (pending orders by default) into one archive.
+        :return: (success, output path or error message)
+        """
+        jobs = self.build_order_jobs(status)
+        return self.render_batch(_render_order_job, jobs, output_path, merge, progress, cancel_event)
@@ -1,11 +1,36 @@
 from typing import List, Dict, Any, Tuple, Optional
-from db import add_bill, get_all_bills, get_monthly_sales, get_medicine_by_barcode, update_medicine_quantity
+from db import (
+    autosave_draft,
+    clear_autosave_draft,
+    commit_bill,
+    get_all_bills,
+    get_bills_by_ids,
+    get_autosave_draft,
+    get_draft,
+    get_monthly_sales,
+    list_drafts,
+    remove_draft,
+    upsert_draft,
+)
+from cart import Cart, compute_totals, from_paise, to_paise
+from config import get_printer_settings
+import artifact_store
+from event_bus import ReceiptReady, bus
 import datetime
 import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from escpos_printer import printer_from_settings, render_receipt
 from receipt_manager import ReceiptManager
 import logging
+from metrics import instrumented
+from query_monitor import counted
 logger = logging.getLogger("medibit")
+# Checkout hot path; rate-limited by logging_setup. Log counts and ids, not items or customer
+# dicts: those args are mutable, so LazyQueueHandler would format them on the UI thread
+billing_logger = logging.getLogger("medibit.billing")
 
+@instrumented("billing")
+@counted("billing")
 class BillingService:
     """
     Service class for all billing-related business logic and data access.
@@ -13,6 +38,11 @@ class BillingService:
     """
 
     def __init__(self):
+        self._last_autosave = None
+        self.last_receipt = None  # Arguments of render_receipt for the last finalized bill, for reprints
+        # PDF/delivery jobs run one at a time, in bill order; the worker is joined at exit, so none are lost
+        self._receipt_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="medibit-receipt")
+        self._receipt_jobs = []
         logger.info("BillingService initialized")
 
     def create_bill(self, items: List[Dict[str, Any]], customer: Dict[str, Any]) -> Tuple[bool, Optional[str], Optional[int], Optional[list]]:
@@ -64,14 +94,10 @@ class BillingService:
         total = sum(item["quantity"] * item["price"] for item in items)
         timestamp = datetime.datetime.now()
         try:
-            bill_id = add_bill(timestamp, total, items)
-            for item in items:
-                medicine = get_medicine_by_barcode(item["barcode"])
-                if medicine:
-                    new_quantity = medicine.quantity - item["quantity"]
-                    if new_quantity < 0:
-                        new_quantity = 0
-                    update_medicine_quantity(item["barcode"], new_quantity)
+            ok, result = commit_bill(timestamp, total, items, customer=customer)
+            if not ok:
+                return False, result, None, None
+            bill_id = result
             receipt_manager = ReceiptManager()
             customer_info = customer.copy()
             customer_info["total"] = total
@@ -92,8 +118,15 @@ class BillingService:
         :param limit: Number of bills to return
         :return: List of bill objects
         """
-        bills = get_all_bills()
-        return bills[:limit]
+        return get_all_bills(limit)
+
+    def get_bills_by_ids(self, bill_ids) -> List[Any]:
+        """
+        Return the given bills, newest first.
+        :param bill_ids: Iterable of bill IDs
+        :return: List of bill objects
+        """
+        return get_bills_by_ids(bill_ids)
 
     def get_sales_data(self, start_date=None, end_date=None) -> List[Any]:
         """
@@ -106,15 +139,23 @@ class BillingService:
         return get_monthly_sales(start_date, end_date)
 
     def calculate_totals(self, items, tax, discount):
-        logger.debug(f"[calculate_totals] ENTRY: items_count={len(items)}, tax={tax}%, discount={discount}%")
+        """
+        Calculate bill totals. Discount is applied to the subtotal first and tax is charged on the remainder.
+        Amounts are computed in integer paise and rounded half-up.
+        :param items: Cart, or list of item dicts with price and quantity
+        :param tax: Tax percentage
+        :param discount: Discount percentage
+        :return: (subtotal, tax_amount, discount_amount, total) in rupees
+        """
+        billing_logger.debug("[calculate_totals] ENTRY: items_count=%d, tax=%s%%, discount=%s%%", len(items), tax, discount)
         try:
-            subtotal = sum(item['price'] * item['quantity'] for item in items)
-            discount_amount = subtotal * (discount / 100)
-            discounted_subtotal = subtotal - discount_amount
-            tax_amount = discounted_subtotal * (tax / 100)
-            total = discounted_subtotal + tax_amount
-            logger.info("Totals calculated successfully.")
-            logger.debug(f"[calculate_totals] EXIT: subtotal={subtotal:.2f}, total={total:.2f}")
+            if isinstance(items, Cart):
+                totals = items.totals(tax, discount)
+            else:
+                gross = sum(to_paise(item['price']) * int(item['quantity']) for item in items)
+                totals = compute_totals(gross, tax, discount)
+            subtotal, tax_amount, discount_amount, total = (from_paise(value) for value in totals)
+            billing_logger.debug("[calculate_totals] EXIT: subtotal=%.2f, total=%.2f", subtotal, total)
             return subtotal, tax_amount, discount_amount, total
         except Exception as e:
             logger.error(f"[calculate_totals] Exception: {e}", exc_info=True)
@@ -151,7 +192,7 @@ Total: ₹{total:.2f}
 
 Thank you for your purchase!
 """
-        receipt_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "receipts")
+        receipt_dir = os.path.join(artifact_store.ARTIFACT_ROOT, "receipts")
         if not os.path.exists(receipt_dir):
             os.makedirs(receipt_dir)
         receipt_filename = f"receipt_{timestamp.strftime('%Y%m%d_%H%M%S')}.txt"
@@ -165,7 +206,7 @@ Thank you for your purchase!
 
     def finalize_bill(self, items, customer, tax_percent, discount, pharmacy_details=None):
         import datetime
-        logger.info(f"[START] finalize_bill: items={items}, customer={customer}, tax_percent={tax_percent}, discount={discount}, pharmacy_details={pharmacy_details}")
+        billing_logger.debug("[START] finalize_bill: items=%d, tax_percent=%s, discount=%s", len(items), tax_percent, discount)
         # Block finalization if customer name is missing
         if not customer.get('name', '').strip():
             logger.error("Cannot finalize bill: Customer name is required.")
@@ -175,81 +216,53 @@ Thank you for your purchase!
                 'bill_id': None,
                 'send_results': None,
                 'pdf_path': None,
+                'print_result': None,
                 'totals': None
             }
         timestamp = datetime.datetime.now()
         try:
             # Calculate totals
-            logger.info("Calculating totals...")
-            subtotal, tax_amount, discount_amount, total = self.calculate_totals(items, tax_percent, discount)
-            logger.info(f"Calculated totals: subtotal={subtotal}, tax_amount={tax_amount}, discount_amount={discount_amount}, total={total}")
-            # Prepare items for DB (add subtotal per item)
-            db_items = []
-            for item in items:
-                item_total = max(0, (float(item.get('price', 0)) - float(item.get('discount', 0)))) * int(item.get('quantity', 0))
-                db_items.append({
-                    **item,
-                    'subtotal': item_total
-                })
-            logger.info(f"Prepared db_items: {db_items}")
-            # Add bill to DB first to get bill_id
-            bill_id = add_bill(timestamp, total, db_items, file_path=None)
-            logger.info(f"Bill added to DB with bill_id={bill_id}")
-            # Instantiate receipt_manager before using it
-            receipt_manager = ReceiptManager()
-            # Now generate PDF receipt with bill_id
-            pdf_path = None
-            if pharmacy_details:
+            cart = items if isinstance(items, Cart) else Cart.from_items(items)
+            subtotal, tax_amount, discount_amount, total = self.calculate_totals(cart, tax_percent, discount)
+            billing_logger.debug("Calculated totals: subtotal=%s, tax_amount=%s, discount_amount=%s, total=%s", subtotal, tax_amount, discount_amount, total)
+            # Serialize the cart (subtotal per line) and record the sale and stock changes in one transaction
+            db_items = cart.to_db_items(tax_percent, discount)
+            ok, result = commit_bill(timestamp, total, db_items, file_path=None,
+                                     tax=cart.tax_summary(tax_percent, discount), customer=customer)
+            if not ok:
+                raise RuntimeError(f"Failed to save bill: {result}")
+            bill_id = result
+            billing_logger.info("Bill saved", extra={"bill_id": bill_id, "items": len(db_items), "total": total})
+            totals = {'subtotal': subtotal, 'tax_amount': tax_amount, 'discount_amount': discount_amount, 'total': total}
+            # Fast path: the text receipt goes straight to the thermal printer, and the A4 PDF and
+            # customer delivery run in the background job (with or without a printer) so the
+            # counter is free in milliseconds
+            settings = get_printer_settings()
+            printer = printer_from_settings(settings)
+            self.last_receipt = (bill_id, timestamp, db_items, totals, pharmacy_details, customer)
+            print_result = None
+            if printer:
                 try:
-                    logger.info(f"Generating PDF receipt: pharmacy_details={pharmacy_details}")
-                    pdf_path = receipt_manager.generate_pdf_receipt(
-                        customer, db_items, total, timestamp, str(bill_id), pharmacy_details
-                    )
-                    logger.info(f"PDF receipt generated at: {pdf_path}")
+                    print_result = printer.send(render_receipt(*self.last_receipt, columns=settings["columns"],
+                                                               cut=settings["cut"]))
                 except Exception as e:
-                    logger.error(f"Failed to generate PDF receipt: {e}", exc_info=True)
-                    pdf_path = None
-            logger.info(f"[LOG] pdf_path after generation: {pdf_path}")
-            # Update bill with PDF path if generated
-            if pdf_path:
-                from db import update_bill_file_path
-                logger.info(f"[LOG] Updating bill {bill_id} with pdf_path: {pdf_path}")
-                update_bill_file_path(bill_id, pdf_path)
-            else:
-                logger.warning(f"[LOG] No PDF generated for bill {bill_id}")
-            # Update inventory
-            for item in db_items:
-                medicine = get_medicine_by_barcode(item["barcode"])
-                logger.info(f"Updating inventory for barcode={item['barcode']}, medicine={medicine}")
-                if medicine:
-                    new_quantity = medicine.quantity - int(item["quantity"])
-                    if new_quantity < 0:
-                        new_quantity = 0
-                    update_medicine_quantity(item["barcode"], new_quantity)
-                    logger.info(f"Updated medicine quantity for barcode={item['barcode']} to {new_quantity}")
-            # Send receipt to customer (do NOT re-instantiate receipt_manager or reassign pdf_path)
-            customer_info = customer.copy()
-            customer_info["total"] = total
-            customer_info["items"] = db_items
-            logger.info(f"Sending receipt to customer: customer_info={customer_info}")
-            send_results = receipt_manager.send_receipt_to_customer(
-                customer_info, db_items, total, timestamp, bill_id
-            )
-            logger.info(f"Receipt send results: {send_results}")
-            logger.info(f"[END] finalize_bill: success, bill_id={bill_id}, pdf_path={pdf_path}")
-            # Return the correct pdf_path in the result
+                    logger.error(f"Failed to print receipt for bill {bill_id}: {e}", exc_info=True)
+                    print_result = (False, str(e))
+            # Without a printer the A4 PDF is the customer's receipt, so it is always rendered
+            make_pdf = settings["pdf_receipts"] if printer else True
+            self._receipt_jobs = [job for job in self._receipt_jobs if not job.done()]
+            self._receipt_jobs.append(self._receipt_executor.submit(
+                self._deliver_in_background, customer, db_items, total, timestamp, bill_id,
+                pharmacy_details, make_pdf))
+            billing_logger.info("[END] finalize_bill: success", extra={"bill_id": bill_id})
             return {
                 'success': True,
                 'error': None,
                 'bill_id': bill_id,
-                'send_results': send_results,
-                'pdf_path': pdf_path,  # Always return the actual PDF path
-                'totals': {
-                    'subtotal': subtotal,
-                    'tax_amount': tax_amount,
-                    'discount_amount': discount_amount,
-                    'total': total
-                }
+                'send_results': None,  # Delivery results and the PDF path arrive through ReceiptReady
+                'pdf_path': None,
+                'print_result': print_result,  # (success, message) from the thermal printer, or None
+                'totals': totals
             }
         except Exception as e:
             logger.error(f"[EXCEPTION] finalize_bill: {e}", exc_info=True)
@@ -259,65 +272,212 @@ Thank you for your purchase!
                 'bill_id': None,
                 'send_results': None,
                 'pdf_path': None,
+                'print_result': None,
                 'totals': None
             }
 
-    def save_draft(self, draft_data, draft_name=None):
+    def _deliver_in_background(self, customer, db_items, total, timestamp, bill_id, pharmacy_details, make_pdf):
+        # Receipt job: the UI learns about the PDF through ReceiptReady
+        try:
+            pdf_path, send_results = self._deliver_receipts(customer, db_items, total, timestamp, bill_id,
+                                                            pharmacy_details, make_pdf)
+        except Exception as e:
+            logger.error(f"Receipt job for bill {bill_id} failed: {e}", exc_info=True)
+            pdf_path, send_results = None, [("Delivery", False, str(e))]
+        bus.publish(ReceiptReady(bill_id, pdf_path, send_results))
+
+    def _deliver_receipts(self, customer, db_items, total, timestamp, bill_id, pharmacy_details, make_pdf=True):
+        """
+        Render the A4 PDF receipt, attach it to the bill and send it to the customer.
+        :param make_pdf: False to skip the PDF and only deliver the receipt
+        :return: (pdf_path or None, send results)
         """
-        Save a billing draft to a JSON file. If draft_name is not provided, prompt for one (UI should handle prompt).
+        receipt_manager = ReceiptManager()
+        pdf_path = None
+        if pharmacy_details and make_pdf:
+            try:
+                pdf_path = receipt_manager.generate_pdf_receipt(
+                    customer, db_items, total, timestamp, str(bill_id), pharmacy_details
+                )
+                billing_logger.debug("PDF receipt generated at: %s", pdf_path)
+            except Exception as e:
+                logger.error(f"Failed to generate PDF receipt: {e}", exc_info=True)
+                pdf_path = None
+        # Update bill with PDF path if generated
+        if pdf_path:
+            from db import update_bill_file_path
+            billing_logger.debug("Updating bill %s with pdf_path: %s", bill_id, pdf_path)
+            update_bill_file_path(bill_id, pdf_path)
+        elif make_pdf:
+            logger.warning("No PDF generated for bill %s", bill_id)
+        customer_info = customer.copy()
+        customer_info["total"] = total
+        customer_info["items"] = db_items
+        try:
+            send_results = receipt_manager.send_receipt_to_customer(
+                customer_info, db_items, total, timestamp, bill_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to send receipt for bill {bill_id}: {e}", exc_info=True)
+            send_results = [("Delivery", False, str(e))]
+        return pdf_path, send_results
+
+    def wait_for_receipts(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the background PDF/delivery jobs of all finalized bills.
+        :param timeout: Seconds to wait, or None to wait until they finish
+        :return: True if no job is left pending
+        """
+        return not wait(self._receipt_jobs, timeout).not_done
+
+    def reprint_last_receipt(self) -> Tuple[bool, str]:
+        """
+        Send the last finalized bill to the thermal printer again.
+        :return: (success, message)
+        """
+        settings = get_printer_settings()
+        printer = printer_from_settings(settings)
+        if printer is None:
+            return False, "No receipt printer configured."
+        if self.last_receipt is None:
+            return False, "No bill has been finalized yet."
+        return printer.send(render_receipt(*self.last_receipt, columns=settings["columns"], cut=settings["cut"]))
+
+    def save_draft(self, draft_data, draft_name=None, draft_id=None):
+        """
+        Save a billing draft to the drafts table. If draft_name is not provided, prompt for one (UI should handle prompt).
         :param draft_data: dict containing all draft info (customer, items, tax, discount, subtotal, total)
-        :param draft_name: Optional name for the draft file
-        :return: (success, filename or error)
+        :param draft_name: Optional name for the draft
+        :param draft_id: Optional ID of an existing draft to overwrite
+        :return: (success, draft ID or error)
         """
-        import os, json, datetime
-        if not os.path.exists('drafts'):
-            os.makedirs('drafts')
         if not draft_name:
             draft_name = 'untitled'
-        safe_name = "_".join(draft_name.strip().split())
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        draft_filename = f'drafts/draft_bill_{safe_name}_{timestamp}.json'
         try:
-            with open(draft_filename, 'w', encoding='utf-8') as f:
-                json.dump(draft_data, f, ensure_ascii=False, indent=2)
-            return True, draft_filename
+            return True, upsert_draft(draft_name.strip(), draft_data, draft_id)
         except Exception as e:
+            logger.error(f"[save_draft] Exception: {e}", exc_info=True)
             return False, str(e)
 
-    def load_draft(self, draft_path):
+    def load_draft(self, draft_id):
         """
-        Load a billing draft from a JSON file.
-        :param draft_path: Path to the draft file
+        Load a billing draft by ID.
+        :param draft_id: Draft ID
         :return: (success, draft_data or error)
         """
-        import json
         try:
-            with open(draft_path, 'r', encoding='utf-8') as f:
-                draft = json.load(f)
+            draft = get_draft(draft_id)
+            if draft is None:
+                return False, f"Draft {draft_id} not found"
             return True, draft
         except Exception as e:
             return False, str(e)
 
-    def delete_draft(self, draft_path):
+    def delete_draft(self, draft_id):
         """
-        Delete a billing draft file.
-        :param draft_path: Path to the draft file
+        Delete a billing draft by ID.
+        :param draft_id: Draft ID
         :return: (success, None or error)
         """
-        import os
         try:
-            os.remove(draft_path)
+            if not remove_draft(draft_id):
+                return False, f"Draft {draft_id} not found"
             return True, None
         except Exception as e:
             return False, str(e)
 
+    def list_drafts(self, limit=10, offset=0):
+        """
+        Return one page of saved drafts, most recently updated first.
+        :param limit: Page size
+        :param offset: Rows to skip
+        :return: List of rows with id, name, customer_name, updated_at
+        """
+        try:
+            return list_drafts(limit, offset)
+        except Exception as e:
+            logger.error(f"[list_drafts] Exception: {e}", exc_info=True)
+            return []
+
+    def autosave(self, draft_data):
+        """
+        Autosave the in-progress bill. Skips the write when nothing changed since the
+        last autosave, and clears the slot when the bill is empty.
+        :param draft_data: dict with the same shape as a saved draft
+        :return: True if the database was written
+        """
+        snapshot = draft_data if draft_data.get('items') else None
+        if snapshot == self._last_autosave:
+            return False
+        try:
+            if snapshot is None:
+                clear_autosave_draft()
+            else:
+                autosave_draft(snapshot)
+            self._last_autosave = snapshot
+            return True
+        except Exception as e:
+            logger.error(f"[autosave] Exception: {e}", exc_info=True)
+            return False
+
+    def get_autosave(self):
+        """
+        Return the autosaved in-progress bill left by a previous session, if any.
+        :return: Draft dict or None
+        """
+        try:
+            return get_autosave_draft()
+        except Exception as e:
+            logger.error(f"[get_autosave] Exception: {e}", exc_info=True)
+            return None
+
+    def clear_autosave(self):
+        """
+        Discard the autosaved in-progress bill (after it was finalized, saved or declined).
+        """
+        try:
+            clear_autosave_draft()
+            self._last_autosave = None
+        except Exception as e:
+            logger.error(f"[clear_autosave] Exception: {e}", exc_info=True)
+
+    def import_legacy_drafts(self, drafts_dir):
+        """
+        Move drafts saved as JSON files by older versions into the drafts table.
+        Imported files are renamed to *.imported so they are not imported twice.
+        :param drafts_dir: Directory holding draft_bill_*.json files
+        :return: Number of drafts imported
+        """
+        import json
+        import re
+        if not os.path.isdir(drafts_dir):
+            return 0
+        imported = 0
+        for fname in sorted(os.listdir(drafts_dir)):
+            match = re.match(r'draft_bill_(.*)_\d{8}_\d{6}\.json$', fname)
+            if not match:
+                continue
+            path = os.path.join(drafts_dir, fname)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    draft = json.load(f)
+                upsert_draft(match.group(1).replace('_', ' '), draft)
+                os.replace(path, path + '.imported')
+                imported += 1
+            except Exception as e:
+                logger.error(f"[import_legacy_drafts] Could not import {path}: {e}")
+        if imported:
+            logger.info(f"Imported {imported} legacy drafts from {drafts_dir}")
+        return imported
+
     def add_item_to_bill(self, bill_items, medicine, quantity):
         """
         Add an item to the bill, enforcing business rules (e.g., stock limits).
-        :param bill_items: Current list of items in the bill (list of dicts)
+        A Cart is updated in O(1); a plain list of item dicts is still accepted.
+        :param bill_items: Cart, or current list of items in the bill (list of dicts)
         :param medicine: Medicine object or dict with at least barcode, name, price, quantity
         :param quantity: Quantity to add
-        :return: (success, updated_items or error message)
+        :return: True if the item was added, False if it would exceed available stock
         """
         # Helper to get attribute or dict value
         def get_val(obj, key):
@@ -329,8 +489,16 @@ Thank you for your purchase!
         available_stock = get_val(medicine, 'quantity')
         if quantity > available_stock:
             return False
-        # Check if already in bill
         med_barcode = get_val(medicine, 'barcode')
+        if isinstance(bill_items, Cart):
+            try:
+                bill_items.add(med_barcode, get_val(medicine, 'name'), get_val(medicine, 'price'),
+                               quantity, max_quantity=available_stock)
+            except ValueError as e:
+                logger.warning(f"[add_item_to_bill] {e}")
+                return False
+            return True
+        # Check if already in bill
         for item in bill_items:
             if item['barcode'] == med_barcode:
                 new_qty = item['quantity'] + quantity
@@ -340,10 +508,10 @@ Thank you for your purchase!
                 return True
         # Add new item
         bill_items.append({
-            'barcode': get_val(medicine, 'barcode'),
+            'barcode': med_barcode,
             'name': get_val(medicine, 'name'),
             'quantity': quantity,
             'price': get_val(medicine, 'price'),
             'discount': 0.0
         })
-        return True 
\ No newline at end of file
+        return True
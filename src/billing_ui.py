@@ -1,15 +1,27 @@
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFrame, QGridLayout, QLabel, QLineEdit, QSpinBox, QComboBox, QPushButton, QTableWidget, QTableWidgetItem, QDoubleSpinBox, QListWidget, QListWidgetItem, QMessageBox, QHeaderView)
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFrame, QGridLayout, QLabel, QLineEdit, QSpinBox, QComboBox, QPushButton, QTableWidget, QTableWidgetItem, QDoubleSpinBox, QListWidget, QListWidgetItem, QMessageBox, QHeaderView, QCompleter)
+from PyQt5.QtCore import Qt, QStringListModel
 import re
 from theme import theme_manager
 import logging
 logger = logging.getLogger("medibit")
 from theme import create_animated_button
+from billing_service import BillingService
+from cart import Cart, from_paise
+from customer_service import CustomerService, normalize_phone
+
+GENDER_NOT_SPECIFIED = "Not specified"
 
 class BillingUi(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window  # Reference to MainWindow for callbacks
+        self.billing_service = BillingService()
+        self.customer_service = CustomerService()
+        self._customer_matches = {}  # Typeahead label -> CustomerRow
+        self._age_entered = False  # The age spin box shows a default until it is edited or filled
+        # Cart mirrors the billing table and keeps running totals; each row stores its cart key in Qt.UserRole
+        self.cart = Cart()
+        self._syncing_cart = False
         logger.info("BillingUi initialized")
         self.init_ui()
         # Setup keyboard shortcuts
@@ -45,11 +57,12 @@ class BillingUi(QWidget):
         self.customer_age.setValue(25)
         self.customer_age.setToolTip("Enter the customer's age.")
         self.customer_age.setAccessibleName("Customer Age Field")
+        self.customer_age.valueChanged.connect(self._on_customer_age_changed)
         customer_layout.addWidget(QLabel("Age:"), 1, 2)
         customer_layout.addWidget(self.customer_age, 1, 3)
         # Gender & Phone
         self.customer_gender = QComboBox()
-        self.customer_gender.addItems(["Male", "Female", "Other"])
+        self.customer_gender.addItems([GENDER_NOT_SPECIFIED, "Male", "Female", "Other"])
         self.customer_gender.setToolTip("Select the customer's gender.")
         self.customer_gender.setAccessibleName("Customer Gender Field")
         customer_layout.addWidget(QLabel("Gender:"), 2, 0)
@@ -60,6 +73,12 @@ class BillingUi(QWidget):
         self.customer_phone.setAccessibleName("Customer Phone Field")
         customer_layout.addWidget(QLabel("Phone:"), 2, 2)
         customer_layout.addWidget(self.customer_phone, 2, 3)
+        # Phone typeahead: picking a saved customer (or typing their full number) fills in the rest
+        self.customer_completer = QCompleter(QStringListModel(self), self)
+        self.customer_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.customer_phone.setCompleter(self.customer_completer)
+        self.customer_phone.textEdited.connect(self._on_customer_phone_edited)
+        self.customer_completer.activated[str].connect(self._on_customer_chosen)
         # Email & Address
         self.customer_email = QLineEdit()
         self.customer_email.setPlaceholderText("Enter email address")
@@ -94,6 +113,7 @@ class BillingUi(QWidget):
         self.billing_table.setAccessibleName("Billing Items Table")
         # Connect table changes to summary updates
         self.billing_table.itemChanged.connect(self._on_table_item_changed)
+        self.billing_table.model().rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
         billing_layout.addWidget(self.billing_table)
         # Buttons
         btn_layout = QHBoxLayout()
@@ -257,6 +277,65 @@ class BillingUi(QWidget):
         summary_layout.addLayout(action_btn_layout)
         layout.addWidget(summary_frame)
 
+    def _on_customer_phone_edited(self, text):
+        matches = self.customer_service.lookup_phone(text)
+        self._customer_matches = {f"{c.phone}  {c.name}": c for c in matches}
+        self.customer_completer.model().setStringList(list(self._customer_matches))
+        exact = [c for c in matches if c.phone == normalize_phone(text)]
+        if exact:
+            self.fill_customer(exact[0])
+        elif matches:
+            self.customer_completer.complete()
+
+    def _on_customer_chosen(self, label):
+        customer = self._customer_matches.get(label)
+        if customer:
+            self.fill_customer(customer)
+
+    def _on_customer_age_changed(self, value):
+        self._age_entered = True
+
+    def customer_details(self):
+        """
+        Customer fields as a dict for the bill. Age and gender are left out unless they were
+        entered, so the defaults shown in the form never overwrite a saved customer.
+        :return: Dict with name, phone, email, address and, when set, age and gender
+        """
+        details = {
+            "name": self.customer_name.text(),
+            "phone": self.customer_phone.text(),
+            "email": self.customer_email.text(),
+            "address": self.customer_address.text(),
+        }
+        if self._age_entered:
+            details["age"] = self.customer_age.value()
+        if self.customer_gender.currentText() != GENDER_NOT_SPECIFIED:
+            details["gender"] = self.customer_gender.currentText()
+        return details
+
+    def clear_customer_fields(self):
+        """Reset the customer fields to an empty form."""
+        self.customer_name.clear()
+        self.customer_age.setValue(25)
+        self._age_entered = False
+        self.customer_gender.setCurrentIndex(0)
+        self.customer_phone.clear()
+        self.customer_email.clear()
+        self.customer_address.clear()
+
+    def fill_customer(self, customer):
+        """Fill the customer fields from a saved customer (CustomerRow)."""
+        self.customer_phone.setText(customer.phone)
+        self.customer_name.setText(customer.name)
+        if customer.age:
+            self.customer_age.setValue(customer.age)
+        if customer.gender:
+            index = self.customer_gender.findText(customer.gender)
+            if index != -1:
+                self.customer_gender.setCurrentIndex(index)
+        self.customer_email.setText(customer.email or "")
+        self.customer_address.setText(customer.address or "")
+
     def validate_customer_info(self):
         """Validate customer information fields"""
         name = self.customer_name.text().strip()
@@ -364,51 +443,113 @@ class BillingUi(QWidget):
         logger.debug("Tax or discount percentage changed, recalculating totals.")
         self.update_bill_summary()
 
+    def _parse_row(self, row):
+        """
+        Parse one billing table row into an item dict.
+        :param row: Table row index
+        :return: Item dict, or None if the row is incomplete or invalid
+        """
+        cells = [self.billing_table.item(row, col) for col in range(6)]
+        barcode, name, quantity, price, tax, discount = (cell.text().strip() if cell else "" for cell in cells)
+        if not (barcode and name and quantity and price):
+            return None
+        try:
+            return {
+                'barcode': barcode,
+                'name': name,
+                'quantity': int(quantity),
+                'price': float(price.replace("₹", "")),
+                'tax': float(tax) if tax else 0.0,
+                'discount': float(discount) if discount else 0.0
+            }
+        except ValueError:
+            logger.warning(f"Invalid numeric value in row {row}")
+            return None
+
     def get_billing_items(self):
         """Extract billing items from the table"""
         items = []
         for row in range(self.billing_table.rowCount()):
-            barcode = self.billing_table.item(row, 0).text().strip()
-            name = self.billing_table.item(row, 1).text().strip()
-            quantity = self.billing_table.item(row, 2).text().strip()
-            price = self.billing_table.item(row, 3).text().strip()
-            tax = self.billing_table.item(row, 4).text().strip() if self.billing_table.item(row, 4) else "0"
-            discount = self.billing_table.item(row, 5).text().strip() if self.billing_table.item(row, 5) else "0"
-            
-            if barcode and name and quantity and price:
-                try:
-                    items.append({
-                        'barcode': barcode,
-                        'name': name,
-                        'quantity': int(quantity),
-                        'price': float(price),
-                        'tax': float(tax) if tax else 0.0,
-                        'discount': float(discount) if discount else 0.0
-                    })
-                except ValueError:
-                    logger.warning(f"Invalid numeric value in row {row}")
-                    continue
+            item = self._parse_row(row)
+            if item:
+                items.append(item)
         return items
 
+    def _sync_cart_row(self, row):
+        """Bring the cart line for a single table row in line with the row contents."""
+        key_item = self.billing_table.item(row, 0)
+        if key_item is None:
+            return
+        old_key = key_item.data(Qt.UserRole)
+        item = self._parse_row(row)
+        new_key = item['barcode'] if item else None
+        if old_key and old_key != new_key:
+            self.cart.remove(old_key)
+        if item:
+            self.cart.set_line(item['barcode'], item['name'], item['price'], item['quantity'],
+                               item['discount'], item['tax'])
+        if old_key != new_key:
+            self._syncing_cart = True
+            try:
+                key_item.setData(Qt.UserRole, new_key)
+            finally:
+                self._syncing_cart = False
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        """Drop the cart lines of rows that are being removed from the table."""
+        for row in range(first, last + 1):
+            key_item = self.billing_table.item(row, 0)
+            key = key_item.data(Qt.UserRole) if key_item else None
+            if key:
+                self.cart.remove(key)
+        self.update_bill_summary()
+
+    def rebuild_cart(self):
+        """Rebuild the cart from the whole table (used after bulk edits made with signals blocked)."""
+        self.cart.clear()
+        for row in range(self.billing_table.rowCount()):
+            key_item = self.billing_table.item(row, 0)
+            if key_item is not None:
+                key_item.setData(Qt.UserRole, None)
+            self._sync_cart_row(row)
+
+    def add_medicine_to_bill(self, medicine, quantity):
+        """
+        Add a medicine to the bill, merging with its existing row if present.
+        Only the affected row is written; totals come from the cart.
+        :param medicine: Medicine object or dict with barcode, name, price, quantity (stock)
+        :param quantity: Quantity to add
+        :return: True if added, False if it would exceed available stock
+        """
+        if not self.billing_service.add_item_to_bill(self.cart, medicine, quantity):
+            return False
+        barcode = medicine['barcode'] if isinstance(medicine, dict) else medicine.barcode
+        line = self.cart.get(barcode)
+        matches = [cell for cell in self.billing_table.findItems(barcode, Qt.MatchExactly) if cell.column() == 0]
+        self._syncing_cart = True
+        try:
+            if matches:
+                self.billing_table.item(matches[0].row(), 2).setText(str(line.quantity))
+            else:
+                row = self.billing_table.rowCount()
+                self.billing_table.insertRow(row)
+                values = [line.barcode, line.name, str(line.quantity), f"{from_paise(line.price):.2f}",
+                          "0", f"{from_paise(line.discount):.2f}"]
+                for col, value in enumerate(values):
+                    self.billing_table.setItem(row, col, QTableWidgetItem(value))
+                self.billing_table.item(row, 0).setData(Qt.UserRole, line.barcode)
+        finally:
+            self._syncing_cart = False
+        self.update_bill_summary()
+        return True
+
     def update_bill_summary(self):
-        """Calculate and update the bill summary using the billing service"""
+        """Update the bill summary labels from the cart's running totals"""
         try:
-            from billing_service import BillingService
-            
-            # Get items from table
-            items = self.get_billing_items()
-            
-            # Get tax and discount percentages
             tax_percent = self.tax_spin.value()
             discount_percent = self.discount_spin.value()
-            
-            # Calculate subtotal
-            subtotal = sum(item['price'] * item['quantity'] for item in items)
-            
-            # Use billing service for calculation
-            billing_service = BillingService()
-            subtotal_calc, tax_amount, discount_amount, total = billing_service.calculate_totals(
-                items, tax_percent, discount_percent
+            subtotal, tax_amount, discount_amount, total = self.billing_service.calculate_totals(
+                self.cart, tax_percent, discount_percent
             )
             
             # Update labels
@@ -430,6 +571,7 @@ class BillingUi(QWidget):
     def refresh_billing_table(self):
         """Refresh the billing table and update summary"""
         logger.debug("Refreshing billing table and updating summary.")
+        self.rebuild_cart()
         self.update_bill_summary()
 
     def clear_bill(self):
@@ -437,15 +579,11 @@ class BillingUi(QWidget):
         logger.info("Clearing current bill.")
         
         # Clear customer info
-        self.customer_name.clear()
-        self.customer_age.setValue(25)
-        self.customer_gender.setCurrentIndex(0)
-        self.customer_phone.clear()
-        self.customer_email.clear()
-        self.customer_address.clear()
+        self.clear_customer_fields()
         
         # Clear billing table
         self.billing_table.setRowCount(0)
+        self.cart.clear()
         
         # Reset tax and discount
         self.tax_spin.setValue(0.0)
@@ -509,8 +647,11 @@ class BillingUi(QWidget):
 
     def _on_table_item_changed(self, item):
         """Handle changes to billing table items"""
+        if self._syncing_cart:
+            return
         logger.debug(f"Table item changed at row {item.row()}, column {item.column()}")
-        # Update the bill summary when any item changes
+        # Patch only the changed row's cart line, then refresh totals
+        self._sync_cart_row(item.row())
         self.update_bill_summary()
 
     def setup_shortcuts(self):
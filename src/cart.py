@@ -0,0 +1,334 @@
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Money inside the cart is kept as integer paise so running totals never drift.
+# Values are converted back to rupees only at the edges (UI labels, DB rows).
+PAISE_PER_RUPEE = 100
+
+
+def to_paise(value: Any) -> int:
+    """
+    Convert a rupee amount (int, float, Decimal or numeric string) to integer paise.
+    :param value: Rupee amount
+    :return: Amount in paise, rounded half-up
+    """
+    if value is None or value == "":
+        return 0
+    if isinstance(value, str):
+        value = value.replace("₹", "").strip() or "0"
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    return int((amount * PAISE_PER_RUPEE).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_paise(paise: int) -> float:
+    """
+    Convert integer paise back to a rupee float.
+    :param paise: Amount in paise
+    :return: Amount in rupees
+    """
+    return paise / PAISE_PER_RUPEE
+
+
+def percent_of(amount_paise: int, percent: Any) -> int:
+    """
+    Return percent% of an amount in paise, rounded half-up to the nearest paisa.
+    :param amount_paise: Base amount in paise
+    :param percent: Percentage (e.g. 12.5)
+    :return: Amount in paise
+    """
+    if not percent:
+        return 0
+    value = Decimal(amount_paise) * Decimal(str(percent)) / 100
+    return int(value.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def compute_totals(gross_paise: int, tax_percent: Any, discount_percent: Any) -> Tuple[int, int, int, int]:
+    """
+    Apply bill-level discount and tax to a gross amount.
+    Discount is taken off the gross first and tax is charged on what remains,
+    matching BillingService.calculate_totals.
+    :param gross_paise: Sum of price * quantity over all lines, in paise
+    :param tax_percent: Bill tax percentage
+    :param discount_percent: Bill discount percentage
+    :return: (subtotal, tax_amount, discount_amount, total) in paise
+    """
+    discount_amount = percent_of(gross_paise, discount_percent)
+    tax_amount = percent_of(gross_paise - discount_amount, tax_percent)
+    total = gross_paise - discount_amount + tax_amount
+    return gross_paise, tax_amount, discount_amount, total
+
+
+def allocate(amount_paise: int, weights: List[int]) -> List[int]:
+    """
+    Split an amount across weights in proportion, so that the shares add up exactly
+    (largest remainder: leftover paise go to the largest fractional parts).
+    :param amount_paise: Amount to split, in paise
+    :param weights: Non-negative weights, e.g. line gross amounts in paise
+    :return: One share per weight, in paise
+    """
+    total_weight = sum(weights)
+    if not total_weight:
+        return [0] * len(weights)
+    shares = [amount_paise * weight // total_weight for weight in weights]
+    remainders = sorted(range(len(weights)), key=lambda i: amount_paise * weights[i] % total_weight, reverse=True)
+    for i in remainders[:amount_paise - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+class CartLine:
+    """
+    A single bill line. Prices and per-unit discounts are stored in paise.
+    """
+
+    __slots__ = ("barcode", "name", "quantity", "price", "discount", "tax")
+
+    def __init__(self, barcode: str, name: str, quantity: int, price: int, discount: int = 0, tax: float = 0.0):
+        self.barcode = barcode
+        self.name = name
+        self.quantity = quantity
+        self.price = price
+        self.discount = discount
+        self.tax = tax
+
+    @property
+    def gross(self) -> int:
+        """Price * quantity in paise, before any discount."""
+        return self.price * self.quantity
+
+    @property
+    def line_discount(self) -> int:
+        """Total per-unit discount for this line in paise, capped at the line price."""
+        return min(self.discount, self.price) * self.quantity
+
+    @property
+    def subtotal(self) -> int:
+        """Line amount after the per-unit discount, in paise."""
+        return self.gross - self.line_discount
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the line in the rupee-based dict shape used by the UI, receipts and DB layer.
+        :return: Item dict
+        """
+        return {
+            "barcode": self.barcode,
+            "name": self.name,
+            "quantity": self.quantity,
+            "price": from_paise(self.price),
+            "discount": from_paise(self.discount),
+            "tax": self.tax,
+            "subtotal": from_paise(self.subtotal),
+        }
+
+    def __repr__(self) -> str:
+        return f"CartLine({self.barcode!r}, qty={self.quantity}, price={self.price})"
+
+
+class Cart:
+    """
+    In-memory bill keyed by barcode.
+    Add, remove and quantity changes are O(1): each mutation adjusts running
+    aggregates instead of re-summing every line, so totals stay instant for
+    bills with hundreds of lines.
+    """
+
+    def __init__(self):
+        self._lines: Dict[str, CartLine] = {}
+        self._gross = 0
+        self._line_discount = 0
+        self._units = 0
+
+    # --- Aggregate bookkeeping -------------------------------------------
+    def _account(self, line: CartLine, sign: int) -> None:
+        self._gross += sign * line.gross
+        self._line_discount += sign * line.line_discount
+        self._units += sign * line.quantity
+
+    # --- Mutations ---------------------------------------------------------
+    def add(self, barcode: str, name: str, price: Any, quantity: int = 1, discount: Any = 0,
+            max_quantity: Optional[int] = None) -> CartLine:
+        """
+        Add quantity of an item, merging with an existing line for the same barcode.
+        :param barcode: Medicine barcode
+        :param name: Medicine name
+        :param price: Unit price in rupees
+        :param quantity: Quantity to add
+        :param discount: Per-unit discount in rupees (used only for a new line)
+        :param max_quantity: Optional stock limit for the resulting line quantity
+        :return: The updated CartLine
+        :raises ValueError: If quantity is not positive or exceeds max_quantity
+        """
+        if not barcode:
+            raise ValueError("Barcode is required.")
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ValueError(f"Quantity must be greater than 0 for item: {name}")
+        line = self._lines.get(barcode)
+        new_quantity = quantity + (line.quantity if line else 0)
+        if max_quantity is not None and new_quantity > max_quantity:
+            raise ValueError(f"Only {max_quantity} units of {name} available in stock.")
+        if line:
+            self._account(line, -1)
+            line.quantity = new_quantity
+        else:
+            line = CartLine(barcode, name, new_quantity, to_paise(price), to_paise(discount))
+            self._lines[barcode] = line
+        self._account(line, 1)
+        return line
+
+    def set_line(self, barcode: str, name: str, price: Any, quantity: int, discount: Any = 0, tax: float = 0.0) -> CartLine:
+        """
+        Insert or replace a line wholesale (used when syncing an edited table row).
+        :return: The stored CartLine
+        """
+        if not barcode:
+            raise ValueError("Barcode is required.")
+        old = self._lines.get(barcode)
+        if old:
+            self._account(old, -1)
+        line = CartLine(barcode, name, int(quantity), to_paise(price), to_paise(discount), tax)
+        self._lines[barcode] = line
+        self._account(line, 1)
+        return line
+
+    def set_quantity(self, barcode: str, quantity: int) -> None:
+        """
+        Change the quantity of a line. A quantity of zero removes the line.
+        :raises KeyError: If the barcode is not in the cart
+        """
+        line = self._lines[barcode]
+        if quantity <= 0:
+            self.remove(barcode)
+            return
+        self._account(line, -1)
+        line.quantity = quantity
+        self._account(line, 1)
+
+    def set_discount(self, barcode: str, discount: Any) -> None:
+        """
+        Change the per-unit discount (in rupees) of a line.
+        :raises KeyError: If the barcode is not in the cart
+        """
+        line = self._lines[barcode]
+        self._account(line, -1)
+        line.discount = to_paise(discount)
+        self._account(line, 1)
+
+    def remove(self, barcode: str) -> Optional[CartLine]:
+        """
+        Remove a line from the cart.
+        :return: The removed CartLine, or None if it was not present
+        """
+        line = self._lines.pop(barcode, None)
+        if line:
+            self._account(line, -1)
+        return line
+
+    def clear(self) -> None:
+        self._lines.clear()
+        self._gross = 0
+        self._line_discount = 0
+        self._units = 0
+
+    # --- Queries -------------------------------------------------------------
+    def get(self, barcode: str) -> Optional[CartLine]:
+        return self._lines.get(barcode)
+
+    def __contains__(self, barcode: str) -> bool:
+        return barcode in self._lines
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self) -> Iterator[CartLine]:
+        return iter(self._lines.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._lines)
+
+    @property
+    def gross(self) -> int:
+        """Sum of price * quantity over all lines, in paise."""
+        return self._gross
+
+    @property
+    def line_discount(self) -> int:
+        """Sum of per-unit line discounts, in paise."""
+        return self._line_discount
+
+    @property
+    def units(self) -> int:
+        """Total number of units across all lines."""
+        return self._units
+
+    def totals(self, tax_percent: Any = 0, discount_percent: Any = 0) -> Tuple[int, int, int, int]:
+        """
+        Return bill totals in paise from the running aggregates (O(1)).
+        :param tax_percent: Bill tax percentage
+        :param discount_percent: Bill discount percentage
+        :return: (subtotal, tax_amount, discount_amount, total) in paise
+        """
+        return compute_totals(self._gross, tax_percent, discount_percent)
+
+    def to_db_items(self, tax_percent: Any = None, discount_percent: Any = 0) -> List[Dict[str, Any]]:
+        """
+        Serialize the cart into the item dicts accepted by db.commit_bill / db.add_bill.
+        With tax_percent, each line also carries its share of the bill-level discount and
+        tax (taxable_value, tax_rate, tax_amount); the shares add up to the bill totals.
+        :param tax_percent: (optional) Bill tax percentage
+        :param discount_percent: Bill discount percentage (used with tax_percent)
+        :return: List of item dicts with rupee amounts
+        """
+        items = [line.to_dict() for line in self._lines.values()]
+        if tax_percent is None:
+            return items
+        _, tax_amount, discount_amount, _ = self.totals(tax_percent, discount_percent)
+        weights = [line.gross for line in self._lines.values()]
+        for item, gross, discount_share, tax_share in zip(
+                items, weights, allocate(discount_amount, weights), allocate(tax_amount, weights)):
+            item["taxable_value"] = from_paise(gross - discount_share)
+            item["tax_rate"] = float(tax_percent or 0)
+            item["tax_amount"] = from_paise(tax_share)
+        return items
+
+    def tax_summary(self, tax_percent: Any = 0, discount_percent: Any = 0) -> Dict[str, float]:
+        """
+        Bill-level tax components, as stored with the bill.
+        :return: Dict with tax_rate, taxable_value, tax_amount and discount_amount (rupees)
+        """
+        gross, tax_amount, discount_amount, _ = self.totals(tax_percent, discount_percent)
+        return {
+            "tax_rate": float(tax_percent or 0),
+            "taxable_value": from_paise(gross - discount_amount),
+            "tax_amount": from_paise(tax_amount),
+            "discount_amount": from_paise(discount_amount),
+        }
+
+    @classmethod
+    def from_items(cls, items: List[Dict[str, Any]]) -> "Cart":
+        """
+        Build a cart from a list of item dicts (barcode, name, quantity, price, discount).
+        Repeated barcodes are merged into one line.
+        :param items: List of item dicts
+        :return: Cart
+        """
+        cart = cls()
+        for item in items:
+            barcode = str(item.get("barcode", "")).strip()
+            quantity = int(item.get("quantity", 0) or 0)
+            existing = cart.get(barcode)
+            if existing:
+                cart.set_quantity(barcode, existing.quantity + quantity)
+                continue
+            cart.set_line(
+                barcode,
+                item.get("name", ""),
+                item.get("price", 0),
+                quantity,
+                item.get("discount", 0) or 0,
+                item.get("tax", 0) or 0,
+            )
+        return cart
@@ -224,3 +224,237 @@ def set_first_launch_shown(value: bool):
             json.dump(data, f)
     except Exception:
         pass
+
+
+DEFAULT_BACKUP_SETTINGS = {"enabled": True, "interval_hours": 24, "retention": 14, "last_backup": None}
+
+
+def get_backup_settings() -> dict:
+    """
+    Get the automatic backup settings.
+
+    Returns:
+        dict: enabled, interval_hours, retention (backups kept) and last_backup (ISO timestamp or None).
+    """
+    settings = dict(DEFAULT_BACKUP_SETTINGS)
+    if not os.path.exists(CONFIG_FILE):
+        return settings
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            data = json.load(f)
+        settings.update(data.get("backup", {}))
+    except Exception as e:
+        config_logger.error(f"Failed to read config in get_backup_settings: {e}")
+    return settings
+
+
+def set_backup_settings(**changes):
+    """
+    Update the automatic backup settings.
+
+    Args:
+        **changes: Any of enabled, interval_hours, retention, last_backup.
+    """
+    data = {}
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            config_logger.error(f"Failed to read config in set_backup_settings: {e}")
+            data = {}
+    data["backup"] = {**DEFAULT_BACKUP_SETTINGS, **data.get("backup", {}), **changes}
+    try:
+        with open(CONFIG_FILE, "w") as f:
+            json.dump(data, f)
+    except Exception as e:
+        config_logger.error(f"Failed to write config in set_backup_settings: {e}")
+
+
+DEFAULT_ARCHIVE_SETTINGS = {"enabled": True, "archive_after_days": 365, "last_run": None}
+
+
+def get_archive_settings() -> dict:
+    """
+    Get the bill/order archival settings.
+
+    Returns:
+        dict: enabled, archive_after_days (age at which closed records move to the archive) and last_run (ISO timestamp or None).
+    """
+    settings = dict(DEFAULT_ARCHIVE_SETTINGS)
+    if not os.path.exists(CONFIG_FILE):
+        return settings
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            data = json.load(f)
+        settings.update(data.get("archive", {}))
+    except Exception as e:
+        config_logger.error(f"Failed to read config in get_archive_settings: {e}")
+    return settings
+
+
+def set_archive_settings(**changes):
+    """
+    Update the bill/order archival settings.
+
+    Args:
+        **changes: Any of enabled, archive_after_days, last_run.
+    """
+    data = {}
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            config_logger.error(f"Failed to read config in set_archive_settings: {e}")
+            data = {}
+    data["archive"] = {**DEFAULT_ARCHIVE_SETTINGS, **data.get("archive", {}), **changes}
+    try:
+        with open(CONFIG_FILE, "w") as f:
+            json.dump(data, f)
+    except Exception as e:
+        config_logger.error(f"Failed to write config in set_archive_settings: {e}")
+
+
+DEFAULT_MAINTENANCE_SETTINGS = {"enabled": True, "interval_hours": 24, "idle_minutes": 5, "compress_artifacts_after_days": 90,
+                                "last_run": None, "last_result": None}
+
+
+def get_maintenance_settings() -> dict:
+    """
+    Get the database maintenance settings.
+
+    Returns:
+        dict: enabled, interval_hours, idle_minutes (UI inactivity before maintenance may start),
+        compress_artifacts_after_days (age at which receipt and order PDFs are gzipped after a run),
+        last_run (ISO timestamp or None) and last_result (report of the last run or None).
+    """
+    settings = dict(DEFAULT_MAINTENANCE_SETTINGS)
+    if not os.path.exists(CONFIG_FILE):
+        return settings
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            data = json.load(f)
+        settings.update(data.get("maintenance", {}))
+    except Exception as e:
+        config_logger.error(f"Failed to read config in get_maintenance_settings: {e}")
+    return settings
+
+
+def set_maintenance_settings(**changes):
+    """
+    Update the database maintenance settings.
+
+    Args:
+        **changes: Any of enabled, interval_hours, idle_minutes, compress_artifacts_after_days, last_run, last_result.
+    """
+    data = {}
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            config_logger.error(f"Failed to read config in set_maintenance_settings: {e}")
+            data = {}
+    data["maintenance"] = {**DEFAULT_MAINTENANCE_SETTINGS, **data.get("maintenance", {}), **changes}
+    try:
+        with open(CONFIG_FILE, "w") as f:
+            json.dump(data, f)
+    except Exception as e:
+        config_logger.error(f"Failed to write config in set_maintenance_settings: {e}")
+
+
+DEFAULT_PRINTER_SETTINGS = {"enabled": False, "device": "", "columns": 42, "cut": True, "pdf_receipts": True}
+
+
+def get_printer_settings() -> dict:
+    """
+    Get the thermal receipt printer settings.
+
+    Returns:
+        dict: enabled, device (printer device file such as /dev/usb/lp0 or /dev/ttyUSB0, or a spool file),
+        columns (characters per line: 42 for 80 mm paper, 32 for 58 mm), cut (feed and cut after each
+        receipt) and pdf_receipts (also render the A4 PDF, in the background when the printer is enabled).
+    """
+    settings = dict(DEFAULT_PRINTER_SETTINGS)
+    if not os.path.exists(CONFIG_FILE):
+        return settings
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            data = json.load(f)
+        settings.update(data.get("printer", {}))
+    except Exception as e:
+        config_logger.error(f"Failed to read config in get_printer_settings: {e}")
+    return settings
+
+
+def set_printer_settings(**changes):
+    """
+    Update the thermal receipt printer settings.
+
+    Args:
+        **changes: Any of enabled, device, columns, cut, pdf_receipts.
+    """
+    data = {}
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            config_logger.error(f"Failed to read config in set_printer_settings: {e}")
+            data = {}
+    data["printer"] = {**DEFAULT_PRINTER_SETTINGS, **data.get("printer", {}), **changes}
+    try:
+        with open(CONFIG_FILE, "w") as f:
+            json.dump(data, f)
+    except Exception as e:
+        config_logger.error(f"Failed to write config in set_printer_settings: {e}")
+
+
+DEFAULT_ALERT_SETTINGS = {"enabled": True, "check_times": ["09:00"], "summary_time": None, "debounce_seconds": 60,
+                          "restock_margin": 0.2}
+
+
+def get_alert_settings() -> dict:
+    """
+    Get the automatic alert settings.
+
+    Returns:
+        dict: enabled, check_times (daily 'HH:MM' checks, e.g. for newly expiring stock), summary_time
+        ('HH:MM' for the daily sales summary, or None for manual only), debounce_seconds (quiet time after
+        stock changes before a check), restock_margin (share of the threshold stock must recover by before a
+        low-stock alert can fire again). When the jobs last ran is kept in the database (db.get_alert_runs).
+    """
+    settings = dict(DEFAULT_ALERT_SETTINGS)
+    if not os.path.exists(CONFIG_FILE):
+        return settings
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            data = json.load(f)
+        settings.update(data.get("alerts", {}))
+    except Exception as e:
+        config_logger.error(f"Failed to read config in get_alert_settings: {e}")
+    return settings
+
+
+def set_alert_settings(**changes):
+    """
+    Update the automatic alert settings.
+
+    Args:
+        **changes: Any of enabled, check_times, summary_time, debounce_seconds, restock_margin.
+    """
+    data = {}
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            config_logger.error(f"Failed to read config in set_alert_settings: {e}")
+            data = {}
+    data["alerts"] = {**DEFAULT_ALERT_SETTINGS, **data.get("alerts", {}), **changes}
+    try:
+        with open(CONFIG_FILE, "w") as f:
+            json.dump(data, f)
+    except Exception as e:
+        config_logger.error(f"Failed to write config in set_alert_settings: {e}")
@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Optional
+import logging
+
+from db import find_customers, get_customer_bills, get_customers_by_ids, normalize_phone
+from metrics import instrumented
+from query_monitor import counted
+logger = logging.getLogger("medibit")
+
+LOOKUP_MIN_DIGITS = 3  # Phone digits typed before the checkout typeahead queries
+
+
+@instrumented("customers")
+@counted("customers")
+class CustomerService:
+    """
+    Lookups over the customers saved at checkout (db.commit_bill links each bill to its
+    customer by phone number). All lookups are index range scans.
+    """
+
+    def lookup_phone(self, prefix: str, limit: int = 10) -> List[Any]:
+        """
+        Customers whose phone starts with the digits typed so far.
+        :param prefix: Phone number as typed
+        :param limit: Maximum number of customers
+        :return: List of CustomerRow (empty below LOOKUP_MIN_DIGITS digits)
+        """
+        if len(normalize_phone(prefix)) < LOOKUP_MIN_DIGITS:
+            return []
+        try:
+            return find_customers(phone_prefix=prefix, limit=limit)
+        except Exception as e:
+            logger.error(f"[lookup_phone] Exception: {e}", exc_info=True)
+            return []
+
+    def search(self, query: str, limit: int = 50) -> List[Any]:
+        """
+        Customers by name prefix, or by phone prefix when the query is a number.
+        :param query: Name or phone prefix
+        :param limit: Maximum number of customers
+        :return: List of CustomerRow
+        """
+        query = (query or "").strip()
+        try:
+            if normalize_phone(query) and not any(ch.isalpha() for ch in query):
+                return find_customers(phone_prefix=query, limit=limit)
+            return find_customers(name_prefix=query, limit=limit)
+        except Exception as e:
+            logger.error(f"[search] Exception: {e}", exc_info=True)
+            return []
+
+    def get_history(self, customer_id: int, limit: Optional[int] = None) -> List[Any]:
+        """
+        Purchase history of a customer, newest first.
+        :param customer_id: Customer ID
+        :param limit: (optional) Only the most recent bills
+        :return: List of BillRow tuples (items included)
+        """
+        try:
+            return get_customer_bills(customer_id, limit)
+        except Exception as e:
+            logger.error(f"[get_history] Exception: {e}", exc_info=True)
+            return []
+
+    def names_for_bills(self, bills) -> Dict[int, str]:
+        """
+        :param bills: BillRow tuples
+        :return: Dict bill ID -> customer name, for bills linked to a customer
+        """
+        customers = get_customers_by_ids(bill.customer_id for bill in bills)
+        return {bill.id: customers[bill.customer_id].name for bill in bills if bill.customer_id in customers}
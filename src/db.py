@@ -1,14 +1,22 @@
 import datetime
+import json
 import logging
 import os
+from concurrent.futures import Future
+from contextlib import contextmanager
 from logging.handlers import RotatingFileHandler
+from typing import NamedTuple, Optional, Tuple
 
-from sqlalchemy import Column, Date, ForeignKey, Integer, String, create_engine
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Integer, String, create_engine, event, func, literal, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker, joinedload
+from sqlalchemy.orm import relationship, sessionmaker, joinedload, selectinload
 
 from config import get_threshold
+from db_writer import DbWriter
+from event_bus import BillCreated, MedicineChanged, OrderStatusChanged, StockAdjusted, bus
+from metrics import instrument_module
+import query_monitor
 
 Base = declarative_base()
 
@@ -51,13 +59,37 @@ class OrderMedicine(Base):
     order = relationship("Order", back_populates="medicines")
 
 
+class Customer(Base):
+    """Repeat customers, keyed by phone number (digits only)."""
+    __tablename__ = "customers"
+    id = Column(Integer, primary_key=True)
+    phone = Column(String, nullable=False, unique=True)
+    name = Column(String(collation="NOCASE"), nullable=False)  # NOCASE lets name-prefix LIKE use the index
+    age = Column(Integer, nullable=True)
+    gender = Column(String, nullable=True)
+    email = Column(String, nullable=True)
+    address = Column(String, nullable=True)
+    updated_at = Column(String, nullable=False)
+    __table_args__ = (Index("ix_customers_name", "name"),)
+
+
 class Bill(Base):
     __tablename__ = "bills"
     id = Column(Integer, primary_key=True)
     timestamp = Column(String, nullable=False)
     total = Column(Integer, nullable=False)
     file_path = Column(String, nullable=True)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)
+    # Tax components at finalize time (NULL for bills from before they were recorded)
+    tax_rate = Column(Float, nullable=True)
+    taxable_value = Column(Float, nullable=True)  # Total less bill discount, before tax
+    tax_amount = Column(Float, nullable=True)
+    discount_amount = Column(Float, nullable=True)
     items = relationship("BillItem", back_populates="bill")
+    __table_args__ = (
+        Index("ix_bills_timestamp", "timestamp"),
+        Index("ix_bills_customer_id", "customer_id", "timestamp"),  # Purchase history per customer
+    )
 
 
 class BillItem(Base):
@@ -70,7 +102,13 @@ class BillItem(Base):
     quantity = Column(Integer, nullable=False)
     subtotal = Column(Integer, nullable=False)
     discount = Column(Integer, nullable=True, default=0)
+    # This line's share of the bill discount and tax (see Cart.to_db_items)
+    taxable_value = Column(Float, nullable=True)
+    tax_rate = Column(Float, nullable=True)
+    tax_amount = Column(Float, nullable=True)
     bill = relationship("Bill", back_populates="items")
+    # Covers the per-day sales aggregate, so it never reads the item rows themselves
+    __table_args__ = (Index("ix_bill_items_bill_id", "bill_id", "barcode", "quantity"),)
 
 
 class PharmacyDetails(Base):
@@ -85,16 +123,219 @@ class PharmacyDetails(Base):
     website = Column(String, nullable=True)
 
 
+class Artifact(Base):
+    """A generated file (receipt or order PDF) recorded in the artifact index."""
+    __tablename__ = "artifacts"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # 'receipt' or 'order'
+    ref_id = Column(Integer, nullable=False)  # Bill or order ID
+    path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    sha256 = Column(String, nullable=False)
+    created_at = Column(String, nullable=False)
+    label = Column(String, nullable=True)  # Customer name for receipts
+    compressed = Column(Integer, nullable=False, default=0)
+    __table_args__ = (
+        Index("ix_artifacts_kind_ref", "kind", "ref_id"),
+        Index("ix_artifacts_kind_label", "kind", "label"),
+    )
+
+
+class Draft(Base):
+    """An in-progress bill saved as a named draft, or the single autosave slot."""
+    __tablename__ = "drafts"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    customer_name = Column(String, nullable=True)
+    data = Column(String, nullable=False)  # Compact JSON of the draft dict
+    created_at = Column(String, nullable=False)
+    updated_at = Column(String, nullable=False)
+    autosave = Column(Integer, nullable=False, default=0)
+    __table_args__ = (
+        Index("ix_drafts_name", "name"),
+        Index("ix_drafts_autosave_updated", "autosave", "updated_at"),
+    )
+
+
+class ArchiveState(Base):
+    """How far bills and orders have been moved into the archive database (see archive_service.py)."""
+    __tablename__ = "archive_state"
+    name = Column(String, primary_key=True)  # 'bills' or 'orders'
+    archived_before = Column(String, nullable=False)  # Rows older than this timestamp may be in the archive
+    updated_at = Column(String, nullable=False)
+
+
+class AlertState(Base):
+    """An alert condition that was notified and has not cleared yet (see alert_scheduler.py)."""
+    __tablename__ = "alert_state"
+    barcode = Column(String, primary_key=True)
+    condition = Column(String, primary_key=True)  # Watchlist category, e.g. 'low_stock'
+    fired_at = Column(String, nullable=False)
+
+
+class AlertRun(Base):
+    """When a scheduled alert job last ran, kept here rather than in config.json (see alert_scheduler.py)."""
+    __tablename__ = "alert_runs"
+    name = Column(String, primary_key=True)  # 'check' or 'summary'
+    ran_at = Column(String, nullable=False)
+
+
+class StockMovement(Base):
+    """One change to a medicine's stock, written in the same transaction as the change (append-only)."""
+    __tablename__ = "stock_movements"
+    id = Column(Integer, primary_key=True)
+    barcode = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # 'sale', 'receipt', 'adjustment' or 'import'
+    delta = Column(Integer, nullable=False)
+    quantity_after = Column(Integer, nullable=False)
+    price = Column(Integer, nullable=True)  # Unit price at the time, for valuation
+    ref = Column(String, nullable=True)  # e.g. 'bill:12', 'delete', 'clear'
+    timestamp = Column(String, nullable=False)
+    __table_args__ = (
+        Index("ix_stock_movements_barcode_id", "barcode", "id"),
+        Index("ix_stock_movements_timestamp", "timestamp"),
+    )
+
+
+class StockSnapshot(Base):
+    """Stock of every medicine after movement `movement_id`; historical stock replays movements from the nearest one."""
+    __tablename__ = "stock_snapshots"
+    id = Column(Integer, primary_key=True)
+    movement_id = Column(Integer, nullable=False)  # Last movement included (0 = before any)
+    taken_at = Column(String, nullable=False)
+    barcode = Column(String, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    price = Column(Integer, nullable=True)
+    __table_args__ = (
+        Index("ix_stock_snapshots_movement_barcode", "movement_id", "barcode"),
+        Index("ix_stock_snapshots_taken_at", "taken_at"),
+    )
+
+
+# Read models: list views and reports get plain immutable tuples from Core queries instead
+# of ORM instances, which carry identity-map state and per-attribute instrumentation.
+# ORM entities stay for writes and for the single-medicine edit paths.
+class MedicineRow(NamedTuple):
+    id: int
+    barcode: str
+    name: str
+    quantity: Optional[int]
+    expiry: Optional[datetime.date]
+    manufacturer: Optional[str]
+    price: Optional[int]
+    threshold: Optional[int]
+
+
+class BillItemRow(NamedTuple):
+    id: int
+    bill_id: int
+    barcode: str
+    name: str
+    price: int
+    quantity: int
+    subtotal: int
+    discount: Optional[int]
+
+
+class CustomerRow(NamedTuple):
+    id: int
+    phone: str
+    name: str
+    age: Optional[int]
+    gender: Optional[str]
+    email: Optional[str]
+    address: Optional[str]
+
+
+class TaxSummaryRow(NamedTuple):
+    period: str  # 'YYYY-MM'
+    tax_rate: Optional[float]  # None for bills from before tax was recorded
+    bills: int
+    lines: int
+    taxable_value: float
+    tax_amount: float
+    discount_amount: float
+    total: float
+
+
+class BillRow(NamedTuple):
+    id: int
+    timestamp: str
+    total: int
+    file_path: Optional[str]
+    customer_id: Optional[int]
+    items: Tuple[BillItemRow, ...] = ()
+
+
+_MEDICINE_ROW = select(*(getattr(Medicine, field) for field in MedicineRow._fields))
+_BILL_ROW = select(Bill.id, Bill.timestamp, Bill.total, Bill.file_path, Bill.customer_id)
+_CUSTOMER_ROW = select(*(getattr(Customer, field) for field in CustomerRow._fields))
+_BILL_ITEM_ROW = select(*(getattr(BillItem, field) for field in BillItemRow._fields))
+# One exported sales line per bill item, in export column order
+SALES_LINE_COLUMNS = ("bill_id", "timestamp", "barcode", "name", "quantity", "price", "discount", "subtotal",
+                      "taxable_value", "tax_rate", "tax_amount")
+_SALES_LINE = select(Bill.id, Bill.timestamp, *(getattr(BillItem, field) for field in SALES_LINE_COLUMNS[2:])) \
+    .join(BillItem, BillItem.bill_id == Bill.id)
+SALES_LINE_BATCH = 1000  # Rows fetched from the cursor per step of a sales export
+
+
+def _medicine_rows(session, statement) -> list:
+    # Runs the compiled SQL directly: on large catalogs SQLAlchemy's Date processor and Row
+    # objects cost more than the query itself (the query monitor still sees the statement)
+    compiled = statement.compile(engine, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+    from_iso = datetime.date.fromisoformat
+    return [
+        MedicineRow(row_id, barcode, name, quantity, from_iso(expiry) if expiry else None, manufacturer, price, threshold)
+        for row_id, barcode, name, quantity, expiry, manufacturer, price, threshold
+        in session.connection().exec_driver_sql(compiled.string, params)
+    ]
+
+
 # Set database directory at project root
 DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database")
 if not os.path.exists(DATABASE_DIR):
     os.makedirs(DATABASE_DIR)
-DB_FILENAME = os.path.join(DATABASE_DIR, "pharmacy_inventory.db")
+# MEDIBIT_DB_PATH points the app at another database file (benchmarks, load tests)
+DB_FILENAME = os.environ.get("MEDIBIT_DB_PATH") or os.path.join(DATABASE_DIR, "pharmacy_inventory.db")
+# Closed bills and completed orders past the archive age live in a separate file
+ARCHIVE_FILENAME = os.environ.get("MEDIBIT_ARCHIVE_PATH") or os.path.join(os.path.dirname(DB_FILENAME), "pharmacy_archive.db")
 DB_URL = f"sqlite:///{DB_FILENAME}"
 engine = create_engine(DB_URL, echo=False)
 Session = sessionmaker(bind=engine)
 
+
+@event.listens_for(engine, "connect")
+def _set_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # Lets maintenance return free pages to the OS (takes effect on new databases; older
+    # files are converted by the first maintenance run, see maintenance_service.py)
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets reads run while the writer thread commits
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+# All inventory and sales writes go through one writer thread (see db_writer.py)
+writer = DbWriter(Session)
+# Count queries per service call / UI action and log slow statements (see query_monitor.py)
+query_monitor.monitor.install(engine)
+
 LOW_STOCK_THRESHOLD = 10
+CUSTOMER_PHONE_DIGITS = 10  # Shortest phone number a customer is saved under
+
+
+def _add_missing_columns(conn, tables, schema: str = "main") -> None:
+    # Columns added to a model after its table was created (SQLite only supports ADD COLUMN)
+    for table in tables:
+        existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA {schema}.table_info({table.name})")}
+        if not existing:  # Table not created yet
+            continue
+        for column in table.columns:
+            if column.name not in existing:
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {schema}.{table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                )
 
 
 def init_db() -> None:
@@ -160,20 +401,58 @@ def init_db() -> None:
                 Base.metadata.create_all(engine)
                 print("All tables created successfully!")
 
+        # Create artifacts table (and its indexes) if missing
+        Artifact.__table__.create(engine, checkfirst=True)
+
+        # Create drafts table (and its indexes) if missing
+        Draft.__table__.create(engine, checkfirst=True)
+
+        # Customers, then the columns added to bills and bill items since (tax components,
+        # customer reference), in the live tables and in an existing archive
+        Customer.__table__.create(engine, checkfirst=True)
+        with engine.connect() as conn:
+            _add_missing_columns(conn, (Bill.__table__, BillItem.__table__))
+            conn.commit()
+        if os.path.exists(ARCHIVE_FILENAME):
+            with archive_session() as archive:
+                conn = archive.connection()
+                if conn.exec_driver_sql("SELECT 1 FROM archive.sqlite_master WHERE name = 'bills'").first():
+                    _add_missing_columns(conn, (Bill.__table__, BillItem.__table__), "archive")
+                    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS archive.ix_bills_customer_id "
+                                         "ON bills (customer_id, timestamp)")
+                    archive.commit()
+
+        # Sales history is read by date range and joined by bill ID (reports, reorder engine)
+        for index in (*Bill.__table__.indexes, *BillItem.__table__.indexes):
+            index.create(engine, checkfirst=True)
+
+        # Create archive_state and alert tables if missing
+        ArchiveState.__table__.create(engine, checkfirst=True)
+        AlertState.__table__.create(engine, checkfirst=True)
+        AlertRun.__table__.create(engine, checkfirst=True)
+
+        # Create the stock ledger tables if missing
+        StockMovement.__table__.create(engine, checkfirst=True)
+        StockSnapshot.__table__.create(engine, checkfirst=True)
+
         # Create default pharmacy details if none exist
         create_default_pharmacy_details()
 
+    # Opening snapshot for a new database, and existing stock for one created before the ledger
+    if get_latest_stock_snapshot() is None:
+        take_stock_snapshot()
+
 
 def get_all_medicines() -> list:
     """
     Retrieve all medicines from the inventory.
-    :return: List of Medicine objects
+    :return: List of MedicineRow tuples
     """
     session = Session()
-    medicines = session.query(Medicine).all()
-    session.expunge_all()  # Force reload of all objects
-    session.close()
-    return medicines
+    try:
+        return _medicine_rows(session, _MEDICINE_ROW)
+    finally:
+        session.close()
 
 
 def get_medicine_by_barcode(barcode: str) -> 'Medicine':
@@ -188,6 +467,53 @@ def get_medicine_by_barcode(barcode: str) -> 'Medicine':
     return medicine
 
 
+def _write(func, *args) -> tuple:
+    """
+    Run a write job on the DB writer thread and wait for its commit.
+    :return: The job's (success, message) result, or (False, error) if the write failed
+    """
+    try:
+        return writer.run(func, *args)
+    except Exception as e:
+        db_logger.error(f"Error in {func.__name__.lstrip('_')}: {e}")
+        return False, str(e)
+
+
+def _now() -> str:
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _publish(session, event) -> None:
+    # Write jobs queue domain events on their session; the bus publishes them once the transaction commits
+    session.info.setdefault("events", []).append(event)
+
+
+def _record_movement(session, barcode, kind, delta, quantity_after, price=None, ref=None) -> None:
+    # Every stock change calls this inside its own write job, so the ledger commits with the change
+    if delta:
+        session.add(StockMovement(barcode=barcode, kind=kind, delta=delta, quantity_after=quantity_after,
+                                  price=price, ref=ref, timestamp=_now()))
+
+
+def _parse_expiry(expiry):
+    # Convert expiry to date if it's a string
+    if isinstance(expiry, str):
+        try:
+            return datetime.datetime.strptime(expiry, "%Y-%m-%d").date()
+        except Exception:
+            return None
+    return expiry
+
+
+def _update_medicine_threshold(session, barcode, threshold) -> tuple:
+    medicine = session.query(Medicine).filter_by(barcode=barcode).first()
+    if not medicine:
+        return False, "Medicine not found"
+    medicine.threshold = threshold
+    _publish(session, MedicineChanged((barcode,)))
+    return True, None
+
+
 def update_medicine_threshold(barcode: str, threshold: int) -> tuple:
     """
     Update the threshold value for a medicine.
@@ -195,130 +521,114 @@ def update_medicine_threshold(barcode: str, threshold: int) -> tuple:
     :param threshold: New threshold value
     :return: (success, error message)
     """
-    session = Session()
-    try:
-        medicine = session.query(Medicine).filter_by(barcode=barcode).first()
-        if medicine:
-            medicine.threshold = threshold
-            session.commit()
-            return True, None
-        else:
-            return False, "Medicine not found"
-    except Exception as e:
-        session.rollback()
-        return False, str(e)
-    finally:
-        session.close()
+    return _write(_update_medicine_threshold, barcode, threshold)
 
 
-def update_medicine(barcode: str, name: str, quantity: int, expiry, manufacturer: str, price: int, threshold: int) -> tuple:
-    import datetime
-    session = Session()
-    try:
-        # Convert expiry to date if it's a string
-        if isinstance(expiry, str):
-            try:
-                expiry = datetime.datetime.strptime(expiry, "%Y-%m-%d").date()
-            except Exception:
-                expiry = None
-        medicine = session.query(Medicine).filter_by(barcode=barcode).first()
-        if medicine:
-            medicine.name = name
-            medicine.quantity = quantity
-            medicine.expiry = expiry
-            medicine.manufacturer = manufacturer
-            medicine.price = price
-            medicine.threshold = threshold
-            session.commit()
-            return True, None
-        else:
-            return False, "Medicine not found"
-    except Exception as e:
-        session.rollback()
-        return False, str(e)
-    finally:
-        session.close()
+def _update_medicine(session, barcode, name, quantity, expiry, manufacturer, price, threshold, kind="adjustment") -> tuple:
+    medicine = session.query(Medicine).filter_by(barcode=barcode).first()
+    if not medicine:
+        return False, "Medicine not found"
+    _record_movement(session, barcode, kind, quantity - (medicine.quantity or 0), quantity, price)
+    medicine.name = name
+    medicine.quantity = quantity
+    medicine.expiry = _parse_expiry(expiry)
+    medicine.manufacturer = manufacturer
+    medicine.price = price
+    medicine.threshold = threshold
+    _publish(session, MedicineChanged((barcode,)))
+    return True, None
+
+
+def update_medicine(barcode: str, name: str, quantity: int, expiry, manufacturer: str, price: int, threshold: int,
+                    kind: str = "adjustment") -> tuple:
+    return _write(_update_medicine, barcode, name, quantity, expiry, manufacturer, price, threshold, kind)
+
+
+def update_medicine_async(barcode: str, name: str, quantity: int, expiry, manufacturer: str, price: int, threshold: int,
+                          kind: str = "adjustment") -> Future:
+    """
+    Queue update_medicine() on the writer without waiting, so bulk callers (Excel import)
+    share commits. The future resolves to (success, error message) or raises.
+    """
+    return writer.submit(_update_medicine, barcode, name, quantity, expiry, manufacturer, price, threshold, kind)
 
 
-def update_medicine_quantity(barcode: str, new_quantity: int) -> tuple:
-    session = Session()
-    try:
-        medicine = session.query(Medicine).filter_by(barcode=barcode).first()
-        if medicine:
-            medicine.quantity = new_quantity
-            session.commit()
-            return True, None
-        else:
-            return False, "Medicine not found"
-    except Exception as e:
-        session.rollback()
-        return False, str(e)
-    finally:
-        session.close()
+def _update_medicine_quantity(session, barcode, new_quantity, kind="adjustment") -> tuple:
+    medicine = session.query(Medicine).filter_by(barcode=barcode).first()
+    if not medicine:
+        return False, "Medicine not found"
+    _record_movement(session, barcode, kind, new_quantity - (medicine.quantity or 0), new_quantity, medicine.price)
+    medicine.quantity = new_quantity
+    _publish(session, StockAdjusted((barcode,), kind))
+    return True, None
 
 
-def add_medicine(barcode: str, name: str, quantity: int, expiry, manufacturer: str, price: int = 0, threshold: int = 10) -> tuple:
-    import datetime
-    session = Session()
-    try:
-        # Convert expiry to date if it's a string
-        if isinstance(expiry, str):
-            try:
-                expiry = datetime.datetime.strptime(expiry, "%Y-%m-%d").date()
-            except Exception:
-                expiry = None
-        existing_medicine = session.query(Medicine).filter_by(barcode=barcode).first()
-        if existing_medicine:
-            existing_medicine.name = name
-            existing_medicine.quantity += quantity
-            existing_medicine.expiry = expiry
-            existing_medicine.manufacturer = manufacturer
-            existing_medicine.price = price
-            existing_medicine.threshold = threshold
-            session.commit()
-            return True, None
-        else:
-            new_medicine = Medicine(
-                barcode=barcode,
-                name=name,
-                quantity=quantity,
-                expiry=expiry,
-                manufacturer=manufacturer,
-                price=price,
-                threshold=threshold
-            )
-            session.add(new_medicine)
-            session.commit()
-            return True, None
-    except Exception as e:
-        session.rollback()
-        return False, str(e)
-    finally:
-        session.close()
+def update_medicine_quantity(barcode: str, new_quantity: int, kind: str = "adjustment") -> tuple:
+    """
+    Set a medicine's stock level.
+    :param barcode: Medicine barcode
+    :param new_quantity: New stock level
+    :param kind: Ledger movement kind ('adjustment' for counts and corrections, 'receipt' for deliveries)
+    :return: (success, error message)
+    """
+    return _write(_update_medicine_quantity, barcode, new_quantity, kind)
+
+
+def _add_medicine(session, barcode, name, quantity, expiry, manufacturer, price, threshold, kind="receipt") -> tuple:
+    expiry = _parse_expiry(expiry)
+    existing_medicine = session.query(Medicine).filter_by(barcode=barcode).first()
+    if existing_medicine:
+        _record_movement(session, barcode, kind, quantity, (existing_medicine.quantity or 0) + quantity, price)
+        existing_medicine.name = name
+        existing_medicine.quantity += quantity
+        existing_medicine.expiry = expiry
+        existing_medicine.manufacturer = manufacturer
+        existing_medicine.price = price
+        existing_medicine.threshold = threshold
+        _publish(session, StockAdjusted((barcode,), kind))
+    else:
+        session.add(Medicine(
+            barcode=barcode,
+            name=name,
+            quantity=quantity,
+            expiry=expiry,
+            manufacturer=manufacturer,
+            price=price,
+            threshold=threshold
+        ))
+        session.flush()
+        _record_movement(session, barcode, kind, quantity, quantity, price)
+        _publish(session, MedicineChanged((barcode,)))
+    return True, None
 
 
-def get_low_stock_medicines() -> list:
+def add_medicine(barcode: str, name: str, quantity: int, expiry, manufacturer: str, price: int = 0, threshold: int = 10,
+                 kind: str = "receipt") -> tuple:
+    return _write(_add_medicine, barcode, name, quantity, expiry, manufacturer, price, threshold, kind)
+
+
+def add_medicine_async(barcode: str, name: str, quantity: int, expiry, manufacturer: str, price: int = 0, threshold: int = 10,
+                       kind: str = "receipt") -> Future:
     """
-    Retrieve all medicines that are below their individual stock threshold.
-    :return: List of Medicine objects
+    Queue add_medicine() on the writer without waiting (see update_medicine_async).
     """
-    session = Session()
-    # Use individual thresholds instead of global threshold
-    medicines = (
-        session.query(Medicine).filter(Medicine.quantity < Medicine.threshold).all()
-    )
-    session.close()
-    return medicines
+    return writer.submit(_add_medicine, barcode, name, quantity, expiry, manufacturer, price, threshold, kind)
 
 
-def add_order(timestamp: str, file_path: str, medicines: list) -> None:
+def get_low_stock_medicines() -> list:
     """
-    Add a new order to the database.
-    :param timestamp: Order timestamp
-    :param file_path: Path to order PDF
-    :param medicines: List of medicine dicts or objects
+    Retrieve all medicines that are below their individual stock threshold.
+    :return: List of MedicineRow tuples
     """
     session = Session()
+    try:
+        # Use individual thresholds instead of global threshold
+        return _medicine_rows(session, _MEDICINE_ROW.where(Medicine.quantity < Medicine.threshold))
+    finally:
+        session.close()
+
+
+def _add_order(session, timestamp, file_path, medicines) -> int:
     order = Order(timestamp=timestamp, file_path=file_path)
     session.add(order)
     session.flush()  # get order.id
@@ -350,26 +660,107 @@ def add_order(timestamp: str, file_path: str, medicines: list) -> None:
             order_quantity=order_quantity,
         )
         session.add(order_med)
-    session.commit()
-    session.close()
+    return order.id
+
+
+def add_order(timestamp: str, file_path: str, medicines: list) -> int:
+    """
+    Add a new order to the database.
+    :param timestamp: Order timestamp
+    :param file_path: Path to order PDF
+    :param medicines: List of medicine dicts or objects
+    :return: Order ID
+    """
+    return writer.run(_add_order, timestamp, file_path, medicines)
     # NOTE: If you get a DB error about missing 'order_quantity', \
     # delete pharmacy_inventory.db and restart the app to recreate the DB.
 
 
-def get_all_orders() -> list:
+def get_archive_watermark(name: str) -> str:
+    """
+    Return the timestamp below which rows of a table may have been archived.
+    :param name: 'bills' or 'orders'
+    :return: Timestamp string, or None if nothing was archived
+    """
+    session = Session()
+    try:
+        state = session.get(ArchiveState, name)
+        return state.archived_before if state else None
+    finally:
+        session.close()
+
+
+def _archive_needed(name: str, start_date=None) -> str:
+    """
+    Return the archive watermark if a query starting at start_date can reach archived rows, else None.
+    """
+    watermark = get_archive_watermark(name)
+    if not watermark or not os.path.exists(ARCHIVE_FILENAME):
+        return None
+    if start_date and str(start_date) >= watermark:
+        return None
+    return watermark
+
+
+@contextmanager
+def archive_session():
+    """
+    Session whose queries read the archive tables. The archive file is ATTACHed to one
+    connection for the duration and the ORM models are mapped onto it with a schema
+    translate map, so the usual queries work unchanged.
+    """
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ATTACH DATABASE ? AS archive", (ARCHIVE_FILENAME,))
+        try:
+            session = Session(bind=conn.execution_options(schema_translate_map={None: "archive"}))
+            try:
+                yield session
+            finally:
+                session.close()
+        finally:
+            conn.rollback()
+            conn.exec_driver_sql("DETACH DATABASE archive")
+
+
+def get_all_orders(include_archived: bool = False) -> list:
     """
     Retrieve all orders from the database.
-    :return: List of Order objects
+    :param include_archived: Also return completed orders moved to the archive
+    :return: List of Order objects, newest first
     """
     session = Session()
-    orders = session.query(Order).order_by(Order.id.desc()).all()
-    # Eager load medicines
+    try:
+        # Load all order medicines in one extra query instead of one per order
+        orders = session.query(Order).options(selectinload(Order.medicines)).order_by(Order.id.desc()).all()
+    finally:
+        session.close()
+    watermark = _archive_needed("orders") if include_archived else None
+    if watermark:
+        with archive_session() as archive:
+            hot_ids = {o.id for o in orders}
+            orders += [o for o in archive.query(Order).options(selectinload(Order.medicines))
+                       .filter(Order.timestamp < watermark).order_by(Order.id.desc()).all() if o.id not in hot_ids]
     for order in orders:
-        order.meds = session.query(OrderMedicine).filter_by(order_id=order.id).all()
-    session.close()
+        order.meds = list(order.medicines)
     return orders
 
 
+def get_order(order_id: int) -> 'Order':
+    """
+    Retrieve one order with its medicines.
+    :param order_id: Order ID
+    :return: Order object (with .meds) or None
+    """
+    session = Session()
+    try:
+        order = session.query(Order).options(selectinload(Order.medicines)).filter(Order.id == order_id).first()
+        if order is not None:
+            order.meds = list(order.medicines)
+        return order
+    finally:
+        session.close()
+
+
 def get_order_items(order_id: int) -> list:
     """
     Retrieve all order items (OrderMedicine) for a given order ID.
@@ -382,294 +773,800 @@ def get_order_items(order_id: int) -> list:
     return items
 
 
-def add_bill(timestamp: str, total: int, items: list, file_path: str = None) -> int:
+def get_orders_by_status(status: str = None) -> list:
+    """
+    Retrieve orders with their items loaded in a single query, optionally filtered by status.
+    :param status: (optional) 'pending' or 'completed'
+    :return: List of Order objects
+    """
+    session = Session()
+    try:
+        query = session.query(Order).options(joinedload(Order.medicines))
+        if status:
+            query = query.filter(Order.status == status)
+        return query.order_by(Order.id).all()
+    finally:
+        session.close()
+
+
+def add_bill(timestamp: str, total: int, items: list, file_path: str = None, tax: dict = None) -> int:
     """
-    Add a new bill to the database.
+    Add a new bill to the database. Runs the same write job as commit_bill, so stock is
+    decremented and the sale movements are recorded with the bill.
     :param timestamp: Bill timestamp
     :param total: Total bill amount
     :param items: List of bill item dicts
     :param file_path: Optional path to bill PDF
+    :param tax: Optional bill tax components (Cart.tax_summary)
     :return: Bill ID
     """
-    session = Session()
-    bill = Bill(timestamp=timestamp, total=total, file_path=file_path)
+    return writer.run(_commit_bill, timestamp, total, items, file_path, tax)[1]
+
+
+def _commit_bill(session, timestamp, total, items, file_path, tax=None, customer=None) -> tuple:
+    customer_id = _save_customer(session, customer) if customer else None
+    bill = Bill(timestamp=timestamp, total=total, file_path=file_path, customer_id=customer_id, **(tax or {}))
     session.add(bill)
     session.flush()
-    for item in items:
-        bill_item = BillItem(
+    session.add_all([
+        BillItem(
             bill_id=bill.id,
             barcode=item["barcode"],
             name=item["name"],
             price=item["price"],
             quantity=item["quantity"],
             subtotal=item["subtotal"],
-            discount=item.get("discount", 0)
+            discount=item.get("discount", 0),
+            taxable_value=item.get("taxable_value"),
+            tax_rate=item.get("tax_rate"),
+            tax_amount=item.get("tax_amount"),
         )
-        session.add(bill_item)
-    session.commit()
-    bill_id = bill.id  # Capture the ID before closing the session
-    session.close()
-    return bill_id
+        for item in items
+    ])
+    session.flush()
+    # The bill insert holds the write lock, so these levels cannot change before the updates below
+    stock = dict(
+        session.query(Medicine.barcode, Medicine.quantity)
+        .filter(Medicine.barcode.in_({item["barcode"] for item in items}))
+        .all()
+    )
+    for item in items:
+        session.execute(
+            update(Medicine)
+            .where(Medicine.barcode == item["barcode"])
+            .values(quantity=func.max(Medicine.quantity - item["quantity"], 0))
+        )
+        barcode = item["barcode"]
+        if barcode in stock:
+            before = stock[barcode] or 0
+            stock[barcode] = max(before - item["quantity"], 0)
+            _record_movement(session, barcode, "sale", stock[barcode] - before, stock[barcode], item["price"], f"bill:{bill.id}")
+    session.flush()
+    _publish(session, StockAdjusted(tuple(stock), "sale"))
+    _publish(session, BillCreated(bill.id, timestamp, total))
+    return True, bill.id
 
 
-def get_all_bills() -> list:
+def commit_bill(timestamp: str, total, items: list, file_path: str = None, tax: dict = None,
+                customer: dict = None) -> tuple:
     """
-    Retrieve all bills from the database.
-    :return: List of Bill objects
+    Record a sale as a single unit of work: insert the bill and its items and
+    decrement stock for every line in one transaction. Stock is decremented in
+    SQL (never below zero) so concurrent sales cannot overwrite each other.
+    :param timestamp: Bill timestamp
+    :param total: Total bill amount
+    :param items: List of bill item dicts (barcode, name, price, quantity, subtotal, discount,
+                  optionally taxable_value, tax_rate, tax_amount)
+    :param file_path: Optional path to bill PDF
+    :param tax: Optional bill tax components: tax_rate, taxable_value, tax_amount, discount_amount
+    :param customer: Optional customer dict (name, phone, age, gender, email, address); customers
+                     with a phone number are saved (or updated) and linked to the bill
+    :return: (success, bill_id or error message)
     """
-    session = Session()
-    bills = session.query(Bill).options(joinedload(Bill.items)).order_by(Bill.id.desc()).all()
-    session.close()
-    return bills
+    return _write(_commit_bill, timestamp, total, items, file_path, tax, customer)
 
 
-def get_monthly_sales(start_date=None, end_date=None) -> list:
+def normalize_phone(phone) -> str:
     """
-    Return a list of (Month, Total Sales, Bill Count, Average Bill) for each month with sales, filtered by date range if provided.
-    :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date
-    :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date
-    :return: List of tuples (month_name, total, count, avg)
+    :param phone: Phone number as typed
+    :return: Its digits only ('' if none)
     """
-    session = Session()
-    try:
-        import calendar
-        from collections import defaultdict
-        import datetime
-        # Prepare date filters
-        query = session.query(Bill)
-        if start_date:
-            if isinstance(start_date, str):
-                start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
-            query = query.filter(Bill.timestamp >= str(start_date))
-        if end_date:
-            if isinstance(end_date, str):
-                end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
-            query = query.filter(Bill.timestamp <= str(end_date))
-        bills = query.order_by(Bill.timestamp).all()
-        monthly = defaultdict(lambda: {"total": 0, "count": 0})
-        for bill in bills:
-            try:
-                dt = datetime.datetime.strptime(bill.timestamp[:10], "%Y-%m-%d")
-            except Exception:
-                continue
-            key = (dt.year, dt.month)
-            monthly[key]["total"] += bill.total
-            monthly[key]["count"] += 1
-        result = []
-        for (year, month), data in sorted(monthly.items()):
-            month_name = f"{calendar.month_name[month]} {year}"
-            total = data["total"]
-            count = data["count"]
-            avg = total / count if count else 0
-            result.append((month_name, total, count, avg))
-        return result
-    finally:
-        session.close()
+    return "".join(ch for ch in str(phone or "") if ch.isdigit())
 
 
-def get_pharmacy_details() -> 'PharmacyDetails':
+def _save_customer(session, customer: dict) -> Optional[int]:
+    # Insert or refresh the customer with this phone; blank fields keep their stored value
+    phone = normalize_phone(customer.get("phone"))
+    name = str(customer.get("name") or "").strip()
+    if len(phone) < CUSTOMER_PHONE_DIGITS or not name:
+        return None
+    fields = {key: customer[key] for key in ("age", "gender", "email", "address") if customer.get(key)}
+    fields.update(name=name, updated_at=datetime.datetime.now().isoformat(timespec="seconds"))
+    row = session.query(Customer).filter_by(phone=phone).one_or_none()
+    if row is None:
+        row = Customer(phone=phone, **fields)
+        session.add(row)
+        session.flush()
+    else:
+        for key, value in fields.items():
+            setattr(row, key, value)
+    return row.id
+
+
+def find_customers(phone_prefix: str = None, name_prefix: str = None, limit: int = 10) -> list:
     """
-    Retrieve pharmacy details from the database.
-    :return: PharmacyDetails object or None
+    Customers whose phone (or name, case-insensitively) starts with a prefix; both are index range scans.
+    :param phone_prefix: Digits typed so far (non-digits are ignored)
+    :param name_prefix: Start of the name
+    :param limit: Maximum number of customers
+    :return: List of CustomerRow, by phone or name
     """
+    statement = _CUSTOMER_ROW
+    if phone_prefix is not None:
+        digits = normalize_phone(phone_prefix)
+        if not digits:
+            return []
+        # Digits sort before ':' so [prefix, prefix + ':') is every phone starting with the prefix
+        statement = statement.where(Customer.phone >= digits, Customer.phone < digits + ":").order_by(Customer.phone)
+    if name_prefix is not None:
+        escaped = name_prefix.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        if not escaped:
+            return []
+        statement = statement.where(Customer.name.like(escaped + "%", escape="\\")).order_by(Customer.name)
     session = Session()
     try:
-        details = session.query(PharmacyDetails).first()
-        session.close()
-        return details
-    except Exception as e:
+        return [CustomerRow._make(row) for row in session.execute(statement.limit(limit))]
+    finally:
         session.close()
-        return None
 
 
-def save_pharmacy_details(
-    name: str, address: str, phone: str, email: str, gst_number: str = "", license_number: str = "", website: str = ""
-) -> tuple:
+def get_customers_by_ids(customer_ids) -> dict:
     """
-    Save or update pharmacy details in the database.
-    :param name: Pharmacy name
-    :param address: Address
-    :param phone: Phone number
-    :param email: Email address
-    :param gst_number: GST number (optional)
-    :param license_number: License number (optional)
-    :param website: Website (optional)
-    :return: (success, message)
+    :param customer_ids: Iterable of customer IDs (None is skipped)
+    :return: Dict customer ID -> CustomerRow
     """
+    customer_ids = list({customer_id for customer_id in customer_ids if customer_id is not None})
+    if not customer_ids:
+        return {}
     session = Session()
     try:
-        # Check if pharmacy details already exist
-        existing = session.query(PharmacyDetails).first()
-        if existing:
-            # Update existing details
-            existing.name = name
-            existing.address = address
-            existing.phone = phone
-            existing.email = email
-            existing.gst_number = gst_number
-            existing.license_number = license_number
-            existing.website = website
-        else:
-            # Create new pharmacy details
-            details = PharmacyDetails(
-                name=name,
-                address=address,
-                phone=phone,
-                email=email,
-                gst_number=gst_number,
-                license_number=license_number,
-                website=website,
-            )
-            session.add(details)
-
-        session.commit()
-        return True, "Pharmacy details saved successfully"
-    except Exception as e:
-        session.rollback()
-        return False, str(e)
+        customers = {}
+        for i in range(0, len(customer_ids), 500):  # Stay well under SQLite's bound-parameter limit
+            rows = session.execute(_CUSTOMER_ROW.where(Customer.id.in_(customer_ids[i:i + 500])))
+            customers.update((row.id, CustomerRow._make(row)) for row in rows)
+        return customers
     finally:
         session.close()
 
 
-def create_default_pharmacy_details() -> bool:
+def get_customer_bills(customer_id: int, limit: int = None) -> list:
     """
-    Create default pharmacy details if none exist.
-    :return: True if created, False if already exists or error
+    Purchase history of a customer, newest first, archived bills included.
+    :param customer_id: Customer ID
+    :param limit: (optional) Only the most recent bills
+    :return: List of BillRow tuples (items included)
     """
+    statement = _BILL_ROW.where(Bill.customer_id == customer_id).order_by(Bill.timestamp.desc(), Bill.id.desc())
+    if limit is not None:
+        statement = statement.limit(limit)
     session = Session()
     try:
-        existing = session.query(PharmacyDetails).first()
-        if not existing:
-            default_details = PharmacyDetails(
-                name="medibit Pharmacy",
-                address="123 Main Street, City, State 12345",
-                phone="+1-555-123-4567",
-                email="info@medibitpharmacy.com",
-                gst_number="",
-                license_number="",
-                website="www.medibitpharmacy.com",
-            )
-            session.add(default_details)
-            session.commit()
-            return True
-        return False
-    except Exception as e:
-        session.rollback()
-        return False
+        bills = _bill_rows(session, statement)
     finally:
         session.close()
+    watermark = _archive_needed("bills")
+    if watermark and (limit is None or len(bills) < limit):
+        with archive_session() as archive:
+            archived = _bill_rows(archive, statement.where(Bill.timestamp < watermark))
+        hot_ids = {b.id for b in bills}
+        bills = sorted([b for b in archived if b.id not in hot_ids] + bills,
+                       key=lambda b: (b.timestamp, b.id), reverse=True)[:limit]
+    return bills
 
 
-def delete_medicine(barcode: str) -> tuple:
+def get_watch_levels(barcodes=None) -> list:
     """
-    Delete a single medicine from the inventory by barcode.
-    :param barcode: Medicine barcode
-    :return: (success, error message)
+    Stock, threshold and expiry of medicines, as plain rows for the watchlist.
+    :param barcodes: (optional) Only these barcodes
+    :return: List of (barcode, quantity, threshold, expiry) tuples
     """
+    query = select(Medicine.barcode, func.coalesce(Medicine.quantity, 0),
+                   func.coalesce(Medicine.threshold, LOW_STOCK_THRESHOLD), Medicine.expiry)
     session = Session()
     try:
-        medicine = session.query(Medicine).filter_by(barcode=barcode).first()
-        if medicine:
-            session.delete(medicine)
-            session.commit()
-            return True, None
-        else:
-            return False, "Medicine not found"
-    except Exception as e:
-        session.rollback()
-        return False, str(e)
+        if barcodes is None:
+            return session.execute(query).all()
+        barcodes = list(barcodes)
+        rows = []
+        for i in range(0, len(barcodes), 500):  # Stay well under SQLite's bound-parameter limit
+            rows += session.execute(query.where(Medicine.barcode.in_(barcodes[i:i + 500]))).all()
+        return rows
     finally:
         session.close()
 
 
-def clear_inventory() -> tuple:
+def get_alert_states() -> dict:
     """
-    Delete all medicines from the inventory.
-    :return: (success, number deleted or error message)
+    Alert conditions that have been notified and not cleared.
+    :return: Dict (barcode, condition) -> fired_at timestamp
     """
     session = Session()
     try:
-        num_deleted = session.query(Medicine).delete()
-        session.commit()
-        return True, num_deleted
-    except Exception as e:
-        session.rollback()
-        return False, str(e)
+        return {(barcode, condition): fired_at for barcode, condition, fired_at
+                in session.execute(select(AlertState.barcode, AlertState.condition, AlertState.fired_at))}
     finally:
         session.close()
 
 
-def clear_all_bills() -> None:
+def _update_alert_states(session, fired, cleared) -> tuple:
+    now = _now()
+    for barcode, condition in cleared:
+        session.query(AlertState).filter_by(barcode=barcode, condition=condition).delete()
+    for barcode, condition in fired:
+        session.merge(AlertState(barcode=barcode, condition=condition, fired_at=now))
+    return True, len(fired) + len(cleared)
+
+
+def update_alert_states(fired=(), cleared=()) -> tuple:
     """
-    Delete all bills from the database.
+    Record alert conditions as notified, and forget the ones that cleared.
+    :param fired: Iterable of (barcode, condition) pairs that were just notified
+    :param cleared: Iterable of (barcode, condition) pairs that no longer hold
+    :return: (success, number of changes or error message)
+    """
+    return _write(_update_alert_states, list(fired), list(cleared))
+
+
+def get_alert_runs() -> dict:
+    """
+    When the scheduled alert jobs last ran.
+    :return: Dict job name ('check', 'summary') -> ISO timestamp
     """
     session = Session()
     try:
-        session.query(BillItem).delete()
-        session.query(Bill).delete()
-        session.commit()
-        return True
-    except Exception as e:
-        session.rollback()
-        return False
+        return dict(session.execute(select(AlertRun.name, AlertRun.ran_at)).all())
     finally:
         session.close()
 
 
-def update_order_status(order_id: int, status: str) -> bool:
+def _record_alert_run(session, name, ran_at) -> tuple:
+    session.merge(AlertRun(name=name, ran_at=ran_at))
+    return True, name
+
+
+def _forget_alert_run(session, name) -> tuple:
+    session.query(AlertRun).filter_by(name=name).delete()
+    return True, name
+
+
+def record_alert_run(name: str, ran_at: Optional[str]) -> tuple:
     """
-    Update the status of an order.
-    :param order_id: Order ID
-    :param status: New status ('pending' or 'completed')
-    :return: True if updated, False otherwise
+    Record that a scheduled alert job ran, or forget it so the job is due again.
+    :param name: Job name ('check' or 'summary')
+    :param ran_at: ISO timestamp of the run, or None to forget it
+    :return: (success, name or error message)
     """
+    if ran_at is None:
+        return _write(_forget_alert_run, name)
+    return _write(_record_alert_run, name, ran_at)
+
+
+def get_medicines_by_barcodes(barcodes) -> list:
+    """
+    Medicines with the given barcodes, ordered by name.
+    :param barcodes: Iterable of barcodes
+    :return: List of MedicineRow tuples
+    """
+    barcodes = list(barcodes)
     session = Session()
     try:
-        order = session.query(Order).filter_by(id=order_id).first()
-        if order:
-            order.status = status
-            session.commit()
-            return True
-        return False
-    except Exception as e:
-        session.rollback()
-        return False
+        medicines = []
+        for i in range(0, len(barcodes), 500):
+            medicines += _medicine_rows(session, _MEDICINE_ROW.where(Medicine.barcode.in_(barcodes[i:i + 500])))
+        return sorted(medicines, key=lambda m: (m.name or "", m.barcode))
     finally:
         session.close()
 
 
-def update_bill_file_path(bill_id: int, file_path: str) -> None:
+def get_daily_item_sales(start_date, end_date=None, barcodes=None) -> list:
     """
-    Update the file_path of a bill after PDF generation.
-    :param bill_id: Bill ID
-    :param file_path: Path to the PDF receipt
+    Units sold per barcode per day, aggregated in one query.
+    :param start_date: string 'YYYY-MM-DD' or datetime.date, inclusive
+    :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date, exclusive
+    :param barcodes: (optional) Only these barcodes
+    :return: List of (barcode, 'YYYY-MM-DD', units) tuples
+    """
+    day = func.substr(Bill.timestamp, 1, 10)
+    query = (select(BillItem.barcode, day, func.sum(BillItem.quantity))
+             .join(Bill, Bill.id == BillItem.bill_id)
+             .where(Bill.timestamp >= str(_parse_date(start_date))))
+    if end_date:
+        query = query.where(Bill.timestamp < str(_parse_date(end_date)))
+    query = query.group_by(BillItem.barcode, day)
+    session = Session()
+    try:
+        # Plain rows: tens of thousands of them, so skip the ORM Query machinery
+        if barcodes is None:
+            return session.execute(query).all()
+        barcodes = list(barcodes)
+        rows = []
+        for i in range(0, len(barcodes), 500):
+            rows += session.execute(query.where(BillItem.barcode.in_(barcodes[i:i + 500]))).all()
+        return rows
+    finally:
+        session.close()
+
+
+def get_stock_levels(barcodes=None) -> list:
+    """
+    Stock level and threshold of medicines, without loading full Medicine objects.
+    :param barcodes: (optional) Only these barcodes; defaults to every medicine
+    :return: List of (barcode, quantity, threshold) tuples
+    """
+    if barcodes is not None:
+        return [row[:3] for row in get_watch_levels(barcodes)]
+    session = Session()
+    try:
+        return session.execute(select(Medicine.barcode, func.coalesce(Medicine.quantity, 0),
+                                      func.coalesce(Medicine.threshold, LOW_STOCK_THRESHOLD))).all()
+    finally:
+        session.close()
+
+
+def _bill_rows(session, statement) -> list:
+    # Two queries whatever the number of bills: the bills, then all their items
+    bills = session.execute(statement).all()
+    items = {}
+    if bills:
+        item_rows = session.execute(
+            _BILL_ITEM_ROW.where(BillItem.bill_id.in_(statement.with_only_columns(Bill.id))).order_by(BillItem.id)
+        )
+        for row in item_rows:
+            items.setdefault(row.bill_id, []).append(BillItemRow._make(row))
+    return [BillRow(*bill, tuple(items.get(bill.id, ()))) for bill in bills]
+
+
+def get_all_bills(limit: int = None) -> list:
+    """
+    Retrieve all bills from the database, newest first.
+    :param limit: (optional) Only the most recent bills
+    :return: List of BillRow tuples (items included)
+    """
+    statement = _BILL_ROW.order_by(Bill.id.desc())
+    if limit is not None:
+        statement = statement.limit(limit)
+    session = Session()
+    try:
+        return _bill_rows(session, statement)
+    finally:
+        session.close()
+
+
+def get_bills_by_ids(bill_ids) -> list:
+    """
+    Retrieve specific bills with their items, newest first.
+    :param bill_ids: Iterable of bill IDs
+    :return: List of BillRow tuples
+    """
+    session = Session()
+    try:
+        return _bill_rows(session, _BILL_ROW.where(Bill.id.in_(list(bill_ids))).order_by(Bill.id.desc()))
+    finally:
+        session.close()
+
+
+def _parse_date(value):
+    if value and isinstance(value, str):
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    return value
+
+
+def _bills_in_range(statement, start_date=None, end_date=None):
+    # Both dates inclusive; timestamps are 'YYYY-MM-DD HH:MM:SS' strings
+    if start_date:
+        statement = statement.where(Bill.timestamp >= str(start_date))
+    if end_date:
+        statement = statement.where(Bill.timestamp < str(end_date + datetime.timedelta(days=1)))
+    return statement
+
+
+def get_bills_between(start_date=None, end_date=None) -> list:
+    """
+    Retrieve bills (with items) whose timestamp falls within a date range, oldest first.
+    Archived bills are included when the range reaches back past the archive watermark.
+    :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+    :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+    :return: List of BillRow tuples (items included)
+    """
+    start_date, end_date = _parse_date(start_date), _parse_date(end_date)
+    statement = _bills_in_range(_BILL_ROW, start_date, end_date).order_by(Bill.timestamp, Bill.id)
+
+    session = Session()
+    try:
+        bills = _bill_rows(session, statement)
+    finally:
+        session.close()
+    watermark = _archive_needed("bills", start_date)
+    if watermark:
+        with archive_session() as archive:
+            archived = _bill_rows(archive, statement.where(Bill.timestamp < watermark))
+        # A batch interrupted between the two files can leave a bill in both; the live copy wins
+        hot_ids = {b.id for b in bills}
+        bills = sorted([b for b in archived if b.id not in hot_ids] + bills, key=lambda b: (b.timestamp, b.id))
+    return bills
+
+
+def _live_bill_ids_before(watermark, start_date=None, end_date=None) -> set:
+    # Bills older than the watermark that are still live: left in both files by an
+    # interrupted archive batch, normally none. Archive reads skip them.
+    session = Session()
+    try:
+        return set(session.scalars(
+            _bills_in_range(select(Bill.id), start_date, end_date).where(Bill.timestamp < watermark)
+        ))
+    finally:
+        session.close()
+
+
+def get_tax_summary(start_date=None, end_date=None) -> list:
+    """
+    Tax liability per month and tax rate, aggregated in SQL over bills and bill items.
+    Archived bills are included when the range reaches back past the archive watermark.
+    Bills from before tax was recorded are grouped under tax_rate None, with their
+    line subtotals as taxable value and no tax.
+    :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+    :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+    :return: List of TaxSummaryRow, by period then rate
+    """
+    start_date, end_date = _parse_date(start_date), _parse_date(end_date)
+    period = func.substr(Bill.timestamp, 1, 7)
+    lines = _bills_in_range(
+        select(period, BillItem.tax_rate, func.count(),
+               func.sum(func.coalesce(BillItem.taxable_value, BillItem.subtotal)),
+               func.sum(func.coalesce(BillItem.tax_amount, 0)))
+        .join(BillItem, BillItem.bill_id == Bill.id), start_date, end_date
+    ).group_by(period, BillItem.tax_rate)
+    bills = _bills_in_range(
+        select(period, Bill.tax_rate, func.count(), func.sum(func.coalesce(Bill.discount_amount, 0)),
+               func.sum(Bill.total)), start_date, end_date
+    ).group_by(period, Bill.tax_rate)
+
+    groups = {}
+
+    def collect(session, where=()):
+        for key_period, rate, count, taxable, tax in session.execute(lines.where(*where)):
+            group = groups.setdefault((key_period, rate), [0, 0, 0.0, 0.0, 0.0, 0.0])
+            group[1] += count
+            group[2] += taxable or 0
+            group[3] += tax or 0
+        for key_period, rate, count, discount, total in session.execute(bills.where(*where)):
+            group = groups.setdefault((key_period, rate), [0, 0, 0.0, 0.0, 0.0, 0.0])
+            group[0] += count
+            group[4] += discount or 0
+            group[5] += total or 0
+
+    session = Session()
+    try:
+        collect(session)
+    finally:
+        session.close()
+    watermark = _archive_needed("bills", start_date)
+    if watermark:
+        live_ids = _live_bill_ids_before(watermark, start_date, end_date)
+        with archive_session() as archive:
+            collect(archive, (Bill.timestamp < watermark, Bill.id.notin_(live_ids)))
+    return [
+        TaxSummaryRow(key_period, rate, count, line_count, *(round(value, 2) for value in sums))
+        for (key_period, rate), (count, line_count, *sums) in sorted(
+            groups.items(), key=lambda item: (item[0][0], item[0][1] is None, item[0][1] or 0))
+    ]
+
+
+def count_sales_lines(start_date=None, end_date=None) -> int:
+    """
+    Count bill items in a date range, archived ones included (for export progress).
+    :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+    :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+    :return: Number of lines
+    """
+    start_date, end_date = _parse_date(start_date), _parse_date(end_date)
+    statement = _bills_in_range(_SALES_LINE.with_only_columns(func.count()), start_date, end_date)
+    session = Session()
+    try:
+        count = session.execute(statement).scalar_one()
+    finally:
+        session.close()
+    watermark = _archive_needed("bills", start_date)
+    if watermark:
+        with archive_session() as archive:
+            count += archive.execute(statement.where(Bill.timestamp < watermark)).scalar_one()
+    return count
+
+
+def _stream_sales_lines(session, statement, batch_size, skip_bills=frozenset()):
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition if row[0] not in skip_bills]
+
+
+def iter_sales_lines(start_date=None, end_date=None, batch_size: int = SALES_LINE_BATCH):
+    """
+    Stream every bill item in a date range, joined to its bill, oldest first. Rows come off
+    a server-side cursor batch_size at a time, so memory stays flat whatever the range.
+    Archived bills come first; a bill left in both files by an interrupted archive batch is
+    read from the live database. Close the generator (or exhaust it) to release the cursor.
+    :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+    :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+    :param batch_size: Rows per yielded batch
+    :return: Generator of lists of tuples in SALES_LINE_COLUMNS order
+    """
+    start_date, end_date = _parse_date(start_date), _parse_date(end_date)
+    statement = _bills_in_range(_SALES_LINE, start_date, end_date).order_by(Bill.timestamp, Bill.id, BillItem.id)
+    watermark = _archive_needed("bills", start_date)
+    if watermark:
+        live_ids = _live_bill_ids_before(watermark, start_date, end_date)
+        with archive_session() as archive:
+            yield from _stream_sales_lines(archive, statement.where(Bill.timestamp < watermark), batch_size, live_ids)
+    session = Session()
+    try:
+        yield from _stream_sales_lines(session, statement, batch_size)
+    finally:
+        session.close()
+
+
+def get_monthly_sales(start_date=None, end_date=None) -> list:
+    """
+    Return a list of (Month, Total Sales, Bill Count, Average Bill) for each month with sales, filtered by date range if provided.
+    Archived bills are included when the range reaches back past the archive watermark.
+    :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date
+    :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date
+    :return: List of tuples (month_name, total, count, avg)
     """
+    import calendar
+    from collections import defaultdict
+    start_date, end_date = _parse_date(start_date), _parse_date(end_date)
+
+    def query(session):
+        q = session.query(Bill.id, Bill.timestamp, Bill.total)
+        if start_date:
+            q = q.filter(Bill.timestamp >= str(start_date))
+        if end_date:
+            q = q.filter(Bill.timestamp <= str(end_date))
+        return q
+
     session = Session()
-    bill = session.query(Bill).filter_by(id=bill_id).first()
-    if bill:
-        bill.file_path = file_path
-        session.commit()
-        session.expire_all()  # Force session refresh
+    try:
+        rows = query(session).all()
+    finally:
+        session.close()
+    watermark = _archive_needed("bills", start_date)
+    if watermark:
+        with archive_session() as archive:
+            hot_ids = {row[0] for row in rows}
+            rows += [row for row in query(archive).filter(Bill.timestamp < watermark).all() if row[0] not in hot_ids]
+    monthly = defaultdict(lambda: {"total": 0, "count": 0})
+    for _, timestamp, total in rows:
+        try:
+            dt = datetime.datetime.strptime(timestamp[:10], "%Y-%m-%d")
+        except Exception:
+            continue
+        key = (dt.year, dt.month)
+        monthly[key]["total"] += total
+        monthly[key]["count"] += 1
+    result = []
+    for (year, month), data in sorted(monthly.items()):
+        month_name = f"{calendar.month_name[month]} {year}"
+        total = data["total"]
+        count = data["count"]
+        avg = total / count if count else 0
+        result.append((month_name, total, count, avg))
+    return result
+
+
+def get_pharmacy_details() -> 'PharmacyDetails':
+    """
+    Retrieve pharmacy details from the database.
+    :return: PharmacyDetails object or None
+    """
+    session = Session()
+    try:
+        details = session.query(PharmacyDetails).first()
+        session.close()
+        return details
+    except Exception as e:
+        session.close()
+        return None
+
+
+def _save_pharmacy_details(session, details) -> tuple:
+    # Check if pharmacy details already exist
+    existing = session.query(PharmacyDetails).first()
+    if existing:
+        # Update existing details
+        for field, value in details.items():
+            setattr(existing, field, value)
     else:
-        pass # Removed debug print
-    session.close()
+        # Create new pharmacy details
+        session.add(PharmacyDetails(**details))
+    return True, "Pharmacy details saved successfully"
 
 
-def update_order(order_id: int, supplier: str, medicines: list) -> None:
+def save_pharmacy_details(
+    name: str, address: str, phone: str, email: str, gst_number: str = "", license_number: str = "", website: str = ""
+) -> tuple:
     """
-    Update an existing order and its medicines. Only allowed if order is pending.
+    Save or update pharmacy details in the database.
+    :param name: Pharmacy name
+    :param address: Address
+    :param phone: Phone number
+    :param email: Email address
+    :param gst_number: GST number (optional)
+    :param license_number: License number (optional)
+    :param website: Website (optional)
+    :return: (success, message)
+    """
+    return _write(_save_pharmacy_details, dict(
+        name=name, address=address, phone=phone, email=email,
+        gst_number=gst_number, license_number=license_number, website=website,
+    ))
+
+
+def _create_default_pharmacy_details(session) -> tuple:
+    if session.query(PharmacyDetails).first():
+        return False, None
+    session.add(PharmacyDetails(
+        name="medibit Pharmacy",
+        address="123 Main Street, City, State 12345",
+        phone="+1-555-123-4567",
+        email="info@medibitpharmacy.com",
+        gst_number="",
+        license_number="",
+        website="www.medibitpharmacy.com",
+    ))
+    return True, None
+
+
+def create_default_pharmacy_details() -> bool:
+    """
+    Create default pharmacy details if none exist.
+    :return: True if created, False if already exists or error
+    """
+    return _write(_create_default_pharmacy_details)[0]
+
+
+def _delete_medicine(session, barcode) -> tuple:
+    medicine = session.query(Medicine).filter_by(barcode=barcode).first()
+    if not medicine:
+        return False, "Medicine not found"
+    _record_movement(session, barcode, "adjustment", -(medicine.quantity or 0), 0, medicine.price, "delete")
+    session.delete(medicine)
+    _publish(session, MedicineChanged((barcode,), deleted=True))
+    return True, None
+
+
+def delete_medicine(barcode: str) -> tuple:
+    """
+    Delete a single medicine from the inventory by barcode.
+    :param barcode: Medicine barcode
+    :return: (success, error message)
+    """
+    return _write(_delete_medicine, barcode)
+
+
+def _clear_inventory(session) -> tuple:
+    # Zero every stock level in the ledger with one INSERT ... SELECT before the rows go
+    session.execute(
+        StockMovement.__table__.insert().from_select(
+            ["barcode", "kind", "delta", "quantity_after", "price", "ref", "timestamp"],
+            session.query(Medicine.barcode, literal("adjustment"), -Medicine.quantity, literal(0),
+                          Medicine.price, literal("clear"), literal(_now()))
+            .filter(Medicine.quantity != 0)
+            .statement,
+        )
+    )
+    _publish(session, MedicineChanged(None, deleted=True))
+    return True, session.query(Medicine).delete()
+
+
+def clear_inventory() -> tuple:
+    """
+    Delete all medicines from the inventory.
+    :return: (success, number deleted or error message)
+    """
+    return _write(_clear_inventory)
+
+
+def _clear_archive(*models) -> None:
+    # "Clear all" covers archived rows too; IDs restart once the hot tables are empty
+    if not os.path.exists(ARCHIVE_FILENAME):
+        return
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ATTACH DATABASE ? AS archive", (ARCHIVE_FILENAME,))
+        try:
+            for model in models:
+                conn.exec_driver_sql(f"DELETE FROM archive.{model.__tablename__}")
+            conn.commit()
+        finally:
+            conn.exec_driver_sql("DETACH DATABASE archive")
+
+
+def _clear_all_bills(session) -> tuple:
+    session.query(BillItem).delete()
+    session.query(Bill).delete()
+    # Bill IDs are reused once the table is empty, so drop their receipt index rows too
+    session.query(Artifact).filter(Artifact.kind == "receipt").delete()
+    session.query(ArchiveState).filter(ArchiveState.name == "bills").delete()
+    return True, None
+
+
+def clear_all_bills() -> None:
+    """
+    Delete all bills from the database.
+    """
+    if not _write(_clear_all_bills)[0]:
+        return False
+    # ATTACH cannot run inside the writer's transaction, so the archive is cleared after it commits
+    _clear_archive(BillItem, Bill)
+    return True
+
+
+def _update_order_status(session, order_id, status) -> tuple:
+    order = session.query(Order).filter_by(id=order_id).first()
+    if not order:
+        return False, "Order not found"
+    if status == "completed" and order.status != "completed":
+        # A delivered order restocks every medicine still in the inventory
+        received = {}
+        for med in order.medicines:
+            received[med.barcode] = received.get(med.barcode, 0) + (med.order_quantity or 0)
+        restocked = session.query(Medicine).filter(Medicine.barcode.in_(received)).all()
+        for medicine in restocked:
+            medicine.quantity = (medicine.quantity or 0) + received[medicine.barcode]
+            _record_movement(session, medicine.barcode, "receipt", received[medicine.barcode], medicine.quantity,
+                             medicine.price, f"order:{order_id}")
+        if restocked:
+            _publish(session, StockAdjusted(tuple(m.barcode for m in restocked), "receipt"))
+    order.status = status
+    _publish(session, OrderStatusChanged(order_id, status))
+    return True, order_id
+
+
+def update_order_status(order_id: int, status: str) -> bool:
+    """
+    Update the status of an order. Completing a pending order adds its order quantities
+    to stock and records them as receipt movements.
     :param order_id: Order ID
-    :param supplier: Supplier name
-    :param medicines: List of medicine dicts
+    :param status: New status ('pending' or 'completed')
+    :return: True if updated, False otherwise
     """
-    session = Session()
+    return _write(_update_order_status, order_id, status)[0]
+
+
+def _update_bill_file_path(session, bill_id, file_path) -> tuple:
+    updated = session.query(Bill).filter_by(id=bill_id).update({"file_path": file_path})
+    return bool(updated), None
+
+
+def update_bill_file_path(bill_id: int, file_path: str) -> None:
+    """
+    Update the file_path of a bill after PDF generation.
+    :param bill_id: Bill ID
+    :param file_path: Path to the PDF receipt
+    """
+    _write(_update_bill_file_path, bill_id, file_path)
+
+
+def _pending_order(session, order_id, action) -> 'Order':
     order = session.query(Order).filter_by(id=order_id).first()
     if not order:
-        session.close()
         raise Exception("Order not found")
     if order.status != "pending":
-        session.close()
-        raise Exception("Only pending orders can be edited")
+        raise Exception(f"Only pending orders can be {action}")
+    return order
+
+
+def _update_order(session, order_id, supplier, medicines) -> None:
+    _pending_order(session, order_id, "edited")
     # Update supplier for all medicines
     # Remove existing medicines
     session.query(OrderMedicine).filter_by(order_id=order_id).delete()
@@ -685,8 +1582,23 @@ def update_order(order_id: int, supplier: str, medicines: list) -> None:
             order_quantity=med.get("order_quantity", None),
         )
         session.add(order_med)
-    session.commit()
-    session.close()
+
+
+def update_order(order_id: int, supplier: str, medicines: list) -> None:
+    """
+    Update an existing order and its medicines. Only allowed if order is pending.
+    :param order_id: Order ID
+    :param supplier: Supplier name
+    :param medicines: List of medicine dicts
+    """
+    writer.run(_update_order, order_id, supplier, medicines)
+
+
+def _delete_order(session, order_id) -> None:
+    order = _pending_order(session, order_id, "deleted")
+    session.query(OrderMedicine).filter_by(order_id=order_id).delete()
+    session.query(Artifact).filter_by(kind="order", ref_id=order_id).delete()
+    session.delete(order)
 
 
 def delete_order(order_id: int) -> None:
@@ -694,18 +1606,12 @@ def delete_order(order_id: int) -> None:
     Delete an order and its medicines by ID, only if the order is pending.
     :param order_id: Order ID
     """
-    session = Session()
-    order = session.query(Order).filter_by(id=order_id).first()
-    if not order:
-        session.close()
+    writer.run(_delete_order, order_id)
+
+
+def _update_order_file_path(session, order_id, file_path) -> None:
+    if not session.query(Order).filter_by(id=order_id).update({"file_path": file_path}):
         raise Exception("Order not found")
-    if order.status != "pending":
-        session.close()
-        raise Exception("Only pending orders can be deleted")
-    session.query(OrderMedicine).filter_by(order_id=order_id).delete()
-    session.delete(order)
-    session.commit()
-    session.close()
 
 
 def update_order_file_path(order_id: int, file_path: str) -> None:
@@ -714,28 +1620,479 @@ def update_order_file_path(order_id: int, file_path: str) -> None:
     :param order_id: Order ID
     :param file_path: Path to PDF file
     """
-    session = Session()
-    order = session.query(Order).filter_by(id=order_id).first()
-    if not order:
-        session.close()
-        raise Exception("Order not found")
-    order.file_path = file_path
-    session.commit()
-    session.close()
+    writer.run(_update_order_file_path, order_id, file_path)
+
+
+def _clear_all_orders(session) -> tuple:
+    session.query(OrderMedicine).delete()
+    session.query(Order).delete()
+    session.query(Artifact).filter(Artifact.kind == "order").delete()
+    session.query(ArchiveState).filter(ArchiveState.name == "orders").delete()
+    return True, None
 
 
 def clear_all_orders() -> None:
     """
     Delete all orders and their medicines from the database.
     """
+    if not _write(_clear_all_orders)[0]:
+        return False
+    _clear_archive(OrderMedicine, Order)
+    return True
+
+
+def _add_artifact(session, artifact) -> int:
+    session.add(artifact)
+    session.flush()
+    return artifact.id
+
+
+def add_artifact(kind: str, ref_id: int, path: str, size: int, sha256: str, label: str = None, compressed: bool = False) -> int:
+    """
+    Record a generated file in the artifact index.
+    :param kind: Artifact kind ('receipt' or 'order')
+    :param ref_id: Bill or order ID
+    :param path: File path
+    :param size: File size in bytes
+    :param sha256: Hex SHA-256 of the file contents
+    :param label: Optional label (customer name for receipts)
+    :param compressed: Whether the stored file is gzip-compressed
+    :return: Artifact ID
+    """
+    return writer.run(_add_artifact, Artifact(
+        kind=kind, ref_id=ref_id, path=path, size=size, sha256=sha256,
+        created_at=datetime.datetime.now().isoformat(timespec="seconds"),
+        label=label, compressed=1 if compressed else 0,
+    ))
+
+
+def get_latest_artifact(kind: str, ref_id: int) -> 'Artifact':
+    """
+    Return the most recent artifact for a bill or order (indexed lookup).
+    :param kind: Artifact kind
+    :param ref_id: Bill or order ID
+    :return: Artifact or None
+    """
     session = Session()
     try:
-        session.query(OrderMedicine).delete()
-        session.query(Order).delete()
-        session.commit()
-        return True
+        return (
+            session.query(Artifact)
+            .filter(Artifact.kind == kind, Artifact.ref_id == ref_id)
+            .order_by(Artifact.id.desc())
+            .first()
+        )
+    finally:
+        session.close()
+
+
+def get_latest_artifacts(kind: str, ref_ids: list) -> dict:
+    """
+    Return the most recent artifact for each of several bills or orders in one query.
+    :param kind: Artifact kind
+    :param ref_ids: Bill or order IDs
+    :return: Dict of ref_id -> Artifact
+    """
+    if not ref_ids:
+        return {}
+    session = Session()
+    try:
+        latest = (
+            session.query(func.max(Artifact.id))
+            .filter(Artifact.kind == kind, Artifact.ref_id.in_(ref_ids))
+            .group_by(Artifact.ref_id)
+        )
+        return {a.ref_id: a for a in session.query(Artifact).filter(Artifact.id.in_(latest)).all()}
+    finally:
+        session.close()
+
+
+def get_latest_artifact_by_label(kind: str, label: str) -> 'Artifact':
+    """
+    Return the most recent artifact with the given label (e.g. a customer's latest receipt).
+    :param kind: Artifact kind
+    :param label: Label to match exactly
+    :return: Artifact or None
+    """
+    session = Session()
+    try:
+        return (
+            session.query(Artifact)
+            .filter(Artifact.kind == kind, Artifact.label == label)
+            .order_by(Artifact.id.desc())
+            .first()
+        )
+    finally:
+        session.close()
+
+
+def get_uncompressed_artifacts_before(cutoff: str, kind: str = None) -> list:
+    """
+    Return uncompressed artifacts created before a cutoff.
+    :param cutoff: ISO timestamp string
+    :param kind: Optional artifact kind filter
+    :return: List of Artifact objects
+    """
+    session = Session()
+    try:
+        query = session.query(Artifact).filter(Artifact.compressed == 0, Artifact.created_at < cutoff)
+        if kind:
+            query = query.filter(Artifact.kind == kind)
+        return query.order_by(Artifact.id).all()
+    finally:
+        session.close()
+
+
+def _mark_artifact_compressed(session, artifact_id, path, size) -> tuple:
+    session.query(Artifact).filter_by(id=artifact_id).update(
+        {"path": path, "size": size, "compressed": 1}
+    )
+    return True, None
+
+
+def mark_artifact_compressed(artifact_id: int, path: str, size: int) -> None:
+    """
+    Point an artifact at its compressed file.
+    :param artifact_id: Artifact ID
+    :param path: Path of the compressed file
+    :param size: Compressed size in bytes
+    """
+    _write(_mark_artifact_compressed, artifact_id, path, size)
+
+
+def _draft_payload(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _upsert_draft(session, name, data, draft_id) -> int:
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    draft = session.get(Draft, draft_id) if draft_id else None
+    if draft is None:
+        draft = Draft(name=name, created_at=now, autosave=0)
+        session.add(draft)
+    draft.name = name
+    draft.customer_name = (data.get("customer") or {}).get("name") or None
+    draft.data = _draft_payload(data)
+    draft.updated_at = now
+    session.flush()
+    return draft.id
+
+
+def upsert_draft(name: str, data: dict, draft_id: int = None) -> int:
+    """
+    Insert a named draft, or overwrite an existing one in place.
+    :param name: Draft name
+    :param data: Draft dict (customer, items, tax, discount, subtotal, total)
+    :param draft_id: (optional) ID of the draft to overwrite
+    :return: Draft ID
+    """
+    return writer.run(_upsert_draft, name, data, draft_id)
+
+
+def _autosave_draft(session, data) -> None:
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    payload = _draft_payload(data)
+    customer_name = (data.get("customer") or {}).get("name") or None
+    updated = (
+        session.query(Draft)
+        .filter(Draft.autosave == 1)
+        .update({"data": payload, "customer_name": customer_name, "updated_at": now})
+    )
+    if not updated:
+        session.add(Draft(name="Autosave", customer_name=customer_name, data=payload,
+                          created_at=now, updated_at=now, autosave=1))
+
+
+def autosave_draft(data: dict) -> None:
+    """
+    Write the in-progress bill to the autosave slot (a single row updated in place).
+    :param data: Draft dict
+    """
+    writer.run(_autosave_draft, data)
+
+
+def get_autosave_draft() -> dict:
+    """
+    Return the autosaved in-progress bill, if any.
+    :return: Draft dict or None
+    """
+    session = Session()
+    try:
+        row = session.query(Draft.data).filter(Draft.autosave == 1).first()
+        return json.loads(row.data) if row else None
+    finally:
+        session.close()
+
+
+def _delete_drafts(session, condition) -> int:
+    return session.query(Draft).filter(condition).delete()
+
+
+def clear_autosave_draft() -> None:
+    """
+    Remove the autosaved in-progress bill.
+    """
+    writer.run(_delete_drafts, Draft.autosave == 1)
+
+
+def get_draft(draft_id: int) -> dict:
+    """
+    Return a saved draft's contents by ID.
+    :param draft_id: Draft ID
+    :return: Draft dict or None
+    """
+    session = Session()
+    try:
+        row = session.query(Draft.data).filter(Draft.id == draft_id).first()
+        return json.loads(row.data) if row else None
+    finally:
+        session.close()
+
+
+def list_drafts(limit: int = 10, offset: int = 0) -> list:
+    """
+    Return one page of named drafts, most recently updated first. Only the listing
+    columns are read; the draft contents are loaded with get_draft().
+    :param limit: Page size
+    :param offset: Rows to skip
+    :return: List of rows with id, name, customer_name, updated_at
+    """
+    session = Session()
+    try:
+        return (
+            session.query(Draft.id, Draft.name, Draft.customer_name, Draft.updated_at)
+            .filter(Draft.autosave == 0)
+            .order_by(Draft.updated_at.desc(), Draft.id.desc())
+            .limit(limit)
+            .offset(offset)
+            .all()
+        )
+    finally:
+        session.close()
+
+
+def remove_draft(draft_id: int) -> bool:
+    """
+    Delete a saved draft by ID.
+    :param draft_id: Draft ID
+    :return: True if a draft was deleted
+    """
+    return bool(writer.run(_delete_drafts, Draft.id == draft_id))
+
+
+# --- Stock ledger ---------------------------------------------------------------------------
+SNAPSHOT_INTERVAL = datetime.timedelta(days=1)
+# Snapshot sooner when this many movements accumulate, so history queries stay short
+SNAPSHOT_MAX_MOVEMENTS = 20000
+SNAPSHOT_KEEP = 60
+SNAPSHOT_MARKER = ""  # Barcode of the zero-stock row that records a snapshot of an empty catalog
+
+
+def _take_stock_snapshot(session, keep) -> int:
+    movement_id = session.query(func.max(StockMovement.id)).scalar() or 0
+    if session.query(StockSnapshot.id).filter(StockSnapshot.movement_id == movement_id).first():
+        return movement_id  # Nothing moved since the last snapshot
+    taken_at = _now()
+    inserted = session.execute(
+        StockSnapshot.__table__.insert().from_select(
+            ["movement_id", "taken_at", "barcode", "quantity", "price"],
+            session.query(literal(movement_id), literal(taken_at), Medicine.barcode,
+                          func.coalesce(Medicine.quantity, 0), Medicine.price).statement,
+        )
+    ).rowcount
+    if not inserted:
+        # An empty catalog still records the snapshot, or it would stay due forever
+        session.add(StockSnapshot(movement_id=movement_id, taken_at=taken_at, barcode=SNAPSHOT_MARKER, quantity=0))
+        session.flush()
+    # Older snapshots are not needed: history before the oldest one kept is replayed backwards
+    kept = [row[0] for row in session.query(StockSnapshot.movement_id).distinct()
+            .order_by(StockSnapshot.movement_id.desc()).limit(keep)]
+    session.query(StockSnapshot).filter(StockSnapshot.movement_id < kept[-1]).delete()
+    return movement_id
+
+
+def take_stock_snapshot(keep: int = SNAPSHOT_KEEP) -> tuple:
+    """
+    Record the current stock of every medicine as a ledger snapshot (runs on the writer thread,
+    so it lines up exactly with the movements committed before it).
+    :param keep: Number of snapshots to keep
+    :return: (success, last movement ID included or error message)
+    """
+    try:
+        return True, writer.run(_take_stock_snapshot, keep)
     except Exception as e:
-        session.rollback()
-        return False
+        db_logger.error(f"Error in take_stock_snapshot: {e}")
+        return False, str(e)
+
+
+def get_latest_stock_snapshot() -> tuple:
+    """
+    :return: (movement_id, taken_at) of the newest snapshot, or None if there is none
+    """
+    session = Session()
+    try:
+        return (session.query(StockSnapshot.movement_id, StockSnapshot.taken_at)
+                .order_by(StockSnapshot.movement_id.desc()).first())
+    finally:
+        session.close()
+
+
+def is_stock_snapshot_due(now: datetime.datetime = None) -> bool:
+    latest = get_latest_stock_snapshot()
+    if latest is None:
+        return True
+    now = now or datetime.datetime.now()
+    session = Session()
+    try:
+        moved = session.query(func.count(StockMovement.id)).filter(StockMovement.id > latest.movement_id).scalar()
     finally:
         session.close()
+    if moved >= SNAPSHOT_MAX_MOVEMENTS:
+        return True
+    # Nothing moved since the last snapshot: a new one would be identical
+    return moved > 0 and now - datetime.datetime.strptime(latest.taken_at, "%Y-%m-%d %H:%M:%S") >= SNAPSHOT_INTERVAL
+
+
+def take_stock_snapshot_if_due() -> tuple:
+    """
+    Take a stock snapshot if one is due (intended for a timer on a background thread).
+    :return: (success, movement ID or reason)
+    """
+    if not is_stock_snapshot_due():
+        return False, "No stock snapshot due."
+    return take_stock_snapshot()
+
+
+def _ledger_boundary(when):
+    # A date means "at the end of that day"; movements strictly before the boundary count
+    when = _parse_date(when)
+    if when is None:
+        return None
+    if isinstance(when, datetime.datetime):
+        return when.strftime("%Y-%m-%d %H:%M:%S")
+    return str(when + datetime.timedelta(days=1))
+
+
+def get_stock_on(when=None, barcodes: list = None) -> dict:
+    """
+    Stock per barcode at a point in time, from the nearest snapshot plus the movements
+    between it and that time, so the cost is bounded by the movements since a snapshot.
+    :param when: (optional) 'YYYY-MM-DD' or datetime.date (end of that day), or datetime.datetime; default now
+    :param barcodes: (optional) Only these barcodes
+    :return: Dict barcode -> (quantity, unit price); barcodes with no stock are left out
+    """
+    boundary = _ledger_boundary(when)
+    session = Session()
+    try:
+        snapshots = session.query(StockSnapshot.movement_id, StockSnapshot.taken_at)
+        before = snapshots
+        if boundary:
+            before = before.filter(StockSnapshot.taken_at < boundary)
+        base = before.order_by(StockSnapshot.movement_id.desc()).first()
+        backwards = False
+        if base is None:
+            # History older than every snapshot kept: start from the oldest and undo later movements
+            base = snapshots.order_by(StockSnapshot.movement_id).first()
+            backwards = base is not None
+
+        stock = {}
+        if base is not None:
+            rows = session.query(StockSnapshot.barcode, StockSnapshot.quantity, StockSnapshot.price).filter(
+                StockSnapshot.movement_id == base.movement_id)
+            if barcodes is not None:
+                rows = rows.filter(StockSnapshot.barcode.in_(barcodes))
+            stock = {barcode: [quantity, price] for barcode, quantity, price in rows}
+
+        # SQLite returns the bare price column from the row holding MAX(id): the latest price
+        moved = session.query(StockMovement.barcode, func.sum(StockMovement.delta), StockMovement.price,
+                              func.max(StockMovement.id))
+        if backwards:
+            moved = moved.filter(StockMovement.id <= base.movement_id, StockMovement.timestamp >= boundary)
+        else:
+            if base is not None:
+                moved = moved.filter(StockMovement.id > base.movement_id)
+            if boundary:
+                moved = moved.filter(StockMovement.timestamp < boundary)
+        if barcodes is not None:
+            moved = moved.filter(StockMovement.barcode.in_(barcodes))
+        for barcode, delta, price, _ in moved.group_by(StockMovement.barcode):
+            entry = stock.setdefault(barcode, [0, price])
+            if backwards:
+                entry[0] -= delta
+            else:
+                entry[0] += delta
+                if price is not None:
+                    entry[1] = price
+        return {barcode: (quantity, price) for barcode, (quantity, price) in stock.items() if quantity}
+    finally:
+        session.close()
+
+
+def get_stock_valuation(when=None) -> int:
+    """
+    Value of the stock at a point in time (quantity x unit price at that time).
+    :param when: See get_stock_on()
+    :return: Total value
+    """
+    return sum(quantity * (price or 0) for quantity, price in get_stock_on(when).values())
+
+
+def get_stock_movements(barcode: str = None, start_date=None, end_date=None, kind: str = None) -> list:
+    """
+    Ledger movements, oldest first, filtered by barcode, date range (inclusive) and kind.
+    :return: List of StockMovement objects
+    """
+    session = Session()
+    try:
+        query = session.query(StockMovement)
+        if barcode:
+            query = query.filter(StockMovement.barcode == barcode)
+        if start_date:
+            query = query.filter(StockMovement.timestamp >= str(_parse_date(start_date)))
+        if end_date:
+            query = query.filter(StockMovement.timestamp < _ledger_boundary(end_date))
+        if kind:
+            query = query.filter(StockMovement.kind == kind)
+        return query.order_by(StockMovement.id).all()
+    finally:
+        session.close()
+
+
+def get_shrinkage(start_date=None, end_date=None) -> list:
+    """
+    Stock lost outside sales in a date range: downward manual adjustments (stock counts,
+    corrections), not deleted or cleared medicines.
+    :return: List of (barcode, units lost, value lost), largest value first
+    """
+    session = Session()
+    try:
+        units = func.sum(-StockMovement.delta)
+        value = func.sum(-StockMovement.delta * func.coalesce(StockMovement.price, 0))
+        query = session.query(StockMovement.barcode, units, value).filter(
+            StockMovement.kind == "adjustment", StockMovement.delta < 0, StockMovement.ref.is_(None))
+        if start_date:
+            query = query.filter(StockMovement.timestamp >= str(_parse_date(start_date)))
+        if end_date:
+            query = query.filter(StockMovement.timestamp < _ledger_boundary(end_date))
+        return [tuple(row) for row in query.group_by(StockMovement.barcode).order_by(value.desc())]
+    finally:
+        session.close()
+
+
+def check_stock_ledger() -> list:
+    """
+    Compare the ledger with the stored stock levels.
+    :return: List of (barcode, ledger quantity, stored quantity) for every barcode that differs
+    """
+    ledger = get_stock_on()
+    session = Session()
+    try:
+        stored = {barcode: quantity or 0 for barcode, quantity in session.query(Medicine.barcode, Medicine.quantity)}
+    finally:
+        session.close()
+    return [(barcode, ledger.get(barcode, (0, None))[0], stored.get(barcode, 0))
+            for barcode in sorted(set(ledger) | set(stored))
+            if ledger.get(barcode, (0, None))[0] != stored.get(barcode, 0)]
+
+
+# Time every public DB function (see metrics.py); must stay at the end of the module
+instrument_module(globals(), "db")
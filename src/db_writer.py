@@ -0,0 +1,222 @@
+import atexit
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+from query_monitor import monitor
+
+try:
+    from PyQt5.QtCore import QObject, pyqtSignal
+except ImportError:  # Headless tools (benchmarks, load tests) can run without Qt
+    QObject = None
+
+# Logging is configured in main_window.py
+writer_logger = logging.getLogger("medibit.db.writer")
+
+_STOP = object()
+
+# Called on the writer thread after each committed transaction with that transaction's
+# session.info, where jobs note what they changed. Module-level, so every DbWriter in the
+# process shares the listeners.
+_commit_listeners: List[Callable[[dict], None]] = []
+
+
+def add_commit_listener(callback: Callable[[dict], None]) -> None:
+    """
+    Register a callable(info) run after every committed write transaction.
+    It runs on the writer thread, so it must be quick and must not write.
+    """
+    if callback not in _commit_listeners:
+        _commit_listeners.append(callback)
+
+
+def remove_commit_listener(callback: Callable[[dict], None]) -> None:
+    if callback in _commit_listeners:
+        _commit_listeners.remove(callback)
+
+
+class _Job:
+    __slots__ = ("func", "args", "kwargs", "future", "scopes")
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        # Query scopes of the submitting thread, so its query counts and budgets include the job
+        self.scopes = monitor.current_scopes()
+
+
+class DbWriter:
+    """
+    Single writer thread for the SQLite database. Write jobs from the GUI thread and
+    worker threads are queued and executed one batch at a time: every job waiting in
+    the queue when the writer becomes free runs in one transaction with one commit,
+    so concurrent writers share commits instead of competing for the file lock.
+    Reads do not go through the writer.
+
+    A job is a function taking the writer's Session as its first argument. It must
+    not commit or roll back; it raises to fail. If any job in a batch raises, the
+    batch is rolled back and its jobs are re-run one transaction each, so one bad
+    write cannot fail the others.
+
+    A job's statements count towards the query scopes (query_monitor) that were
+    active on the thread that submitted it.
+    """
+
+    def __init__(self, session_factory: Callable, max_batch: int = 200, name: str = "medibit-db-writer"):
+        self._session_factory = session_factory
+        self.max_batch = max_batch
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._session = None  # Session of the transaction in progress (writer thread only)
+        self._atexit_registered = False
+        self.stats: Dict[str, int] = {"jobs": 0, "batches": 0, "commits": 0, "fallbacks": 0, "largest_batch": 0}
+
+    # --- Submitting -------------------------------------------------------------------
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Queue a write job.
+        :param func: Function called as func(session, *args, **kwargs)
+        :return: Future resolving to the function's return value once committed
+        """
+        job = _Job(func, args, kwargs)
+        if threading.current_thread() is self._thread:
+            # Called from inside another job: join the transaction in progress
+            try:
+                job.future.set_result(func(self._session, *args, **kwargs))
+            except Exception as e:
+                job.future.set_exception(e)
+            return job.future
+        self._ensure_started()
+        self._queue.put(job)
+        return job.future
+
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Queue a write job and wait until it is committed.
+        :return: The function's return value (raises what the job raised)
+        """
+        return self.submit(func, *args, **kwargs).result()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+                if not self._atexit_registered:
+                    atexit.register(self.stop)
+                    self._atexit_registered = True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Finish the queued jobs and stop the writer thread. A later submit() restarts it.
+        :param timeout: Seconds to wait for the queue to drain
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive() or threading.current_thread() is thread:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # --- Writer thread ------------------------------------------------------------------
+    def _loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            batch, stop = [job], False
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stop = True
+                    break
+                batch.append(job)
+            try:
+                self._execute(batch)
+            except Exception:  # Never let the writer thread die
+                writer_logger.critical("Unexpected error in DB writer", exc_info=True)
+            if stop:
+                return
+
+    def _transaction(self, jobs: List[_Job]) -> list:
+        session = self._session_factory()
+        self._session = session
+        try:
+            results = []
+            for job in jobs:
+                with monitor.joined(job.scopes):
+                    results.append(job.func(session, *job.args, **job.kwargs))
+                    session.flush()  # The job's statements run inside its scopes, not at commit
+            info = dict(session.info)
+            session.commit()
+            self.stats["commits"] += 1
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            self._session = None
+            session.close()
+        for listener in list(_commit_listeners):
+            try:
+                listener(info)
+            except Exception:
+                writer_logger.error("Commit listener %r failed", listener, exc_info=True)
+        return results
+
+    def _execute(self, batch: List[_Job]) -> None:
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.stats["jobs"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        try:
+            results = self._transaction(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            writer_logger.warning("Batch of %d writes failed (%s); retrying one transaction each", len(batch), e)
+            self.stats["fallbacks"] += 1
+            for job in batch:
+                try:
+                    (result,) = self._transaction([job])
+                except Exception as job_error:
+                    job.future.set_exception(job_error)
+                else:
+                    job.future.set_result(result)
+            return
+        for job, result in zip(batch, results):
+            job.future.set_result(result)
+
+
+if QObject is not None:
+    class WriteSignals(QObject):
+        """
+        Qt signals for a queued write, emitted from the writer thread and delivered
+        to slots in their own thread (queued connection).
+        Connect the signals first, then call watch() with the future from submit().
+        Keep a reference to this object until a signal has been emitted.
+        """
+        succeeded = pyqtSignal(object)
+        failed = pyqtSignal(str)
+
+        def watch(self, future: Future) -> Future:
+            def emit(done):
+                error = done.exception()
+                if error is not None:
+                    self.failed.emit(str(error))
+                else:
+                    self.succeeded.emit(done.result())
+            future.add_done_callback(emit)
+            return future
@@ -35,6 +35,7 @@ from db import (
     update_medicine_threshold,
 )
 from notifications import NotificationManager
+import pdf_templates
 import re
 import weakref
 
@@ -139,18 +140,21 @@ class AddMedicineDialog(QDialog):
 
 
 class OrderQuantityDialog(QDialog):
-    def __init__(self, medicines, parent=None):
+    def __init__(self, medicines, parent=None, suggestions=None):
         super().__init__(parent)
         self.setWindowTitle("Order Quantities")
         self.setModal(True)
         self.setMinimumSize(400, 300)
         self.medicines = medicines
         self.spins = {}
+        suggestions = suggestions or {}
         layout = QFormLayout(self)
         for med in medicines:
             spin = QSpinBox()
             spin.setRange(1, 10000)
-            spin.setValue(10)
+            spin.setValue(min(suggestions.get(med.barcode, 10), 10000))
+            if med.barcode in suggestions:
+                spin.setToolTip("Suggested from recent sales, lead time and safety stock.")
             self.spins[med.barcode] = spin
             layout.addRow(f"{med.name} (Current: {med.quantity})", spin)
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -1136,12 +1140,7 @@ class BulkThresholdDialog(QDialog):
                     "Success",
                     f"Updated thresholds for {updated_count} medicines.",
                 )
-                # Robust: Walk up parent chain to find main window
-                parent = self.parent()
-                while parent and not hasattr(parent, 'refresh_inventory_table'):
-                    parent = parent.parent() if hasattr(parent, 'parent') else None
-                if parent and hasattr(parent, 'refresh_inventory_table'):
-                    parent.refresh_inventory_table()
+                # The inventory table patches the changed rows from the update events
                 self.accept()
             elif not errors:
                 QMessageBox.information(
@@ -1418,6 +1417,7 @@ class PharmacyDetailsWidget(QWidget):
             return
         success, message = save_pharmacy_details(name, address, phone, email, gst_number, license_number, website)
         if success:
+            pdf_templates.invalidate()
             QMessageBox.information(self, "Success", message)
             self.details_saved.emit()
         else:
@@ -1558,7 +1558,7 @@ class QuickAddStockDialog(QDialog):
 
                             # Update medicine with new quantity (more efficient)
                             success, error = update_medicine_quantity(
-                                med.barcode, new_total
+                                med.barcode, new_total, kind="receipt"
                             )
 
                             if success:
@@ -1577,18 +1577,8 @@ class QuickAddStockDialog(QDialog):
                 QMessageBox.information(
                     self, "Success", f"Added stock to {updated_count} medicines."
                 )
-                # Robust: Walk up parent chain to find main window and refresh inventory table
-                parent = self.parent()
-                while parent and not hasattr(parent, 'refresh_inventory_table'):
-                    parent = parent.parent() if hasattr(parent, 'parent') else None
-                if parent and hasattr(parent, 'refresh_inventory_table'):
-                    parent.refresh_inventory_table()
-                # Automatically send low stock alerts after quick add stock
-                if parent and hasattr(parent, 'alert_service'):
-                    success, msg = parent.alert_service.send_all_alerts()
-                    import logging
-                    logger = logging.getLogger("QuickAddStockDialog")
-                    logger.info(f"[AutoAlert] After quick add stock: success={success}, msg={msg}")
+                # The inventory table patches the changed rows and the alert scheduler
+                # clears recovered stock alerts, both from the stock events
                 self.accept()
             else:
                 QMessageBox.information(
@@ -1720,3 +1710,137 @@ class NotificationSendWorker(QObject):
         super().__init__()
     def start(self):
         pass
+
+
+class BatchPdfWorker(QObject):
+    """Runs a BatchPdfService task off the UI thread. task(progress, cancel_event) -> (success, message)."""
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        import threading
+        self.task = task
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            success, message = self.task(self.progress.emit, self._cancel_event)
+        except Exception as e:
+            success, message = False, str(e)
+        self.finished.emit(success, message)
+
+
+def start_batch_pdf_job(parent, title, task, on_finished, initial_text="Preparing documents...",
+                        label_format="Rendered {done} of {total}: {name}"):
+    """
+    Run a batch PDF task (or any long task, e.g. a backup) on a worker thread with a cancellable progress dialog.
+    :param parent: Parent widget; keeps references to the thread and worker while running
+    :param title: Progress dialog title
+    :param task: Callable(progress, cancel_event) -> (success, message)
+    :param on_finished: Callable(success, message) invoked on the UI thread
+    :param initial_text: Label shown before the first progress update
+    :param label_format: Progress label; receives done, total and name (the task's message)
+    """
+    from PyQt5.QtWidgets import QProgressDialog
+    progress_dialog = QProgressDialog(initial_text, "Cancel", 0, 0, parent)
+    progress_dialog.setWindowTitle(title)
+    progress_dialog.setWindowModality(Qt.WindowModal)
+    progress_dialog.setMinimumDuration(0)
+    thread = QThread(parent)
+    worker = BatchPdfWorker(task)
+    worker.moveToThread(thread)
+
+    def update(done, total, filename):
+        progress_dialog.setMaximum(total)
+        progress_dialog.setValue(done)
+        progress_dialog.setLabelText(label_format.format(done=done, total=total, name=filename))
+
+    def finish(success, message):
+        progress_dialog.close()
+        thread.quit()
+        thread.wait()
+        worker.deleteLater()
+        parent._batch_pdf_job = None
+        on_finished(success, message)
+
+    worker.progress.connect(update)
+    worker.finished.connect(finish)
+    progress_dialog.canceled.connect(worker.cancel)
+    thread.started.connect(worker.run)
+    parent._batch_pdf_job = (thread, worker)
+    thread.start()
+    progress_dialog.show()
+
+
+class MetricsDialog(QDialog):
+    """Diagnostics view of per-operation latency (service methods and DB functions)."""
+    COLUMNS = ["Operation", "Calls", "Errors", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Queries/call"]
+    KEYS = ["count", "errors", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performance Diagnostics")
+        self.setMinimumSize(800, 450)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Slowest operations first (by p95). Percentiles cover the most recent calls."))
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+        btn_layout = QHBoxLayout()
+        for text, slot in (
+            ("Refresh", self.refresh),
+            ("Export JSON", lambda: self.export("json")),
+            ("Export Prometheus", lambda: self.export("prom")),
+            ("Reset", self.reset),
+        ):
+            btn = QPushButton(text)
+            btn.clicked.connect(slot)
+            btn_layout.addWidget(btn)
+        btn_layout.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+        self.refresh()
+
+    def refresh(self):
+        from metrics import registry
+        from query_monitor import monitor
+        snapshot = registry.snapshot()
+        queries = monitor.snapshot()
+        self.table.setRowCount(len(snapshot))
+        for row, (name, stats) in enumerate(snapshot.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for col, key in enumerate(self.KEYS, 1):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, stats[key])
+                self.table.setItem(row, col, item)
+            query_item = QTableWidgetItem()
+            query_item.setData(Qt.DisplayRole, queries[name]["mean"] if name in queries else "")
+            self.table.setItem(row, len(self.KEYS) + 1, query_item)
+
+    def export(self, fmt):
+        from PyQt5.QtWidgets import QFileDialog
+        from metrics import registry
+        if fmt == "prom":
+            path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", "medibit_metrics.prom", "Prometheus Text (*.prom)")
+        else:
+            path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", "medibit_metrics.json", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            registry.export(path)
+            QMessageBox.information(self, "Metrics Exported", f"Metrics saved to {path}")
+        except Exception as e:
+            QMessageBox.warning(self, "Export Failed", f"Could not export metrics: {e}")
+
+    def reset(self):
+        from metrics import registry
+        registry.reset()
+        self.refresh()
@@ -0,0 +1,167 @@
+import datetime
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Logging is configured in main_window.py
+printer_logger = logging.getLogger("medibit.printer")
+
+# ESC/POS commands understood by practically every 58/80 mm receipt printer
+ESC = b"\x1b"
+GS = b"\x1d"
+INIT = ESC + b"@"
+ALIGN_LEFT = ESC + b"a\x00"
+ALIGN_CENTER = ESC + b"a\x01"
+BOLD_ON = ESC + b"E\x01"
+BOLD_OFF = ESC + b"E\x00"
+DOUBLE_SIZE = GS + b"!\x11"
+NORMAL_SIZE = GS + b"!\x00"
+FEED_AND_CUT = GS + b"V\x42\x04"  # Feed 4 lines, then partial cut
+ENCODING = "cp437"  # Power-on code page; anything outside it prints as '?'
+CURRENCY = "Rs."  # The rupee sign is not in the printer code page
+
+
+def _detail(details, field: str) -> str:
+    # Pharmacy details arrive as the ORM row, a PharmacySnapshot or a plain dict
+    value = details.get(field) if isinstance(details, dict) else getattr(details, field, None)
+    return str(value or "").strip()
+
+
+def _money(amount: float) -> str:
+    return f"{CURRENCY}{amount:.2f}"
+
+
+def _pair(left: str, right: str, columns: int) -> str:
+    """
+    :return: left and right on one line of the given width, truncating left if needed
+    """
+    room = max(columns - len(right) - 1, 0)
+    return left[:room].ljust(room) + " " + right
+
+
+class ReceiptBuilder:
+    """Accumulates ESC/POS bytes for one receipt."""
+
+    def __init__(self, columns: int = 42):
+        self.columns = columns
+        self.data = bytearray(INIT)
+
+    def raw(self, command: bytes) -> "ReceiptBuilder":
+        self.data += command
+        return self
+
+    def line(self, text: str = "", bold: bool = False, center: bool = False, large: bool = False) -> "ReceiptBuilder":
+        width = self.columns // 2 if large else self.columns
+        if center:
+            self.data += ALIGN_CENTER
+        if bold:
+            self.data += BOLD_ON
+        if large:
+            self.data += DOUBLE_SIZE
+        self.data += text[:width].encode(ENCODING, errors="replace") + b"\n"
+        if large:
+            self.data += NORMAL_SIZE
+        if bold:
+            self.data += BOLD_OFF
+        if center:
+            self.data += ALIGN_LEFT
+        return self
+
+    def pair(self, left: str, right: str, bold: bool = False) -> "ReceiptBuilder":
+        return self.line(_pair(left, right, self.columns), bold=bold)
+
+    def rule(self, char: str = "-") -> "ReceiptBuilder":
+        return self.line(char * self.columns)
+
+    def cut(self) -> "ReceiptBuilder":
+        return self.raw(FEED_AND_CUT)
+
+    def build(self) -> bytes:
+        return bytes(self.data)
+
+
+def render_receipt(bill_id, timestamp, items: Iterable[Dict[str, Any]], totals: Dict[str, float],
+                   pharmacy_details: Any = None, customer: Optional[Dict[str, Any]] = None,
+                   columns: int = 42, cut: bool = True) -> bytes:
+    """
+    Render the text receipt layout as ESC/POS bytes.
+    :param bill_id: Bill number printed in the header
+    :param timestamp: Sale datetime or string
+    :param items: Bill item dicts (name, quantity, price, subtotal)
+    :param totals: Dict with subtotal, discount_amount, tax_amount and total
+    :param pharmacy_details: (optional) Pharmacy details object or dict (name, address, phone, gst_number)
+    :param customer: (optional) Dict with name and phone
+    :param columns: Characters per line (42 for 80 mm paper, 32 for 58 mm)
+    :param cut: Feed and cut the paper at the end
+    :return: Bytes ready to be written to the printer
+    """
+    when = timestamp.strftime("%Y-%m-%d %H:%M") if isinstance(timestamp, datetime.datetime) else str(timestamp)[:16]
+    receipt = ReceiptBuilder(columns)
+    receipt.line((_detail(pharmacy_details, "name") or "Pharmacy").upper(), bold=True, center=True, large=True)
+    address, phone, gst = (_detail(pharmacy_details, field) for field in ("address", "phone", "gst_number"))
+    for text in (address, phone and f"Phone: {phone}", gst and f"GSTIN: {gst}"):
+        if text:
+            receipt.line(text, center=True)
+    receipt.rule("=")
+    receipt.pair(f"Bill #{bill_id}", when)
+    if customer and str(customer.get("name", "")).strip():
+        phone = str(customer.get("phone", "")).strip()
+        receipt.line(f"Customer: {customer['name'].strip()}" + (f" ({phone})" if phone else ""))
+    receipt.rule()
+    for item in items:
+        receipt.line(str(item["name"]))
+        receipt.pair(f"  {item['quantity']} x {item['price']:.2f}", f"{item['subtotal']:.2f}")
+    receipt.rule()
+    receipt.pair("Subtotal", _money(totals.get("subtotal", 0)))
+    if totals.get("discount_amount"):
+        receipt.pair("Discount", "-" + _money(totals["discount_amount"]))
+    if totals.get("tax_amount"):
+        receipt.pair("Tax", _money(totals["tax_amount"]))
+    receipt.pair("TOTAL", _money(totals.get("total", 0)), bold=True)
+    receipt.rule("=")
+    receipt.line("Thank you for your purchase!", center=True)
+    if cut:
+        receipt.cut()
+    return receipt.build()
+
+
+class EscPosPrinter:
+    """
+    Raw ESC/POS output to a receipt printer device file: a USB printer class device
+    (/dev/usb/lp0), a serial port set up with stty (/dev/ttyUSB0), a Windows share or
+    port name, or a plain spool file for testing. Receipts are appended with one write,
+    so a receipt reaches the printer in milliseconds without a print dialog or PDF.
+    """
+
+    def __init__(self, device: str):
+        self.device = device
+        self._lock = threading.Lock()
+
+    def send(self, data: bytes) -> Tuple[bool, str]:
+        """
+        Write one receipt to the device.
+        :param data: ESC/POS bytes from render_receipt
+        :return: (success, message)
+        """
+        if not self.device:
+            return False, "No receipt printer configured."
+        try:
+            with self._lock, open(self.device, "ab", buffering=0) as port:
+                port.write(data)
+        except OSError as e:
+            printer_logger.error(f"Receipt printer {self.device} failed: {e}")
+            return False, f"Receipt printer error: {e}"
+        printer_logger.debug("Sent %d bytes to %s", len(data), self.device)
+        return True, f"Printed on {os.path.basename(self.device) or self.device}"
+
+
+def printer_from_settings(settings: Dict[str, Any]) -> Optional[EscPosPrinter]:
+    """
+    :param settings: config.get_printer_settings() dict
+    :return: EscPosPrinter for the configured device, or None when the fast path is off
+    """
+    if not settings.get("enabled") or not settings.get("device"):
+        return None
+    return EscPosPrinter(settings["device"])
+
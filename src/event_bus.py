@@ -0,0 +1,175 @@
+import logging
+import threading
+import types
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+try:
+    from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+except ImportError:  # The bus itself works headless (scripts, tests)
+    QObject = None
+
+from db_writer import add_commit_listener
+
+# Logging is configured in main_window.py
+events_logger = logging.getLogger("medibit.events")
+
+COALESCE_MS = 150  # Events arriving within this window reach a screen as one batch
+
+
+@dataclass(frozen=True)
+class MedicineChanged:
+    """A medicine was added, edited or deleted. barcodes=None means the whole inventory (cleared)."""
+    barcodes: Optional[Tuple[str, ...]]
+    deleted: bool = False
+
+
+@dataclass(frozen=True)
+class StockAdjusted:
+    """Stock of existing medicines changed (sale, receipt, import, manual adjustment)."""
+    barcodes: Tuple[str, ...]
+    kind: str
+
+
+@dataclass(frozen=True)
+class BillCreated:
+    bill_id: int
+    timestamp: str
+    total: float
+
+
+@dataclass(frozen=True)
+class OrderStatusChanged:
+    order_id: int
+    status: str
+
+
+@dataclass(frozen=True)
+class ReceiptReady:
+    """The background PDF/delivery job of a bill finished. pdf_path is None when no PDF was made."""
+    bill_id: int
+    pdf_path: Optional[str]
+    send_results: Optional[list]
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for domain events, so screens patch what changed
+    instead of re-reading everything.
+
+    Write jobs in db.py attach events to their session (db._publish) and the bus
+    publishes them after the transaction commits, on the writer thread; writes
+    made outside the writer publish directly after their commit. Subscribers run
+    on the publishing thread and must be quick: screens go through QtEventRelay.
+    Bound methods are held weakly, so a closed screen does not stay subscribed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[Type, List] = {}
+
+    def subscribe(self, event_type: Type, callback: Callable) -> None:
+        ref = weakref.WeakMethod(callback) if isinstance(callback, types.MethodType) else (lambda: callback)
+        with self._lock:
+            self._subscribers.setdefault(event_type, []).append(ref)
+
+    def unsubscribe(self, event_type: Type, callback: Callable) -> None:
+        self._drop(event_type, lambda subscriber: subscriber == callback)
+
+    def _drop(self, event_type: Type, predicate: Callable) -> None:
+        with self._lock:
+            self._subscribers[event_type] = [
+                ref for ref in self._subscribers.get(event_type, [])
+                if ref() is not None and not predicate(ref())
+            ]
+
+    def publish(self, *events) -> None:
+        for event in events:
+            with self._lock:
+                refs = list(self._subscribers.get(type(event), []))
+            for ref in refs:
+                callback = ref()
+                if callback is None:  # Subscriber was garbage collected
+                    self._drop(type(event), lambda subscriber: False)
+                    continue
+                try:
+                    callback(event)
+                except Exception:
+                    events_logger.error("Subscriber %r failed on %r", callback, event, exc_info=True)
+
+    def _on_commit(self, info: dict) -> None:
+        if info.get("events"):
+            self.publish(*info["events"])
+
+
+# Process-wide bus; db_writer is imported once, so both import paths of db.py share it
+bus = EventBus()
+add_commit_listener(bus._on_commit)
+
+
+if QObject is not None:
+    class QtEventRelay(QObject):
+        """
+        Delivers bus events to a screen on the GUI thread, coalesced: everything
+        published within COALESCE_MS of the first event reaches handler(events) as
+        one list, so a burst of writes (an import, a multi-line bill) costs one patch.
+        """
+
+        _arrived = pyqtSignal()
+
+        def __init__(self, handler: Callable[[List], None], event_types: Iterable[Type],
+                     coalesce_ms: int = COALESCE_MS, parent=None, event_bus: EventBus = None):
+            super().__init__(parent)
+            self.handler = handler
+            self.event_types = tuple(event_types)
+            self.event_bus = event_bus or bus
+            self._lock = threading.Lock()
+            self._pending = []
+            self._timer = QTimer(self)
+            self._timer.setSingleShot(True)
+            self._timer.setInterval(coalesce_ms)
+            self._timer.timeout.connect(self.flush)
+            self._arrived.connect(self._schedule)  # Queued when the event comes from the writer thread
+            for event_type in self.event_types:
+                self.event_bus.subscribe(event_type, self._receive)
+            self.destroyed.connect(self._detach)
+
+        def _receive(self, event) -> None:
+            with self._lock:
+                self._pending.append(event)
+                first = len(self._pending) == 1
+            if first:
+                try:
+                    self._arrived.emit()
+                except RuntimeError:  # Screen already deleted
+                    self._detach()
+
+        def _schedule(self) -> None:
+            if not self._timer.isActive():
+                self._timer.start()
+
+        def flush(self) -> None:
+            """Hand pending events to the handler now."""
+            with self._lock:
+                events, self._pending = self._pending, []
+            if events:
+                self.handler(events)
+
+        def _detach(self, *args) -> None:
+            for event_type in self.event_types:
+                self.event_bus.unsubscribe(event_type, self._receive)
+
+
+def changed_barcodes(events) -> Optional[set]:
+    """
+    :param events: Batch of MedicineChanged/StockAdjusted events
+    :return: Set of affected barcodes, or None when the whole inventory changed
+    """
+    barcodes = set()
+    for event in events:
+        if isinstance(event, (MedicineChanged, StockAdjusted)):
+            if event.barcodes is None:
+                return None
+            barcodes.update(event.barcodes)
+    return barcodes
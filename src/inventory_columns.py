@@ -0,0 +1,258 @@
+import datetime
+import logging
+import threading
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+import db
+from event_bus import MedicineChanged, StockAdjusted, bus
+
+# Logging is configured in main_window.py
+columns_logger = logging.getLogger("medibit.inventory.columns")
+
+EXPIRING_DAYS = 30
+NO_EXPIRY = -1  # Expiry ordinal of medicines without an expiry date
+NO_MANUFACTURER = -1
+COMPACT_RATIO = 0.25  # Drop deleted rows once they are this share of the store
+STOCK_STATUSES = ("low", "out", "in")
+EXPIRY_STATUSES = ("expired", "expiring", "valid")
+
+
+class InventoryColumns:
+    """
+    Column-oriented copy of the catalog for vectorized filters and KPIs: one NumPy array
+    per field (quantity, threshold, price, expiry as a date ordinal) and categorical
+    codes for manufacturer, so a filter or a count is a few array operations instead of
+    a loop over medicine objects.
+
+    It loads once, then stays current from the MedicineChanged/StockAdjusted events:
+    changed barcodes are queued on the writer thread and re-read in one query on the
+    next access. Updated medicines are patched in place, new ones appended (arrays grow
+    geometrically) and deleted ones tombstoned until they make up COMPACT_RATIO of the
+    rows. Clearing the inventory triggers a reload.
+
+    Stock and expiry statuses follow the inventory screen: low is 0 < quantity <= threshold,
+    out is quantity 0, expiring is within EXPIRING_DAYS days after today.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._stale = False
+        self._pending = set()
+        self._reset(0)
+        bus.subscribe(MedicineChanged, self._on_change)
+        bus.subscribe(StockAdjusted, self._on_change)
+
+    def close(self) -> None:
+        """Stop listening for writes."""
+        bus.unsubscribe(MedicineChanged, self._on_change)
+        bus.unsubscribe(StockAdjusted, self._on_change)
+
+    # --- Storage ----------------------------------------------------------------------------
+    def _reset(self, capacity: int) -> None:
+        self._size = 0
+        self._deleted = 0
+        self._index: Dict[str, int] = {}
+        self._manufacturers: List[str] = []
+        self._manufacturer_codes: Dict[str, int] = {}
+        self.barcode = np.empty(capacity, dtype=object)
+        self.quantity = np.zeros(capacity, dtype=np.int64)
+        self.threshold = np.zeros(capacity, dtype=np.int64)
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.expiry = np.full(capacity, NO_EXPIRY, dtype=np.int64)
+        self.manufacturer = np.full(capacity, NO_MANUFACTURER, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.quantity)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 1024)
+        for name, fill in (("barcode", None), ("quantity", 0), ("threshold", 0), ("price", 0),
+                           ("expiry", NO_EXPIRY), ("manufacturer", NO_MANUFACTURER), ("alive", False)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _manufacturer_code(self, name: Optional[str]) -> int:
+        if not name:
+            return NO_MANUFACTURER
+        code = self._manufacturer_codes.get(name)
+        if code is None:
+            code = self._manufacturer_codes[name] = len(self._manufacturers)
+            self._manufacturers.append(name)
+        return code
+
+    def _set_row(self, row: int, medicine) -> None:
+        self.barcode[row] = medicine.barcode
+        self.quantity[row] = medicine.quantity or 0
+        self.threshold[row] = db.LOW_STOCK_THRESHOLD if medicine.threshold is None else medicine.threshold
+        self.price[row] = medicine.price or 0
+        self.expiry[row] = medicine.expiry.toordinal() if medicine.expiry else NO_EXPIRY
+        self.manufacturer[row] = self._manufacturer_code(medicine.manufacturer)
+        self.alive[row] = True
+
+    # --- Updates ----------------------------------------------------------------------------
+    def _on_change(self, event) -> None:
+        # Writer thread: only record what changed, the query happens on the next access
+        with self._lock:
+            if event.barcodes is None:
+                self._stale = True
+            else:
+                self._pending.update(event.barcodes)
+
+    def reload(self) -> None:
+        """Rebuild every column from the catalog."""
+        medicines = db.get_all_medicines()
+        with self._lock:
+            self._reset(len(medicines))
+            for row, medicine in enumerate(medicines):
+                self._set_row(row, medicine)
+                self._index[medicine.barcode] = row
+            self._size = len(medicines)
+            self._pending.clear()
+            self._stale = False
+            self._loaded = True
+        columns_logger.debug("Inventory columns loaded", extra={"medicines": len(medicines)})
+
+    def _apply(self, barcodes: Set[str]) -> None:
+        found = set()
+        for medicine in db.get_medicines_by_barcodes(barcodes):
+            row = self._index.get(medicine.barcode)
+            if row is None:
+                self._grow(self._size + 1)
+                row = self._index[medicine.barcode] = self._size
+                self._size += 1
+            self._set_row(row, medicine)
+            found.add(medicine.barcode)
+        for barcode in barcodes - found:
+            row = self._index.pop(barcode, None)
+            if row is not None:
+                self.alive[row] = False
+                self._deleted += 1
+        if self._deleted > COMPACT_RATIO * self._size:
+            self._compact()
+
+    def _compact(self) -> None:
+        keep = self.alive[:self._size]
+        size = int(keep.sum())
+        for name in ("barcode", "quantity", "threshold", "price", "expiry", "manufacturer", "alive"):
+            setattr(self, name, getattr(self, name)[:self._size][keep].copy())
+        self._size = size
+        self._deleted = 0
+        self._index = {barcode: row for row, barcode in enumerate(self.barcode.tolist())}
+
+    def _ensure_current(self) -> None:
+        with self._lock:
+            if not self._loaded or self._stale:
+                self.reload()
+            elif self._pending:
+                pending, self._pending = self._pending, set()
+                self._apply(pending)
+
+    # --- Queries ----------------------------------------------------------------------------
+    def mask(self, stock: Optional[str] = None, expiry: Optional[str] = None, manufacturer: Optional[str] = None,
+             today: Optional[datetime.date] = None) -> np.ndarray:
+        """
+        Boolean mask over the store's rows (deleted rows are always False).
+        :param stock: None, 'low', 'out' or 'in'
+        :param expiry: None, 'expired', 'expiring' or 'valid'
+        :param manufacturer: Manufacturer name, compared case-insensitively; None for any
+        :param today: Reference date for expiry (defaults to today)
+        :return: bool array of length len(self)
+        """
+        if stock not in (None,) + STOCK_STATUSES or expiry not in (None,) + EXPIRY_STATUSES:
+            raise ValueError(f"Unknown filter: stock={stock!r}, expiry={expiry!r}")
+        self._ensure_current()
+        n = self._size
+        selected = self.alive[:n].copy()
+        quantity = self.quantity[:n]
+        if stock == "low":
+            selected &= (quantity > 0) & (quantity <= self.threshold[:n])
+        elif stock == "out":
+            selected &= quantity == 0
+        elif stock == "in":
+            selected &= quantity > 0
+        if expiry:
+            today = (today or datetime.date.today()).toordinal()
+            dates = self.expiry[:n]
+            if expiry == "expired":
+                selected &= (dates != NO_EXPIRY) & (dates < today)
+            else:
+                selected &= dates > today
+                if expiry == "expiring":
+                    selected &= dates <= today + EXPIRING_DAYS
+        if manufacturer:
+            target = manufacturer.strip().lower()
+            codes = [code for code, name in enumerate(self._manufacturers) if name.strip().lower() == target]
+            selected &= np.isin(self.manufacturer[:n], codes)
+        return selected
+
+    def select(self, **filters) -> Set[str]:
+        """
+        :param filters: Same as mask()
+        :return: Barcodes of the medicines passing every filter
+        """
+        selected = self.mask(**filters)
+        return set(self.barcode[:self._size][selected].tolist())
+
+    def low_stock_barcodes(self) -> List[str]:
+        """
+        :return: Barcodes at or below their threshold (out of stock included), in catalog order
+        """
+        self._ensure_current()
+        n = self._size
+        selected = self.alive[:n] & (self.quantity[:n] <= self.threshold[:n])
+        return self.barcode[:n][selected].tolist()
+
+    def stock_value(self, selected: Optional[np.ndarray] = None) -> float:
+        """
+        :param selected: (optional) Mask from mask(); defaults to every medicine
+        :return: Sum of quantity x price
+        """
+        self._ensure_current()
+        n = self._size
+        selected = self.alive[:n] if selected is None else selected
+        return float(np.dot(self.quantity[:n][selected], self.price[:n][selected]))
+
+    def status_counts(self, today: Optional[datetime.date] = None) -> Dict[str, int]:
+        """
+        :param today: Reference date for expiry (defaults to today)
+        :return: Dict with total and the number of medicines per stock and expiry status
+        """
+        self._ensure_current()
+        counts = {"total": int(self.alive[:self._size].sum())}
+        for status in STOCK_STATUSES:
+            counts[status] = int(self.mask(stock=status).sum())
+        for status in EXPIRY_STATUSES:
+            counts[status] = int(self.mask(expiry=status, today=today).sum())
+        return counts
+
+    def manufacturer_counts(self, selected: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """
+        :param selected: (optional) Mask from mask(); defaults to every medicine
+        :return: Dict manufacturer name -> number of medicines (manufacturers with none left are omitted)
+        """
+        self._ensure_current()
+        n = self._size
+        selected = self.alive[:n] if selected is None else selected
+        codes = self.manufacturer[:n][selected]
+        counts = np.bincount(codes[codes != NO_MANUFACTURER], minlength=len(self._manufacturers))
+        return {self._manufacturers[code]: int(count) for code, count in enumerate(counts) if count}
+
+    def manufacturers(self) -> List[str]:
+        """
+        :return: Sorted names of manufacturers with at least one medicine
+        """
+        return sorted(self.manufacturer_counts())
+
+    def __len__(self) -> int:
+        self._ensure_current()
+        return len(self._index)
+
+
+# Process-wide column store used by the inventory screen and service
+inventory_columns = InventoryColumns()
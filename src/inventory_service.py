@@ -2,14 +2,33 @@ from typing import List, Optional, Tuple, Dict, Any
 from db import (
     add_medicine,
     get_all_medicines,
+    get_medicines_by_barcodes,
     update_medicine,
     update_medicine_quantity,
     delete_medicine,
     clear_inventory,
 )
 import logging
+from inventory_columns import inventory_columns
+from metrics import instrumented
+from query_monitor import counted
 logger = logging.getLogger("medibit")
 
+
+def medicine_matches(medicine, query: str) -> bool:
+    """
+    Whether a medicine matches a lower-cased search query on name, barcode or manufacturer.
+    Module-level so per-row checks skip the service's per-call instrumentation.
+    """
+    return (
+        query in medicine.name.lower()
+        or query in medicine.barcode.lower()
+        or bool(medicine.manufacturer and query in medicine.manufacturer.lower())
+    )
+
+
+@instrumented("inventory")
+@counted("inventory")
 class InventoryService:
     """
     Service class for all inventory-related business logic and data access.
@@ -28,6 +47,18 @@ class InventoryService:
             logging.error(f"Error fetching all medicines: {e}", exc_info=True)
             return []
 
+    def get_by_barcodes(self, barcodes) -> List[Any]:
+        """
+        Return the medicines with the given barcodes (missing barcodes are skipped).
+        :param barcodes: Iterable of barcodes
+        :return: List of medicine objects
+        """
+        try:
+            return get_medicines_by_barcodes(barcodes)
+        except Exception as e:
+            logging.error(f"[get_by_barcodes] Exception: {e}", exc_info=True)
+            return []
+
     def add(self, data):
         logger.debug(f"[add] ENTRY: barcode={data.get('barcode', 'N/A')}")
         try:
@@ -124,15 +155,55 @@ class InventoryService:
         logger.debug(f"[search] ENTRY: query={query}")
         try:
             query = query.strip().lower()
-            result = [
-                m for m in get_all_medicines()
-                if query in m.name.lower()
-                or query in m.barcode.lower()
-                or (m.manufacturer and query in m.manufacturer.lower())
-            ]
+            result = [m for m in get_all_medicines() if medicine_matches(m, query)]
             logging.info(f"Search for '{query}' returned {len(result)} results.")
             logger.debug(f"[search] EXIT: success, query={query}")
             return result
         except Exception as e:
             logging.error(f"[search] Exception: {e}", exc_info=True)
-            return [] 
\ No newline at end of file
+            return [] 
+
+    def filter_barcodes(self, stock: Optional[str] = None, expiry: Optional[str] = None,
+                        manufacturer: Optional[str] = None) -> set:
+        """
+        Barcodes passing the stock/expiry/manufacturer filters, evaluated on the column store.
+        :param stock: None, 'low', 'out' or 'in'
+        :param expiry: None, 'expired', 'expiring' or 'valid'
+        :param manufacturer: Manufacturer name (case-insensitive) or None
+        :return: Set of barcodes
+        """
+        return inventory_columns.select(stock=stock, expiry=expiry, manufacturer=manufacturer)
+
+    def get_manufacturers(self) -> List[str]:
+        """
+        :return: Sorted names of the manufacturers currently in stock records
+        """
+        try:
+            return inventory_columns.manufacturers()
+        except Exception as e:
+            logging.error(f"[get_manufacturers] Exception: {e}", exc_info=True)
+            return []
+
+    def get_reorder_candidates(self) -> List[Any]:
+        """
+        :return: Medicines at or below their threshold (out of stock included)
+        """
+        try:
+            return get_medicines_by_barcodes(inventory_columns.low_stock_barcodes())
+        except Exception as e:
+            logging.error(f"[get_reorder_candidates] Exception: {e}", exc_info=True)
+            return []
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Inventory KPIs: medicine count per stock/expiry status, stock value and manufacturer count.
+        :return: Dict (empty on error)
+        """
+        try:
+            summary = inventory_columns.status_counts()
+            summary["stock_value"] = inventory_columns.stock_value()
+            summary["manufacturers"] = len(inventory_columns.manufacturer_counts())
+            return summary
+        except Exception as e:
+            logging.error(f"[get_summary] Exception: {e}", exc_info=True)
+            return {}
@@ -3,7 +3,7 @@ from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject, QTimer
 from PyQt5.QtGui import QKeySequence, QColor
 import pandas as pd
 import datetime
-from db import add_medicine, get_medicine_by_barcode, update_medicine, get_all_medicines
+from db import add_medicine, get_medicine_by_barcode, update_medicine, get_all_medicines, add_medicine_async, update_medicine_async
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -20,13 +20,23 @@ import tempfile
 import threading
 from theme import theme_manager, create_animated_button
 from dialogs import AddMedicineDialog
+from event_bus import MedicineChanged, QtEventRelay, StockAdjusted, changed_barcodes
+from inventory_service import medicine_matches
 
 logger = logging.getLogger("medibit")
+PATCH_LIMIT = 200  # Above this many changed medicines, reload the table instead of patching rows
+# Filter combo labels -> InventoryColumns.mask() statuses
+STOCK_FILTERS = {"Low Stock": "low", "Out of Stock": "out", "In Stock": "in"}
+EXPIRY_FILTERS = {"Expired": "expired", "Expiring Soon (30 days)": "expiring", "Valid": "valid"}
+# Per-row import/export progress; sampled by logging_setup
+worker_logger = logging.getLogger("medibit.inventory.worker")
+# Rows queued on the DB writer before the import waits for their results
+IMPORT_WRITE_CHUNK = 500
 
 def log_memory_usage(tag=""):
     process = psutil.Process(os.getpid())
     mem = process.memory_info().rss / (1024 * 1024)
-    logging.info(f"Memory usage {tag}: {mem:.2f} MB")
+    worker_logger.info("Memory usage %s: %.2f MB", tag, mem)
 
 class InventoryProgressDialog(QDialog):
     def __init__(self, title, label_text, maximum, parent=None):
@@ -95,11 +105,34 @@ class ImportWorker(QObject):
         row_count = len(self.df)
         try:
             log_memory_usage("import worker start")
+            # Use InventoryService for DB access; load existing barcodes once, not per row
+            from inventory_service import InventoryService
+            service = InventoryService()
+            existing_barcodes = {m.barcode for m in service.get_all()}
+            pending = []
+
+            def collect():
+                nonlocal imported, updated, errors
+                for row_idx, row_barcode, is_update, future in pending:
+                    try:
+                        success, msg = future.result()
+                    except Exception as e:
+                        success, msg = False, str(e)
+                    if not success:
+                        errors += 1
+                        error_details.append(f"Row {row_idx+2} (Barcode: {row_barcode}): {msg}")
+                    elif is_update:
+                        updated += 1
+                        updated_barcodes.append(row_barcode)
+                    else:
+                        imported += 1
+                        imported_barcodes.append(row_barcode)
+                pending.clear()
+
             for idx, row in self.df.iterrows():
                 if self._canceled:
+                    collect()
                     self.canceled.emit()
-                    for handler in logging.root.handlers:
-                        handler.flush()
                     return
                 if idx % 20 == 0 or idx == row_count - 1:
                     log_memory_usage(f"import row {idx}")
@@ -112,10 +145,7 @@ class ImportWorker(QObject):
                     expiry = row["Expiry"] if "Expiry" in row and not pd.isna(row["Expiry"]) else None
                     manufacturer = str(row["Manufacturer"]) if "Manufacturer" in row and not pd.isna(row["Manufacturer"]) else ""
                     price = row["Price"] if "Price" in row and not pd.isna(row["Price"]) else 0
-                    # Use InventoryService for DB access
-                    from inventory_service import InventoryService
-                    service = InventoryService()
-                    validation_errors = InventoryUi.validate_medicine_input_static(barcode, name, quantity, expiry, manufacturer, price, threshold, is_add=(service.get_all() and not any(m.barcode == barcode for m in service.get_all())))
+                    validation_errors = InventoryUi.validate_medicine_input_static(barcode, name, quantity, expiry, manufacturer, price, threshold, is_add=bool(existing_barcodes) and barcode not in existing_barcodes)
                     if validation_errors:
                         errors += 1
                         error_details.append(f"Row {idx+2} (Barcode: {barcode}): {'; '.join(validation_errors)}")
@@ -134,56 +164,26 @@ class ImportWorker(QObject):
                             expiry = expiry.date()
                         elif not isinstance(expiry, datetime.date):
                             expiry = None
-                    existing = [m for m in service.get_all() if m.barcode == barcode]
-                    if existing:
-                        success, msg = service.update(barcode, {
-                            "name": name,
-                            "quantity": int(quantity),
-                            "expiry": expiry,
-                            "manufacturer": manufacturer,
-                            "price": int(price),
-                            "threshold": int(threshold)
-                        })
-                        if success:
-                            updated += 1
-                            updated_barcodes.append(barcode)
-                        else:
-                            errors += 1
-                            error_details.append(f"Row {idx+2} (Barcode: {barcode}): {msg}")
-                    else:
-                        result = service.add({
-                            "barcode": barcode,
-                            "name": name,
-                            "quantity": int(quantity),
-                            "expiry": expiry,
-                            "manufacturer": manufacturer,
-                            "price": int(price),
-                            "threshold": int(threshold)
-                        })
-                        if result[0]:
-                            imported += 1
-                            imported_barcodes.append(barcode)
-                        else:
-                            errors += 1
-                            error_details.append(f"Row {idx+2} (Barcode: {barcode}): {result[1]}")
+                    # Queue the write; the DB writer commits queued rows together
+                    is_update = barcode in existing_barcodes
+                    write = update_medicine_async if is_update else add_medicine_async
+                    pending.append((idx, barcode, is_update, write(barcode, name, int(quantity), expiry, manufacturer, int(price), int(threshold), kind="import")))
+                    existing_barcodes.add(barcode)
+                    if len(pending) >= IMPORT_WRITE_CHUNK:
+                        collect()
                 except Exception as e:
                     errors += 1
                     error_details.append(f"Row {idx+2} (Barcode: {row.get('Barcode', 'N/A')}): {e}")
+            collect()
             log_memory_usage("import worker complete")
             self.progress.emit(row_count, "Import complete.")
             self.finished.emit(imported, updated, errors, imported_barcodes, updated_barcodes, error_details)
         except Exception as e:
             logging.critical("Fatal error in import worker", exc_info=True)
-            for handler in logging.root.handlers:
-                handler.flush()
             self.canceled.emit()
         except BaseException as e:
             logging.critical("Non-standard fatal error in import worker", exc_info=True)
-            for handler in logging.root.handlers:
-                handler.flush()
             self.canceled.emit()
-        for handler in logging.root.handlers:
-            handler.flush()
 
 class ExportWorker(QObject):
     progress = pyqtSignal(int, str)
@@ -233,8 +233,6 @@ class ExportWorker(QObject):
         except BaseException as exc:
             logging.critical(f"Non-standard fatal error in ExportWorker: {exc}", exc_info=True)
             self.error.emit(str(exc))
-        for handler in logging.root.handlers:
-            handler.flush()
 
 class InventoryUi(QWidget):
     def __init__(self, main_window):
@@ -250,6 +248,8 @@ class InventoryUi(QWidget):
             pass
         self.add_medicine_btn.clicked.connect(self._on_add_medicine)
         # If you have edit button, connect similarly
+        # Writes anywhere in the app patch the affected rows instead of reloading the table
+        self.event_relay = QtEventRelay(self._on_inventory_events, (MedicineChanged, StockAdjusted), parent=self)
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -376,6 +376,10 @@ class InventoryUi(QWidget):
         table_title.setToolTip("Section: Inventory Items")
         table_title.setAccessibleName("Inventory Items Title")
         table_layout.addWidget(table_title)
+        self.summary_label = QLabel("")
+        self.summary_label.setToolTip("Inventory totals across all medicines")
+        self.summary_label.setAccessibleName("Inventory Summary")
+        table_layout.addWidget(self.summary_label)
         self.inventory_table = QTableWidget(0, 7)
         self.inventory_table.setHorizontalHeaderLabels([
             "Barcode", "Name", "Quantity", "Threshold", "Expiry", "Manufacturer", "Price"
@@ -476,64 +480,117 @@ class InventoryUi(QWidget):
         # Use blockSignals for better performance
         self.inventory_table.blockSignals(True)
         
-        from datetime import date
-        
         for i, med in enumerate(filtered):
-            # Barcode
-            self.inventory_table.setItem(i, 0, QTableWidgetItem(med.barcode))
-            
-            # Name with status indicators
-            name_text = med.name
-            if hasattr(med, 'threshold') and med.quantity <= med.threshold:
-                name_text += " 🔴"  # Low stock indicator
-            if med.expiry and med.expiry <= date.today():
-                name_text += " ⚠️"  # Expired indicator
-            elif med.expiry and (med.expiry - date.today()).days <= 30:
-                name_text += " 🟡"  # Expiring soon indicator
-            
-            name_item = QTableWidgetItem(name_text)
-            self.inventory_table.setItem(i, 1, name_item)
-            
-            # Quantity with color coding
-            quantity_item = QTableWidgetItem(str(med.quantity))
-            quantity_item.setTextAlignment(Qt.AlignCenter)
-            if hasattr(med, 'threshold') and med.quantity <= med.threshold:
-                quantity_item.setBackground(QColor(255, 200, 200))  # Light red for low stock
-            self.inventory_table.setItem(i, 2, quantity_item)
-            
-            # Threshold
-            threshold_item = QTableWidgetItem(str(getattr(med, 'threshold', 10)))
-            threshold_item.setTextAlignment(Qt.AlignCenter)
-            self.inventory_table.setItem(i, 3, threshold_item)
-            
-            # Expiry with color coding
-            expiry_text = str(med.expiry) if med.expiry else "N/A"
-            expiry_item = QTableWidgetItem(expiry_text)
-            expiry_item.setTextAlignment(Qt.AlignCenter)
-            if med.expiry:
-                if med.expiry <= date.today():
-                    expiry_item.setBackground(QColor(255, 150, 150))  # Red for expired
-                elif (med.expiry - date.today()).days <= 30:
-                    expiry_item.setBackground(QColor(255, 255, 150))  # Yellow for expiring soon
-            self.inventory_table.setItem(i, 4, expiry_item)
-            
-            # Manufacturer
-            self.inventory_table.setItem(i, 5, QTableWidgetItem(med.manufacturer or "N/A"))
-            
-            # Price
-            price_item = QTableWidgetItem(f"₹{getattr(med, 'price', 0)}")
-            price_item.setTextAlignment(Qt.AlignCenter)
-            self.inventory_table.setItem(i, 6, price_item)
+            self._set_medicine_row(i, med)
         
         # Re-enable signals and sorting
         self.inventory_table.blockSignals(False)
         self.inventory_table.setSortingEnabled(True)
+        self.update_inventory_summary()
         
         self.inventory_table.viewport().update()
         self.inventory_table.repaint()
         from PyQt5.QtWidgets import QApplication
         QApplication.processEvents()
     
+    def _set_medicine_row(self, i, med):
+        """Render one medicine into table row i, with the stock and expiry indicators."""
+        from datetime import date
+        # Barcode
+        self.inventory_table.setItem(i, 0, QTableWidgetItem(med.barcode))
+        
+        # Name with status indicators
+        name_text = med.name
+        if hasattr(med, 'threshold') and med.quantity <= med.threshold:
+            name_text += " 🔴"  # Low stock indicator
+        if med.expiry and med.expiry <= date.today():
+            name_text += " ⚠️"  # Expired indicator
+        elif med.expiry and (med.expiry - date.today()).days <= 30:
+            name_text += " 🟡"  # Expiring soon indicator
+        
+        name_item = QTableWidgetItem(name_text)
+        self.inventory_table.setItem(i, 1, name_item)
+        
+        # Quantity with color coding
+        quantity_item = QTableWidgetItem(str(med.quantity))
+        quantity_item.setTextAlignment(Qt.AlignCenter)
+        if hasattr(med, 'threshold') and med.quantity <= med.threshold:
+            quantity_item.setBackground(QColor(255, 200, 200))  # Light red for low stock
+        self.inventory_table.setItem(i, 2, quantity_item)
+        
+        # Threshold
+        threshold_item = QTableWidgetItem(str(getattr(med, 'threshold', 10)))
+        threshold_item.setTextAlignment(Qt.AlignCenter)
+        self.inventory_table.setItem(i, 3, threshold_item)
+        
+        # Expiry with color coding
+        expiry_text = str(med.expiry) if med.expiry else "N/A"
+        expiry_item = QTableWidgetItem(expiry_text)
+        expiry_item.setTextAlignment(Qt.AlignCenter)
+        if med.expiry:
+            if med.expiry <= date.today():
+                expiry_item.setBackground(QColor(255, 150, 150))  # Red for expired
+            elif (med.expiry - date.today()).days <= 30:
+                expiry_item.setBackground(QColor(255, 255, 150))  # Yellow for expiring soon
+        self.inventory_table.setItem(i, 4, expiry_item)
+        
+        # Manufacturer
+        self.inventory_table.setItem(i, 5, QTableWidgetItem(med.manufacturer or "N/A"))
+        
+        # Price
+        price_item = QTableWidgetItem(f"₹{getattr(med, 'price', 0)}")
+        price_item.setTextAlignment(Qt.AlignCenter)
+        self.inventory_table.setItem(i, 6, price_item)
+
+    def _on_inventory_events(self, events):
+        barcodes = changed_barcodes(events)
+        if barcodes is None or len(barcodes) > PATCH_LIMIT:
+            self.refresh_inventory_table()  # Inventory cleared or a bulk import: one full reload is cheaper
+        elif barcodes:
+            self.patch_inventory_rows(barcodes)
+            self.update_inventory_summary()
+
+    def update_inventory_summary(self):
+        """Show medicine count, stock value and status counts above the table."""
+        summary = self.inventory_service.get_summary()
+        if not summary:
+            self.summary_label.setText("")
+            return
+        self.summary_label.setText(
+            f"{summary['total']} medicines | Stock value ₹{summary['stock_value']:,.2f} | "
+            f"Low: {summary['low']} | Out: {summary['out']} | "
+            f"Expired: {summary['expired']} | Expiring soon: {summary['expiring']}"
+        )
+
+    def patch_inventory_rows(self, barcodes):
+        """
+        Re-render only the rows of the given medicines: update rows still matching the
+        search and filters, drop deleted or no longer matching ones and append new ones.
+        """
+        query = self.search_box.text().strip().lower()
+        medicines = [m for m in self.inventory_service.get_by_barcodes(barcodes) if medicine_matches(m, query)]
+        visible = {m.barcode: m for m in self.apply_advanced_filters(medicines)}
+        rows = {}
+        for row in range(self.inventory_table.rowCount()):
+            item = self.inventory_table.item(row, 0)
+            if item and item.text() in barcodes:
+                rows[item.text()] = row
+        
+        self.inventory_table.setSortingEnabled(False)
+        self.inventory_table.blockSignals(True)
+        for barcode, row in rows.items():
+            if barcode in visible:
+                self._set_medicine_row(row, visible[barcode])
+        for row in sorted((row for barcode, row in rows.items() if barcode not in visible), reverse=True):
+            self.inventory_table.removeRow(row)
+        for barcode, med in visible.items():
+            if barcode not in rows:
+                row = self.inventory_table.rowCount()
+                self.inventory_table.insertRow(row)
+                self._set_medicine_row(row, med)
+        self.inventory_table.blockSignals(False)
+        self.inventory_table.setSortingEnabled(True)
+
     def filter_inventory_exact(self):
         """Filter inventory to show only exact matches when Enter is pressed."""
         query = self.search_box.text().strip().lower()
@@ -551,39 +608,8 @@ class InventoryUi(QWidget):
         self.inventory_table.clearContents()
         self.inventory_table.setRowCount(len(filtered))
         self.inventory_table.blockSignals(True)
-        from datetime import date
         for i, med in enumerate(filtered):
-            self.inventory_table.setItem(i, 0, QTableWidgetItem(med.barcode))
-            name_text = med.name
-            if hasattr(med, 'threshold') and med.quantity <= med.threshold:
-                name_text += " 🔴"
-            if med.expiry and med.expiry <= date.today():
-                name_text += " ⚠️"
-            elif med.expiry and (med.expiry - date.today()).days <= 30:
-                name_text += " 🟡"
-            name_item = QTableWidgetItem(name_text)
-            self.inventory_table.setItem(i, 1, name_item)
-            quantity_item = QTableWidgetItem(str(med.quantity))
-            quantity_item.setTextAlignment(Qt.AlignCenter)
-            if hasattr(med, 'threshold') and med.quantity <= med.threshold:
-                quantity_item.setBackground(QColor(255, 200, 200))
-            self.inventory_table.setItem(i, 2, quantity_item)
-            threshold_item = QTableWidgetItem(str(getattr(med, 'threshold', 10)))
-            threshold_item.setTextAlignment(Qt.AlignCenter)
-            self.inventory_table.setItem(i, 3, threshold_item)
-            expiry_text = str(med.expiry) if med.expiry else "N/A"
-            expiry_item = QTableWidgetItem(expiry_text)
-            expiry_item.setTextAlignment(Qt.AlignCenter)
-            if med.expiry:
-                if med.expiry <= date.today():
-                    expiry_item.setBackground(QColor(255, 150, 150))
-                elif (med.expiry - date.today()).days <= 30:
-                    expiry_item.setBackground(QColor(255, 255, 150))
-            self.inventory_table.setItem(i, 4, expiry_item)
-            self.inventory_table.setItem(i, 5, QTableWidgetItem(med.manufacturer or "N/A"))
-            price_item = QTableWidgetItem(f"₹{getattr(med, 'price', 0)}")
-            price_item.setTextAlignment(Qt.AlignCenter)
-            self.inventory_table.setItem(i, 6, price_item)
+            self._set_medicine_row(i, med)
         self.inventory_table.blockSignals(False)
         self.inventory_table.setSortingEnabled(True)
         self.inventory_table.viewport().update()
@@ -592,35 +618,16 @@ class InventoryUi(QWidget):
         QApplication.processEvents()
 
     def apply_advanced_filters(self, medicines):
-        """Apply advanced filters to the medicine list."""
-        from datetime import date
-        
-        filtered = medicines
-        
-        # Stock status filter
-        stock_filter = self.stock_filter.currentText()
-        if stock_filter == "Low Stock":
-            filtered = [m for m in filtered if hasattr(m, 'threshold') and m.quantity > 0 and m.quantity <= m.threshold]
-        elif stock_filter == "Out of Stock":
-            filtered = [m for m in filtered if m.quantity == 0]
-        elif stock_filter == "In Stock":
-            filtered = [m for m in filtered if m.quantity > 0]
-        
-        # Expiry filter
-        expiry_filter = self.expiry_filter.currentText()
-        if expiry_filter == "Expired":
-            filtered = [m for m in filtered if m.expiry and m.expiry < date.today()]
-        elif expiry_filter == "Expiring Soon (30 days)":
-            filtered = [m for m in filtered if m.expiry and (m.expiry - date.today()).days <= 30 and m.expiry > date.today()]
-        elif expiry_filter == "Valid":
-            filtered = [m for m in filtered if m.expiry and m.expiry > date.today()]
-        
-        # Manufacturer filter (normalize for comparison)
-        manufacturer_filter = self.manufacturer_filter.currentText()
-        if manufacturer_filter != "All":
-            filtered = [m for m in filtered if (m.manufacturer or "").strip().lower() == manufacturer_filter.strip().lower()]
-        
-        return filtered
+        """Apply advanced filters to the medicine list (evaluated on the inventory column store)."""
+        stock = STOCK_FILTERS.get(self.stock_filter.currentText())
+        expiry = EXPIRY_FILTERS.get(self.expiry_filter.currentText())
+        manufacturer = self.manufacturer_filter.currentText()
+        manufacturer = None if manufacturer == "All" else manufacturer
+        if not (stock or expiry or manufacturer):
+            return medicines
+        
+        keep = self.inventory_service.filter_barcodes(stock=stock, expiry=expiry, manufacturer=manufacturer)
+        return [m for m in medicines if m.barcode in keep]
 
     @staticmethod
     def validate_medicine_input_static(barcode, name, quantity, expiry, manufacturer, price, threshold, is_add=True):
@@ -698,7 +705,6 @@ class InventoryUi(QWidget):
                     QMessageBox.warning(self, "Add Failed", result[1])
                     return  # Exit early on failure
                 else:
-                    self.refresh_inventory_table()
                     self.populate_manufacturer_filter()  # Update manufacturer filter
                     logger.info("Medicine added successfully.")
                     QMessageBox.information(self, "Success", "Medicine added successfully!")
@@ -739,13 +745,9 @@ class InventoryUi(QWidget):
             log_memory_usage("main thread after starting import thread")
         except Exception as e:
             logging.critical("Fatal error in main thread import trigger", exc_info=True)
-            for handler in logging.root.handlers:
-                handler.flush()
             QMessageBox.critical(self, "Import Error", f"A fatal error occurred during import. See log for details.\n{e}")
         except BaseException as e:
             logging.critical("Non-standard fatal error in main thread import trigger", exc_info=True)
-            for handler in logging.root.handlers:
-                handler.flush()
             QMessageBox.critical(self, "Import Error", f"A non-standard fatal error occurred during import. See log for details.\n{e}")
 
     def _on_import_finished(self, progress, thread, imported, updated, errors, imported_barcodes, updated_barcodes, error_details):
@@ -784,7 +786,7 @@ class InventoryUi(QWidget):
             self._export_thread = QThread()
             self._export_worker = ExportWorker(medicines, file_path)
             self._export_worker.moveToThread(self._export_thread)
-            self._export_worker.progress.connect(lambda idx, text: (logging.info(f"Export progress: {text}"), progress.set_progress(idx, text)))
+            self._export_worker.progress.connect(lambda idx, text: (worker_logger.debug("Export progress: %s", text), progress.set_progress(idx, text)))
             self._export_worker.finished.connect(self._on_export_finished)
             self._export_worker.error.connect(self._on_export_error)
             self._export_worker.canceled.connect(self._on_export_canceled)
@@ -796,13 +798,9 @@ class InventoryUi(QWidget):
             log_memory_usage("main thread after starting export thread")
         except Exception as e:
             logging.critical("Fatal error in main thread export trigger", exc_info=True)
-            for handler in logging.root.handlers:
-                handler.flush()
             QMessageBox.critical(self, "Export Error", f"A fatal error occurred during export. See log for details.\n{e}")
         except BaseException as e:
             logging.critical("Non-standard fatal error in main thread export trigger", exc_info=True)
-            for handler in logging.root.handlers:
-                handler.flush()
             QMessageBox.critical(self, "Export Error", f"A non-standard fatal error occurred during export. See log for details.\n{e}")
 
     def _on_export_finished(self, file_path):
@@ -907,7 +905,6 @@ class InventoryUi(QWidget):
             result = self.inventory_service.update(barcode, updated_data)
             if result[0]:
                 logger.info(f"Medicine updated successfully: {barcode}")
-                self.refresh_inventory_table()
                 QMessageBox.information(self, "Success", "Medicine updated successfully!")
             else:
                 logger.error(f"Failed to update medicine: {result[1]}")
@@ -940,7 +937,6 @@ class InventoryUi(QWidget):
                 result = self.inventory_service.delete(barcode)
                 if result[0]:
                     logger.info(f"Medicine deleted: {barcode}")
-                    self.refresh_inventory_table()
                     QMessageBox.information(self, "Success", "Medicine deleted successfully.")
                 else:
                     logger.error(f"Failed to delete medicine: {result[1]}")
@@ -996,15 +992,11 @@ class InventoryUi(QWidget):
     def populate_manufacturer_filter(self):
         """Populate manufacturer filter with unique manufacturers."""
         try:
-            medicines = self.inventory_service.get_all()
-            manufacturers = set()
-            for medicine in medicines:
-                if medicine.manufacturer:
-                    manufacturers.add(medicine.manufacturer)
+            manufacturers = self.inventory_service.get_manufacturers()
             
             current_text = self.manufacturer_filter.currentText()
             self.manufacturer_filter.clear()
-            self.manufacturer_filter.addItems(["All"] + sorted(list(manufacturers)))
+            self.manufacturer_filter.addItems(["All"] + manufacturers)
             
             # Restore selection if it still exists
             if current_text in [self.manufacturer_filter.itemText(i) for i in range(self.manufacturer_filter.count())]:
@@ -1133,8 +1125,7 @@ Price: ₹{getattr(medicine, 'price', 0)}
         logger.info("Generate Order button clicked.")
         try:
             # Get low stock medicines
-            medicines = self.inventory_service.get_all()
-            low_stock_medicines = [m for m in medicines if m.quantity <= getattr(m, 'threshold', 10)]
+            low_stock_medicines = self.inventory_service.get_reorder_candidates()
             
             if not low_stock_medicines:
                 QMessageBox.information(self, "No Low Stock", "No medicines are currently low on stock.")
@@ -1180,7 +1171,6 @@ Price: ₹{getattr(medicine, 'price', 0)}
                     result = self.inventory_service.clear()
                     if result[0]:
                         logger.info("Inventory cleared successfully.")
-                        self.refresh_inventory_table()
                         QMessageBox.information(self, "Success", "Inventory cleared successfully!")
                     else:
                         logger.error(f"Failed to clear inventory: {result[1]}")
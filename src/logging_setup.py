@@ -0,0 +1,195 @@
+import atexit
+import datetime
+import decimal
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
+
+# Per-logger limits for chatty hot paths; WARNING and above always pass.
+#   rate/burst: token bucket, records per second with a burst allowance
+#   sample: keep one record in every N
+# Keys match the logger name and its children ("medibit.billing" covers "medibit.billing.x").
+DEFAULT_POLICIES = {
+    "medibit.billing": {"rate": 20.0, "burst": 50},
+    "medibit.ui.history": {"rate": 5.0, "burst": 20},
+    "medibit.inventory.worker": {"sample": 25},
+}
+
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, bytes, type(None), decimal.Decimal, datetime.date, datetime.time)
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the writer thread. The stock
+    handler formats every record on the calling thread; here only records whose
+    arguments could change before they are written are rendered up front.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args and not _args_are_immutable(record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _args_are_immutable(args) -> bool:
+    values = args.values() if isinstance(args, dict) else args
+    return all(isinstance(value, _IMMUTABLE_ARG_TYPES) for value in values)
+
+
+class HotPathFilter(logging.Filter):
+    """
+    Rate-limit and sample records below WARNING for the configured loggers.
+    The next record let through carries the number dropped before it as 'suppressed'.
+    """
+
+    def __init__(self, policies: Dict[str, dict]):
+        super().__init__()
+        self.policies = dict(policies)
+        self._lock = threading.Lock()
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._state: Dict[str, dict] = {}
+
+    def _policy_key(self, name: str) -> Optional[str]:
+        key = self._resolved.get(name, "")
+        if key == "":
+            key = None
+            for candidate in self.policies:
+                if (name == candidate or name.startswith(candidate + ".")) and len(candidate) > len(key or ""):
+                    key = candidate
+            self._resolved[name] = key
+        return key
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = self._policy_key(record.name)
+        if key is None:
+            return True
+        policy = self.policies[key]
+        with self._lock:
+            state = self._state.setdefault(key, {"tokens": float(policy.get("burst", 1)), "last": time.monotonic(), "seen": 0, "dropped": 0})
+            state["seen"] += 1
+            allowed = (state["seen"] - 1) % policy.get("sample", 1) == 0
+            if allowed and "rate" in policy:
+                now = time.monotonic()
+                state["tokens"] = min(float(policy.get("burst", 1)), state["tokens"] + (now - state["last"]) * policy["rate"])
+                state["last"] = now
+                if state["tokens"] >= 1.0:
+                    state["tokens"] -= 1.0
+                else:
+                    allowed = False
+            if not allowed:
+                state["dropped"] += 1
+                return False
+            if state["dropped"]:
+                record.suppressed = state["dropped"]
+                state["dropped"] = 0
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Standard text format followed by any structured fields passed through
+    'extra', as key=value pairs, e.g. "... Bill saved bill_id=12 items=3".
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = [f"{key}={value!r}" if isinstance(value, str) and " " in value else f"{key}={value}"
+                  for key, value in vars(record).items() if key not in _STANDARD_ATTRS and not key.startswith("_")]
+        if fields:
+            text = f"{text} {' '.join(fields)}"
+        return text
+
+
+def configure_logging(log_dir: Optional[str] = None, level: int = logging.DEBUG, console: bool = True,
+                      policies: Optional[Dict[str, dict]] = None) -> QueueListener:
+    """
+    Route all logging through a queue to a single writer thread. Callers only pay
+    for putting the record on the queue; file and console I/O happen off the UI thread.
+    Safe to call more than once; later calls return the running listener.
+    :param log_dir: Directory for the rotating log file (defaults to <project>/logs)
+    :param level: Root logger level
+    :param console: Also write to stderr
+    :param policies: Hot-path rate limits/sampling, see DEFAULT_POLICIES
+    :return: The running QueueListener
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+    log_dir = log_dir or LOG_DIR
+    os.makedirs(log_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_file = os.path.join(log_dir, f"medibit_app_{timestamp}.log")
+
+    formatter = StructuredFormatter(LOG_FORMAT)
+    handlers = [RotatingFileHandler(log_file, maxBytes=2 * 1024 * 1024, backupCount=5, encoding="utf-8")]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = LazyQueueHandler(log_queue)
+    _queue_handler.addFilter(HotPathFilter(DEFAULT_POLICIES if policies is None else policies))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def add_log_handler(handler: logging.Handler, logger_name: Optional[str] = None) -> bool:
+    """
+    Write records through an extra handler on the queue's writer thread, so a dedicated
+    log file costs callers no more than the app log does. Without a running listener
+    (logging not configured) the handler is attached to the logger itself.
+    :param handler: Handler to add
+    :param logger_name: Only pass records of this logger and its children
+    :return: False if a handler for the same file is already attached
+    """
+    if logger_name:
+        handler.addFilter(logging.Filter(logger_name))
+    path = getattr(handler, "baseFilename", None)
+    attached = _listener.handlers if _listener is not None else logging.getLogger(logger_name).handlers
+    if path and any(getattr(h, "baseFilename", None) == path for h in attached):
+        handler.close()
+        return False
+    if _listener is None:
+        logging.getLogger(logger_name).addHandler(handler)
+    else:
+        # The listener thread reads this tuple once per record, so swapping it is safe while running
+        _listener.handlers = (*_listener.handlers, handler)
+    return True
+
+
+def shutdown_logging() -> None:
+    """
+    Write out everything still queued and stop the writer thread.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
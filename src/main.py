@@ -1,13 +1,5 @@
-import sys
-
-from PyQt5.QtCore import QTimer
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QIcon
-
-from db import init_db  # Import init_db
-from main_window import MainWindow
-from splash_screen import MedibitSplashScreen
 import logging
+import multiprocessing
 import sys
 import traceback
 import os
@@ -26,8 +18,23 @@ def log_uncaught_exceptions(exctype, value, tb):
 
 sys.excepthook = log_uncaught_exceptions
 
-if __name__ == "__main__":
+def main():
+    # Imported here rather than at module level: main_window configures logging and db builds
+    # the engine when imported, and the batch PDF pool's worker processes import this module
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QIcon
+
+    from db import init_db  # Import init_db
+    from main_window import MainWindow
+    from splash_screen import MedibitSplashScreen
+
     init_db()  # Initialize the database
+    # Keep a latency snapshot of each session so slow till actions can be found from real usage
+    from metrics import dump_on_exit
+    from query_monitor import enable_slow_query_log
+    dump_on_exit(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs"))
+    enable_slow_query_log()
     app = QApplication(sys.argv)
 
     # Set app icon
@@ -52,3 +59,10 @@ if __name__ == "__main__":
     QTimer.singleShot(2000, launch_app)
 
     sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    # Needed for the batch PDF process pool in frozen (PyInstaller) builds; it must run
+    # before any application module is imported
+    multiprocessing.freeze_support()
+    main()
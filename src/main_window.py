@@ -5,12 +5,11 @@ import logging
 
 # Setup logging
 import os
-import os as _os
 import subprocess
 import sys
 import tempfile
+import threading
 import webbrowser
-from logging.handlers import RotatingFileHandler
 
 import qtawesome as qta
 from PyQt5.QtCore import QDate, QSize, Qt, QTimer, QUrl
@@ -72,7 +71,7 @@ from license_utils import verify_license_key
 from order_service import OrderService
 from receipt_manager import ReceiptManager
 from theme import theme_manager
-from billing_ui import BillingUi
+from billing_ui import GENDER_NOT_SPECIFIED, BillingUi
 from inventory_ui import InventoryUi
 from orders_ui import OrdersUi
 from alerts_ui import AlertsUi
@@ -80,40 +79,36 @@ from sales_ui import SalesUi
 from settings_ui import SettingsUi
 from inventory_service import InventoryService
 from billing_service import BillingService
+from customer_service import CustomerService
 from db import (
     clear_all_bills,
+    get_bills_by_ids,
+    is_stock_snapshot_due,
+    take_stock_snapshot_if_due,
 )
+from alert_scheduler import AlertScheduler
 from alert_service import AlertService
+from artifact_store import ArtifactStore
+from archive_service import ArchiveService
+from backup_service import BackupService
+from batch_pdf_service import customer_name_from_path
+from maintenance_service import IdleMonitor, MaintenanceService
 from settings_service import SettingsService
-from config import get_theme, get_first_launch_shown, set_first_launch_shown
+from config import get_theme, get_first_launch_shown, set_first_launch_shown, get_maintenance_settings
+from event_bus import QtEventRelay, ReceiptReady
 from notifications import NotificationManager
+from logging_setup import configure_logging
+from query_monitor import scoped as query_scoped
 import sip
 
-log_dir = _os.path.join(_os.path.dirname(_os.path.dirname(_os.path.abspath(__file__))), "logs")
-if not _os.path.exists(log_dir):
-    _os.makedirs(log_dir)
-
-# Create log filename with timestamp
-from datetime import datetime as dt
-timestamp = dt.now().strftime("%Y-%m-%d_%H-%M-%S")
-log_file = _os.path.join(log_dir, f"medibit_app_{timestamp}.log")
-
-# Central logger setup for the entire application
-logging.basicConfig(
-    level=logging.DEBUG,  # Set to DEBUG to capture all log levels
-    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-    handlers=[RotatingFileHandler(log_file, maxBytes=2 * 1024 * 1024, backupCount=5)]
-)
-# Add console handler for real-time feedback if not already present
-if not any(isinstance(h, logging.StreamHandler) for h in logging.getLogger().handlers):
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
-    console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
-    logging.getLogger().addHandler(console_handler)
+# Central logger setup for the entire application: records are queued and written by one
+# background thread, so logging never blocks the UI thread on file I/O
+configure_logging()
 logger = logging.getLogger("medibit")
+history_logger = logging.getLogger("medibit.ui.history")
 
-# For drafts
-os.makedirs(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'drafts'), exist_ok=True)
+# Drafts are stored in the database; JSON drafts left here by older versions are imported on startup
+LEGACY_DRAFTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'drafts')
 
 class WelcomePage(QWidget):
     def __init__(self, pharmacy_name="Pharmacy", main_window=None):
@@ -204,9 +199,38 @@ class MainWindow(QMainWindow):
         self.quick_add_stock_dialog = None
         self.inventory_service = InventoryService()
         self.billing_service = BillingService()
+        self.customer_service = CustomerService()
         self.order_service = OrderService()
         self.alert_service = AlertService()
         self.settings_service = SettingsService()
+        self.artifact_store = ArtifactStore()
+        self.backup_service = BackupService()
+        self.archive_service = ArchiveService()
+        # Check every 15 minutes (and once shortly after startup) whether a scheduled backup, archive run or stock snapshot is due
+        self._backup_timer = QTimer(self)
+        self._backup_timer.setInterval(15 * 60 * 1000)
+        self._backup_timer.timeout.connect(self._run_scheduled_backup)
+        self._backup_timer.start()
+        QTimer.singleShot(60 * 1000, self._run_scheduled_backup)
+        # Database maintenance runs only after the counter has been idle for a while
+        self.maintenance_service = MaintenanceService()
+        self.idle_monitor = IdleMonitor(self)
+        QApplication.instance().installEventFilter(self.idle_monitor)
+        self._maintenance_timer = QTimer(self)
+        self._maintenance_timer.setInterval(60 * 1000)
+        self._maintenance_timer.timeout.connect(self._run_idle_maintenance)
+        self._maintenance_timer.start()
+        # Stock and expiry alerts go out from the scheduler thread as digests of new conditions
+        self.alert_scheduler = AlertScheduler(self.alert_service)
+        self.alert_scheduler.start()
+        # With the thermal printer on, PDF receipts are made in the background; pick up their paths
+        self._last_bill_id = None
+        self.receipt_relay = QtEventRelay(self._on_receipts_ready, (ReceiptReady,), parent=self)
+        # Alerts badge: the watchlist keeps the counts, so polling is cheap
+        self._alert_badge_timer = QTimer(self)
+        self._alert_badge_timer.setInterval(5 * 1000)
+        self._alert_badge_timer.timeout.connect(self._update_alert_badge)
+        self._alert_badge_timer.start()
         self._init_menubar()
         self.setStyleSheet(theme_manager.get_main_window_stylesheet())
         self.stacked_widget = QStackedWidget(self)
@@ -230,8 +254,10 @@ class MainWindow(QMainWindow):
         dev_label = QLabel("Designed & Developed by Octobit8")
         dev_label.setStyleSheet("font-weight: bold; padding-right: 16px;")
         self.statusBar.addPermanentWidget(dev_label)
+        self.billing_service.import_legacy_drafts(LEGACY_DRAFTS_DIR)
         # Ensure UI and nav_buttons are always initialized for tests
         self.init_ui()
+        self._restore_autosaved_bill()
     def __del__(self):
         print(f"[MainWindow] __del__ called. id: {id(self)}")
 
@@ -284,6 +310,9 @@ class MainWindow(QMainWindow):
         if not reports_menu:
             reports_menu = self.menuBar().addMenu("Reports")
         reports_menu.addAction(daily_sales_action)
+        diagnostics_action = QAction("Performance Diagnostics", self)
+        diagnostics_action.triggered.connect(self.show_metrics_dialog)
+        reports_menu.addAction(diagnostics_action)
 
     def init_ui(self) -> None:
         """
@@ -349,6 +378,20 @@ class MainWindow(QMainWindow):
         # Set initial page
         self.display_page(0)
 
+    def _update_alert_badge(self) -> None:
+        """
+        Show the number of low-stock and expired medicines on the Alerts button.
+        """
+        if len(self.nav_buttons) < 4:
+            return
+        try:
+            counts = self.alert_service.get_alert_counts()
+        except Exception as e:
+            logger.error(f"[_update_alert_badge] Exception: {e}", exc_info=True)
+            return
+        pending = counts["low_stock"] + counts["expired"]
+        self.nav_buttons[3].setText(f"Alerts ({pending})" if pending else "Alerts")
+
     def update_navbar_highlight(self, index: int) -> None:
         """
         Update navbar button highlights.
@@ -388,8 +431,18 @@ class MainWindow(QMainWindow):
         self.billing_ui.save_draft_btn.clicked.connect(self.save_billing_draft)
         self.billing_ui.delete_draft_btn.clicked.connect(self.delete_selected_draft)
         self.billing_ui.print_bill_btn.clicked.connect(self.print_latest_bill)
-        # Note: tax_spin and discount_spin don't exist in current BillingUi
-        # These will need to be added to the UI or handled differently
+        # Autosave the in-progress bill shortly after edits stop, so a crash loses at most a few seconds
+        self._autosave_timer = QTimer(self)
+        self._autosave_timer.setSingleShot(True)
+        self._autosave_timer.setInterval(1500)
+        self._autosave_timer.timeout.connect(self._autosave_billing_draft)
+        billing_model = self.billing_ui.billing_table.model()
+        billing_model.dataChanged.connect(self._autosave_timer.start)
+        billing_model.rowsInserted.connect(self._autosave_timer.start)
+        billing_model.rowsRemoved.connect(self._autosave_timer.start)
+        self.billing_ui.customer_name.textChanged.connect(self._autosave_timer.start)
+        self.billing_ui.tax_spin.valueChanged.connect(self._autosave_timer.start)
+        self.billing_ui.discount_spin.valueChanged.connect(self._autosave_timer.start)
         self.stacked_widget.addWidget(self.billing_ui)
 
     def create_orders_page(self) -> None:
@@ -420,35 +473,17 @@ class MainWindow(QMainWindow):
         data = selected_item.data(Qt.UserRole)
         # Resume draft if selected
         if isinstance(data, dict) and data.get('is_draft'):
-            draft = data['draft']
-            # Restore customer info
-            self.billing_ui.customer_name.setText(draft['customer'].get('name', ''))
-            self.billing_ui.customer_age.setValue(draft['customer'].get('age', 0))
-            gender = draft['customer'].get('gender', 'Male')
-            idx = self.billing_ui.customer_gender.findText(gender)
-            self.billing_ui.customer_gender.setCurrentIndex(idx if idx != -1 else 0)
-            self.billing_ui.customer_phone.setText(draft['customer'].get('phone', ''))
-            self.billing_ui.customer_email.setText(draft['customer'].get('email', ''))
-            self.billing_ui.customer_address.setText(draft['customer'].get('address', ''))
-            # Restore billing table
-            self.billing_ui.billing_table.setRowCount(0)
-            for item in draft['items']:
-                row = self.billing_ui.billing_table.rowCount()
-                self.billing_ui.billing_table.insertRow(row)
-                for col, key in enumerate(['barcode', 'name', 'quantity', 'price', 'tax', 'discount']):
-                    self.billing_ui.billing_table.setItem(row, col, QTableWidgetItem(item.get(key, '')))
-                self.billing_ui.billing_table.setItem(row, 6, QTableWidgetItem(""))  # Total will be recalculated
-            # Restore tax, discount, subtotal, total
-            self.billing_ui.tax_spin.setValue(float(draft.get('tax', 0)))
-            self.billing_ui.discount_spin.setValue(float(draft.get('discount', 0)))
-            self.billing_ui.subtotal_label.setText(draft.get('subtotal', '₹0.00'))
-            self.billing_ui.total_label.setText(draft.get('total', '₹0.00'))
-            # Store draft path for auto-delete on finalize
-            self._current_loaded_draft_path = data.get('draft_path')
-            self._refresh_billing_table()
+            success, draft = self.billing_service.load_draft(data['draft_id'])
+            if not success:
+                QMessageBox.warning(self, "Draft Error", f"Could not load draft: {draft}")
+                self._refresh_billing_history()
+                return
+            self._apply_billing_draft(draft)
+            # Store draft ID for auto-delete on finalize
+            self._current_loaded_draft_id = data['draft_id']
             # If a PDF exists for this draft, offer to download it
-            pdf_path = data.get('pdf_path')
-            if pdf_path and os.path.exists(pdf_path):
+            pdf_path = self.artifact_store.open_path(data.get('pdf_artifact'))
+            if pdf_path:
                 from PyQt5.QtWidgets import QFileDialog
                 import shutil
                 pdf_filename = os.path.basename(pdf_path)
@@ -467,27 +502,31 @@ class MainWindow(QMainWindow):
         if not bill:
             QMessageBox.warning(self, "Error", "Could not retrieve bill details.")
             return
-        import os
-        if hasattr(bill, 'file_path') and bill.file_path and os.path.exists(bill.file_path):
+        # Resolve through the artifact index so compressed receipts are still retrievable
+        bill_pdf = self.artifact_store.path_for_ref('receipt', bill.id) if hasattr(bill, 'id') else None
+        if not bill_pdf and getattr(bill, 'file_path', None) and os.path.exists(bill.file_path):
+            bill_pdf = bill.file_path
+        if bill_pdf:
             from PyQt5.QtWidgets import QFileDialog
             import shutil
-            pdf_filename = os.path.basename(bill.file_path)
+            pdf_filename = os.path.basename(bill_pdf)
             save_path, _ = QFileDialog.getSaveFileName(self, "Save Bill PDF", pdf_filename, "PDF Files (*.pdf)")
             if save_path:
                 try:
-                    shutil.copyfile(bill.file_path, save_path)
+                    shutil.copyfile(bill_pdf, save_path)
                     QMessageBox.information(self, "Saved", f"Bill saved to {save_path}")
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"Could not save file: {e}")
             return
         # Fallback to old logic (for current session)
-        if hasattr(self, '_last_pdf_receipt_path') and self._last_pdf_receipt_path:
+        last_pdf = self._last_receipt_pdf()
+        if last_pdf:
             from PyQt5.QtWidgets import QFileDialog
             import shutil
             save_path, _ = QFileDialog.getSaveFileName(self, "Save Bill PDF", "bill.pdf", "PDF Files (*.pdf)")
             if save_path:
                 try:
-                    shutil.copyfile(self._last_pdf_receipt_path, save_path)
+                    shutil.copyfile(last_pdf, save_path)
                     QMessageBox.information(self, "Saved", f"Bill saved to {save_path}")
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"Could not save file: {e}")
@@ -556,7 +595,6 @@ class MainWindow(QMainWindow):
                 # Save changes using service
                 data = dialog.get_data()
                 self.inventory_service.update(barcode, data)
-                self.inventory_ui.refresh_inventory_table()
                 # Automatically send low stock alerts after manual inventory update
                 # Note: Alert sending is handled separately when needed
                 logger.info("[AutoAlert] Inventory updated successfully")
@@ -570,7 +608,6 @@ class MainWindow(QMainWindow):
             data = dialog.get_data()
             success, error = self.inventory_service.add(data)
             if success:
-                self.inventory_ui.refresh_inventory_table()
                 QMessageBox.information(self, "Success", "Medicine added successfully!")
             else:
                 QMessageBox.warning(self, "Error", f"Failed to add medicine: {error}")
@@ -595,7 +632,8 @@ class MainWindow(QMainWindow):
                 self, "No Orders Needed", "All medicines have sufficient stock."
             )
             return
-        dialog = OrderQuantityDialog(low_stock_medicines, self)
+        suggestions = self.order_service.suggest_order_quantities([med.barcode for med in low_stock_medicines])
+        dialog = OrderQuantityDialog(low_stock_medicines, self, suggestions)
         if dialog.exec_() == QDialog.Accepted:
             quantities = dialog.get_order_quantities()
             # Prepare order items based on selected quantities
@@ -614,9 +652,7 @@ class MainWindow(QMainWindow):
             if order_items:
                 import datetime
                 timestamp_str = datetime.datetime.now().strftime("%Y-%m-%d %H-%M-%S")
-                order_id = int(datetime.datetime.now().timestamp())  # simple unique ID
-                pdf_path = self.order_service.generate_order_pdf(order_items, order_id, timestamp_str)
-                success, error = self.order_service.add(timestamp_str, pdf_path, order_items)
+                success, error = self.order_service.create(timestamp_str, order_items)
                 if success:
                     QMessageBox.information(self, "Order Generated", "Order has been generated and saved successfully!")
                     self.refresh_orders_table()
@@ -782,6 +818,13 @@ class MainWindow(QMainWindow):
             "Developed by Octobit8",
         )
 
+    def show_metrics_dialog(self) -> None:
+        """
+        Show per-operation latency statistics collected in this session
+        """
+        from dialogs import MetricsDialog
+        MetricsDialog(self).exec_()
+
     def send_low_stock_alerts(self) -> None:
         """
         Send low stock alerts
@@ -844,7 +887,6 @@ class MainWindow(QMainWindow):
         self.bulk_threshold_dialog = BulkThresholdDialog(medicines, self)
         self.bulk_threshold_dialog.exec_()
         self.bulk_threshold_dialog = None
-        self.inventory_ui.refresh_inventory_table()
 
     def open_quick_add_stock_dialog(self) -> None:
         """
@@ -858,8 +900,7 @@ class MainWindow(QMainWindow):
             return
 
         self.quick_add_stock_dialog = QuickAddStockDialog(medicines, self)
-        if self.quick_add_stock_dialog.exec_() == QDialog.Accepted:
-            self.inventory_ui.refresh_inventory_table()
+        self.quick_add_stock_dialog.exec_()
         self.quick_add_stock_dialog = None
 
     # Billing methods
@@ -890,131 +931,63 @@ class MainWindow(QMainWindow):
             return
 
         # Check if already in billing table
-        for i in range(self.billing_ui.billing_table.rowCount()):
-            if self.billing_ui.billing_table.item(i, 0).text() == barcode:
-                QMessageBox.information(
-                    self, "Already Added", f"{medicine.name} is already in the bill."
-                )
-                return
+        if barcode in self.billing_ui.cart:
+            QMessageBox.information(
+                self, "Already Added", f"{medicine.name} is already in the bill."
+            )
+            return
 
         # Add to billing table
-        row = self.billing_ui.billing_table.rowCount()
-        self.billing_ui.billing_table.insertRow(row)
-
-        self.billing_ui.billing_table.setItem(row, 0, QTableWidgetItem(barcode))
-        self.billing_ui.billing_table.setItem(row, 1, QTableWidgetItem(medicine.name))
-        self.billing_ui.billing_table.setItem(row, 2, QTableWidgetItem("1"))
-        self.billing_ui.billing_table.setItem(row, 3, QTableWidgetItem(f"₹{getattr(medicine, 'price', 0)}"))
-        self.billing_ui.billing_table.setItem(row, 4, QTableWidgetItem("0"))  # Tax
-        self.billing_ui.billing_table.setItem(row, 5, QTableWidgetItem("0"))  # Discount
-        self.billing_ui.billing_table.setItem(row, 6, QTableWidgetItem(f"₹{getattr(medicine, 'price', 0)}"))
-
-        self._refresh_billing_table()
+        if not self.billing_ui.add_medicine_to_bill(medicine, 1):
+            QMessageBox.warning(self, "Out of Stock", f"{medicine.name} is out of stock.")
 
     def _refresh_billing_table(self) -> None:
-        logger.info("Refreshing billing table and summary UI")
-        items = []
-        for row in range(self.billing_ui.billing_table.rowCount()):
-            try:
-                qty_item = self.billing_ui.billing_table.item(row, 2)
-                quantity = int(qty_item.text()) if qty_item and qty_item.text() and qty_item.text().isdigit() else 0
-                price_item = self.billing_ui.billing_table.item(row, 3)
-                price_text = price_item.text().replace("₹", "") if price_item and price_item.text() else "0"
-                price = float(price_text) if price_text.replace('.', '', 1).isdigit() else 0.0
-                discount_item = self.billing_ui.billing_table.item(row, 5)
-                discount_text = discount_item.text() if discount_item and discount_item.text() else "0"
-                try:
-                    discount = float(discount_text)
-                except ValueError:
-                    discount = 0.0
-                items.append({
-                    'price': price,
-                    'quantity': quantity,
-                    'discount': discount
-                })
-            except Exception as e:
-                logger.error(f"Error parsing billing table row {row}: {e}")
-                self.billing_ui.billing_table.setItem(row, 6, QTableWidgetItem("₹0.00"))
-        tax_percent = self.billing_ui.tax_spin.value()
-        discount_percent = self.billing_ui.discount_spin.value()
-        logger.info(f"Calling calculate_totals with items={items}, tax_percent={tax_percent}, discount_percent={discount_percent}")
-        subtotal, tax_amount, total = self.billing_service.calculate_totals(items, tax_percent, discount_percent)
-        # Update per-row totals
-        for row, item in enumerate(items):
-            item_total = max(0, (item['price'] - item['discount'])) * item['quantity']
-            self.billing_ui.billing_table.setItem(row, 6, QTableWidgetItem(f"₹{item_total:.2f}"))
-        self.billing_ui.subtotal_label.setText(f"₹{subtotal:.2f}")
-        self.billing_ui.total_label.setText(f"Total: ₹{total:.2f} (Tax: ₹{tax_amount:.2f})")
-        logger.info(f"UI updated: subtotal=₹{subtotal:.2f}, total=₹{total:.2f}, tax=₹{tax_amount:.2f}")
+        logger.info("Refreshing billing summary UI")
+        self.billing_ui.update_bill_summary()
 
     def _on_billing_table_item_changed(self, item: QTableWidgetItem) -> None:
         # Recalculate totals if quantity, price, or discount changes
         if item.column() in [2, 3, 5]:
             self._refresh_billing_table()
 
+    @query_scoped("ui.refresh_billing_history")
     def _refresh_billing_history(self) -> None:
         """
         Refresh billing history list
         """
-        logger.info("[UI] _refresh_billing_history called")
+        history_logger.debug("[UI] _refresh_billing_history called")
         # Clear layout
         for i in reversed(range(self.billing_ui.recent_bills_list.count())):
             self.billing_ui.recent_bills_list.takeItem(i)
 
-        import os, json, re, glob
         try:
-            logger.info("[UI] Entering drafts loop")
             draft_count = 0
-            drafts = []
-            if os.path.exists('drafts'):
-                for fname in os.listdir('drafts'):
-                    if re.match(r'draft_bill_.*\.json$', fname):
-                        path = os.path.join('drafts', fname)
-                        try:
-                            with open(path, 'r', encoding='utf-8') as f:
-                                draft = json.load(f)
-                        except Exception as e:
-                            continue
-                        # Extract timestamp from filename for sorting
-                        try:
-                            ts_part = fname.rsplit('_', 1)[-1].replace('.json', '')
-                            draft_dt = datetime.datetime.strptime(ts_part, "%Y%m%d_%H%M%S")
-                        except Exception:
-                            draft_dt = datetime.datetime.min
-                        drafts.append((draft_dt, fname, path, draft))
-            # Sort drafts by timestamp descending and take latest 10
-            for draft_dt, fname, path, draft in sorted(drafts, key=lambda x: x[0], reverse=True)[:10]:
-                receipts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "receipts")
-                customer_name = draft.get('customer', {}).get('name', None)
-                pdf_path = None
-                pdf_filename = None
-                if customer_name:
-                    safe_name = "_".join(customer_name.strip().split())
-                    pdf_candidates = glob.glob(os.path.join(receipts_dir, f"receipt_{safe_name}_*.pdf"))
-                    if pdf_candidates:
-                        pdf_path = pdf_candidates[-1]
-                        pdf_filename = os.path.basename(pdf_path)
-                label = f"Draft Bill: {fname.replace('draft_bill_', '').replace('.json', '')}"
-                if pdf_filename:
-                    label += f" ({pdf_filename})"
-                logger.info(f"[UI] Adding draft to history: {label}, pdf_path={pdf_path}")
+            for draft in self.billing_service.list_drafts(10):
+                artifact = self.artifact_store.lookup_by_label('receipt', draft.customer_name)
+                if artifact is not None and not os.path.exists(artifact.path):
+                    artifact = None
+                label = f"Draft Bill: {draft.name} ({draft.updated_at.replace('T', ' ')})"
+                if artifact is not None:
+                    label += f" ({os.path.basename(artifact.path)})"
+                history_logger.debug("[UI] Adding draft to history: %s", label)
                 item = QListWidgetItem(label)
-                item.setData(Qt.UserRole, {'is_draft': True, 'draft': draft, 'draft_path': path, 'pdf_path': pdf_path})
+                item.setData(Qt.UserRole, {'is_draft': True, 'draft_id': draft.id, 'pdf_artifact': artifact})
                 self.billing_ui.recent_bills_list.addItem(item)
                 draft_count += 1
-            logger.info(f"[UI] Finished drafts loop, added {draft_count} drafts")
+            history_logger.debug("[UI] Finished drafts loop, added %d drafts", draft_count)
         except Exception as e:
             logger.error(f"[UI] Exception in drafts loop: {e}")
 
         try:
-            logger.info("[UI] Entering bills loop")
             bill_count = 0
             bills = self.billing_service.get_recent_bills(10)
+            artifacts = self.artifact_store.lookup_many('receipt', [bill.id for bill in bills])
+            customer_names = self.customer_service.names_for_bills(bills)
             for bill in bills:
-                pdf_filename = os.path.basename(bill.file_path) if bill.file_path else "No PDF"
-                customer_name = None
-                if pdf_filename.startswith("receipt_") and "_id" in pdf_filename:
-                    customer_name = pdf_filename[len("receipt_"):].split("_id")[0].replace("_", " ").title()
+                artifact = artifacts.get(bill.id)
+                # Saved customer, else the receipt label, else the name in pre-index receipt filenames
+                customer_name = (customer_names.get(bill.id) or (artifact.label if artifact else None)
+                                 or customer_name_from_path(bill.file_path))
                 try:
                     dt = datetime.datetime.fromisoformat(str(bill.timestamp))
                     date_str = dt.strftime("%d-%b-%Y")
@@ -1025,15 +998,12 @@ class MainWindow(QMainWindow):
                 label = f"Bill for {customer_name or 'Customer'} on {date_str} at {time_str} - ₹{bill.total}"
                 if bill.file_path:
                     label += " (Download PDF)"
-                logger.info(f"[UI] Adding bill to history: {label}, file_path={bill.file_path}")
-                print(f"[UI] Adding bill to history: {label}, file_path={bill.file_path}")
-                import sys
-                sys.stdout.flush()
+                history_logger.debug("[UI] Adding bill to history: %s, file_path=%s", label, bill.file_path)
                 item = QListWidgetItem(label)
                 item.setData(Qt.UserRole, bill)
                 self.billing_ui.recent_bills_list.addItem(item)
                 bill_count += 1
-            logger.info(f"[UI] Finished bills loop, added {bill_count} bills")
+            history_logger.debug("[UI] Finished bills loop, added %d bills", bill_count)
         except Exception as e:
             logger.error(f"[UI] Exception in bills loop: {e}")
 
@@ -1116,34 +1086,13 @@ class MainWindow(QMainWindow):
             )
             return
         # Get customer info from inline fields
-        customer_data = {
-            "name": self.billing_ui.customer_name.text(),
-            "phone": self.billing_ui.customer_phone.text(),
-            "email": self.billing_ui.customer_email.text(),
-        }
-        logger.info(f"Customer data: {customer_data}")
-        # Gather items from table
-        items = []
-        for row in range(self.billing_ui.billing_table.rowCount()):
-            barcode = self.billing_ui.billing_table.item(row, 0).text()
-            name = self.billing_ui.billing_table.item(row, 1).text()
-            quantity = int(self.billing_ui.billing_table.item(row, 2).text())
-            price = float(self.billing_ui.billing_table.item(row, 3).text().replace("₹", ""))
-            discount = 0.0
-            discount_item = self.billing_ui.billing_table.item(row, 5)
-            if discount_item and discount_item.text():
-                try:
-                    discount = float(discount_item.text())
-                except ValueError:
-                    discount = 0.0
-            items.append({
-                "barcode": barcode,
-                "name": name,
-                "quantity": quantity,
-                "price": price,
-                "discount": discount
-            })
-        logger.info(f"Bill items: {items}")
+        customer_data = self.billing_ui.customer_details()
+        # Customer details are personal data: log only which contact fields were filled in
+        logger.debug("Customer contact: phone=%s, email=%s",
+                     bool(customer_data.get("phone")), bool(customer_data.get("email")))
+        # The billing UI keeps the cart in sync with the table
+        items = self.billing_ui.cart
+        logger.info(f"Bill items: {len(items)} lines")
         tax_percent = self.billing_ui.tax_spin.value()
         discount_percent = self.billing_ui.discount_spin.value()
         from db import get_pharmacy_details
@@ -1166,29 +1115,22 @@ class MainWindow(QMainWindow):
             self.billing_ui.subtotal_label.setText("₹0.00")
             self.billing_ui.total_label.setText("₹0.00")
             logger.warning("Finalize bill returned no totals")
-        # Store PDF path for download/print
-        self._last_pdf_receipt_path = result.get('pdf_path')
-        # If this was a draft, auto-delete the draft file
-        if hasattr(self, '_current_loaded_draft_path') and self._current_loaded_draft_path:
-            import os
-            try:
-                os.remove(self._current_loaded_draft_path)
-                logger.info(f"Auto-deleted draft: {self._current_loaded_draft_path}")
-            except Exception as e:
-                logger.error(f"Failed to auto-delete draft: {e}")
-            self._current_loaded_draft_path = None
+        # The PDF for download/print and the delivery results arrive later through ReceiptReady
+        self._last_bill_id = result['bill_id']
+        self._last_pdf_receipt_path = None
+        print_result = result.get('print_result')
+        if print_result and not print_result[0]:
+            QMessageBox.warning(self, "Receipt Printer", f"The bill was saved but the receipt did not print:\n{print_result[1]}")
+        self.billing_service.clear_autosave()
+        # If this was a draft, auto-delete it
+        if getattr(self, '_current_loaded_draft_id', None):
+            success, error = self.billing_service.delete_draft(self._current_loaded_draft_id)
+            if success:
+                logger.info(f"Auto-deleted draft: {self._current_loaded_draft_id}")
+            else:
+                logger.error(f"Failed to auto-delete draft: {error}")
+            self._current_loaded_draft_id = None
             self._refresh_billing_history()
-        # Show delivery results to the user
-        send_results = result.get('send_results')
-        if send_results:
-            result_msg = "\n".join(
-                [
-                    f"{channel}: {'Success' if success else 'Failed'} - {msg}"
-                    for channel, success, msg in send_results
-                ]
-            )
-            logger.info(f"Receipt notification results: {result_msg}")
-            QMessageBox.information(self, "Receipt Notification", result_msg)
         # Clear bill
         self.clear_bill()
         logger.info("Bill cleared after finalize")
@@ -1196,14 +1138,44 @@ class MainWindow(QMainWindow):
         QMessageBox.information(
             self, "Sale Complete", f"Sale completed successfully!\nTotal: ₹{totals['total']:.2f}" if totals else "Sale completed successfully!"
         )
-        # Refresh tables
-        self.inventory_ui.refresh_inventory_table()
+        # Refresh tables (the inventory table patches the sold rows itself)
         self._refresh_billing_history()  # Force refresh after finalize to get latest PDF path
         self._refresh_monthly_sales()
         logger.info("Refreshed inventory, billing history, and monthly sales after finalize")
-        # Automatically send low stock alerts after sale
-        success, msg = self.alert_service.send_all_alerts()
-        logger.info(f"[AutoAlert] After sale: success={success}, msg={msg}")
+        # Low stock alerts for the sold items go out from the alert scheduler once sales go quiet
+
+    def _on_receipts_ready(self, events) -> None:
+        """
+        Background receipt jobs finished: remember the latest bill's PDF, report its delivery
+        in the status bar and show the new paths in history.
+        """
+        for event in events:
+            if event.bill_id == self._last_bill_id:
+                if event.pdf_path:
+                    self._last_pdf_receipt_path = event.pdf_path
+                if event.send_results:
+                    # Not a dialog: the result can arrive while the next sale is being entered
+                    self.statusBar.showMessage(f"Receipt for bill {event.bill_id}: " + "; ".join(
+                        f"{channel}: {'Success' if success else 'Failed'} - {msg}"
+                        for channel, success, msg in event.send_results
+                    ), 15000)
+            failed = [f"{channel}: {msg}" for channel, success, msg in event.send_results or [] if not success]
+            if failed:
+                logger.warning(f"Receipt delivery for bill {event.bill_id} failed: {'; '.join(failed)}")
+        if any(event.pdf_path for event in events):
+            self._refresh_billing_history()
+
+    def _last_receipt_pdf(self):
+        """
+        PDF of the last finalized bill. It is rendered in the background, so when it is asked for
+        right after the sale, wait briefly for the receipt job instead of reporting no PDF.
+        :return: PDF path or None
+        """
+        if not getattr(self, '_last_pdf_receipt_path', None) and self._last_bill_id is not None:
+            self.billing_service.wait_for_receipts(timeout=10)
+            bills = get_bills_by_ids([self._last_bill_id])
+            self._last_pdf_receipt_path = bills[0].file_path if bills else None
+        return getattr(self, '_last_pdf_receipt_path', None)
 
     def _generate_receipt(self, timestamp: datetime.datetime, items: list, total: float) -> None:
         """
@@ -1217,14 +1189,10 @@ class MainWindow(QMainWindow):
         Clear the current bill
         """
         self.billing_ui.billing_table.setRowCount(0)
-        self.billing_ui.customer_name.clear()
-        self.billing_ui.customer_phone.clear()
-        self.billing_ui.customer_email.clear()
-        self.billing_ui.customer_address.clear()
-        self.billing_ui.customer_age.clear()
-        self.billing_ui.customer_gender.setCurrentIndex(0)
+        self.billing_ui.clear_customer_fields()
         self.billing_ui.total_label.setText("Total: ₹0.00")
 
+    @query_scoped("ui.refresh_orders_table")
     def refresh_orders_table(self) -> None:
         """
         Refresh the orders table
@@ -1365,49 +1333,13 @@ class MainWindow(QMainWindow):
         if dialog.exec_() == dialog.Accepted:
             med, qty = dialog.get_selected()
             if med and qty > 0:
-                # Gather current bill items from the table
-                bill_items = []
-                for row in range(self.billing_ui.billing_table.rowCount()):
-                    bill_items.append({
-                        'barcode': self.billing_ui.billing_table.item(row, 0).text(),
-                        'name': self.billing_ui.billing_table.item(row, 1).text(),
-                        'quantity': int(self.billing_ui.billing_table.item(row, 2).text()),
-                        'price': float(self.billing_ui.billing_table.item(row, 3).text()),
-                        'discount': float(self.billing_ui.billing_table.item(row, 5).text()) if self.billing_ui.billing_table.item(row, 5) and self.billing_ui.billing_table.item(row, 5).text() else 0.0
-                    })
-                # Use billing_service to add item
-                success, result = self.billing_service.add_item_to_bill(bill_items, med, qty)
-                if not success:
+                if not self.billing_ui.add_medicine_to_bill(med, qty):
                     from PyQt5.QtWidgets import QMessageBox
-                    QMessageBox.warning(self, "Add Item Error", result)
-                    return
-                # Update the billing table with the new items
-                self.billing_ui.billing_table.setRowCount(0)
-                for item in result:
-                    row = self.billing_ui.billing_table.rowCount()
-                    self.billing_ui.billing_table.insertRow(row)
-                    self.billing_ui.billing_table.setItem(row, 0, QTableWidgetItem(item['barcode']))
-                    self.billing_ui.billing_table.setItem(row, 1, QTableWidgetItem(item['name']))
-                    self.billing_ui.billing_table.setItem(row, 2, QTableWidgetItem(str(item['quantity'])))
-                    self.billing_ui.billing_table.setItem(row, 3, QTableWidgetItem(f"{item['price']}"))
-                    self.billing_ui.billing_table.setItem(row, 4, QTableWidgetItem("0"))  # Tax per item (optional)
-                    self.billing_ui.billing_table.setItem(row, 5, QTableWidgetItem(str(item.get('discount', 0))))
-                self._refresh_billing_table()
+                    QMessageBox.warning(self, "Add Item Error", f"Only {med.quantity} units of {med.name} available in stock.")
 
     def _add_billing_item_manual(self, medicine: dict, quantity: int) -> None:
         # Add the selected medicine to the billing table manually
-        row = self.billing_ui.billing_table.rowCount()
-        self.billing_ui.billing_table.insertRow(row)
-        self.billing_ui.billing_table.setItem(row, 0, QTableWidgetItem(medicine.get('barcode', '')))
-        self.billing_ui.billing_table.setItem(row, 1, QTableWidgetItem(medicine.get('name', '')))
-        self.billing_ui.billing_table.setItem(row, 2, QTableWidgetItem(str(quantity)))
-        self.billing_ui.billing_table.setItem(row, 3, QTableWidgetItem(f"₹{getattr(medicine, 'price', 0)}"))
-        self.billing_ui.billing_table.setItem(row, 4, QTableWidgetItem("0"))  # Tax
-        self.billing_ui.billing_table.setItem(row, 5, QTableWidgetItem("0"))  # Discount
-        self.billing_ui.billing_table.setItem(row, 6, QTableWidgetItem(f"₹{getattr(medicine, 'price', 0)}"))
-        total = getattr(medicine, "price", 0) * quantity
-        self.billing_ui.billing_table.setItem(row, 6, QTableWidgetItem(f"₹{total:.2f}"))
-        self._refresh_billing_table()
+        self.billing_ui.add_medicine_to_bill(medicine, quantity)
 
     def remove_selected_billing_item(self) -> None:
         table = self.billing_ui.billing_table
@@ -1473,6 +1405,104 @@ class MainWindow(QMainWindow):
             self.save_settings_changes()
             self.settings_edit_in_progress = False
 
+    def _collect_billing_draft(self) -> dict:
+        """
+        Snapshot the in-progress bill (customer fields, table rows, tax and discount) as a draft dict.
+        :return: Draft dict
+        """
+        table = self.billing_ui.billing_table
+        draft = {
+            'customer': self.billing_ui.customer_details(),
+            'items': [],
+            'tax': self.billing_ui.tax_spin.value(),
+            'discount': self.billing_ui.discount_spin.value(),
+            'subtotal': self.billing_ui.subtotal_label.text(),
+            'total': self.billing_ui.total_label.text(),
+        }
+        for row in range(table.rowCount()):
+            draft['items'].append({
+                key: table.item(row, col).text() if table.item(row, col) else ''
+                for col, key in enumerate(['barcode', 'name', 'quantity', 'price', 'tax', 'discount'])
+            })
+        return draft
+
+    def _apply_billing_draft(self, draft: dict) -> None:
+        """
+        Load a draft dict into the customer fields and billing table.
+        :param draft: Draft dict as produced by _collect_billing_draft
+        """
+        customer = draft.get('customer', {})
+        self.billing_ui.clear_customer_fields()
+        self.billing_ui.customer_name.setText(customer.get('name', ''))
+        if customer.get('age'):
+            self.billing_ui.customer_age.setValue(customer['age'])
+        idx = self.billing_ui.customer_gender.findText(customer.get('gender') or GENDER_NOT_SPECIFIED)
+        self.billing_ui.customer_gender.setCurrentIndex(idx if idx != -1 else 0)
+        self.billing_ui.customer_phone.setText(customer.get('phone', ''))
+        self.billing_ui.customer_email.setText(customer.get('email', ''))
+        self.billing_ui.customer_address.setText(customer.get('address', ''))
+        # Restore billing table
+        self.billing_ui.billing_table.setRowCount(0)
+        for item in draft.get('items', []):
+            row = self.billing_ui.billing_table.rowCount()
+            self.billing_ui.billing_table.insertRow(row)
+            for col, key in enumerate(['barcode', 'name', 'quantity', 'price', 'tax', 'discount']):
+                self.billing_ui.billing_table.setItem(row, col, QTableWidgetItem(str(item.get(key, ''))))
+            self.billing_ui.billing_table.setItem(row, 6, QTableWidgetItem(""))  # Total will be recalculated
+        # Restore tax, discount, subtotal, total
+        self.billing_ui.tax_spin.setValue(float(draft.get('tax', 0)))
+        self.billing_ui.discount_spin.setValue(float(draft.get('discount', 0)))
+        self.billing_ui.subtotal_label.setText(str(draft.get('subtotal', '₹0.00')))
+        self.billing_ui.total_label.setText(str(draft.get('total', '₹0.00')))
+        self._refresh_billing_table()
+
+    def _autosave_billing_draft(self) -> None:
+        """
+        Autosave the in-progress bill (fired by the debounce timer after billing edits).
+        """
+        self.billing_service.autosave(self._collect_billing_draft())
+
+    def _run_scheduled_backup(self) -> None:
+        """
+        Start the scheduled backup, archive run and stock snapshot on a background thread if any is due
+        (fired by the backup timer). The backup goes first, so records are in a backup before they move to the archive.
+        """
+        if self.backup_service.is_backup_due() or self.archive_service.is_archive_due() or is_stock_snapshot_due():
+            threading.Thread(target=self._scheduled_jobs, name="medibit-backup", daemon=True).start()
+
+    def _scheduled_jobs(self) -> None:
+        self.backup_service.run_scheduled_backup()
+        self.archive_service.run_scheduled_archive()
+        take_stock_snapshot_if_due()
+
+    def _run_idle_maintenance(self) -> None:
+        """
+        Start database maintenance on a background thread once the UI has been idle long enough
+        (fired by the maintenance timer). The run stops between steps as soon as the user is back.
+        """
+        idle_minutes = get_maintenance_settings()["idle_minutes"]
+        if self.idle_monitor.idle_seconds() < idle_minutes * 60 or not self.maintenance_service.is_maintenance_due():
+            return
+        idle_since = self.idle_monitor.last_activity
+        should_stop = lambda: self.idle_monitor.last_activity != idle_since
+        threading.Thread(target=self._idle_jobs, args=(should_stop,), name="medibit-maintenance", daemon=True).start()
+
+    def _idle_jobs(self, should_stop) -> None:
+        ok, _ = self.maintenance_service.run_scheduled_maintenance(should_stop)
+        # Old receipt and order PDFs are rarely opened again; gzip them while the counter is idle
+        if ok and not should_stop():
+            self.artifact_store.compress_older_than(get_maintenance_settings()["compress_artifacts_after_days"])
+
+    def _restore_autosaved_bill(self) -> None:
+        """
+        Restore a bill that was still in progress when the previous session ended.
+        """
+        draft = self.billing_service.get_autosave()
+        if not draft or not draft.get('items') or self.billing_ui.billing_table.rowCount():
+            return
+        self._apply_billing_draft(draft)
+        logger.info(f"Recovered autosaved bill with {len(draft['items'])} items")
+
     def save_billing_draft(self) -> None:
         """
         Save the current bill as a draft using billing_service.
@@ -1483,43 +1513,16 @@ class MainWindow(QMainWindow):
         if not ok or not name.strip():
             QMessageBox.warning(self, "No Name", "Draft not saved: name is required.")
             return
-        draft = {
-            'customer': {
-                'name': self.billing_ui.customer_name.text(),
-                'age': self.billing_ui.customer_age.value(),
-                'gender': self.billing_ui.customer_gender.currentText(),
-                'phone': self.billing_ui.customer_phone.text(),
-                'email': self.billing_ui.customer_email.text(),
-                'address': self.billing_ui.customer_address.text(),
-            },
-            'items': [],
-            'tax': self.billing_ui.tax_spin.value(),
-            'discount': self.billing_ui.discount_spin.value(),
-            'subtotal': self.billing_ui.subtotal_label.text(),
-            'total': self.billing_ui.total_label.text(),
-        }
-        for row in range(self.billing_ui.billing_table.rowCount()):
-            item = {
-                'barcode': self.billing_ui.billing_table.item(row, 0).text() if self.billing_ui.billing_table.item(row, 0) else '',
-                'name': self.billing_ui.billing_table.item(row, 1).text() if self.billing_ui.billing_table.item(row, 1) else '',
-                'quantity': self.billing_ui.billing_table.item(row, 2).text() if self.billing_ui.billing_table.item(row, 2) else '',
-                'price': self.billing_ui.billing_table.item(row, 3).text() if self.billing_ui.billing_table.item(row, 3) else '',
-                'tax': self.billing_ui.billing_table.item(row, 4).text() if self.billing_ui.billing_table.item(row, 4) else '',
-                'discount': self.billing_ui.billing_table.item(row, 5).text() if self.billing_ui.billing_table.item(row, 5) else '',
-            }
-            draft['items'].append(item)
-        success, result = self.billing_service.save_draft(draft, name)
+        draft = self._collect_billing_draft()
+        success, result = self.billing_service.save_draft(draft, name, getattr(self, '_current_loaded_draft_id', None))
         if success:
-            QMessageBox.information(self, "Draft Saved", f"Current bill has been saved as a draft: {result}")
+            QMessageBox.information(self, "Draft Saved", f"Current bill has been saved as draft '{name.strip()}'.")
+            self._current_loaded_draft_id = None
+            self.billing_service.clear_autosave()
             self._refresh_billing_history()
             # Clear billing table and customer info after saving draft
             self.billing_ui.billing_table.setRowCount(0)
-            self.billing_ui.customer_name.clear()
-            self.billing_ui.customer_age.setValue(0)
-            self.billing_ui.customer_gender.setCurrentIndex(0)
-            self.billing_ui.customer_phone.clear()
-            self.billing_ui.customer_email.clear()
-            self.billing_ui.customer_address.clear()
+            self.billing_ui.clear_customer_fields()
             self.billing_ui.tax_spin.setValue(0)
             self.billing_ui.discount_spin.setValue(0)
             self.billing_ui.subtotal_label.setText("₹0.00")
@@ -1532,13 +1535,8 @@ class MainWindow(QMainWindow):
         # Clear the billing table
         if hasattr(self, "billing_table"):
             self.billing_ui.billing_table.setRowCount(0)
-        # Optionally remove the draft file
-        if os.path.exists("billing_draft.json"):
-            try:
-                os.remove("billing_draft.json")
-            except Exception as e:
-                logger.error(f"Failed to delete billing_draft.json: {e}")
-                QMessageBox.warning(self, "Delete Error", f"Could not delete billing draft: {e}")
+        # Discard the autosaved in-progress bill
+        self.billing_service.clear_autosave()
 
     def save_inventory_edits(self) -> None:
         # Call inventory model/controller save method if present
@@ -1787,7 +1785,6 @@ class MainWindow(QMainWindow):
                 QMessageBox.information(
                     self, "Deleted", "Medicine deleted successfully."
                 )
-                self.inventory_ui.refresh_inventory_table()
                 # Refresh open dialogs if present
                 if self.bulk_threshold_dialog is not None:
                     self.bulk_threshold_dialog.reload_data()
@@ -1813,7 +1810,6 @@ class MainWindow(QMainWindow):
                     "Inventory Cleared",
                     f"All medicines deleted. ({result} items removed)",
                 )
-                self.inventory_ui.refresh_inventory_table()
                 # Refresh open dialogs if present
                 if self.bulk_threshold_dialog is not None:
                     self.bulk_threshold_dialog.reload_data()
@@ -1825,43 +1821,9 @@ class MainWindow(QMainWindow):
                 )
 
     def send_daily_sales_summary(self) -> None:
-        import datetime
-
-        from db import Bill
-        from notifications import NotificationManager
-
-        session = None
         try:
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-
-            engine = create_engine(f"sqlite:///pharmacy_inventory.db", echo=False)
-            Session = sessionmaker(bind=engine)
-            session = Session()
-            today = datetime.datetime.now().strftime("%Y-%m-%d")
-            bills = session.query(Bill).filter(Bill.timestamp.startswith(today)).all()
-            total = sum(bill.total for bill in bills)
-            count = len(bills)
-            avg = total / count if count else 0
-            bill_details = []
-            for bill in bills:
-                # Extract time from timestamp if possible
-                time_str = (
-                    bill.timestamp[11:16]
-                    if len(bill.timestamp) >= 16
-                    else bill.timestamp
-                )
-                bill_details.append({"time": time_str, "total": bill.total})
-            sales_summary = {"total": total, "count": count, "avg": avg}
-            notif = NotificationManager()
-            email_success, email_msg = notif.send_daily_sales_summary_email(
-                sales_summary, bill_details
-            )
-            whatsapp_success, whatsapp_msg = notif.send_daily_sales_summary_whatsapp(
-                sales_summary, bill_details
-            )
-            msg = f"Email: {email_msg}\nWhatsApp: {whatsapp_msg}"
-            if email_success or whatsapp_success:
+            success, msg = self.alert_service.send_daily_sales_summary()
+            if success:
                 QMessageBox.information(self, "Daily Sales Summary Sent", msg)
             else:
                 QMessageBox.warning(self, "Daily Sales Summary Failed", msg)
@@ -1869,9 +1831,6 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(
                 self, "Error", f"Failed to send daily sales summary: {str(e)}"
             )
-        finally:
-            if session:
-                session.close()
 
     def clear_billing_history(self) -> None:
         """
@@ -1887,7 +1846,7 @@ class MainWindow(QMainWindow):
 
     def delete_selected_draft(self) -> None:
         """
-        Delete the selected draft file from the drafts directory.
+        Delete the selected draft.
         """
         from PyQt5.QtWidgets import QMessageBox
         selected_items = self.billing_ui.recent_bills_list.selectedItems()
@@ -1896,16 +1855,15 @@ class MainWindow(QMainWindow):
             return
         selected_item = selected_items[0]
         data = selected_item.data(Qt.UserRole)
-        if not (isinstance(data, dict) and data.get('is_draft') and data.get('draft_path')):
+        if not (isinstance(data, dict) and data.get('is_draft') and data.get('draft_id')):
             QMessageBox.warning(self, "Not a Draft", "Please select a draft bill to delete.")
             return
-        import os
-        try:
-            os.remove(data['draft_path'])
+        success, error = self.billing_service.delete_draft(data['draft_id'])
+        if success:
             QMessageBox.information(self, "Draft Deleted", "Draft has been deleted.")
             self._refresh_billing_history()
-        except Exception as e:
-            QMessageBox.warning(self, "Delete Failed", f"Could not delete draft: {e}")
+        else:
+            QMessageBox.warning(self, "Delete Failed", f"Could not delete draft: {error}")
 
     @property
     def inventory_table(self):
@@ -1927,8 +1885,12 @@ class MainWindow(QMainWindow):
         from PyQt5.QtGui import QPagedPaintDevice
         import os
 
-        pdf_path = getattr(self, '_last_pdf_receipt_path', None)
-        if not pdf_path or not os.path.exists(pdf_path):
+        from config import get_printer_settings
+
+        pdf_path = self._last_receipt_pdf()
+        has_pdf = bool(pdf_path) and os.path.exists(pdf_path)
+        has_thermal = get_printer_settings()["enabled"] and self.billing_service.last_receipt is not None
+        if not has_pdf and not has_thermal:
             QMessageBox.information(self, "No PDF Available", "No PDF file is available to print. Please finalize a bill first.")
             return
 
@@ -1936,14 +1898,26 @@ class MainWindow(QMainWindow):
         dialog = QDialog(self)
         dialog.setWindowTitle("Print Bill")
         layout = QVBoxLayout(dialog)
+        btn_receipt = QPushButton("Print Receipt (Thermal)")
         btn_print = QPushButton("Print to Printer")
         btn_pdf = QPushButton("Save as PDF")
         btn_cancel = QPushButton("Cancel")
+        btn_receipt.setVisible(has_thermal)
+        btn_print.setEnabled(has_pdf)
+        btn_pdf.setEnabled(has_pdf)
+        layout.addWidget(btn_receipt)
         layout.addWidget(btn_print)
         layout.addWidget(btn_pdf)
         layout.addWidget(btn_cancel)
         dialog.setLayout(layout)
 
+        def do_print_receipt():
+            # Raw ESC/POS reprint of the last bill; no rendering or print dialog involved
+            success, message = self.billing_service.reprint_last_receipt()
+            if not success:
+                QMessageBox.warning(self, "Print Error", message)
+            dialog.accept()
+
         def do_print():
             # Print the PDF to a selected printer
             printer = QPrinter(QPrinter.HighResolution)
@@ -1980,6 +1954,7 @@ class MainWindow(QMainWindow):
                     QMessageBox.warning(self, "Save Error", f"Failed to save PDF: {e}")
             dialog.accept()
 
+        btn_receipt.clicked.connect(do_print_receipt)
         btn_print.clicked.connect(do_print)
         btn_pdf.clicked.connect(do_save_pdf)
         btn_cancel.clicked.connect(dialog.reject)
@@ -0,0 +1,188 @@
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+try:
+    from PyQt5.QtCore import QEvent, QObject
+except ImportError:  # Maintenance can run headless (scripts, tests)
+    QObject = None
+
+import db
+from config import get_maintenance_settings, set_maintenance_settings
+
+# Logging is configured in main_window.py
+maintenance_logger = logging.getLogger("medibit.maintenance")
+
+BUSY_TIMEOUT = 30  # Seconds to wait for a running write before a step gives up
+VACUUM_STEP_PAGES = 1024  # Free pages returned per incremental vacuum step (4 MiB with 4 KiB pages)
+# Run early when this share of the file is free pages (after clear_inventory, big deletes, archiving)
+FREE_RATIO_TRIGGER = 0.25
+
+# One maintenance run at a time per process
+_maintenance_lock = threading.Lock()
+
+
+class MaintenanceService:
+    """
+    Routine SQLite upkeep, meant to run while the counter is idle:
+    incremental vacuum returns free pages to the filesystem, ANALYZE (first run) or
+    PRAGMA optimize keeps planner statistics current, and quick_check catches
+    corruption early. Each run records its duration and the space reclaimed.
+
+    Databases created before auto_vacuum was enabled are converted with one full
+    VACUUM on their first run; after that every step is short and the run stops
+    between steps as soon as should_stop() returns True.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, vacuum_step_pages: int = VACUUM_STEP_PAGES):
+        self.db_path = db_path or db.DB_FILENAME
+        self.vacuum_step_pages = vacuum_step_pages
+
+    def run(self, should_stop: Optional[Callable[[], bool]] = None,
+            now: Optional[datetime.datetime] = None) -> Tuple[bool, object]:
+        """
+        Run the maintenance steps.
+        :param should_stop: Optional callable checked between steps; returning True ends the run early
+        :param now: Reference time recorded as the run time (defaults to now)
+        :return: (True, report dict) or (False, error message)
+        """
+        if not _maintenance_lock.acquire(blocking=False):
+            return False, "Maintenance is already running."
+        try:
+            return self._run(should_stop or (lambda: False), now or datetime.datetime.now())
+        finally:
+            _maintenance_lock.release()
+
+    def _run(self, should_stop, now) -> Tuple[bool, object]:
+        started = time.perf_counter()
+        report = {"started": now.isoformat(timespec="seconds"), "size_before": self._file_size(),
+                  "vacuum": None, "freed_pages": 0, "statistics": None, "quick_check": None, "interrupted": False}
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        except sqlite3.Error as e:
+            maintenance_logger.error("Could not open database for maintenance: %s", e, exc_info=True)
+            return False, str(e)
+        try:
+            for step in (self._vacuum, self._statistics, self._quick_check):
+                if should_stop():
+                    report["interrupted"] = True
+                    break
+                step(conn, report, should_stop)
+            # Move the WAL back into the main file so the truncated pages actually leave the disk
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        except sqlite3.Error as e:
+            maintenance_logger.error("Maintenance failed: %s", e, exc_info=True)
+            return False, str(e)
+        finally:
+            conn.close()
+        report["size_after"] = self._file_size()
+        report["reclaimed_bytes"] = max(0, report["size_before"] - report["size_after"])
+        report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if report["interrupted"]:
+            set_maintenance_settings(last_result=report)
+        else:
+            set_maintenance_settings(last_run=report["started"], last_result=report)
+        if report["quick_check"] not in (None, "ok"):
+            maintenance_logger.error("Database quick_check reported problems: %s", report["quick_check"])
+        maintenance_logger.info("Database maintenance finished", extra=report)
+        return True, report
+
+    def _vacuum(self, conn, report, should_stop) -> None:
+        free_before = _pragma(conn, "freelist_count")
+        if _pragma(conn, "auto_vacuum") == 0:
+            # auto_vacuum only changes with a full VACUUM; do it once so later runs are incremental
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            report["vacuum"] = "full"
+        elif free_before:
+            report["vacuum"] = "incremental"
+            while _pragma(conn, "freelist_count") and not should_stop():
+                conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_step_pages})").fetchall()
+        report["freed_pages"] = free_before - _pragma(conn, "freelist_count")
+
+    @staticmethod
+    def _statistics(conn, report, should_stop) -> None:
+        analyzed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+        if analyzed:
+            # Re-analyzes only the tables whose statistics are stale
+            conn.execute("PRAGMA optimize").fetchall()
+            report["statistics"] = "optimize"
+        else:
+            conn.execute("ANALYZE")
+            report["statistics"] = "analyze"
+
+    @staticmethod
+    def _quick_check(conn, report, should_stop) -> None:
+        result = [row[0] for row in conn.execute("PRAGMA quick_check")]
+        report["quick_check"] = "; ".join(result[:5])
+
+    def _file_size(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.db_path, self.db_path + "-wal") if os.path.exists(path))
+
+    def free_ratio(self) -> float:
+        """Share of the database file that is free pages."""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+        try:
+            pages = _pragma(conn, "page_count")
+            return _pragma(conn, "freelist_count") / pages if pages else 0.0
+        finally:
+            conn.close()
+
+    # --- Scheduling -----------------------------------------------------------------------
+    def is_maintenance_due(self, now: Optional[datetime.datetime] = None) -> bool:
+        settings = get_maintenance_settings()
+        if not settings["enabled"]:
+            return False
+        if not settings["last_run"]:
+            return True
+        now = now or datetime.datetime.now()
+        try:
+            last = datetime.datetime.fromisoformat(settings["last_run"])
+        except ValueError:
+            return True
+        if now - last >= datetime.timedelta(hours=settings["interval_hours"]):
+            return True
+        try:
+            return self.free_ratio() >= FREE_RATIO_TRIGGER
+        except sqlite3.Error:
+            return False
+
+    def run_scheduled_maintenance(self, should_stop: Optional[Callable[[], bool]] = None) -> Tuple[bool, object]:
+        """
+        Run maintenance if it is due (intended for an idle timer on a background thread).
+        :param should_stop: Optional callable checked between steps, e.g. "the user is back"
+        :return: (success, report or reason)
+        """
+        if not self.is_maintenance_due():
+            return False, "No maintenance due."
+        return self.run(should_stop)
+
+
+def _pragma(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+if QObject is not None:
+    class IdleMonitor(QObject):
+        """
+        Tracks user input across the application to tell when the counter is idle.
+        Install with QApplication.instance().installEventFilter(monitor).
+        """
+        INPUT_EVENTS = frozenset((QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.MouseMove,
+                                  QEvent.Wheel, QEvent.TouchBegin))
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.last_activity = time.monotonic()
+
+        def eventFilter(self, obj, event):
+            if event.type() in self.INPUT_EVENTS:
+                self.last_activity = time.monotonic()
+            return False
+
+        def idle_seconds(self) -> float:
+            return time.monotonic() - self.last_activity
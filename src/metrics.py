@@ -0,0 +1,232 @@
+import bisect
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Histogram bucket upper bounds in seconds (Prometheus style, cumulative on export)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Recent samples kept per operation for exact percentiles
+RESERVOIR_SIZE = 2048
+
+
+class OperationStats:
+    """Latency statistics for one operation. Not thread-safe on its own; the registry locks."""
+
+    __slots__ = ("count", "errors", "total", "max", "buckets", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # Last slot is +Inf
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, seconds: float, error: bool) -> None:
+        self.count += 1
+        self.errors += 1 if error else 0
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.recent)
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(pct(50), 3),
+            "p95_ms": round(pct(95), 3),
+            "p99_ms": round(pct(99), 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process registry of per-operation latency histograms and call counts.
+    Operation names are dotted, e.g. 'billing.finalize_bill' or 'db.get_all_medicines'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops: Dict[str, OperationStats] = {}
+        self.enabled = True
+
+    def observe(self, name: str, seconds: float, error: bool = False) -> None:
+        """
+        Record one call.
+        :param name: Operation name
+        :param seconds: Duration in seconds
+        :param error: Whether the call raised
+        """
+        with self._lock:
+            stats = self._ops.get(name)
+            if stats is None:
+                stats = self._ops[name] = OperationStats()
+            stats.observe(seconds, error)
+
+    @contextmanager
+    def track(self, name: str):
+        """
+        Context manager timing the enclosed block as one call of an operation.
+        :param name: Operation name
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, error)
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """
+        Decorator timing every call of a function.
+        :param name: Operation name (defaults to the function's qualified name)
+        """
+        def decorator(func):
+            op = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                error = False
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    self.observe(op, time.perf_counter() - start, error)
+
+            wrapper.__metrics_name__ = op
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return summary statistics per operation, slowest p95 first.
+        :return: Dict of operation -> {count, errors, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}
+        """
+        with self._lock:
+            summaries = {name: stats.summary() for name, stats in self._ops.items()}
+        return dict(sorted(summaries.items(), key=lambda kv: kv[1]["p95_ms"], reverse=True))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Render all operations in the Prometheus text exposition format.
+        :return: Exposition text
+        """
+        lines = [
+            "# HELP medibit_operation_duration_seconds Latency of service methods and DB functions.",
+            "# TYPE medibit_operation_duration_seconds histogram",
+        ]
+        with self._lock:
+            ops = [(name, list(s.buckets), s.count, s.total, s.errors) for name, s in sorted(self._ops.items())]
+        for name, buckets, count, total, _ in ops:
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float("inf"),), buckets):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'medibit_operation_duration_seconds_bucket{{operation="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'medibit_operation_duration_seconds_sum{{operation="{name}"}} {total:.6f}')
+            lines.append(f'medibit_operation_duration_seconds_count{{operation="{name}"}} {count}')
+        lines.append("# HELP medibit_operation_errors_total Calls that raised an exception.")
+        lines.append("# TYPE medibit_operation_errors_total counter")
+        for name, _, _, _, errors in ops:
+            lines.append(f'medibit_operation_errors_total{{operation="{name}"}} {errors}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> str:
+        """
+        Write metrics to a file: Prometheus text for *.prom/*.txt, JSON otherwise.
+        :param path: Destination file
+        :return: The path written
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if path.endswith((".prom", ".txt")):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps({"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "operations": self.snapshot()}, indent=2)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return path
+
+
+registry = MetricsRegistry()
+timed = registry.timed
+track = registry.track
+
+
+def instrumented(prefix: str):
+    """
+    Class decorator timing every public method of a service class as '<prefix>.<method>'.
+    :param prefix: Operation name prefix, e.g. 'billing'
+    """
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_"):
+                continue
+            if isinstance(value, staticmethod):
+                setattr(cls, attr, staticmethod(timed(f"{prefix}.{attr}")(value.__func__)))
+            elif isinstance(value, classmethod):
+                setattr(cls, attr, classmethod(timed(f"{prefix}.{attr}")(value.__func__)))
+            elif inspect.isfunction(value):
+                setattr(cls, attr, timed(f"{prefix}.{attr}")(value))
+        return cls
+    return decorator
+
+
+def instrument_module(namespace: dict, prefix: str) -> None:
+    """
+    Wrap every public function defined in a module with timing, in place.
+    Call at the end of the module so importers pick up the wrapped functions.
+    :param namespace: The module's globals()
+    :param prefix: Operation name prefix, e.g. 'db'
+    """
+    module_name = namespace["__name__"]
+    for attr, value in list(namespace.items()):
+        if not attr.startswith("_") and inspect.isfunction(value) and value.__module__ == module_name:
+            namespace[attr] = timed(f"{prefix}.{attr}")(value)
+
+
+def dump_on_exit(directory: str) -> None:
+    """
+    Write a JSON metrics snapshot into the directory when the process exits.
+    :param directory: Output directory (e.g. the logs directory)
+    """
+    import atexit
+    path = os.path.join(directory, f"metrics_{time.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+
+    def dump():
+        if registry.snapshot():
+            registry.export(path)
+
+    atexit.register(dump)
@@ -9,14 +9,19 @@ from logging.handlers import RotatingFileHandler
 
 import requests
 
+import config
+
 # Logging is configured in main_window.py
 notif_logger = logging.getLogger("medibit.notifications")
 
+SEND_TIMEOUT_SECONDS = 15  # SMTP and Twilio calls run on worker threads; never let one hang them
+TWILIO_CHANNELS = {"whatsapp": "WhatsApp", "sms": "SMS"}  # Config section -> display name
+
 
 class NotificationManager:
     def __init__(self):
-        # Set config directory at project root
-        config_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
+        # Notification settings sit next to config.json
+        config_dir = os.path.dirname(config.CONFIG_FILE)
         if not os.path.exists(config_dir):
             os.makedirs(config_dir)
         self.config_file = os.path.join(config_dir, "notification_config.json")
@@ -67,63 +72,20 @@ class NotificationManager:
             notif_logger.info(f"[Email] Attempted to send but email notifications are disabled at {datetime.now()}")
             return False, "Email notifications are disabled"
 
-        try:
-            # Create message
-            msg = MIMEMultipart()
-            msg["From"] = self.config["email"]["sender_email"]
-            msg["To"] = ", ".join(self.config["email"]["recipient_emails"])
-            msg["Subject"] = (
-                f"Low Stock Alert - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-            )
-
-            # Create email body
-            body = "Low Stock Alert - medibit Pharmacy Management System\n\n"
-            body += "The following medicines are running low on stock:\n\n"
-
-            for med in low_stock_medicines:
-                body += f"• {med.name} (Barcode: {med.barcode})\n"
-                body += f"  Current Stock: {med.quantity}\n"
-                body += f"  Manufacturer: {med.manufacturer or 'N/A'}\n\n"
-
-            body += "\nPlease take necessary action to restock these items.\n"
-            body += f"\nGenerated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-
-            msg.attach(MIMEText(body, "plain"))
-
-            # Send email
-            server = smtplib.SMTP(
-                self.config["email"]["smtp_server"],
-                self.config["email"]["smtp_port"],
-            )
-            server.starttls()
-            server.login(
-                self.config["email"]["sender_email"],
-                self.config["email"]["sender_password"],
-            )
+        # Create email body
+        body = "Low Stock Alert - medibit Pharmacy Management System\n\n"
+        body += "The following medicines are running low on stock:\n\n"
 
-            for recipient in self.config["email"]["recipient_emails"]:
-                server.send_message(msg)
+        for med in low_stock_medicines:
+            body += f"• {med.name} (Barcode: {med.barcode})\n"
+            body += f"  Current Stock: {med.quantity}\n"
+            body += f"  Manufacturer: {med.manufacturer or 'N/A'}\n\n"
 
-            server.quit()
-            notif_logger.info(f"[Email] Alert sent to {self.config['email']['recipient_emails']} at {datetime.now()}")
-            return (
-                True,
-                f"Email alert sent to {len(self.config['email']['recipient_emails'])} recipients",
-            )
+        body += "\nPlease take necessary action to restock these items.\n"
+        body += f"\nGenerated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 
-        except smtplib.SMTPAuthenticationError as e:
-            notif_logger.error(f"[Email] Authentication failed at {datetime.now()}: {str(e)}")
-            if "534" in str(e) and "application specific password" in str(e).lower():
-                return (
-                    False,
-                    f"Email alert failed: Gmail requires an App Password. Please generate one at: "
-                    "Google Account → Security → 2-Step Verification → App passwords",
-                )
-            else:
-                return False, f"Email authentication failed: {str(e)}"
-        except Exception as e:
-            notif_logger.error(f"[Email] Alert failed at {datetime.now()}: {str(e)}")
-            return False, f"Email alert failed: {str(e)}"
+        subject = f"Low Stock Alert - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+        return self._send_email(subject, body, "Email alert")
 
     def send_whatsapp_alert(self, low_stock_medicines):
         """Send WhatsApp alert for low stock medicines using Twilio"""
@@ -131,69 +93,22 @@ class NotificationManager:
             notif_logger.info(f"[WhatsApp] Attempted to send but WhatsApp notifications are disabled at {datetime.now()}")
             return False, "WhatsApp notifications are disabled"
 
-        try:
-            # Parse Twilio credentials
-            api_key = self.config["whatsapp"]["api_key"]
-            if ":" not in api_key:
-                return (
-                    False,
-                    "Invalid Twilio API key format. Use: Account SID:Auth Token",
-                )
+        # Create message
+        message = "🚨 *Low Stock Alert - medibit*\n\n"
+        message += "The following medicines are running low on stock:\n\n"
 
-            account_sid, auth_token = api_key.split(":", 1)
-
-            # Create message
-            message = "🚨 *Low Stock Alert - medibit*\n\n"
-            message += "The following medicines are running low on stock:\n\n"
-
-            for med in low_stock_medicines:
-                message += f"• *{med.name}*\n"
-                message += f"  📦 Current Stock: {med.quantity}\n"
-                message += f"  📋 Barcode: {med.barcode}\n"
-                if med.manufacturer:
-                    message += f"  🏭 Manufacturer: {med.manufacturer}\n"
-                message += "\n"
-
-            message += (
-                f"\n⏰ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            )
-
-            # Send to each phone number using Twilio WhatsApp API
-            success_count = 0
-            for phone in self.config["whatsapp"]["phone_numbers"]:
-                try:
-                    # Twilio WhatsApp API endpoint
-                    url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
-
-                    # For WhatsApp, use the whatsapp: prefix
-                    from_number = (
-                        "whatsapp:+14155238886"  # Twilio WhatsApp sandbox number
-                    )
-                    to_number = f"whatsapp:{phone}"
-
-                    payload = {"From": from_number, "To": to_number, "Body": message}
-
-                    response = requests.post(
-                        url, data=payload, auth=(account_sid, auth_token)
-                    )
-
-                    if response.status_code in [200, 201]:
-                        success_count += 1
-                        notif_logger.info(f"[WhatsApp] Alert sent to {phone} at {datetime.now()}")
-                    else:
-                        notif_logger.error(f"[WhatsApp] Failed to send to {phone} at {datetime.now()}: {response.text}")
-
-                except Exception as e:
-                    notif_logger.error(f"[WhatsApp] Exception sending to {phone} at {datetime.now()}: {str(e)}")
-
-            if success_count > 0:
-                return True, f"WhatsApp alert sent to {success_count} recipients"
-            else:
-                return False, "WhatsApp alert failed for all recipients"
+        for med in low_stock_medicines:
+            message += f"• *{med.name}*\n"
+            message += f"  📦 Current Stock: {med.quantity}\n"
+            message += f"  📋 Barcode: {med.barcode}\n"
+            if med.manufacturer:
+                message += f"  🏭 Manufacturer: {med.manufacturer}\n"
+            message += "\n"
 
-        except Exception as e:
-            notif_logger.error(f"[WhatsApp] Alert failed at {datetime.now()}: {str(e)}")
-            return False, f"WhatsApp alert failed: {str(e)}"
+        message += (
+            f"\n⏰ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+        return self._send_twilio("whatsapp", message, "WhatsApp alert")
 
     def send_sms_alert(self, low_stock_medicines):
         """Send SMS alert for low stock medicines using Twilio"""
@@ -201,64 +116,17 @@ class NotificationManager:
             notif_logger.info(f"[SMS] Attempted to send but SMS notifications are disabled at {datetime.now()}")
             return False, "SMS notifications are disabled"
 
-        try:
-            # Parse Twilio credentials
-            api_key = self.config["sms"]["api_key"]
-            if ":" not in api_key:
-                return (
-                    False,
-                    "Invalid Twilio API key format. Use: Account SID:Auth Token",
-                )
-
-            account_sid, auth_token = api_key.split(":", 1)
+        # Create message (SMS has character limit)
+        message = "Low Stock Alert - medibit\n\n"
 
-            # Create message (SMS has character limit)
-            message = "Low Stock Alert - medibit\n\n"
+        # Add first few medicines (SMS has 160 character limit)
+        for med in low_stock_medicines[:3]:  # Limit to first 3 medicines
+            message += f"{med.name}: {med.quantity} left\n"
 
-            # Add first few medicines (SMS has 160 character limit)
-            for i, med in enumerate(
-                low_stock_medicines[:3]
-            ):  # Limit to first 3 medicines
-                message += f"{med.name}: {med.quantity} left\n"
+        if len(low_stock_medicines) > 3:
+            message += f"...and {len(low_stock_medicines) - 3} more items"
 
-            if len(low_stock_medicines) > 3:
-                message += f"...and {len(low_stock_medicines) - 3} more items"
-
-            # Send to each phone number using Twilio SMS API
-            success_count = 0
-            for phone in self.config["sms"]["phone_numbers"]:
-                try:
-                    # Twilio SMS API endpoint
-                    url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
-
-                    # You need to replace this with your actual Twilio phone number
-                    from_number = (
-                        "+16203178530"  # Replace with your Twilio phone number
-                    )
-
-                    payload = {"From": from_number, "To": phone, "Body": message}
-
-                    response = requests.post(
-                        url, data=payload, auth=(account_sid, auth_token)
-                    )
-
-                    if response.status_code in [200, 201]:
-                        success_count += 1
-                        notif_logger.info(f"[SMS] Alert sent to {phone} at {datetime.now()}")
-                    else:
-                        notif_logger.error(f"[SMS] Failed to send to {phone} at {datetime.now()}: {response.text}")
-
-                except Exception as e:
-                    notif_logger.error(f"[SMS] Exception sending to {phone} at {datetime.now()}: {str(e)}")
-
-            if success_count > 0:
-                return True, f"SMS alert sent to {success_count} recipients"
-            else:
-                return False, "SMS alert failed for all recipients"
-
-        except Exception as e:
-            notif_logger.error(f"[SMS] Alert failed at {datetime.now()}: {str(e)}")
-            return False, f"SMS alert failed: {str(e)}"
+        return self._send_twilio("sms", message, "SMS alert")
 
     def send_all_alerts(self, low_stock_medicines):
         """Send alerts through all enabled channels and log summary"""
@@ -284,6 +152,102 @@ class NotificationManager:
 
         return results
 
+    def send_alert_digest(self, sections):
+        """
+        Send one digest of new stock and expiry alerts through all enabled channels.
+        :param sections: List of (heading, medicines) pairs; empty sections are skipped
+        :return: List of (channel, success, message) for the enabled channels
+        """
+        sections = [(heading, meds) for heading, meds in sections if meds]
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        body = f"Stock Alerts - medibit ({stamp})\n"
+        for heading, meds in sections:
+            body += f"\n{heading} ({len(meds)}):\n"
+            for med in meds:
+                expiry = f", expires {med.expiry}" if med.expiry else ""
+                body += f"• {med.name} (Barcode: {med.barcode}) - Stock: {med.quantity}{expiry}\n"
+        # SMS gets the counts only
+        short = "medibit alerts: " + ", ".join(f"{heading} {len(meds)}" for heading, meds in sections)
+
+        results = []
+        if self.config["email"]["enabled"]:
+            results.append(("Email", *self._send_email(f"Stock Alerts - {stamp}", body)))
+        if self.config["whatsapp"]["enabled"]:
+            results.append(("WhatsApp", *self._send_twilio("whatsapp", body)))
+        if self.config["sms"]["enabled"]:
+            results.append(("SMS", *self._send_twilio("sms", short)))
+        for channel, success, message in results:
+            notif_logger.info(f"[Audit] Digest {channel}: {message} (Success: {success}) at {datetime.now()}")
+        return results
+
+    def _send_email(self, subject, body, label="Email"):
+        """
+        Send one plain-text email to all configured recipients.
+        :param label: What is being sent, for the result message (e.g. "Email alert")
+        :return: (success, message)
+        """
+        email = self.config["email"]
+        try:
+            msg = MIMEMultipart()
+            msg["From"] = email["sender_email"]
+            msg["To"] = ", ".join(email["recipient_emails"])
+            msg["Subject"] = subject
+            msg.attach(MIMEText(body, "plain"))
+            server = smtplib.SMTP(email["smtp_server"], email["smtp_port"], timeout=SEND_TIMEOUT_SECONDS)
+            server.starttls()
+            server.login(email["sender_email"], email["sender_password"])
+            server.send_message(msg)  # One message; every recipient is in the To header
+            server.quit()
+            notif_logger.info(f"[Email] {label} sent to {email['recipient_emails']} at {datetime.now()}")
+            return True, f"{label} sent to {len(email['recipient_emails'])} recipients"
+        except smtplib.SMTPAuthenticationError as e:
+            notif_logger.error(f"[Email] Authentication failed at {datetime.now()}: {str(e)}")
+            if "534" in str(e) and "application specific password" in str(e).lower():
+                return (
+                    False,
+                    f"{label} failed: Gmail requires an App Password. Please generate one at: "
+                    "Google Account → Security → 2-Step Verification → App passwords",
+                )
+            return False, f"Email authentication failed: {str(e)}"
+        except Exception as e:
+            notif_logger.error(f"[Email] {label} failed at {datetime.now()}: {str(e)}")
+            return False, f"{label} failed: {str(e)}"
+
+    def _send_twilio(self, channel, body, label=None):
+        """
+        Send one message to every configured number through Twilio.
+        :param channel: "whatsapp" or "sms"
+        :param label: What is being sent, for the result message (defaults to the channel name)
+        :return: (success, message)
+        """
+        name = TWILIO_CHANNELS[channel]
+        label = label or name
+        settings = self.config[channel]
+        api_key = settings["api_key"]
+        if ":" not in api_key:
+            return False, "Invalid Twilio API key format. Use: Account SID:Auth Token"
+        account_sid, auth_token = api_key.split(":", 1)
+        url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
+        if channel == "whatsapp":
+            from_number, prefix = "whatsapp:+14155238886", "whatsapp:"  # Twilio WhatsApp sandbox number
+        else:
+            from_number, prefix = "+16203178530", ""  # Replace with your Twilio phone number
+        success_count = 0
+        for phone in settings["phone_numbers"]:
+            try:
+                response = requests.post(url, data={"From": from_number, "To": prefix + phone, "Body": body},
+                                         auth=(account_sid, auth_token), timeout=SEND_TIMEOUT_SECONDS)
+                if response.status_code in [200, 201]:
+                    success_count += 1
+                    notif_logger.info(f"[{name}] {label} sent to {phone} at {datetime.now()}")
+                else:
+                    notif_logger.error(f"[{name}] Failed to send to {phone} at {datetime.now()}: {response.text}")
+            except Exception as e:
+                notif_logger.error(f"[{name}] Exception sending to {phone} at {datetime.now()}: {str(e)}")
+        if success_count > 0:
+            return True, f"{label} sent to {success_count} recipients"
+        return False, f"{label} failed for all recipients"
+
     def update_config(self, section, key, value):
         """Update configuration"""
         if section in self.config and key in self.config[section]:
@@ -296,85 +260,29 @@ class NotificationManager:
         """Send daily sales summary via email to all recipients."""
         if not self.config["email"]["enabled"]:
             return False, "Email notifications are disabled"
-        try:
-            msg = MIMEMultipart()
-            msg["From"] = self.config["email"]["sender_email"]
-            msg["To"] = ", ".join(self.config["email"]["recipient_emails"])
-            msg["Subject"] = (
-                f"Daily Sales Summary - {datetime.now().strftime('%Y-%m-%d')}"
-            )
-            body = f"Daily Sales Summary for {datetime.now().strftime('%Y-%m-%d')}\n\n"
-            body += f"Total Sales: ₹{sales_summary['total']:.2f}\n"
-            body += f"Number of Bills: {sales_summary['count']}\n"
-            body += f"Average Bill: ₹{sales_summary['avg']:.2f}\n\n"
-            body += "Bill Details:\n"
-            for bill in bill_details:
-                body += f"- Time: {bill['time']}, Amount: ₹{bill['total']:.2f}\n"
-            body += "\nThis is an automated message."
-            msg.attach(MIMEText(body, "plain"))
-            server = smtplib.SMTP(
-                self.config["email"]["smtp_server"], self.config["email"]["smtp_port"]
-            )
-            server.starttls()
-            server.login(
-                self.config["email"]["sender_email"],
-                self.config["email"]["sender_password"],
-            )
-            for recipient in self.config["email"]["recipient_emails"]:
-                server.send_message(msg)
-            server.quit()
-            return (
-                True,
-                f"Daily sales summary sent to {len(self.config['email']['recipient_emails'])} recipients",
-            )
-        except Exception as e:
-            return False, f"Daily sales summary email failed: {str(e)}"
+        body = f"Daily Sales Summary for {datetime.now().strftime('%Y-%m-%d')}\n\n"
+        body += f"Total Sales: ₹{sales_summary['total']:.2f}\n"
+        body += f"Number of Bills: {sales_summary['count']}\n"
+        body += f"Average Bill: ₹{sales_summary['avg']:.2f}\n\n"
+        body += "Bill Details:\n"
+        for bill in bill_details:
+            body += f"- Time: {bill['time']}, Amount: ₹{bill['total']:.2f}\n"
+        body += "\nThis is an automated message."
+        subject = f"Daily Sales Summary - {datetime.now().strftime('%Y-%m-%d')}"
+        return self._send_email(subject, body, "Daily sales summary email")
 
     def send_daily_sales_summary_whatsapp(self, sales_summary, bill_details):
         """Send daily sales summary via WhatsApp to all configured numbers."""
         if not self.config["whatsapp"]["enabled"]:
             return False, "WhatsApp notifications are disabled"
-        try:
-            api_key = self.config["whatsapp"]["api_key"]
-            if ":" not in api_key:
-                return (
-                    False,
-                    "Invalid Twilio API key format. Use: Account SID:Auth Token",
-                )
-            account_sid, auth_token = api_key.split(":", 1)
-            message = (
-                f"📊 *Daily Sales Summary - {datetime.now().strftime('%Y-%m-%d')}*\n\n"
-            )
-            message += f"*Total Sales:* ₹{sales_summary['total']:.2f}\n"
-            message += f"*Number of Bills:* {sales_summary['count']}\n"
-            message += f"*Average Bill:* ₹{sales_summary['avg']:.2f}\n\n"
-            message += "*Bill Details:*\n"
-            for bill in bill_details:
-                message += f"- Time: {bill['time']}, Amount: ₹{bill['total']:.2f}\n"
-            message += "\n_Automated message from Medibit Pharmacy_"
-            success_count = 0
-            for phone in self.config["whatsapp"]["phone_numbers"]:
-                try:
-                    url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
-                    from_number = "whatsapp:+14155238886"
-                    to_number = f"whatsapp:{phone}"
-                    payload = {"From": from_number, "To": to_number, "Body": message}
-                    response = requests.post(
-                        url, data=payload, auth=(account_sid, auth_token)
-                    )
-                    if response.status_code in [200, 201]:
-                        success_count += 1
-                except Exception as e:
-                    pass
-            if success_count > 0:
-                return (
-                    True,
-                    f"WhatsApp daily sales summary sent to {success_count} recipients",
-                )
-            else:
-                return (
-                    False,
-                    "WhatsApp daily sales summary failed for all recipients",
-                )
-        except Exception as e:
-            return False, f"WhatsApp daily sales summary failed: {str(e)}"
+        message = (
+            f"📊 *Daily Sales Summary - {datetime.now().strftime('%Y-%m-%d')}*\n\n"
+        )
+        message += f"*Total Sales:* ₹{sales_summary['total']:.2f}\n"
+        message += f"*Number of Bills:* {sales_summary['count']}\n"
+        message += f"*Average Bill:* ₹{sales_summary['avg']:.2f}\n\n"
+        message += "*Bill Details:*\n"
+        for bill in bill_details:
+            message += f"- Time: {bill['time']}, Amount: ₹{bill['total']:.2f}\n"
+        message += "\n_Automated message from Medibit Pharmacy_"
+        return self._send_twilio("whatsapp", message, "WhatsApp daily sales summary")
@@ -10,12 +10,11 @@ from email.mime.text import MIMEText
 from logging.handlers import RotatingFileHandler
 
 import requests
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+import pdf_templates
+from artifact_store import ArtifactStore
 
 # Logging is configured in main_window.py
 order_logger = logging.getLogger("medibit.order")
@@ -46,98 +45,42 @@ class OrderManager:
             self.config = {"email": {"enabled": False}, "whatsapp": {"enabled": False}}
 
     def generate_pdf_order(self, order_items, order_id, timestamp, supplier_info=None):
-        """Generate a professional PDF order"""
-
-        # Create orders directory
-        orders_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "orders")
-        os.makedirs(orders_dir, exist_ok=True)
+        """Generate a professional PDF order and record it in the artifact store"""
 
         # Generate filename
         filename = f"order_{order_id}_{timestamp.replace(':','-').replace(' ','_')}.pdf"
-        filepath = os.path.join(orders_dir, filename)
-
-        # Create PDF document
-        doc = SimpleDocTemplate(filepath, pagesize=A4)
-        story = []
-        styles = getSampleStyleSheet()
-
-        # Get pharmacy details
-        try:
-            from db import get_pharmacy_details
+        store = ArtifactStore()
+        filepath = store.path_for("order", filename)
 
-            pharmacy_details = get_pharmacy_details()
-        except Exception as e:
-            pharmacy_details = None
-
-        # Title
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1,  # Center alignment
-            textColor=colors.HexColor("#1976d2"),
-        )
+        self.render_pdf_order(filepath, order_items, order_id, timestamp, supplier_info)
+        if str(order_id).isdigit():
+            store.register("order", order_id, filepath, label=(supplier_info or {}).get("name"))
+        return filepath
 
-        # Use pharmacy name if available, otherwise use default
-        pharmacy_name = (
-            pharmacy_details.name if pharmacy_details else "medibit Pharmacy"
-        )
-        title = Paragraph(pharmacy_name, title_style)
-        story.append(title)
-
-        # Subtitle
-        subtitle_style = ParagraphStyle(
-            "Subtitle",
-            parent=styles["Heading2"],
-            fontSize=16,
-            spaceAfter=20,
-            alignment=1,
-            textColor=colors.HexColor("#666666"),
+    @staticmethod
+    def render_pdf_order(target, order_items, order_id, timestamp, supplier_info=None, pharmacy_details=None):
+        """
+        Render a purchase-order PDF using the shared templates.
+        :param target: File path or writable binary file object
+        :param pharmacy_details: Optional pharmacy details; defaults to the cached details
+        """
+        if pharmacy_details is None:
+            pharmacy_details = pdf_templates.get_pharmacy_details()
+        SimpleDocTemplate(target, pagesize=A4).build(
+            OrderManager.build_order_story(order_items, order_id, timestamp, pharmacy_details)
         )
-        subtitle = Paragraph("Purchase Order", subtitle_style)
-        story.append(subtitle)
-
-        story.append(Spacer(1, 20))
 
-        # Pharmacy Details Section
-        if pharmacy_details:
-            pharmacy_data = [
-                ["Pharmacy Information"],
-                ["Name:", pharmacy_details.name],
-                ["Address:", pharmacy_details.address],
-                ["Phone:", pharmacy_details.phone],
-                ["Email:", pharmacy_details.email],
-            ]
+    @staticmethod
+    def build_order_story(order_items, order_id, timestamp, pharmacy_details=None):
+        """
+        Build the purchase-order flowables. Styles, the pharmacy header and footer come
+        from the process-wide template cache; only order content is built here.
+        :return: List of flowables
+        """
+        styles = pdf_templates.get_styles()
 
-            # Add optional fields if available
-            if pharmacy_details.gst_number:
-                pharmacy_data.append(["GST Number:", pharmacy_details.gst_number])
-            if pharmacy_details.license_number:
-                pharmacy_data.append(
-                    ["License Number:", pharmacy_details.license_number]
-                )
-            if pharmacy_details.website:
-                pharmacy_data.append(["Website:", pharmacy_details.website])
-
-            pharmacy_table = Table(pharmacy_data, colWidths=[2 * inch, 4 * inch])
-            pharmacy_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f5f5f5")),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1976d2")),
-                        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, 0), 12),
-                        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.HexColor("#ffffff")),
-                        ("GRID", (0, 0), (-1, -1), 1, colors.HexColor("#dddddd")),
-                        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ]
-                )
-            )
-            story.append(pharmacy_table)
-            story.append(Spacer(1, 20))
+        # Title, subtitle and pharmacy details section
+        story = pdf_templates.order_header(pharmacy_details)
 
         # Order Details
         order_data = [
@@ -146,24 +89,7 @@ class OrderManager:
             ["Date:", timestamp],
             ["Status:", "Pending"],
         ]
-
-        order_table = Table(order_data, colWidths=[2 * inch, 4 * inch])
-        order_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f5f5f5")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1976d2")),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 12),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.HexColor("#ffffff")),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.HexColor("#dddddd")),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ]
-            )
-        )
-        story.append(order_table)
+        story.append(pdf_templates.info_table(order_data))
         story.append(Spacer(1, 20))
 
         # Items Table
@@ -192,60 +118,16 @@ class OrderManager:
             )
             total_quantity += item["order_quantity"]
 
-        items_table = Table(
-            items_data,
-            colWidths=[
-                0.5 * inch,
-                2 * inch,
-                1.5 * inch,
-                1 * inch,
-                1 * inch,
-                1.5 * inch,
-            ],
-        )
-        items_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1976d2")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 10),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.HexColor("#ffffff")),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.HexColor("#dddddd")),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ("FONTSIZE", (0, 1), (-1, -1), 9),
-                ]
-            )
-        )
-        story.append(items_table)
+        story.append(pdf_templates.items_table(items_data, pdf_templates.ORDER_ITEM_COL_WIDTHS))
         story.append(Spacer(1, 20))
 
         # Summary
-        summary_style = ParagraphStyle(
-            "Summary",
-            parent=styles["Heading2"],
-            fontSize=14,
-            spaceAfter=20,
-            alignment=2,  # Right alignment
-            textColor=colors.HexColor("#1976d2"),
-        )
         summary_text = (
             f"Total Items: {len(order_items)} | Total Quantity: {total_quantity}"
         )
-        summary_para = Paragraph(summary_text, summary_style)
-        story.append(summary_para)
+        story.append(Paragraph(summary_text, styles["summary"]))
 
         # Instructions
-        instructions_style = ParagraphStyle(
-            "Instructions",
-            parent=styles["Normal"],
-            fontSize=11,
-            spaceAfter=20,
-            alignment=0,  # Left alignment
-            textColor=colors.HexColor("#666666"),
-        )
         instructions_text = """
         <b>Instructions:</b><br/>
         • Please process this order as soon as possible<br/>
@@ -253,48 +135,11 @@ class OrderManager:
         • Contact us for any clarifications<br/>
         • Expected delivery: Within 3-5 business days
         """
-        instructions = Paragraph(instructions_text, instructions_style)
-        story.append(instructions)
+        story.append(pdf_templates.static_paragraph("order_instructions", instructions_text, "instructions"))
 
         # Footer
-        footer_style = ParagraphStyle(
-            "Footer",
-            parent=styles["Normal"],
-            fontSize=10,
-            spaceAfter=20,
-            alignment=1,  # Center alignment
-            textColor=colors.HexColor("#666666"),
-        )
-
-        if pharmacy_details:
-            footer_text = (
-                """
-                Thank you for your business!<br/>
-                {name}<br/>
-                {address}<br/>
-                Phone: {phone} | Email: {email}<br/>
-                This is a computer generated order.
-                """
-            ).format(
-                name=pharmacy_details.name,
-                address=pharmacy_details.address,
-                phone=pharmacy_details.phone,
-                email=pharmacy_details.email,
-            )
-        else:
-            footer_text = """
-                Thank you for your business!<br/>
-                medibit Pharmacy Management System<br/>
-                This is a computer generated order.
-                """
-
-        footer = Paragraph(footer_text, footer_style)
-        story.append(footer)
-
-        # Build PDF
-        doc.build(story)
-
-        return filepath
+        story.extend(pdf_templates.order_footer(pharmacy_details))
+        return story
 
     def send_order_email(self, supplier_info, pdf_path, order_items, order_id):
         """Send order via email"""
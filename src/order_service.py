@@ -1,10 +1,16 @@
 from typing import List, Dict, Any, Tuple, Optional
-from db import add_order, get_all_orders, get_low_stock_medicines
+from db import add_order, get_all_orders, update_order_file_path
 from order_manager import OrderManager
 import datetime
 import logging
+from metrics import instrumented
+from query_monitor import counted
+from reorder_engine import ReorderEngine
+from watchlist import watchlist
 logger = logging.getLogger("medibit")
 
+@instrumented("orders")
+@counted("orders")
 class OrderService:
     """
     Service class for all order-related business logic and data access.
@@ -12,6 +18,7 @@ class OrderService:
     """
 
     def __init__(self):
+        self.reorder_engine = ReorderEngine()
         logger.info("OrderService initialized")
 
     def get_all(self) -> List[Any]:
@@ -35,13 +42,28 @@ class OrderService:
         """
         logger.debug(f"[get_low_stock] ENTRY")
         try:
-            low_stock_medicines = get_low_stock_medicines()
+            low_stock_medicines = watchlist.medicines("low_stock")
             logger.debug(f"[get_low_stock] EXIT: success, low_stock_medicines_count={len(low_stock_medicines)}")
             return low_stock_medicines
         except Exception as e:
             logger.error(f"[get_low_stock] Exception: {e}", exc_info=True)
             return []
 
+    def suggest_order_quantities(self, barcodes: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Suggested order quantities from the demand forecast (see reorder_engine.py).
+        :param barcodes: Only these barcodes; defaults to every medicine that needs reordering
+        :return: Dict barcode -> quantity (empty if the forecast failed)
+        """
+        logger.debug(f"[suggest_order_quantities] ENTRY")
+        try:
+            suggestions = self.reorder_engine.suggest_quantities(barcodes)
+            logger.debug(f"[suggest_order_quantities] EXIT: success, count={len(suggestions)}")
+            return suggestions
+        except Exception as e:
+            logger.error(f"[suggest_order_quantities] Exception: {e}", exc_info=True)
+            return {}
+
     def add(self, timestamp: datetime.datetime, pdf_path: str, order_items: List[Dict[str, Any]]) -> Tuple[bool, Optional[str]]:
         """
         Add a new order to the database.
@@ -60,6 +82,27 @@ class OrderService:
             logger.error(f"[add] Exception: {e}", exc_info=True)
             return False, str(e)
 
+    def create(self, timestamp: str, order_items: List[Dict[str, Any]], supplier_info: Optional[Dict[str, Any]] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Save a new order, then generate its PDF under the real order ID.
+        :param timestamp: Order timestamp string
+        :param order_items: List of order item dicts
+        :param supplier_info: Optional supplier info dict
+        :return: (success, error message)
+        """
+        logger.debug(f"[create] ENTRY: timestamp={timestamp}, order_items={order_items}")
+        try:
+            order_id = add_order(timestamp, "", order_items)
+            pdf_path = self.generate_order_pdf(order_items, order_id, timestamp, supplier_info)
+            if pdf_path:
+                update_order_file_path(order_id, pdf_path)
+            logger.info(f"Order {order_id} created.")
+            logger.debug(f"[create] EXIT: success, order_id={order_id}, pdf_path={pdf_path}")
+            return True, None
+        except Exception as e:
+            logger.error(f"[create] Exception: {e}", exc_info=True)
+            return False, str(e)
+
     def update(self, order_id: int, supplier: str, order_items: list) -> tuple:
         """
         Update an existing order (if pending).
@@ -3,7 +3,7 @@ from PyQt5.QtCore import Qt
 from dialogs import SupplierInfoDialog
 from order_manager import OrderManager
 from PyQt5.QtWidgets import QMessageBox
-from db import get_order_items, get_all_orders, update_order_status, get_all_medicines
+from db import get_order, get_order_items, get_all_orders, update_order_status, get_all_medicines
 from theme import theme_manager
 import logging
 logger = logging.getLogger("medibit")
@@ -12,6 +12,7 @@ from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import QShortcut
 from theme import create_animated_button
+from event_bus import OrderStatusChanged, QtEventRelay
 
 class InventoryLookupDialog(QDialog):
     def __init__(self, parent=None):
@@ -87,8 +88,13 @@ class InventoryLookupDialog(QDialog):
         }
 
 class CreateOrderDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, suggest=None):
+        """
+        :param suggest: Optional callable(barcodes) -> {barcode: quantity} used to prefill Order Qty;
+                        called with just the medicine being added, so it should forecast only those
+        """
         super().__init__(parent)
+        self.suggest = suggest
         self.setWindowTitle("Create Order")
         self.setMinimumWidth(700)
         self.setMinimumHeight(500)
@@ -173,9 +179,13 @@ class CreateOrderDialog(QDialog):
                 self.meds_table.setItem(row, 2, qty_item)
                 self.meds_table.setItem(row, 3, QTableWidgetItem(med['expiry']))
                 self.meds_table.setItem(row, 4, QTableWidgetItem(med['manufacturer']))
-                order_qty_item = QTableWidgetItem("1")
+                order_qty_item = QTableWidgetItem(str(self.suggested_quantity(med['barcode'])))
                 self.meds_table.setItem(row, 5, order_qty_item)
                 self.meds_table.setCurrentCell(row, 2)
+    def suggested_quantity(self, barcode):
+        if self.suggest is None:
+            return 1
+        return self.suggest([barcode]).get(barcode, 1)
     def remove_selected_row(self):
         row = self.meds_table.currentRow()
         if row >= 0:
@@ -276,6 +286,7 @@ class OrdersUi(QWidget):
         self.main_window = main_window
         logger.info("OrdersUi initialized")
         self.init_ui()
+        self.event_relay = QtEventRelay(self._on_order_events, (OrderStatusChanged,), parent=self)
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -324,6 +335,12 @@ class OrdersUi(QWidget):
         self.send_order_btn.setFocusPolicy(Qt.StrongFocus)
         self.send_order_btn.clicked.connect(self.send_order_to_supplier)
         header_layout.addWidget(self.send_order_btn)
+        self.export_pdfs_btn = create_animated_button("Export Pending PDFs", self)
+        self.export_pdfs_btn.setToolTip("Render all pending orders into one zip archive or PDF.")
+        self.export_pdfs_btn.setAccessibleName("Export Pending Order PDFs Button")
+        self.export_pdfs_btn.setFocusPolicy(Qt.StrongFocus)
+        self.export_pdfs_btn.clicked.connect(self.export_pending_order_pdfs)
+        header_layout.addWidget(self.export_pdfs_btn)
         header_layout.addStretch()
         layout.addLayout(header_layout)
         # Status Filter
@@ -441,7 +458,7 @@ class OrdersUi(QWidget):
         QTimer.singleShot(3000, lambda: banner_ref() and banner_ref().setVisible(False))
 
     def open_create_order_dialog(self):
-        dialog = CreateOrderDialog(self)
+        dialog = CreateOrderDialog(self, suggest=self.main_window.order_service.suggest_order_quantities)
         if dialog.exec_() == QDialog.Accepted:
             supplier, meds = dialog.get_data()
             if not supplier or not meds:
@@ -556,21 +573,35 @@ class OrdersUi(QWidget):
             self.orders_table.setItem(row, 3, QTableWidgetItem(items))
             total = sum([med.order_quantity or 0 for med in order.meds])
             self.orders_table.setItem(row, 4, QTableWidgetItem(str(total)))
-            self.orders_table.setItem(row, 5, QTableWidgetItem(order.status))
-            # Add Completed button if not completed
-            if order.status.lower() != "completed":
-                btn = QPushButton("Completed")
-                btn.setStyleSheet("padding: 4px 12px; border-radius: 4px; background: #43a047; color: white; font-weight: bold;")
-                btn.clicked.connect(lambda checked, oid=order.id: self.mark_order_completed(oid))
-                self.orders_table.setCellWidget(row, 6, btn)
-            else:
-                self.orders_table.setCellWidget(row, 6, None)
+            self._set_order_status(row, order.id, order.status)
         # Update pagination label and button states
         total_pages = max(1, (total_orders + self.page_size - 1) // self.page_size)
         self.page_label.setText(f"Page {self.current_page + 1} of {total_pages}")
         self.prev_page_btn.setEnabled(self.current_page > 0)
         self.next_page_btn.setEnabled((self.current_page + 1) * self.page_size < total_orders)
 
+    def _set_order_status(self, row, order_id, status):
+        self.orders_table.setItem(row, 5, QTableWidgetItem(status))
+        # Add Completed button if not completed
+        if status.lower() != "completed":
+            btn = QPushButton("Completed")
+            btn.setStyleSheet("padding: 4px 12px; border-radius: 4px; background: #43a047; color: white; font-weight: bold;")
+            btn.clicked.connect(lambda checked, oid=order_id: self.mark_order_completed(oid))
+            self.orders_table.setCellWidget(row, 6, btn)
+        else:
+            self.orders_table.removeCellWidget(row, 6)
+
+    def _on_order_events(self, events):
+        if self.status_filter.currentText() != "All":
+            self.refresh_orders_table()  # Rows move in or out of the filtered list
+            return
+        statuses = {str(event.order_id): event.status for event in events}
+        for row in range(self.orders_table.rowCount()):
+            item = self.orders_table.item(row, 0)
+            if item and item.text() in statuses:
+                self._set_order_status(row, int(item.text()), statuses[item.text()])
+        self.update_action_buttons()
+
     def get_selected_order_id(self):
         selected = self.orders_table.selectedItems()
         if not selected:
@@ -618,8 +649,7 @@ class OrdersUi(QWidget):
             if hasattr(self, 'pdf_btn'):
                 self.pdf_btn.setEnabled(False)
             return
-        orders = get_all_orders()
-        order = next((o for o in orders if o.id == order_id), None)
+        order = get_order(order_id)
         if not order:
             if hasattr(self, 'edit_btn'):
                 self.edit_btn.setEnabled(False)
@@ -681,14 +711,12 @@ class OrdersUi(QWidget):
     def confirm_delivery(self, order_id):
         if update_order_status(order_id, "completed"):
             QMessageBox.information(self, "Order Completed", f"Order {order_id} marked as completed.")
-            self.refresh_orders_table()
         else:
             QMessageBox.warning(self, "Error", f"Failed to update order {order_id}.")
 
     def edit_order(self, order_id):
         # Fetch order and its medicines
-        orders = get_all_orders()
-        order = next((o for o in orders if o.id == order_id), None)
+        order = get_order(order_id)
         if not order:
             QMessageBox.warning(self, "Error", f"Order {order_id} not found.")
             return
@@ -739,13 +767,36 @@ class OrdersUi(QWidget):
             else:
                 QMessageBox.warning(self, "Error", f"Failed to delete order: {error}")
 
+    def export_pending_order_pdfs(self):
+        """Render every pending order's PDF in the background into one archive."""
+        from PyQt5.QtWidgets import QFileDialog
+        from batch_pdf_service import BatchPdfService
+        from dialogs import start_batch_pdf_job
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Pending Orders", "pending_orders.zip", "Zip Archive (*.zip);;Merged PDF (*.pdf)"
+        )
+        if not path:
+            return
+        merge = path.lower().endswith(".pdf")
+        service = BatchPdfService()
+
+        def task(progress, cancel_event):
+            return service.export_orders(path, status="pending", merge=merge, progress=progress, cancel_event=cancel_event)
+
+        def done(success, message):
+            if success:
+                self.show_banner(f"Order PDFs saved to {message}", success=True)
+            else:
+                self.show_banner(f"Order PDF export failed: {message}", success=False)
+
+        start_batch_pdf_job(self, "Exporting Order PDFs", task, done)
+
     def download_order_pdf(self, order_id):
         import os
         from PyQt5.QtWidgets import QFileDialog, QMessageBox
         from PyQt5.QtGui import QDesktopServices
         from PyQt5.QtCore import QUrl
-        orders = get_all_orders()
-        order = next((o for o in orders if o.id == order_id), None)
+        order = get_order(order_id)
         if not order:
             QMessageBox.warning(self, "Error", f"Order {order_id} not found.")
             return
@@ -818,9 +869,7 @@ class OrdersUi(QWidget):
             self.delete_order(int(order_id))
 
     def view_order_details(self, order_id, supplier=None):
-        from db import get_all_orders
-        orders = get_all_orders()
-        order = next((o for o in orders if str(o.id) == str(order_id)), None)
+        order = get_order(int(order_id))
         if not order:
             QMessageBox.warning(self, "Error", f"Order {order_id} not found.")
             return
@@ -835,6 +884,5 @@ class OrdersUi(QWidget):
         from db import update_order_status
         if update_order_status(order_id, "completed"):
             self.show_banner(f"Order {order_id} marked as completed.", success=True)
-            self.refresh_orders_table()
         else:
             self.show_banner(f"Failed to mark order {order_id} as completed.", success=False) 
\ No newline at end of file
@@ -0,0 +1,312 @@
+import copy
+import logging
+import os
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, Spacer, Table
+
+# Logging is configured in main_window.py
+pdf_logger = logging.getLogger("medibit.pdf")
+
+# Shared, process-wide building blocks for receipt and purchase-order PDFs.
+# Style sheets, table styles, fonts and the pharmacy header are built once and
+# reused by every document; only per-document content is created per render.
+# Call invalidate() when pharmacy details change.
+
+PRIMARY_COLOR = colors.HexColor("#1976d2")
+MUTED_COLOR = colors.HexColor("#666666")
+HEADER_BG = colors.HexColor("#f5f5f5")
+BODY_BG = colors.HexColor("#ffffff")
+GRID_COLOR = colors.HexColor("#dddddd")
+
+INFO_COL_WIDTHS = [2 * inch, 4 * inch]
+RECEIPT_ITEM_COL_WIDTHS = [0.5 * inch, 2 * inch, 1.5 * inch, 1 * inch, 0.5 * inch, 1.5 * inch]
+ORDER_ITEM_COL_WIDTHS = [0.5 * inch, 2 * inch, 1.5 * inch, 1 * inch, 1 * inch, 1.5 * inch]
+
+# TTF fonts with a rupee glyph, tried in order; the built-in Helvetica is used otherwise
+FONT_CANDIDATES = [
+    ("DejaVuSans", "DejaVuSans-Bold", [
+        "/usr/share/fonts/truetype/dejavu",
+        "/usr/share/fonts/dejavu",
+        os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+    ]),
+]
+
+_lock = threading.RLock()
+_fonts = None
+_cache = {}
+
+
+def register_fonts() -> tuple:
+    """
+    Register document fonts once per process.
+    :return: (regular font name, bold font name)
+    """
+    global _fonts
+    with _lock:
+        if _fonts is not None:
+            return _fonts
+        _fonts = ("Helvetica", "Helvetica-Bold")
+        try:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            for regular, bold, dirs in FONT_CANDIDATES:
+                for font_dir in dirs:
+                    regular_path = os.path.join(font_dir, f"{regular}.ttf")
+                    bold_path = os.path.join(font_dir, f"{bold}.ttf")
+                    if os.path.exists(regular_path) and os.path.exists(bold_path):
+                        pdfmetrics.registerFont(TTFont(regular, regular_path))
+                        pdfmetrics.registerFont(TTFont(bold, bold_path))
+                        _fonts = (regular, bold)
+                        pdf_logger.info(f"Registered PDF fonts from {font_dir}")
+                        return _fonts
+        except Exception as e:
+            pdf_logger.warning(f"Falling back to built-in PDF fonts: {e}")
+        return _fonts
+
+
+def _cached(key, factory):
+    with _lock:
+        if key not in _cache:
+            _cache[key] = factory()
+        return _cache[key]
+
+
+def _build_styles() -> dict:
+    regular, bold = register_fonts()
+    sample = getSampleStyleSheet()
+
+    def style(name, parent, **kwargs):
+        font = bold if parent in ("Heading1", "Heading2") else regular
+        return ParagraphStyle(name, parent=sample[parent], fontName=font, **kwargs)
+
+    return {
+        "normal": style("MedibitNormal", "Normal"),
+        "header": style("Header", "Heading1", fontSize=18, spaceAfter=6, alignment=1, textColor=PRIMARY_COLOR),
+        "title": style("CustomTitle", "Heading1", fontSize=24, spaceAfter=30, alignment=1, textColor=PRIMARY_COLOR),
+        "subtitle": style("Subtitle", "Heading2", fontSize=16, spaceAfter=20, alignment=1, textColor=MUTED_COLOR),
+        "total": style("Total", "Heading2", fontSize=16, spaceAfter=20, alignment=2, textColor=PRIMARY_COLOR),
+        "summary": style("Summary", "Heading2", fontSize=14, spaceAfter=20, alignment=2, textColor=PRIMARY_COLOR),
+        "instructions": style("Instructions", "Normal", fontSize=11, spaceAfter=20, alignment=0, textColor=MUTED_COLOR),
+        "footer": style("Footer", "Normal", fontSize=10, spaceAfter=20, alignment=1, textColor=MUTED_COLOR),
+    }
+
+
+def _build_table_styles() -> dict:
+    regular, bold = register_fonts()
+    info = [
+        ("BACKGROUND", (0, 0), (-1, 0), HEADER_BG),
+        ("TEXTCOLOR", (0, 0), (-1, 0), PRIMARY_COLOR),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("FONTNAME", (0, 0), (-1, -1), regular),
+        ("FONTNAME", (0, 0), (-1, 0), bold),
+        ("FONTSIZE", (0, 0), (-1, 0), 12),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+        ("BACKGROUND", (0, 1), (-1, -1), BODY_BG),
+        ("GRID", (0, 0), (-1, -1), 1, GRID_COLOR),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]
+    items = [
+        ("BACKGROUND", (0, 0), (-1, 0), PRIMARY_COLOR),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, -1), regular),
+        ("FONTNAME", (0, 0), (-1, 0), bold),
+        ("FONTSIZE", (0, 0), (-1, 0), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+        ("BACKGROUND", (0, 1), (-1, -1), BODY_BG),
+        ("GRID", (0, 0), (-1, -1), 1, GRID_COLOR),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("FONTSIZE", (0, 1), (-1, -1), 9),
+    ]
+    # Tables copy the commands on setStyle, so plain command lists are safe to share
+    return {"info": info, "items": items}
+
+
+def get_styles() -> dict:
+    """
+    Return the cached paragraph styles keyed by role
+    (normal, header, title, subtitle, total, summary, instructions, footer).
+    """
+    return _cached("styles", _build_styles)
+
+
+def get_table_styles() -> dict:
+    """
+    Return the cached table style commands keyed by role (info, items).
+    """
+    return _cached("table_styles", _build_table_styles)
+
+
+def info_table(rows, col_widths=None) -> Table:
+    """
+    Build a two-column information table with the shared info style.
+    :param rows: Table rows
+    :param col_widths: Optional column widths
+    :return: Table flowable
+    """
+    table = Table(rows, colWidths=col_widths or INFO_COL_WIDTHS)
+    table.setStyle(get_table_styles()["info"])
+    return table
+
+
+def items_table(rows, col_widths) -> Table:
+    """
+    Build an items table with the shared items style.
+    :param rows: Table rows including the header row
+    :param col_widths: Column widths
+    :return: Table flowable
+    """
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(get_table_styles()["items"])
+    return table
+
+
+class PharmacySnapshot:
+    """Detached copy of pharmacy details, safe to keep after the DB session closes."""
+
+    FIELDS = ("name", "address", "phone", "email", "gst_number", "license_number", "website")
+
+    def __init__(self, details):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(details, field, None) or "")
+
+    def key(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+
+def get_pharmacy_details():
+    """
+    Return the pharmacy details, loaded from the database once per process.
+    :return: PharmacySnapshot, or None if no details are stored
+    """
+    def load():
+        try:
+            from db import get_pharmacy_details as load_details
+            details = load_details()
+        except Exception as e:
+            pdf_logger.error(f"Failed to load pharmacy details for PDF templates: {e}")
+            return None
+        return PharmacySnapshot(details) if details else None
+    return _cached("pharmacy_details", load)
+
+
+def _copies(flowables) -> list:
+    # Flowables keep layout state from wrap(); hand out shallow copies so the parsed text is shared
+    return [copy.copy(flowable) for flowable in flowables]
+
+
+def receipt_header(pharmacy_details) -> list:
+    """
+    Return the receipt header block (pharmacy name, address, phone) for the given details.
+    :param pharmacy_details: Pharmacy details object, or None
+    :return: List of flowables
+    """
+    if not pharmacy_details:
+        return []
+    snapshot = pharmacy_details if isinstance(pharmacy_details, PharmacySnapshot) else PharmacySnapshot(pharmacy_details)
+
+    def build():
+        styles = get_styles()
+        block = [Paragraph(snapshot.name or "Pharmacy", styles["header"])]
+        if snapshot.address:
+            block.append(Paragraph(snapshot.address, styles["normal"]))
+        if snapshot.phone:
+            block.append(Paragraph(f"Phone: {snapshot.phone}", styles["normal"]))
+        block.append(Spacer(1, 12))
+        return block
+    return _copies(_cached(("receipt_header", snapshot.key()), build))
+
+
+def order_header(pharmacy_details) -> list:
+    """
+    Return the purchase-order header block: title, subtitle and pharmacy information table.
+    :param pharmacy_details: Pharmacy details object, or None
+    :return: List of flowables
+    """
+    snapshot = None
+    if pharmacy_details:
+        snapshot = pharmacy_details if isinstance(pharmacy_details, PharmacySnapshot) else PharmacySnapshot(pharmacy_details)
+
+    def build():
+        styles = get_styles()
+        block = [
+            Paragraph(snapshot.name if snapshot else "medibit Pharmacy", styles["title"]),
+            Paragraph("Purchase Order", styles["subtitle"]),
+            Spacer(1, 20),
+        ]
+        if snapshot:
+            rows = [
+                ["Pharmacy Information"],
+                ["Name:", snapshot.name],
+                ["Address:", snapshot.address],
+                ["Phone:", snapshot.phone],
+                ["Email:", snapshot.email],
+            ]
+            if snapshot.gst_number:
+                rows.append(["GST Number:", snapshot.gst_number])
+            if snapshot.license_number:
+                rows.append(["License Number:", snapshot.license_number])
+            if snapshot.website:
+                rows.append(["Website:", snapshot.website])
+            block.append(rows)
+            block.append(Spacer(1, 20))
+        return block
+    block = _cached(("order_header", snapshot.key() if snapshot else None), build)
+    # Tables are rebuilt per document from the cached rows; they keep per-layout state
+    return [info_table(part) if isinstance(part, list) else copy.copy(part) for part in block]
+
+
+def order_footer(pharmacy_details) -> list:
+    """
+    Return the purchase-order footer paragraph for the given pharmacy details.
+    :param pharmacy_details: Pharmacy details object, or None
+    :return: List of flowables
+    """
+    snapshot = None
+    if pharmacy_details:
+        snapshot = pharmacy_details if isinstance(pharmacy_details, PharmacySnapshot) else PharmacySnapshot(pharmacy_details)
+
+    def build():
+        if snapshot:
+            text = (
+                """
+                Thank you for your business!<br/>
+                {name}<br/>
+                {address}<br/>
+                Phone: {phone} | Email: {email}<br/>
+                This is a computer generated order.
+                """
+            ).format(name=snapshot.name, address=snapshot.address, phone=snapshot.phone, email=snapshot.email)
+        else:
+            text = """
+                Thank you for your business!<br/>
+                medibit Pharmacy Management System<br/>
+                This is a computer generated order.
+                """
+        return [Paragraph(text, get_styles()["footer"])]
+    return _copies(_cached(("order_footer", snapshot.key() if snapshot else None), build))
+
+
+def static_paragraph(key, text, style_name) -> Paragraph:
+    """
+    Return a cached paragraph for fixed text (titles, footers, instructions).
+    :param key: Cache key
+    :param text: Paragraph markup
+    :param style_name: Key into get_styles()
+    :return: Paragraph flowable
+    """
+    return copy.copy(_cached(("static", key), lambda: Paragraph(text, get_styles()[style_name])))
+
+
+def invalidate() -> None:
+    """
+    Drop cached styles and pharmacy blocks so the next document picks up changed settings.
+    Registered fonts stay registered for the life of the process.
+    """
+    with _lock:
+        _cache.clear()
+    pdf_logger.info("PDF template cache invalidated")
@@ -0,0 +1,241 @@
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from logging_setup import add_log_handler
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
+DEFAULT_SLOW_MS = float(os.environ.get("MEDIBIT_SLOW_QUERY_MS", "100"))
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH", "INSERT")
+
+slow_logger = logging.getLogger("medibit.sql.slow")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget() when a block issues more queries than allowed."""
+
+
+class QueryScope:
+    """Queries issued while a scope is active on the current thread."""
+
+    def __init__(self, name: str, capture: bool = False):
+        self.name = name
+        self.count = 0
+        self.statements: Optional[List[str]] = [] if capture else None
+
+
+class QueryMonitor:
+    """
+    Engine-level SQL instrumentation: counts the statements issued inside named
+    scopes (service calls, UI actions), records statements slower than a threshold
+    together with their parameters and EXPLAIN QUERY PLAN, and enforces query budgets.
+    """
+
+    def __init__(self, slow_threshold_ms: float = DEFAULT_SLOW_MS, explain: bool = True):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.explain = explain
+        self.total_queries = 0
+        self.slow_queries = deque(maxlen=200)
+        self.scope_stats: Dict[str, Dict[str, int]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._engines = set()
+
+    # --- Engine hooks ---------------------------------------------------------------
+    def install(self, engine) -> None:
+        """
+        Attach the cursor-execute listeners to an engine (idempotent).
+        :param engine: SQLAlchemy Engine
+        """
+        if id(engine) in self._engines:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        self._engines.add(id(engine))
+
+    def uninstall(self, engine) -> None:
+        if id(engine) not in self._engines:
+            return
+        event.remove(engine, "before_cursor_execute", self._before_execute)
+        event.remove(engine, "after_cursor_execute", self._after_execute)
+        self._engines.discard(id(engine))
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        with self._lock:
+            self.total_queries += 1
+        for scope in self._scopes():
+            scope.count += 1
+            if scope.statements is not None:
+                scope.statements.append(statement)
+        if elapsed_ms >= self.slow_threshold_ms:
+            self._record_slow(conn, statement, parameters, elapsed_ms, executemany)
+
+    def _record_slow(self, conn, statement, parameters, elapsed_ms, executemany):
+        plan = None
+        if self.explain and not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+            try:
+                explain_cursor = conn.connection.cursor()
+                try:
+                    explain_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                    plan = [" ".join(str(col) for col in row[1:]) for row in explain_cursor.fetchall()]
+                finally:
+                    explain_cursor.close()
+            except Exception as e:
+                plan = [f"EXPLAIN failed: {e}"]
+        scopes = [scope.name for scope in self._scopes()]
+        entry = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "ms": round(elapsed_ms, 3),
+            "statement": statement,
+            "parameters": repr(parameters)[:500],
+            "plan": plan,
+            "scope": scopes[-1] if scopes else None,
+        }
+        self.slow_queries.append(entry)
+        slow_logger.warning(
+            "Slow query (%.1f ms) in %s: %s | params=%s | plan=%s",
+            entry["ms"], entry["scope"] or "-", " ".join(statement.split()), entry["parameters"],
+            "; ".join(plan) if plan else "-",
+        )
+
+    # --- Scopes -------------------------------------------------------------------------
+    def _scopes(self) -> List[QueryScope]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def scope(self, name: str, capture: bool = False):
+        """
+        Count the queries issued on this thread while the block runs, including the
+        DB writer jobs it queues.
+        Nested scopes each see the queries of their inner scopes.
+        :param name: Scope name, e.g. 'orders.get_all' or 'ui.refresh_billing_history'
+        :param capture: Also keep the statements (for budget failure messages)
+        :return: The QueryScope (count is final once the block exits)
+        """
+        scope = QueryScope(name, capture)
+        stack = self._scopes()
+        stack.append(scope)
+        try:
+            yield scope
+        finally:
+            stack.remove(scope)
+            with self._lock:
+                stats = self.scope_stats.setdefault(name, {"calls": 0, "queries": 0, "max": 0})
+                stats["calls"] += 1
+                stats["queries"] += scope.count
+                stats["max"] = max(stats["max"], scope.count)
+
+    def current_scopes(self) -> tuple:
+        """
+        :return: The scopes active on this thread, outermost first (see joined())
+        """
+        return tuple(self._scopes())
+
+    @contextmanager
+    def joined(self, scopes: tuple):
+        """
+        Count this thread's queries in scopes opened on another thread, e.g. a DB writer
+        job counting towards the service call that queued it. The scopes' statistics are
+        still recorded once, by the thread that opened them.
+        :param scopes: Scopes from current_scopes() on the other thread
+        """
+        stack = self._scopes()
+        stack.extend(scopes)
+        try:
+            yield
+        finally:
+            del stack[len(stack) - len(scopes):]
+
+    @contextmanager
+    def query_budget(self, max_queries: int, name: str = "block"):
+        """
+        Fail with QueryBudgetExceeded if the block issues more than max_queries statements.
+        Intended for tests: with monitor.query_budget(2): service.get_all()
+        :param max_queries: Allowed number of statements
+        :param name: Label used in the failure message
+        """
+        with self.scope(f"budget:{name}", capture=True) as scope:
+            yield scope
+        if scope.count > max_queries:
+            listing = "\n".join(f"  {i}. {' '.join(s.split())}" for i, s in enumerate(scope.statements, 1))
+            raise QueryBudgetExceeded(f"{name} issued {scope.count} queries (budget {max_queries}):\n{listing}")
+
+    def scoped(self, name: str):
+        """
+        Decorator running a function (e.g. a UI action) inside a query scope.
+        :param name: Scope name, e.g. 'ui.refresh_billing_history'
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.scope(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def counted(self, prefix: str):
+        """
+        Class decorator opening a query scope '<prefix>.<method>' around every public method.
+        :param prefix: Scope name prefix, e.g. 'billing'
+        """
+        def wrap(func, name):
+            return self.scoped(name)(func)
+
+        def decorator(cls):
+            for attr, value in list(vars(cls).items()):
+                if attr.startswith("_"):
+                    continue
+                if isinstance(value, staticmethod):
+                    setattr(cls, attr, staticmethod(wrap(value.__func__, f"{prefix}.{attr}")))
+                elif isinstance(value, classmethod):
+                    setattr(cls, attr, classmethod(wrap(value.__func__, f"{prefix}.{attr}")))
+                elif inspect.isfunction(value):
+                    setattr(cls, attr, wrap(value, f"{prefix}.{attr}"))
+            return cls
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return query counts per scope, most queries per call first.
+        :return: Dict of scope -> {calls, queries, max, mean}
+        """
+        with self._lock:
+            stats = {name: dict(s, mean=round(s["queries"] / s["calls"], 2)) for name, s in self.scope_stats.items() if s["calls"]}
+        return dict(sorted(stats.items(), key=lambda kv: kv[1]["mean"], reverse=True))
+
+
+def enable_slow_query_log(log_dir: Optional[str] = None, max_bytes: int = 1024 * 1024, backup_count: int = 3) -> None:
+    """
+    Write slow queries to a dedicated rotating file (logs/slow_queries.log) in addition to the app log.
+    The file is written by the logging queue's writer thread (see logging_setup.add_log_handler).
+    :param log_dir: Directory for the log (defaults to <project>/logs)
+    """
+    log_dir = log_dir or LOG_DIR
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, "slow_queries.log")
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    add_log_handler(handler, slow_logger.name)
+
+
+monitor = QueryMonitor()
+scope = monitor.scope
+query_budget = monitor.query_budget
+scoped = monitor.scoped
+counted = monitor.counted
@@ -10,12 +10,11 @@ from email.mime.text import MIMEText
 from logging.handlers import RotatingFileHandler
 
 import requests
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+import pdf_templates
+from artifact_store import ArtifactStore
 
 # Logging is configured in main_window.py
 receipt_logger = logging.getLogger("medibit.receipt")
@@ -46,70 +45,54 @@ class ReceiptManager:
             self.config = {"email": {"enabled": False}, "whatsapp": {"enabled": False}}
 
     def generate_pdf_receipt(self, customer_info, items, total, timestamp, receipt_id, pharmacy_details=None):
-        """Generate a professional PDF receipt"""
-
-        # Create receipts directory
-        receipts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "receipts")
-        os.makedirs(receipts_dir, exist_ok=True)
+        """Generate a professional PDF receipt and record it in the artifact store"""
 
         # Fix filename construction for datetime
         if isinstance(timestamp, str):
             ts_str = timestamp.replace(":", "-").replace(" ", "_")
+            try:
+                when = datetime.fromisoformat(timestamp)
+            except ValueError:
+                when = None
         else:
             ts_str = timestamp.strftime("%Y%m%d_%H%M%S")
-        safe_name = "_".join(customer_info.get("name", "customer").strip().split())
+            when = timestamp
+        customer_name = customer_info.get("name", "customer").strip()
+        safe_name = "_".join(customer_name.split())
         filename = f"receipt_{safe_name}_id{receipt_id}_{ts_str}.pdf"
-        filepath = os.path.join(receipts_dir, filename)
+        store = ArtifactStore()
+        filepath = store.path_for("receipt", filename, when)
 
-        # Create PDF document
-        doc = SimpleDocTemplate(filepath, pagesize=A4)
-        story = []
-        styles = getSampleStyleSheet()
+        self.render_pdf_receipt(filepath, customer_info, items, total, timestamp, receipt_id, pharmacy_details)
+        if str(receipt_id).isdigit():
+            store.register("receipt", receipt_id, filepath, label=customer_name or None)
+        return filepath
 
-        # Pharmacy Name/Address at the top
-        if pharmacy_details:
-            pharmacy_name = getattr(pharmacy_details, "name", "Pharmacy")
-            pharmacy_address = getattr(pharmacy_details, "address", "")
-            pharmacy_phone = getattr(pharmacy_details, "phone", "")
-            header_style = ParagraphStyle(
-                "Header",
-                parent=styles["Heading1"],
-                fontSize=18,
-                spaceAfter=6,
-                alignment=1,  # Center
-                textColor=colors.HexColor("#1976d2"),
-            )
-            story.append(Paragraph(pharmacy_name, header_style))
-            if pharmacy_address:
-                story.append(Paragraph(pharmacy_address, styles["Normal"]))
-            if pharmacy_phone:
-                story.append(Paragraph(f"Phone: {pharmacy_phone}", styles["Normal"]))
-            story.append(Spacer(1, 12))
-
-        # Title
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1,  # Center alignment
-            textColor=colors.HexColor("#1976d2"),
-        )
-        title = Paragraph("medibit Pharmacy", title_style)
-        story.append(title)
-
-        # Subtitle
-        subtitle_style = ParagraphStyle(
-            "Subtitle",
-            parent=styles["Heading2"],
-            fontSize=16,
-            spaceAfter=20,
-            alignment=1,
-            textColor=colors.HexColor("#666666"),
+    @staticmethod
+    def render_pdf_receipt(target, customer_info, items, total, timestamp, receipt_id, pharmacy_details=None):
+        """
+        Render a receipt PDF using the shared templates.
+        :param target: File path or writable binary file object
+        """
+        SimpleDocTemplate(target, pagesize=A4).build(
+            ReceiptManager.build_receipt_story(customer_info, items, total, timestamp, receipt_id, pharmacy_details)
         )
-        subtitle = Paragraph("Digital Receipt", subtitle_style)
-        story.append(subtitle)
 
+    @staticmethod
+    def build_receipt_story(customer_info, items, total, timestamp, receipt_id, pharmacy_details=None):
+        """
+        Build the receipt flowables. Styles and the pharmacy header come from the
+        process-wide template cache; only customer, receipt and item content is built here.
+        :return: List of flowables
+        """
+        styles = pdf_templates.get_styles()
+
+        # Pharmacy Name/Address at the top
+        story = pdf_templates.receipt_header(pharmacy_details)
+
+        # Title and subtitle
+        story.append(pdf_templates.static_paragraph("receipt_title", "medibit Pharmacy", "title"))
+        story.append(pdf_templates.static_paragraph("receipt_subtitle", "Digital Receipt", "subtitle"))
         story.append(Spacer(1, 20))
 
         # Customer Information
@@ -120,24 +103,7 @@ class ReceiptManager:
                 ["Phone:", customer_info.get("phone", "N/A")],
                 ["Email:", customer_info.get("email", "N/A")],
             ]
-
-            customer_table = Table(customer_data, colWidths=[2 * inch, 4 * inch])
-            customer_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f5f5f5")),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1976d2")),
-                        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, 0), 12),
-                        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.HexColor("#ffffff")),
-                        ("GRID", (0, 0), (-1, -1), 1, colors.HexColor("#dddddd")),
-                        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ]
-                )
-            )
-            story.append(customer_table)
+            story.append(pdf_templates.info_table(customer_data))
             story.append(Spacer(1, 20))
 
         # Receipt Details
@@ -146,24 +112,7 @@ class ReceiptManager:
             ["Date:", timestamp],
             ["Payment Method:", "Cash/Card"],
         ]
-
-        receipt_table = Table(receipt_data, colWidths=[2 * inch, 4 * inch])
-        receipt_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f5f5f5")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1976d2")),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 12),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.HexColor("#ffffff")),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.HexColor("#dddddd")),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ]
-            )
-        )
-        story.append(receipt_table)
+        story.append(pdf_templates.info_table(receipt_data))
         story.append(Spacer(1, 20))
 
         # Items Table
@@ -186,70 +135,20 @@ class ReceiptManager:
             except Exception as e:
                 items_data.append([str(i), "ERROR", "ERROR", "0.00", "0", "0.00"])
 
-        items_table = Table(
-            items_data,
-            colWidths=[
-                0.5 * inch,
-                2 * inch,
-                1.5 * inch,
-                1 * inch,
-                0.5 * inch,
-                1.5 * inch,
-            ],
-        )
-        items_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1976d2")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 10),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.HexColor("#ffffff")),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.HexColor("#dddddd")),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ("FONTSIZE", (0, 1), (-1, -1), 9),
-                ]
-            )
-        )
-        story.append(items_table)
+        story.append(pdf_templates.items_table(items_data, pdf_templates.RECEIPT_ITEM_COL_WIDTHS))
         story.append(Spacer(1, 20))
 
         # Total
-        total_style = ParagraphStyle(
-            "Total",
-            parent=styles["Heading2"],
-            fontSize=16,
-            spaceAfter=20,
-            alignment=2,  # Right alignment
-            textColor=colors.HexColor("#1976d2"),
-        )
-        total_text = f"Total Amount: ₹{total/100:.2f}"
-        total_para = Paragraph(total_text, total_style)
-        story.append(total_para)
+        story.append(Paragraph(f"Total Amount: ₹{total/100:.2f}", styles["total"]))
 
         # Footer
-        footer_style = ParagraphStyle(
-            "Footer",
-            parent=styles["Normal"],
-            fontSize=10,
-            spaceAfter=20,
-            alignment=1,  # Center alignment
-            textColor=colors.HexColor("#666666"),
-        )
         footer_text = """
         Thank you for choosing medibit Pharmacy!<br/>
         For any queries, please contact us.<br/>
         This is a computer generated receipt.
         """
-        footer = Paragraph(footer_text, footer_style)
-        story.append(footer)
-
-        # Build PDF
-        doc.build(story)
-
-        return filepath
+        story.append(pdf_templates.static_paragraph("receipt_footer", footer_text, "footer"))
+        return story
 
     def send_receipt_email(self, customer_info, pdf_path):
         """Send receipt via email"""
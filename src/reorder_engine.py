@@ -0,0 +1,136 @@
+import datetime
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+import db
+
+# Logging is configured in main_window.py
+reorder_logger = logging.getLogger("medibit.reorder")
+
+HISTORY_DAYS = 90
+SMA_WINDOW_DAYS = 28
+SMOOTHING_ALPHA = 0.1  # Exponential smoothing weight of the most recent day
+LEAD_TIME_DAYS = 7  # Days between placing an order and the stock arriving
+REVIEW_DAYS = 14  # Days of demand one order should cover after it arrives
+SERVICE_Z = 1.65  # Safety factor for ~95% of lead times without a stockout
+METHODS = ("ema", "sma")
+
+
+class ReorderEngine:
+    """
+    Demand forecast and suggested order quantities for the whole catalog.
+
+    Daily units sold per SKU over the history window come from one aggregate query
+    and go into a SKU x day NumPy matrix. Everything after that is array arithmetic
+    over all SKUs at once:
+        daily demand   exponential smoothing (ema) or moving average (sma) per row
+        safety stock   z * std(daily demand) * sqrt(lead time)
+        reorder point  demand over the lead time + safety stock
+        order quantity demand over lead time + review period + safety stock - stock
+    SKUs with no sales in the window fall back to topping stock up to twice their
+    threshold when they are below it.
+    """
+
+    def __init__(self, method: str = "ema", history_days: int = HISTORY_DAYS, lead_time_days: int = LEAD_TIME_DAYS,
+                 review_days: int = REVIEW_DAYS, service_z: float = SERVICE_Z, alpha: float = SMOOTHING_ALPHA,
+                 sma_window_days: int = SMA_WINDOW_DAYS):
+        if method not in METHODS:
+            raise ValueError(f"Unknown forecast method '{method}' (expected one of {', '.join(METHODS)})")
+        self.method = method
+        self.history_days = history_days
+        self.lead_time_days = lead_time_days
+        self.review_days = review_days
+        self.service_z = service_z
+        self.alpha = alpha
+        self.sma_window_days = sma_window_days
+
+    def demand_matrix(self, barcodes: np.ndarray, today: Optional[datetime.date] = None,
+                      subset: bool = False) -> np.ndarray:
+        """
+        Units sold per SKU per day over the history window, ending yesterday.
+        :param barcodes: Sorted array of catalog barcodes (rows of the matrix)
+        :param today: Reference date (defaults to today)
+        :param subset: barcodes are a few SKUs, so read only their sales
+        :return: float64 array of shape (len(barcodes), history_days)
+        """
+        today = today or datetime.date.today()
+        start = today - datetime.timedelta(days=self.history_days)
+        days = self.history_days
+        rows = db.get_daily_item_sales(start, today, barcodes.tolist() if subset else None)
+        if not rows or not len(barcodes):
+            return np.zeros((len(barcodes), days))
+        sold_barcodes, sold_days, units = zip(*rows)
+        sold_barcodes = np.array(sold_barcodes, dtype=str)
+        row = np.searchsorted(barcodes, sold_barcodes)
+        row[row == len(barcodes)] = 0
+        known = barcodes[row] == sold_barcodes  # Drop sales of medicines no longer in the catalog
+        col = (np.array(sold_days, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+        flat = row[known] * days + col[known]
+        return np.bincount(flat, weights=np.array(units, dtype=np.float64)[known], minlength=len(barcodes) * days).reshape(-1, days)
+
+    def forecast(self, today: Optional[datetime.date] = None,
+                 barcodes: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Forecast demand and order quantities for every medicine (or the given ones) in one pass.
+        :param today: Reference date (defaults to today)
+        :param barcodes: (optional) Only these medicines, e.g. the one just added to an order
+        :return: Dict of equal-length arrays: barcode, stock, threshold, daily_demand,
+                 safety_stock, reorder_point, suggested, needs_reorder
+        """
+        subset = barcodes is not None
+        levels = db.get_stock_levels(set(barcodes) if subset else None)
+        if levels:
+            barcodes, stock, threshold = zip(*levels)
+        else:
+            barcodes, stock, threshold = (), (), ()
+        barcodes = np.array(barcodes, dtype=str)
+        order = np.argsort(barcodes)
+        barcodes = barcodes[order]
+        stock = np.array(stock, dtype=np.float64)[order]
+        threshold = np.array(threshold, dtype=np.float64)[order]
+
+        demand = self.demand_matrix(barcodes, today, subset=subset)
+        if self.method == "ema":
+            weights = self.alpha * (1 - self.alpha) ** np.arange(demand.shape[1] - 1, -1, -1)
+            daily = demand @ (weights / weights.sum())
+        else:
+            daily = demand[:, -self.sma_window_days:].mean(axis=1) if demand.shape[1] else np.zeros(len(barcodes))
+        sigma = demand.std(axis=1) if demand.shape[1] else np.zeros(len(barcodes))
+
+        safety = self.service_z * sigma * np.sqrt(self.lead_time_days)
+        reorder_point = daily * self.lead_time_days + safety
+        target = daily * (self.lead_time_days + self.review_days) + safety
+        # Round off float noise first: the matrix product can land an ulp above a whole number
+        suggested = np.ceil(np.clip(np.round(target - stock, 6), 0, None))
+        no_history = daily == 0
+        suggested[no_history] = np.clip(2 * threshold - stock, 0, None)[no_history]
+        needs_reorder = (stock < threshold) | ((stock <= reorder_point) & ~no_history)
+        return {
+            "barcode": barcodes,
+            "stock": stock,
+            "threshold": threshold,
+            "daily_demand": daily,
+            "safety_stock": safety,
+            "reorder_point": reorder_point,
+            "suggested": suggested.astype(np.int64),
+            "needs_reorder": needs_reorder,
+        }
+
+    def suggest_quantities(self, barcodes: Optional[Iterable[str]] = None,
+                           today: Optional[datetime.date] = None) -> Dict[str, int]:
+        """
+        Suggested order quantity per barcode.
+        :param barcodes: Only these barcodes (each gets at least 1); defaults to every medicine that needs reordering
+        :param today: Reference date (defaults to today)
+        :return: Dict barcode -> quantity
+        """
+        if barcodes is not None:
+            barcodes = list(barcodes)
+        result = self.forecast(today, barcodes)
+        if barcodes is None:
+            picked = result["needs_reorder"] & (result["suggested"] > 0)
+            return dict(zip(result["barcode"][picked].tolist(), result["suggested"][picked].tolist()))
+        suggested = dict(zip(result["barcode"].tolist(), result["suggested"].tolist()))
+        return {barcode: max(1, suggested.get(barcode, 0)) for barcode in barcodes}
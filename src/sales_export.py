@@ -0,0 +1,139 @@
+import csv
+import gzip
+import logging
+import os
+from typing import Callable, Optional, Tuple
+
+import db
+
+# Logging is configured in main_window.py
+export_logger = logging.getLogger("medibit.sales_export")
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # CSV and gzip CSV exports work without it
+    Workbook = None
+
+FORMATS = ("csv", "csv.gz", "xlsx")
+HEADERS = ("Bill ID", "Timestamp", "Barcode", "Name", "Quantity", "Price", "Discount", "Subtotal",
+           "Taxable Value", "Tax Rate", "Tax Amount")  # db.SALES_LINE_COLUMNS order
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def format_for_path(path: str) -> Optional[str]:
+    """
+    :param path: Destination file name
+    :return: 'csv', 'csv.gz' or 'xlsx' from its extension, or None if unsupported
+    """
+    lower = path.lower()
+    for fmt in sorted(FORMATS, key=len, reverse=True):
+        if lower.endswith("." + fmt):
+            return fmt
+    return None
+
+
+class _CsvSink:
+    def __init__(self, path: str, compress: bool):
+        self.file = gzip.open(path, "wt", newline="", encoding="utf-8") if compress \
+            else open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+
+    def write(self, rows) -> None:
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+    abort = close
+
+
+class _XlsxSink:
+    def __init__(self, path: str):
+        # Write-only mode streams rows to the file instead of keeping cell objects
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Sales Lines")
+
+    def write(self, rows) -> None:
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self) -> None:
+        self.workbook.save(self.path)
+
+    def abort(self) -> None:
+        pass  # Nothing reaches output_path before save()
+
+
+class SalesExportService:
+    """
+    Line-level sales export for accounting: one row per bill item with the bill timestamp,
+    barcode, quantity, price, discount and tax share. Rows are streamed from a database cursor
+    (db.iter_sales_lines) straight into CSV, gzip CSV or write-only XLSX, so memory stays
+    flat whatever the date range. Runs on a worker thread via dialogs.start_batch_pdf_job.
+    """
+
+    def export_lines(self, start_date, end_date, output_path: str, fmt: Optional[str] = None,
+                     progress: Optional[Callable[[int, int, str], None]] = None,
+                     cancel_event=None) -> Tuple[bool, str]:
+        """
+        Export every bill item in a date range.
+        :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+        :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+        :param output_path: Destination file
+        :param fmt: 'csv', 'csv.gz' or 'xlsx'; defaults to the output_path extension
+        :param progress: Optional callback(done, total, message)
+        :param cancel_event: Optional threading.Event; set it to cancel
+        :return: (success, output path or error message)
+        """
+        fmt = fmt or format_for_path(output_path)
+        if fmt not in FORMATS:
+            return False, f"Unsupported export format. Use one of: {', '.join('.' + f for f in FORMATS)}"
+        if fmt == "xlsx" and Workbook is None:
+            return False, "Excel export requires the 'openpyxl' package. Export as CSV instead."
+        lines = None
+        sink = None
+        try:
+            total = db.count_sales_lines(start_date, end_date)
+            if total == 0:
+                return False, "No sales in the selected date range."
+            export_logger.info(f"Exporting {total} sales lines ({start_date}..{end_date}) to {output_path}")
+            sink = _XlsxSink(output_path) if fmt == "xlsx" else _CsvSink(output_path, fmt == "csv.gz")
+            sink.write([HEADERS])
+            done = 0
+            lines = db.iter_sales_lines(start_date, end_date)
+            for batch in lines:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExportCancelled()
+                sink.write(batch)
+                done += len(batch)
+                if progress:
+                    progress(min(done, total), total, f"{done} lines")
+            lines.close()
+            sink.close()
+            sink = None
+        except ExportCancelled:
+            self._abort(lines, sink, output_path)
+            export_logger.info("Sales export cancelled")
+            return False, "Cancelled"
+        except Exception as e:
+            self._abort(lines, sink, output_path)
+            export_logger.error(f"Sales export failed: {e}", exc_info=True)
+            return False, str(e)
+        export_logger.info(f"Sales export written: {output_path} ({done} lines)")
+        return True, output_path
+
+    @staticmethod
+    def _abort(lines, sink, output_path: str) -> None:
+        if lines is not None:
+            lines.close()  # Releases the cursor and session
+        if sink is not None:
+            sink.abort()
+        if os.path.exists(output_path):
+            try:
+                os.remove(output_path)
+            except OSError:
+                export_logger.warning(f"Could not remove partial export {output_path}")
@@ -3,6 +3,7 @@ from PyQt5.QtCore import Qt, QDate, QTimer
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from theme import theme_manager, create_animated_button
+from event_bus import BillCreated, QtEventRelay
 import logging
 logger = logging.getLogger("medibit")
 
@@ -41,6 +42,7 @@ class SalesUi(QWidget):
         self.main_window = main_window
         logger.info("SalesUi initialized")
         self.init_ui()
+        self.event_relay = QtEventRelay(self._on_bill_events, (BillCreated,), parent=self)
         # Feedback banner
         self.feedback_banner = QLabel("")
         self.feedback_banner.setStyleSheet("padding: 8px; border-radius: 4px; font-weight: bold; font-size: 14px;")
@@ -110,11 +112,23 @@ class SalesUi(QWidget):
         self.filter_btn.setFocusPolicy(Qt.StrongFocus)
         header_layout.addWidget(self.filter_btn)
         self.export_btn = create_animated_button("Export", self)
-        self.export_btn.setToolTip("Export sales data as CSV file.")
+        self.export_btn.setToolTip("Export every sold line in the date range as CSV, gzip CSV or Excel.")
         self.export_btn.setAccessibleName("Export CSV Button")
         self.export_btn.setFocusPolicy(Qt.StrongFocus)
         self.export_btn.clicked.connect(self.export_sales_data)
         header_layout.addWidget(self.export_btn)
+        self.tax_report_btn = create_animated_button("Tax Report", self)
+        self.tax_report_btn.setToolTip("Export GST totals per month and tax rate for the date range.")
+        self.tax_report_btn.setAccessibleName("Tax Report Button")
+        self.tax_report_btn.setFocusPolicy(Qt.StrongFocus)
+        self.tax_report_btn.clicked.connect(self.export_tax_report)
+        header_layout.addWidget(self.tax_report_btn)
+        self.reprint_btn = create_animated_button("Reprint Receipts", self)
+        self.reprint_btn.setToolTip("Regenerate all receipts in the selected date range into one zip archive or PDF.")
+        self.reprint_btn.setAccessibleName("Reprint Receipts Button")
+        self.reprint_btn.setFocusPolicy(Qt.StrongFocus)
+        self.reprint_btn.clicked.connect(self.reprint_receipts)
+        header_layout.addWidget(self.reprint_btn)
         layout.addLayout(header_layout)
         # Connect filter
         self.filter_btn.clicked.connect(self.on_filter_clicked)
@@ -254,16 +268,84 @@ class SalesUi(QWidget):
         self.canvas.draw()
 
     def export_sales_data(self):
-        logger.info("Export CSV button clicked.")
-        self.show_loading("Exporting sales data...")
-        try:
-            # ... existing code ...
-            self.show_banner("Sales data exported.", success=True)
-        except Exception as e:
-            self.show_banner(f"Failed to export sales data: {str(e)}", success=False)
-        finally:
-            self.hide_loading()
-        logger.info("Sales data exported.")
+        """Export every sold line in the selected date range in the background (CSV, gzip CSV or Excel)."""
+        from PyQt5.QtWidgets import QFileDialog
+        from dialogs import start_batch_pdf_job
+        from sales_export import SalesExportService, format_for_path
+        logger.info("Export button clicked.")
+        start = self.start_date_edit.date().toString("yyyy-MM-dd")
+        end = self.end_date_edit.date().toString("yyyy-MM-dd")
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Sales Lines", f"sales_{start}_to_{end}.csv",
+            "CSV (*.csv);;Compressed CSV (*.csv.gz);;Excel Workbook (*.xlsx)"
+        )
+        if not path:
+            return
+        if format_for_path(path) is None:  # No recognised extension: take the selected filter's
+            path += selected_filter[selected_filter.index("*") + 1:-1]
+        logger.info(f"Exporting sales lines {start}..{end} into {path}")
+        service = SalesExportService()
+
+        def task(progress, cancel_event):
+            return service.export_lines(start, end, path, progress=progress, cancel_event=cancel_event)
+
+        def done(success, message):
+            if success:
+                self.show_banner(f"Sales data exported to {message}", success=True)
+            else:
+                self.show_banner(f"Failed to export sales data: {message}", success=False)
+
+        start_batch_pdf_job(self, "Exporting Sales", task, done, initial_text="Counting sales lines...",
+                            label_format="Exported {done} of {total} lines")
+    def export_tax_report(self):
+        """Export the tax summary of the selected date range (CSV or Excel)."""
+        from PyQt5.QtWidgets import QFileDialog
+        from sales_export import format_for_path
+        from tax_report import TaxReportService
+        start = self.start_date_edit.date().toString("yyyy-MM-dd")
+        end = self.end_date_edit.date().toString("yyyy-MM-dd")
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Tax Report", f"tax_report_{start}_to_{end}.csv",
+            "CSV (*.csv);;Excel Workbook (*.xlsx)"
+        )
+        if not path:
+            return
+        if format_for_path(path) is None:
+            path += selected_filter[selected_filter.index("*") + 1:-1]
+        success, message = TaxReportService().export(start, end, path)
+        if success:
+            self.show_banner(f"Tax report saved to {message}", success=True)
+        else:
+            self.show_banner(f"Failed to export tax report: {message}", success=False)
+
+    def reprint_receipts(self):
+        """Re-render every receipt in the selected date range in the background."""
+        from PyQt5.QtWidgets import QFileDialog
+        from batch_pdf_service import BatchPdfService
+        from dialogs import start_batch_pdf_job
+        start = self.start_date_edit.date().toString("yyyy-MM-dd")
+        end = self.end_date_edit.date().toString("yyyy-MM-dd")
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save Receipts", f"receipts_{start}_to_{end}.zip",
+            "Zip Archive (*.zip);;Merged PDF (*.pdf)"
+        )
+        if not path:
+            return
+        merge = path.lower().endswith(".pdf")
+        logger.info(f"Reprinting receipts {start}..{end} into {path}")
+        service = BatchPdfService()
+
+        def task(progress, cancel_event):
+            return service.reprint_receipts(start, end, path, merge=merge, progress=progress, cancel_event=cancel_event)
+
+        def done(success, message):
+            if success:
+                self.show_banner(f"Receipts saved to {message}", success=True)
+            else:
+                self.show_banner(f"Receipt reprint failed: {message}", success=False)
+
+        start_batch_pdf_job(self, "Reprinting Receipts", task, done)
+
     def view_sale(self):
         logger.info("View Sale button clicked.")
         row = self.sales_table.currentRow()
@@ -304,12 +386,32 @@ class SalesUi(QWidget):
         paged_sales = sales[start:end]
         self.sales_table.setRowCount(len(paged_sales))
         for row, sale in enumerate(paged_sales):
-            self.sales_table.setItem(row, 0, QTableWidgetItem(str(getattr(sale, 'id', ''))))
-            self.sales_table.setItem(row, 1, QTableWidgetItem(getattr(sale, 'customer', '')))
-            self.sales_table.setItem(row, 2, QTableWidgetItem(getattr(sale, 'timestamp', '')))
-            items = ", ".join([item.name for item in getattr(sale, 'items', [])]) if hasattr(sale, 'items') else ""
-            self.sales_table.setItem(row, 3, QTableWidgetItem(items))
-            self.sales_table.setItem(row, 4, QTableWidgetItem(f"₹{getattr(sale, 'total', 0):.2f}"))
+            self._set_sale_row(row, sale)
+        self.total_sales = total_sales
+        self._update_pagination()
+
+    def _set_sale_row(self, row, sale):
+        self.sales_table.setItem(row, 0, QTableWidgetItem(str(getattr(sale, 'id', ''))))
+        self.sales_table.setItem(row, 1, QTableWidgetItem(getattr(sale, 'customer', '')))
+        self.sales_table.setItem(row, 2, QTableWidgetItem(getattr(sale, 'timestamp', '')))
+        items = ", ".join([item.name for item in getattr(sale, 'items', [])]) if hasattr(sale, 'items') else ""
+        self.sales_table.setItem(row, 3, QTableWidgetItem(items))
+        self.sales_table.setItem(row, 4, QTableWidgetItem(f"₹{getattr(sale, 'total', 0):.2f}"))
+
+    def _on_bill_events(self, events):
+        # New bills are the newest sales: prepend them on the first page, elsewhere only the count moves
+        self.total_sales += len(events)
+        if self.current_page == 0:
+            bills = self.main_window.billing_service.get_bills_by_ids([event.bill_id for event in events])
+            for sale in reversed(bills):
+                self.sales_table.insertRow(0)
+                self._set_sale_row(0, sale)
+            while self.sales_table.rowCount() > self.page_size:
+                self.sales_table.removeRow(self.sales_table.rowCount() - 1)
+        self._update_pagination()
+
+    def _update_pagination(self):
+        total_sales = self.total_sales
         # Update pagination label and button states
         total_pages = max(1, (total_sales + self.page_size - 1) // self.page_size)
         self.page_label.setText(f"Page {self.current_page + 1} of {total_pages}")
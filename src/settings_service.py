@@ -2,6 +2,7 @@ from typing import Any, Dict, Optional
 from db import get_pharmacy_details, save_pharmacy_details
 from config import get_theme, set_theme, get_license_key, set_license_key, get_installation_date, set_installation_date
 from notifications import NotificationManager
+import pdf_templates
 import logging
 logger = logging.getLogger("medibit")
 
@@ -74,6 +75,8 @@ class SettingsService:
                 details.get('license_number', ''),
                 details.get('website', ''),
             )
+            # Receipt/order PDF headers are cached per process
+            pdf_templates.invalidate()
             logger.info("Pharmacy details saved.")
             logger.debug(f"[save_pharmacy_details] EXIT: success={success}, details={details}")
             return success
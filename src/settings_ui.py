@@ -1,7 +1,10 @@
-from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QStackedWidget, QComboBox, QColorDialog, QLabel, QMessageBox, QFileDialog, QFormLayout, QLineEdit)
+from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QStackedWidget, QComboBox, QColorDialog, QLabel, QMessageBox, QFileDialog, QFormLayout, QLineEdit, QSpinBox)
 from PyQt5.QtCore import Qt
-from dialogs import NotificationSettingsWidget, PharmacyDetailsWidget
-import shutil, os
+from dialogs import NotificationSettingsWidget, PharmacyDetailsWidget, start_batch_pdf_job
+from backup_service import BackupService
+from config import get_backup_settings, set_backup_settings
+import datetime
+import os
 from PyQt5.QtGui import QLinearGradient, QBrush, QColor, QPalette
 import re
 from theme import theme_manager
@@ -154,6 +157,9 @@ class ThemeSettingsWidget(QWidget):
                 self.main_window.set_theme_from_menu(self.theme_combo.currentText().lower())
 
 class BackupSettingsWidget(QWidget):
+    # Automatic backup choices: (label, interval in hours; 0 = off)
+    SCHEDULES = [("Off", 0), ("Every 6 hours", 6), ("Daily", 24), ("Weekly", 24 * 7)]
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
@@ -187,34 +193,100 @@ class BackupSettingsWidget(QWidget):
         self.restore_btn.setAccessibleName("Restore Data Button")
         self.restore_btn.clicked.connect(self.restore_data)
         layout.addWidget(self.restore_btn)
+        # Automatic backups
+        settings = get_backup_settings()
+        schedule_form = QFormLayout()
+        self.schedule_combo = QComboBox()
+        for text, hours in self.SCHEDULES:
+            self.schedule_combo.addItem(text, hours)
+        current = settings["interval_hours"] if settings["enabled"] else 0
+        self.schedule_combo.setCurrentIndex(max(0, self.schedule_combo.findData(current)))
+        self.schedule_combo.setToolTip("How often a backup is taken automatically while the app is running.")
+        self.schedule_combo.setAccessibleName("Automatic Backup ComboBox")
+        self.schedule_combo.currentIndexChanged.connect(self.save_schedule)
+        schedule_form.addRow("Automatic backups:", self.schedule_combo)
+        self.retention_spin = QSpinBox()
+        self.retention_spin.setRange(1, 365)
+        self.retention_spin.setValue(settings["retention"])
+        self.retention_spin.setToolTip("Number of automatic backups to keep; older ones are deleted.")
+        self.retention_spin.setAccessibleName("Backup Retention SpinBox")
+        self.retention_spin.valueChanged.connect(self.save_schedule)
+        schedule_form.addRow("Keep last:", self.retention_spin)
+        layout.addLayout(schedule_form)
+        self.last_backup_label = QLabel()
+        self.last_backup_label.setStyleSheet("color: #666; font-size: 12px;")
+        layout.addWidget(self.last_backup_label)
+        self.update_last_backup_label()
         layout.addStretch()
 
+    def save_schedule(self, *_):
+        hours = self.schedule_combo.currentData()
+        changes = {"enabled": bool(hours), "retention": self.retention_spin.value()}
+        if hours:
+            changes["interval_hours"] = hours
+        set_backup_settings(**changes)
+        logger.info("Backup schedule saved: %s", changes)
+
+    def update_last_backup_label(self):
+        last = get_backup_settings()["last_backup"]
+        self.last_backup_label.setText(f"Last backup: {last.replace('T', ' ') if last else 'never'}")
+
     def backup_data(self):
         logger.info("Backup Data button clicked.")
-        db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'medibit.db')
-        if not os.path.exists(db_path):
+        service = BackupService()
+        if not os.path.exists(service.db_path):
             QMessageBox.warning(self, "Backup Failed", "Database file not found.")
             return
-        filename, _ = QFileDialog.getSaveFileName(self, "Backup Database", "medibit_backup.db", "Database Files (*.db)")
-        if filename:
-            try:
-                shutil.copy2(db_path, filename)
-                QMessageBox.information(self, "Backup Complete", f"Backup saved to: {filename}")
-            except Exception as e:
-                QMessageBox.critical(self, "Backup Failed", str(e))
-        logger.info("Data backup completed.")
+        default_name = os.path.join(service.backup_dir, f"medibit_backup_{datetime.datetime.now():%Y%m%d-%H%M%S}.db.gz")
+        filename, _ = QFileDialog.getSaveFileName(self, "Backup Database", default_name, "Compressed Backups (*.db.gz);;Database Files (*.db)")
+        if not filename:
+            return
+
+        def done(success, message):
+            self.update_last_backup_label()
+            if success:
+                QMessageBox.information(self, "Backup Complete", f"Backup saved to: {message}")
+            else:
+                QMessageBox.critical(self, "Backup Failed", message)
+            logger.info("Data backup finished: %s", message)
+
+        # Online backup on a worker thread; the app stays usable while it runs
+        start_batch_pdf_job(
+            self, "Backing Up Database",
+            lambda progress, cancel_event: service.create_backup(filename, progress=progress, cancel_event=cancel_event),
+            done, initial_text="Starting backup...", label_format="{name}",
+        )
 
     def restore_data(self):
         logger.info("Restore Data button clicked.")
-        db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'medibit.db')
-        filename, _ = QFileDialog.getOpenFileName(self, "Restore Database", "", "Database Files (*.db)")
-        if filename:
-            try:
-                shutil.copy2(filename, db_path)
-                QMessageBox.information(self, "Restore Complete", "Database restored successfully. Please restart the application.")
-            except Exception as e:
-                QMessageBox.critical(self, "Restore Failed", str(e))
-        logger.info("Data restore completed.")
+        service = BackupService()
+        filename, _ = QFileDialog.getOpenFileName(self, "Restore Database", service.backup_dir, "Backups (*.db.gz *.db)")
+        if not filename:
+            return
+        ok, message = service.verify_backup(filename)
+        if not ok:
+            QMessageBox.critical(self, "Restore Failed", f"The selected file is not a valid backup: {message}")
+            return
+        confirm = QMessageBox.question(
+            self, "Restore Database",
+            "Replace all current data with this backup? The current database is backed up first.",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        if confirm != QMessageBox.Yes:
+            return
+
+        def done(success, message):
+            if success:
+                QMessageBox.information(self, "Restore Complete", f"{message}\nPlease restart the application.")
+            else:
+                QMessageBox.critical(self, "Restore Failed", message)
+            logger.info("Data restore finished: %s", message)
+
+        start_batch_pdf_job(
+            self, "Restoring Database",
+            lambda progress, cancel_event: service.restore(filename, progress=progress),
+            done, initial_text="Validating backup...", label_format="{name}",
+        )
 
 class LicenseSettingsWidget(QWidget):
     def __init__(self, main_window):
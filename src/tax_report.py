@@ -0,0 +1,82 @@
+import csv
+import gzip
+import logging
+from typing import Any, Dict, List, Tuple
+
+import db
+from cart import from_paise, to_paise
+from sales_export import Workbook, format_for_path
+
+# Logging is configured in main_window.py
+tax_logger = logging.getLogger("medibit.tax_report")
+
+HEADERS = ("Period", "Tax Rate %", "Bills", "Lines", "Taxable Value", "CGST", "SGST", "Total Tax",
+           "Discounts", "Invoice Value")
+NOT_RECORDED = "Not recorded"  # Rate label for bills from before tax was stored
+
+
+class TaxReportService:
+    """
+    GST summaries for a filing period, from the tax components stored with every bill
+    and bill item at finalize time. Aggregation runs in SQL (db.get_tax_summary), so a
+    period costs a handful of grouped queries whatever the number of sales. Tax is split
+    evenly into CGST and SGST (intra-state supply).
+    """
+
+    def summary(self, start_date=None, end_date=None) -> List[Dict[str, Any]]:
+        """
+        Tax summary per month and rate, followed by a 'Total' row.
+        :param start_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+        :param end_date: (optional) string 'YYYY-MM-DD' or datetime.date, inclusive
+        :return: List of row dicts keyed like HEADERS (empty when there are no sales)
+        """
+        rows = [self._row(r.period, r.tax_rate, r.bills, r.lines, r.taxable_value, r.tax_amount,
+                          r.discount_amount, r.total)
+                for r in db.get_tax_summary(start_date, end_date)]
+        if rows:
+            sums = [sum(to_paise(row[key]) for row in rows)
+                    for key in ("Taxable Value", "Total Tax", "Discounts", "Invoice Value")]
+            rows.append(self._row("Total", "", sum(row["Bills"] for row in rows), sum(row["Lines"] for row in rows),
+                                  *(from_paise(value) for value in sums)))
+        return rows
+
+    @staticmethod
+    def _row(period, rate, bills, lines, taxable, tax, discount, total) -> Dict[str, Any]:
+        tax_paise = to_paise(tax)
+        cgst = tax_paise // 2
+        return dict(zip(HEADERS, (
+            period, NOT_RECORDED if rate is None else rate, bills, lines, taxable,
+            from_paise(cgst), from_paise(tax_paise - cgst), tax, discount, total,
+        )))
+
+    def export(self, start_date, end_date, output_path: str) -> Tuple[bool, str]:
+        """
+        Write the summary to CSV, gzip CSV or XLSX (by output_path extension).
+        :return: (success, output path or error message)
+        """
+        fmt = format_for_path(output_path)
+        if fmt is None:
+            return False, "Unsupported export format. Use .csv, .csv.gz or .xlsx"
+        if fmt == "xlsx" and Workbook is None:
+            return False, "Excel export requires the 'openpyxl' package. Export as CSV instead."
+        try:
+            rows = self.summary(start_date, end_date)
+            if not rows:
+                return False, "No sales in the selected date range."
+            table = [HEADERS] + [tuple(row[key] for key in HEADERS) for row in rows]
+            if fmt == "xlsx":
+                workbook = Workbook()
+                sheet = workbook.active
+                sheet.title = "Tax Summary"
+                for cells in table:
+                    sheet.append(cells)
+                workbook.save(output_path)
+            else:
+                opener = gzip.open if fmt == "csv.gz" else open
+                with opener(output_path, "wt", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerows(table)
+        except Exception as e:
+            tax_logger.error(f"Tax report export failed: {e}", exc_info=True)
+            return False, str(e)
+        tax_logger.info(f"Tax report ({start_date}..{end_date}) written to {output_path}")
+        return True, output_path
@@ -0,0 +1,136 @@
+import datetime
+import logging
+import threading
+from typing import Dict, FrozenSet, List, Optional
+
+import db
+from event_bus import MedicineChanged, StockAdjusted, bus
+
+# Logging is configured in main_window.py
+watchlist_logger = logging.getLogger("medibit.watchlist")
+
+EXPIRING_DAYS = 30
+CATEGORIES = ("low_stock", "out_of_stock", "expired", "expiring_soon")
+
+
+class StockWatchlist:
+    """
+    Low-stock, out-of-stock, expired and expiring-soon sets of barcodes, kept current
+    without rescanning the medicines table:
+      - it subscribes to the MedicineChanged/StockAdjusted events db.py publishes
+        after each commit, which name the barcodes that changed;
+      - the next read re-classifies only those barcodes with one query;
+      - the first read of a new day rebuilds everything, since expiry is relative to today.
+    Counts are then O(1), for badges and alert screens.
+
+    Definitions match the rest of the app: low stock is quantity < threshold (out of
+    stock included), out of stock is quantity 0, expired is an expiry before today and
+    expiring soon is an expiry within the next EXPIRING_DAYS days (today excluded).
+    """
+
+    def __init__(self, expiring_days: int = EXPIRING_DAYS):
+        self.expiring_days = expiring_days
+        self._lock = threading.RLock()
+        self._sets = {category: set() for category in CATEGORIES}
+        self._today = None  # Date of the last full rebuild; None = not loaded
+        self._pending = set()  # Barcodes changed since the last read
+        self._stale = False  # Everything changed (inventory cleared)
+        self.version = 0  # Bumped whenever the sets change, so screens can skip redundant refreshes
+        bus.subscribe(MedicineChanged, self._on_change)
+        bus.subscribe(StockAdjusted, self._on_change)
+
+    def close(self) -> None:
+        """Stop listening for writes."""
+        bus.unsubscribe(MedicineChanged, self._on_change)
+        bus.unsubscribe(StockAdjusted, self._on_change)
+
+    # --- Updates ----------------------------------------------------------------------------
+    def _on_change(self, event) -> None:
+        # Writer thread: only record what changed, the query happens on the next read
+        with self._lock:
+            if event.barcodes is None:
+                self._stale = True
+            else:
+                self._pending.update(event.barcodes)
+
+    def rebuild(self, today: Optional[datetime.date] = None) -> None:
+        """Reload every medicine (startup, date rollover, after the inventory was cleared)."""
+        today = today or datetime.date.today()
+        rows = db.get_watch_levels()
+        with self._lock:
+            for members in self._sets.values():
+                members.clear()
+            for row in rows:
+                self._classify(today, *row)
+            self._today = today
+            self._pending.clear()
+            self._stale = False
+            self.version += 1
+            sizes = {category: len(members) for category, members in self._sets.items()}
+        watchlist_logger.debug("Watchlist rebuilt", extra={"medicines": len(rows), **sizes})
+
+    def _refresh(self, barcodes: set) -> None:
+        rows = db.get_watch_levels(barcodes)
+        with self._lock:
+            for members in self._sets.values():
+                members.difference_update(barcodes)  # Deleted medicines have no row
+            for row in rows:
+                self._classify(self._today, *row)
+            self.version += 1
+
+    def _classify(self, today, barcode, quantity, threshold, expiry) -> None:
+        if quantity < threshold:
+            self._sets["low_stock"].add(barcode)
+        if quantity == 0:
+            self._sets["out_of_stock"].add(barcode)
+        if expiry:
+            if expiry < today:
+                self._sets["expired"].add(barcode)
+            elif today < expiry and (expiry - today).days <= self.expiring_days:
+                self._sets["expiring_soon"].add(barcode)
+
+    def _ensure_current(self) -> None:
+        today = datetime.date.today()
+        with self._lock:
+            if self._stale or self._today != today:
+                self.rebuild(today)
+            elif self._pending:
+                pending, self._pending = self._pending, set()
+                self._refresh(pending)
+
+    # --- Reads ------------------------------------------------------------------------------
+    def count(self, category: str) -> int:
+        """
+        :param category: One of CATEGORIES
+        :return: Number of medicines in that category
+        """
+        self._ensure_current()
+        return len(self._sets[category])
+
+    def counts(self) -> Dict[str, int]:
+        """
+        :return: Dict category -> number of medicines
+        """
+        self._ensure_current()
+        with self._lock:
+            return {category: len(members) for category, members in self._sets.items()}
+
+    def barcodes(self, category: str) -> FrozenSet[str]:
+        """
+        :param category: One of CATEGORIES
+        :return: Barcodes currently in that category
+        """
+        self._ensure_current()
+        with self._lock:
+            return frozenset(self._sets[category])
+
+    def medicines(self, category: str) -> List:
+        """
+        :param category: One of CATEGORIES
+        :return: Medicine objects in that category, ordered by name
+        """
+        return db.get_medicines_by_barcodes(self.barcodes(category))
+
+
+# Process-wide watchlist used by the services and screens
+watchlist = StockWatchlist()
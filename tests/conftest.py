@@ -1,6 +1,15 @@
 import sys
 import os
+import shutil
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+# The database and generated PDFs go to a scratch directory, never into the repository tree.
+# db.py opens its engine on import, so this has to happen before the first import of db.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="medibit-tests-")
+os.environ["MEDIBIT_DB_PATH"] = os.path.join(SCRATCH_DIR, "pharmacy_inventory.db")
+os.environ["MEDIBIT_ARTIFACT_ROOT"] = SCRATCH_DIR
+
 import pytest
 import datetime
 
@@ -67,6 +76,18 @@ def patch_messageboxes_and_dialogs(monkeypatch):
     monkeypatch.setattr(QDialog, "exec_", original_exec)
 
 
+@pytest.fixture(autouse=True)
+def scratch_paths(tmp_path, monkeypatch):
+    """Point config.json, notification settings and generated PDFs at the test's tmp_path."""
+    for name in ("config", "src.config"):
+        if name in sys.modules:
+            monkeypatch.setattr(sys.modules[name], "CONFIG_FILE", str(tmp_path / "config.json"))
+    for name in ("artifact_store", "src.artifact_store"):
+        if name in sys.modules:
+            monkeypatch.setattr(sys.modules[name], "ARTIFACT_ROOT", str(tmp_path))
+    return tmp_path
+
+
 @pytest.fixture(autouse=True)
 def setup_database():
     """Automatically initialize the database before each test"""
@@ -75,7 +96,7 @@ def setup_database():
     # Cleanup could be added here if needed
 
 @pytest.fixture(autouse=True)
-def activate_license():
+def activate_license(scratch_paths):
     settings_service = SettingsService()
     # Use a unique test email for identification
     test_email = "testuser@example.com"
@@ -88,6 +109,9 @@ def pytest_configure():
     # Optionally, global setup for all tests
     pass
 
+def pytest_unconfigure():
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
 @pytest.fixture
 def sample_inventory():
     clear_inventory()
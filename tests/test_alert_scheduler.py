@@ -0,0 +1,118 @@
+import datetime
+
+import pytest
+
+import config
+import db
+from alert_scheduler import AlertScheduler, restock_level
+
+TODAY = datetime.date.today()
+NEXT_YEAR = TODAY + datetime.timedelta(days=365)
+
+
+class FakeNotifier:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.digests = []
+
+    def __call__(self):
+        return self
+
+    def send_alert_digest(self, sections):
+        self.digests.append({heading: [m.barcode for m in meds] for heading, meds in sections if meds})
+        return [("Email", self.ok, "sent" if self.ok else "SMTP down")]
+
+
+@pytest.fixture
+def notifier():
+    config.set_alert_settings(check_times=[], debounce_seconds=0)
+    db.clear_inventory()
+    db.update_alert_states(cleared=db.get_alert_states())
+    for name in ("check", "summary"):
+        db.record_alert_run(name, None)
+    db.add_medicine("A1", "Plenty", 50, NEXT_YEAR, "Acme", 10, 10)
+    db.add_medicine("A2", "Running Low", 3, NEXT_YEAR, "Acme", 10, 10)
+    db.add_medicine("A3", "Expiring", 40, TODAY + datetime.timedelta(days=5), "Acme", 10, 10)
+    fake = FakeNotifier()
+    yield fake
+    db.clear_inventory()
+    db.update_alert_states(cleared=db.get_alert_states())
+
+
+def test_each_condition_fires_once_until_it_clears(notifier):
+    scheduler = AlertScheduler(notifier_factory=notifier)
+    try:
+        assert scheduler.check()[0]
+        assert notifier.digests == [{"Low stock": ["A2"], "Expiring soon": ["A3"]}]
+        assert scheduler.check() == (True, "No new alerts.")
+
+        db.update_medicine_quantity("A2", 0)
+        db.update_medicine_quantity("A1", 5)
+        scheduler.check()
+        assert notifier.digests[-1] == {"Out of stock": ["A2"], "Low stock": ["A1"]}
+
+        # Hysteresis: back at the threshold is not enough to re-arm the alert
+        assert restock_level(10, 0.2) == 12
+        db.update_medicine_quantity("A1", 10)
+        scheduler.check()
+        db.update_medicine_quantity("A1", 4)
+        assert scheduler.check() == (True, "No new alerts.")
+        db.update_medicine_quantity("A1", 12)
+        scheduler.check()
+        assert ("A1", "low_stock") not in db.get_alert_states()
+        db.update_medicine_quantity("A1", 4)
+        scheduler.check()
+        assert notifier.digests[-1] == {"Low stock": ["A1"]}
+
+        db.delete_medicine("A3")
+        scheduler.check()
+        assert not any(barcode == "A3" for barcode, _ in db.get_alert_states())
+    finally:
+        scheduler.stop()
+
+
+def test_failed_digest_is_retried(notifier):
+    notifier.ok = False
+    scheduler = AlertScheduler(notifier_factory=notifier)
+    try:
+        ok, msg = scheduler.check()
+        assert not ok and "SMTP down" in msg and db.get_alert_states() == {}
+        notifier.ok = True
+        assert scheduler.check()[0] and len(db.get_alert_states()) == 2
+        assert notifier.digests[0] == notifier.digests[1]
+    finally:
+        scheduler.stop()
+
+
+def test_runs_after_writes_and_at_configured_times(notifier):
+    now = datetime.datetime.combine(TODAY, datetime.time(9, 30))
+    summaries = []
+    service = type("Service", (), {"send_daily_sales_summary": lambda self, day: summaries.append(day) or (True, "ok")})()
+    scheduler = AlertScheduler(service, notifier_factory=notifier, clock=lambda: now)
+    try:
+        scheduler.run_due()
+        assert notifier.digests == [] and summaries == []  # Nothing changed and nothing scheduled
+
+        db.update_medicine_quantity("A1", 1)  # The bus wakes the scheduler
+        scheduler.run_due()
+        assert len(notifier.digests) == 1
+
+        assert "check" not in db.get_alert_runs()  # Only scheduled checks are recorded as runs
+
+        config.set_alert_settings(check_times=["09:00"], summary_time="09:15")
+        db.update_alert_states(cleared=db.get_alert_states())
+        scheduler.run_due()
+        assert len(notifier.digests) == 2 and summaries == [TODAY]
+        assert db.get_alert_runs() == {"check": now.isoformat(timespec="seconds"),
+                                       "summary": now.isoformat(timespec="seconds")}
+        scheduler.run_due()
+        assert len(notifier.digests) == 2 and summaries == [TODAY]  # Already done today
+        assert "last_check" not in config.get_alert_settings()
+
+        config.set_alert_settings(enabled=False)
+        db.record_alert_run("check", None)
+        db.update_alert_states(cleared=db.get_alert_states())
+        scheduler.run_due()
+        assert len(notifier.digests) == 2
+    finally:
+        scheduler.stop()
@@ -0,0 +1,95 @@
+import datetime
+import sqlite3
+
+import pytest
+
+import config
+import src.db as db_module
+from archive_service import ArchiveService
+from src.db import (add_bill, add_order, clear_all_bills, clear_all_orders, get_all_orders, get_archive_watermark,
+                    get_bills_between, get_monthly_sales, update_order_status)
+
+NOW = datetime.datetime(2025, 6, 1, 12, 0)
+
+
+def _item(barcode="A1", quantity=1):
+    return {"barcode": barcode, "name": "Archived Med", "price": 10, "quantity": quantity, "subtotal": 10 * quantity}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    archive_path = str(tmp_path / "archive.db")
+    monkeypatch.setattr(db_module, "ARCHIVE_FILENAME", archive_path)
+    clear_all_bills()
+    clear_all_orders()
+    yield ArchiveService(db_path=db_module.DB_FILENAME, archive_path=archive_path, batch_size=2)
+    clear_all_bills()
+    clear_all_orders()
+
+
+def _count(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_old_bills_and_completed_orders_move_to_archive(service):
+    for day in range(1, 6):
+        add_bill(f"2024-01-0{day} 10:00:00", 10, [_item(), _item("A2", 2)])
+    add_bill("2025-05-30 10:00:00", 20, [_item()])
+    done = add_order("2024-01-01T09:00:00", "done.pdf", [{"barcode": "A1", "name": "Med", "quantity": 5}])
+    update_order_status(done, "completed")
+    add_order("2024-01-02T09:00:00", "pending.pdf", [{"barcode": "A1", "name": "Med", "quantity": 5}])
+    add_order("2025-05-30T09:00:00", "new.pdf", [])
+
+    ok, moved = service.archive(older_than_days=90, now=NOW)
+    assert ok and moved == {"bills": 5, "orders": 1}
+    assert _count(service.archive_path, "bills") == 5 and _count(service.archive_path, "bill_items") == 10
+    assert _count(service.db_path, "bills") == 1 and _count(service.db_path, "bill_items") == 1
+    assert get_archive_watermark("bills") == "2025-03-03"
+    assert config.get_archive_settings()["last_run"] == NOW.isoformat(timespec="seconds")
+
+    # Pending orders stay hot whatever their age
+    assert sorted(o.file_path for o in get_all_orders()) == ["new.pdf", "pending.pdf"]
+    archived = [o for o in get_all_orders(include_archived=True) if o.file_path == "done.pdf"]
+    assert len(archived) == 1 and archived[0].meds[0].quantity == 5
+
+    # Running again moves nothing and duplicates nothing
+    assert service.archive(older_than_days=90, now=NOW) == (True, {"bills": 0, "orders": 0})
+    assert _count(service.archive_path, "bills") == 5
+
+
+def test_newest_row_stays_hot(service):
+    add_bill("2024-01-01 10:00:00", 10, [_item()])
+    add_bill("2024-01-02 10:00:00", 10, [_item()])
+    assert service.archive(older_than_days=30, now=NOW) == (True, {"bills": 1, "orders": 0})
+    assert [b.timestamp for b in get_bills_between("2024-01-02", "2024-01-02")] == ["2024-01-02 10:00:00"]
+
+
+def test_reads_reach_the_archive_only_for_old_ranges(service, monkeypatch):
+    add_bill("2024-01-05 10:00:00", 100, [_item()])
+    add_bill("2024-02-05 10:00:00", 50, [_item()])
+    add_bill("2025-05-20 10:00:00", 30, [_item()])
+    service.archive(older_than_days=90, now=NOW)
+
+    bills = get_bills_between("2024-01-01", "2025-12-31")
+    assert [b.total for b in bills] == [100, 50, 30]
+    assert [i.barcode for i in bills[0].items] == ["A1"]
+    assert get_monthly_sales("2024-01-01", "2024-12-31") == [("January 2024", 100, 1, 100.0),
+                                                           ("February 2024", 50, 1, 50.0)]
+
+    opened = []
+    monkeypatch.setattr(db_module, "archive_session", lambda: opened.append(1))
+    assert [b.total for b in get_bills_between("2025-05-01", "2025-05-31")] == [30]
+    assert opened == []
+
+
+def test_schedule_runs_daily_when_enabled(service):
+    assert service.is_archive_due()
+    config.set_archive_settings(last_run="2025-06-01T00:00:00")
+    assert not service.is_archive_due(NOW)
+    assert service.is_archive_due(NOW + datetime.timedelta(days=1))
+    config.set_archive_settings(enabled=False)
+    assert not service.is_archive_due(NOW + datetime.timedelta(days=30))
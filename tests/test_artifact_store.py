@@ -0,0 +1,58 @@
+import datetime
+import os
+
+import pytest
+
+from src.artifact_store import ArtifactStore
+from src.db import clear_all_bills, clear_all_orders
+
+
+@pytest.fixture
+def store(tmp_path):
+    clear_all_bills()
+    clear_all_orders()
+    yield ArtifactStore(root=str(tmp_path))
+    clear_all_bills()
+    clear_all_orders()
+
+
+def _write(store, kind, name, data=b"%PDF-1.4 test", when=None):
+    path = store.path_for(kind, name, when)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_paths_are_sharded_by_month(store, tmp_path):
+    path = store.path_for("receipt", "r.pdf", datetime.datetime(2024, 3, 5))
+    assert path == os.path.join(str(tmp_path), "receipts", "2024", "03", "r.pdf")
+    assert os.path.isdir(os.path.dirname(path))
+
+
+def test_lookup_by_ref_and_label(store):
+    _write(store, "receipt", "old.pdf")
+    store.register("receipt", 41, store.path_for("receipt", "old.pdf"), label="Jane Doe")
+    newer = _write(store, "receipt", "new.pdf", b"%PDF-1.4 newer")
+    artifact_id = store.register("receipt", "41", newer, label="Jane Doe")
+
+    artifact = store.lookup("receipt", 41)
+    assert artifact.id == artifact_id and artifact.path == newer
+    assert artifact.size == len(b"%PDF-1.4 newer")
+    assert store.lookup_by_label("receipt", "Jane Doe").id == artifact_id
+    assert set(store.lookup_many("receipt", [41, 42])) == {41}
+    assert store.lookup("order", 41) is None
+
+
+def test_compression_keeps_contents_retrievable(store):
+    path = _write(store, "order", "order_7.pdf", b"%PDF-1.4 " + b"x" * 4096)
+    store.register("order", 7, path)
+
+    assert store.compress_older_than(-1, kind="order") == 1
+    artifact = store.lookup("order", 7)
+    assert artifact.compressed and artifact.path.endswith(".gz")
+    assert not os.path.exists(path)
+    assert artifact.size < 4096
+    assert store.verify(artifact)
+    with open(store.path_for_ref("order", 7), "rb") as f:
+        assert f.read().startswith(b"%PDF")
+    assert store.compress_older_than(-1, kind="order") == 0
@@ -0,0 +1,103 @@
+import datetime
+import gzip
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+import config
+from backup_service import BackupService
+from src.db import Base
+
+
+@pytest.fixture
+def service(tmp_path):
+    db_path = tmp_path / "live.db"
+    Base.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executemany("INSERT INTO medicines (barcode, name, quantity) VALUES (?, ?, ?)",
+                     [(f"B{i}", f"Med {i}", i) for i in range(500)])
+    conn.commit()
+    conn.close()
+    return BackupService(db_path=str(db_path), backup_dir=str(tmp_path / "backups"), pages_per_step=4, step_pause=0)
+
+
+def _medicine_count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM medicines").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_is_compressed_verified_and_recorded(service, tmp_path):
+    steps = []
+    ok, path = service.create_backup(progress=lambda done, total, msg: steps.append((done, total)))
+    assert ok and path.endswith(".db.gz")
+    assert len(steps) > 1 and steps[-2][0] == steps[-2][1]
+    assert service.verify_backup(path) == (True, "ok")
+    raw = tmp_path / "check.db"
+    raw.write_bytes(gzip.open(path).read())
+    assert _medicine_count(raw) == 500
+    assert config.get_backup_settings()["last_backup"] is not None
+    assert [b["path"] for b in service.list_backups()] == [path]
+
+
+def test_verify_rejects_corrupt_and_foreign_files(service, tmp_path):
+    garbage = tmp_path / "garbage.db"
+    garbage.write_bytes(b"not a database" * 100)
+    assert service.verify_backup(str(garbage))[0] is False
+    other = tmp_path / "other.db"
+    sqlite3.connect(other).execute("CREATE TABLE notes (text TEXT)").connection.commit()
+    ok, message = service.verify_backup(str(other))
+    assert not ok and "missing tables" in message
+
+
+def test_cancel_stops_backup_without_output(service):
+    cancel = threading.Event()
+    cancel.set()
+    assert service.create_backup(cancel_event=cancel) == (False, "Backup canceled.")
+    assert service.list_backups() == []
+
+
+def test_retention_keeps_newest_backups(service):
+    service.create_backup()
+    backup_dir = service.backup_dir
+    for stamp in ("20240101-000000", "20240102-000000", "20240103-000000"):
+        with open(f"{backup_dir}/medibit_backup_{stamp}.db.gz", "wb") as f:
+            f.write(b"old")
+    removed = service.prune(keep=2)
+    assert sorted(p.rsplit("_", 1)[-1] for p in removed) == ["20240101-000000.db.gz", "20240102-000000.db.gz"]
+    assert len(service.list_backups("backup")) == 2
+
+
+def test_restore_validates_and_keeps_previous_database(service, tmp_path):
+    ok, path = service.create_backup()
+    conn = sqlite3.connect(service.db_path)
+    conn.execute("DELETE FROM medicines")
+    conn.commit()
+    conn.close()
+
+    garbage = tmp_path / "garbage.db.gz"
+    garbage.write_bytes(gzip.compress(b"junk" * 1000))
+    ok_bad, message = service.restore(str(garbage))
+    assert not ok_bad and "nothing was changed" in message
+    assert _medicine_count(service.db_path) == 0
+
+    ok, message = service.restore(path)
+    assert ok, message
+    assert _medicine_count(service.db_path) == 500
+    (pre_restore,) = service.list_backups("pre-restore")
+    assert service.verify_backup(pre_restore["path"]) == (True, "ok")
+
+
+def test_schedule_uses_interval_and_enabled_flag(service):
+    assert service.is_backup_due()
+    now = datetime.datetime(2025, 1, 2, 12, 0)
+    config.set_backup_settings(last_backup="2025-01-02T00:00:00", interval_hours=24)
+    assert not service.is_backup_due(now)
+    assert service.is_backup_due(now + datetime.timedelta(hours=12))
+    config.set_backup_settings(enabled=False)
+    assert not service.is_backup_due(now + datetime.timedelta(days=30))
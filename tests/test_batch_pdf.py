@@ -0,0 +1,70 @@
+import threading
+import zipfile
+
+import pytest
+
+from src.batch_pdf_service import BatchPdfService, PdfWriter, customer_name_from_path
+from src.db import add_bill, add_order, clear_all_bills, clear_all_orders
+
+
+@pytest.fixture(autouse=True)
+def sample_data():
+    clear_all_bills()
+    clear_all_orders()
+    for day in range(1, 4):
+        add_bill(
+            f"2024-03-0{day} 10:00:00",
+            100.0 * day,
+            [{"barcode": f"B{day}", "name": f"Medicine {day}", "price": 50.0, "quantity": 2 * day, "subtotal": 100.0 * day}],
+            file_path=f"receipts/receipt_Jane_Doe_id{day}_20240301_100000.pdf",
+        )
+    add_order("2024-03-02 09:00:00", "", [
+        {"barcode": "B1", "name": "Medicine 1", "quantity": 1, "expiry": "2030-01-01", "manufacturer": "Acme", "order_quantity": 10}
+    ])
+    yield
+    clear_all_bills()
+    clear_all_orders()
+
+
+def test_reprint_receipts_streams_into_zip(tmp_path):
+    output = tmp_path / "receipts.zip"
+    seen = []
+    ok, result = BatchPdfService(max_workers=2).reprint_receipts(
+        "2024-03-01", "2024-03-02", str(output), progress=lambda done, total, name: seen.append((done, total))
+    )
+    assert ok, result
+    with zipfile.ZipFile(output) as archive:
+        names = archive.namelist()
+        assert len(names) == 2
+        assert all(archive.read(name).startswith(b"%PDF") for name in names)
+    assert seen[-1] == (2, 2)
+
+
+def test_receipt_jobs_recover_customer_name():
+    jobs = BatchPdfService().build_receipt_jobs("2024-03-01", "2024-03-03")
+    assert [job["customer"]["name"] for job in jobs] == ["Jane Doe"] * 3
+    assert customer_name_from_path("receipts/2024/03/receipt_A_B_id12_20240301_100000.pdf") == "A B"
+    assert customer_name_from_path("bill.pdf") is None and customer_name_from_path(None) is None
+
+
+def test_export_pending_orders(tmp_path):
+    output = tmp_path / "orders.zip"
+    ok, result = BatchPdfService(max_workers=1).export_orders(str(output))
+    assert ok, result
+    with zipfile.ZipFile(output) as archive:
+        assert len(archive.namelist()) == 1
+
+
+def test_cancelled_batch_removes_partial_output(tmp_path):
+    output = tmp_path / "cancelled.zip"
+    cancel = threading.Event()
+    cancel.set()
+    ok, result = BatchPdfService(max_workers=1).reprint_receipts(None, None, str(output), cancel_event=cancel)
+    assert not ok and result == "Cancelled"
+    assert not output.exists()
+
+
+@pytest.mark.skipif(PdfWriter is not None, reason="pypdf installed")
+def test_merge_requires_pypdf(tmp_path):
+    ok, result = BatchPdfService().reprint_receipts(None, None, str(tmp_path / "all.pdf"), merge=True)
+    assert not ok and "pypdf" in result
@@ -0,0 +1,37 @@
+import datetime
+
+from benchmarks import dataset, suite
+
+
+def test_dataset_rows_are_reproducible_and_valid():
+    first = dataset.medicine_rows(500, seed=7)
+    assert first == dataset.medicine_rows(500, seed=7)
+    assert first != dataset.medicine_rows(500, seed=8)
+
+    barcodes = [m["barcode"] for m in first]
+    assert len(set(barcodes)) == 500
+    assert all(len(b) == 13 and b.startswith("890") and dataset.ean13(b[:12]) == b for b in barcodes)
+    expired = sum(m["expiry"] < dataset.REFERENCE_DATE for m in first)
+    assert 0 < expired < 50
+    assert any(m["quantity"] <= m["threshold"] for m in first)
+
+
+def test_bills_reference_generated_medicines():
+    meds = dataset.medicine_rows(200, seed=3)
+    barcodes = {m["barcode"] for m in meds}
+    bills = list(dataset.bill_rows(meds, 50, first_id=10, seed=3))
+    assert [bill["id"] for bill, _ in bills] == list(range(10, 60))
+    for bill, items in bills:
+        assert items and all(i["bill_id"] == bill["id"] and i["barcode"] in barcodes for i in items)
+        assert bill["total"] == sum(i["subtotal"] for i in items)
+        assert datetime.datetime.strptime(bill["timestamp"], "%Y-%m-%d %H:%M:%S").date() < dataset.REFERENCE_DATE
+
+
+def test_compare_flags_regressions():
+    def result(median):
+        return {"scales": {"1k": {"scenarios": {"monthly_sales": {"median_ms": median}}}}}
+
+    rows, regressions = suite.compare(result(10.0), result(11.0), tolerance=0.2)
+    assert rows == [("1k", "monthly_sales", 10.0, 11.0, 0.1)] and not regressions
+    _, regressions = suite.compare(result(10.0), result(15.0), tolerance=0.2)
+    assert [r[1] for r in regressions] == ["monthly_sales"]
@@ -378,15 +378,14 @@ class TestBillingService:
             "total": 258.75
         }
         
-        success, filename = billing_service.save_draft(draft_data, "test_draft")
+        success, draft_id = billing_service.save_draft(draft_data, "test_draft")
         
         assert success is True
-        assert filename is not None
-        assert os.path.exists(filename)
+        assert draft_id is not None
+        assert draft_id in [d.id for d in billing_service.list_drafts(100)]
         
         # Clean up
-        if os.path.exists(filename):
-            os.remove(filename)
+        billing_service.delete_draft(draft_id)
     
     def test_load_draft_success(self, billing_service, sample_customer, sample_billing_items):
         """Test successful draft loading"""
@@ -400,11 +399,11 @@ class TestBillingService:
             "total": 258.75
         }
         
-        success, filename = billing_service.save_draft(draft_data, "test_draft")
+        success, draft_id = billing_service.save_draft(draft_data, "test_draft")
         assert success is True
         
         # Then load it
-        success, loaded_draft = billing_service.load_draft(filename)
+        success, loaded_draft = billing_service.load_draft(draft_id)
         
         assert success is True
         assert loaded_draft is not None
@@ -412,8 +411,7 @@ class TestBillingService:
         assert len(loaded_draft["items"]) == len(sample_billing_items)
         
         # Clean up
-        if os.path.exists(filename):
-            os.remove(filename)
+        billing_service.delete_draft(draft_id)
     
     def test_delete_draft_success(self, billing_service, sample_customer, sample_billing_items):
         """Test successful draft deletion"""
@@ -427,16 +425,56 @@ class TestBillingService:
             "total": 258.75
         }
         
-        success, filename = billing_service.save_draft(draft_data, "test_draft")
+        success, draft_id = billing_service.save_draft(draft_data, "test_draft")
         assert success is True
-        assert os.path.exists(filename)
         
         # Then delete it
-        success, error = billing_service.delete_draft(filename)
+        success, error = billing_service.delete_draft(draft_id)
         
         assert success is True
         assert error is None
-        assert not os.path.exists(filename)
+        assert billing_service.load_draft(draft_id)[0] is False
+    
+    def test_save_draft_overwrites_in_place(self, billing_service, sample_customer):
+        """Test re-saving a loaded draft updates it instead of adding a new one"""
+        draft_data = {"customer": sample_customer, "items": [], "tax": 0, "discount": 0}
+        success, draft_id = billing_service.save_draft(draft_data, "first")
+        draft_data["tax"] = 12.0
+        success, same_id = billing_service.save_draft(draft_data, "renamed", draft_id)
+        
+        assert success is True and same_id == draft_id
+        listed = [d for d in billing_service.list_drafts(100) if d.id == draft_id]
+        assert listed[0].name == "renamed"
+        assert listed[0].customer_name == sample_customer["name"]
+        assert billing_service.load_draft(draft_id)[1]["tax"] == 12.0
+        billing_service.delete_draft(draft_id)
+    
+    def test_autosave_round_trip(self, billing_service, sample_customer, sample_billing_items):
+        """Test autosave skips unchanged writes and survives a new service instance"""
+        draft_data = {"customer": sample_customer, "items": sample_billing_items, "tax": 5.0, "discount": 0}
+        listed_before = len(billing_service.list_drafts(1000))
+        assert billing_service.autosave(draft_data) is True
+        assert billing_service.autosave(dict(draft_data)) is False
+        
+        recovered = BillingService().get_autosave()
+        assert recovered["customer"]["name"] == sample_customer["name"]
+        assert len(recovered["items"]) == len(sample_billing_items)
+        # The autosave slot is not listed with the named drafts
+        assert len(billing_service.list_drafts(1000)) == listed_before
+        
+        billing_service.clear_autosave()
+        assert billing_service.get_autosave() is None
+    
+    def test_import_legacy_drafts(self, billing_service, sample_customer, tmp_path):
+        """Test JSON drafts from older versions are moved into the drafts table once"""
+        legacy = tmp_path / "draft_bill_Old_Draft_20240101_120000.json"
+        legacy.write_text(json.dumps({"customer": sample_customer, "items": []}), encoding="utf-8")
+        
+        assert billing_service.import_legacy_drafts(str(tmp_path)) == 1
+        assert billing_service.import_legacy_drafts(str(tmp_path)) == 0
+        imported = [d for d in billing_service.list_drafts(100) if d.name == "Old Draft"]
+        assert imported and imported[0].customer_name == sample_customer["name"]
+        billing_service.delete_draft(imported[0].id)
     
     def test_add_item_to_bill(self, billing_service, sample_billing_items):
         """Test adding item to bill"""
@@ -775,17 +813,16 @@ class TestBillingIntegration:
             "total": 258.75
         }
         
-        success, filename = billing_service.save_draft(draft_data, "test_workflow")
+        success, draft_id = billing_service.save_draft(draft_data, "test_workflow")
         assert success is True
         
         # 3. Load draft
-        success, loaded_draft = billing_service.load_draft(filename)
+        success, loaded_draft = billing_service.load_draft(draft_id)
         assert success is True
         assert loaded_draft["customer"]["name"] == sample_customer["name"]
         
         # 4. Clean up
-        if os.path.exists(filename):
-            os.remove(filename)
+        billing_service.delete_draft(draft_id)
 
 
 class TestBillingPerformance:
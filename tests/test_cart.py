@@ -0,0 +1,134 @@
+import pytest
+from PyQt5.QtWidgets import QTableWidgetItem
+from unittest.mock import Mock
+
+# Import through src/ on sys.path so Cart is the same class the services check against
+from cart import Cart, to_paise
+from src.billing_service import BillingService
+from src.billing_ui import BillingUi
+from src.db import add_medicine, clear_all_bills, clear_inventory, commit_bill, get_all_bills, get_medicine_by_barcode
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    clear_inventory()
+    clear_all_bills()
+    yield
+    clear_inventory()
+    clear_all_bills()
+
+
+class TestCart:
+    def test_to_paise_rounds_half_up(self):
+        assert to_paise(10.005) == 1001
+        assert to_paise("₹12.50") == 1250
+        assert to_paise(None) == 0
+
+    def test_add_merges_lines_and_updates_aggregates(self):
+        cart = Cart()
+        cart.add("C001", "Aspirin", 10.5, 2)
+        cart.add("C002", "Paracetamol", 4.25, 4)
+        cart.add("C001", "Aspirin", 10.5, 1)
+        assert len(cart) == 2
+        assert cart.get("C001").quantity == 3
+        assert cart.gross == 3 * 1050 + 4 * 425
+        assert cart.units == 7
+
+    def test_add_respects_stock_limit(self):
+        cart = Cart()
+        cart.add("C001", "Aspirin", 10, 4, max_quantity=5)
+        with pytest.raises(ValueError):
+            cart.add("C001", "Aspirin", 10, 2, max_quantity=5)
+        assert cart.get("C001").quantity == 4
+
+    def test_set_quantity_and_remove(self):
+        cart = Cart()
+        cart.add("C001", "Aspirin", 10, 2)
+        cart.add("C002", "Paracetamol", 5, 1)
+        cart.set_quantity("C001", 5)
+        assert cart.gross == 5 * 1000 + 500
+        cart.set_quantity("C002", 0)
+        assert "C002" not in cart
+        cart.remove("C001")
+        assert cart.gross == 0 and cart.units == 0
+
+    def test_totals_match_calculate_totals(self):
+        items = [
+            {"barcode": "A", "name": "A", "price": 100.0, "quantity": 2},
+            {"barcode": "B", "name": "B", "price": 50.0, "quantity": 1},
+        ]
+        cart = Cart.from_items(items)
+        service = BillingService()
+        assert service.calculate_totals(cart, 10, 5) == service.calculate_totals(items, 10, 5)
+        assert service.calculate_totals(cart, 10, 5) == (250.0, 23.75, 12.5, 261.25)
+
+    def test_to_db_items_applies_line_discount(self):
+        cart = Cart()
+        cart.add("C001", "Aspirin", 20, 3, discount=5)
+        cart.add("C002", "Syrup", 10, 1, discount=15)
+        items = {item["barcode"]: item for item in cart.to_db_items()}
+        assert items["C001"]["subtotal"] == 45.0
+        assert items["C002"]["subtotal"] == 0.0
+        assert cart.line_discount == 3 * 500 + 1000
+
+    def test_large_cart_keeps_running_totals(self):
+        cart = Cart()
+        for i in range(500):
+            cart.add(f"B{i:04d}", f"Item {i}", 1.01, 3)
+        for i in range(0, 500, 2):
+            cart.remove(f"B{i:04d}")
+        assert len(cart) == 250
+        assert cart.gross == 250 * 3 * 101
+
+
+class TestCartBilling:
+    def test_add_item_to_bill_with_cart(self):
+        service = BillingService()
+        cart = Cart()
+        medicine = {"barcode": "C001", "name": "Aspirin", "price": 10, "quantity": 5}
+        assert service.add_item_to_bill(cart, medicine, 3) is True
+        assert service.add_item_to_bill(cart, medicine, 3) is False
+        assert cart.get("C001").quantity == 3
+
+    def test_commit_bill_decrements_stock_atomically(self):
+        add_medicine("C001", "Aspirin", 5, "2030-01-01", "Pharma", 10)
+        items = [{"barcode": "C001", "name": "Aspirin", "price": 10, "quantity": 8, "subtotal": 80}]
+        ok, bill_id = commit_bill("2024-01-01 10:00:00", 80, items)
+        assert ok
+        assert get_medicine_by_barcode("C001").quantity == 0
+        bills = get_all_bills()
+        assert bills[0].id == bill_id
+        assert len(bills[0].items) == 1
+
+    def test_finalize_bill_accepts_cart(self):
+        add_medicine("C001", "Aspirin", 10, "2030-01-01", "Pharma", 20)
+        cart = Cart()
+        cart.add("C001", "Aspirin", 20, 2)
+        result = BillingService().finalize_bill(cart, {"name": "Test Customer"}, 0, 0)
+        assert result["success"]
+        assert result["totals"]["total"] == 40.0
+        assert get_medicine_by_barcode("C001").quantity == 8
+
+
+class TestBillingUiCart:
+    def test_table_edits_update_cart_incrementally(self, qapp):
+        ui = BillingUi(Mock())
+        for row, (barcode, qty, price) in enumerate([("C001", "2", "10"), ("C002", "1", "5.5")]):
+            ui.billing_table.insertRow(row)
+            for col, value in enumerate([barcode, "Item", qty, price, "0", "0"]):
+                ui.billing_table.setItem(row, col, QTableWidgetItem(value))
+        assert ui.cart.gross == 2550
+        ui.billing_table.item(0, 2).setText("4")
+        assert ui.cart.get("C001").quantity == 4
+        ui.billing_table.removeRow(1)
+        assert "C002" not in ui.cart
+        assert "₹40.00" in ui.total_label.text()
+
+    def test_add_medicine_to_bill_merges_rows(self, qapp):
+        ui = BillingUi(Mock())
+        medicine = {"barcode": "C001", "name": "Aspirin", "price": 12, "quantity": 10}
+        assert ui.add_medicine_to_bill(medicine, 2)
+        assert ui.add_medicine_to_bill(medicine, 3)
+        assert ui.billing_table.rowCount() == 1
+        assert ui.billing_table.item(0, 2).text() == "5"
+        assert "₹60.00" in ui.total_label.text()
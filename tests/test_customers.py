@@ -0,0 +1,98 @@
+import pytest
+
+import db
+from billing_service import BillingService
+from customer_service import CustomerService
+
+
+@pytest.fixture(autouse=True)
+def no_customers():
+    def clear():
+        db.clear_all_bills()
+        session = db.Session()
+        session.query(db.Customer).delete()
+        session.commit()
+        session.close()
+    clear()
+    yield
+    clear()
+
+
+def _sell(customer, quantity=1):
+    result = BillingService().finalize_bill([{"barcode": "C1", "name": "Med", "price": 10, "quantity": quantity}],
+                                            customer, 0, 0)
+    assert result["success"], result["error"]
+    return result["bill_id"]
+
+
+def test_checkout_saves_and_updates_customers_by_phone():
+    first = _sell({"name": "Asha Rao", "phone": "98765 43210", "email": "asha@example.com", "age": 40})
+    second = _sell({"name": "Asha R.", "phone": "9876543210", "address": "12 MG Road"}, quantity=2)
+    _sell({"name": "Walk-in", "phone": ""})  # No phone: nothing to key the customer on
+
+    [customer] = db.find_customers(phone_prefix="98765")
+    assert customer.phone == "9876543210" and customer.name == "Asha R."
+    assert (customer.email, customer.age, customer.address) == ("asha@example.com", 40, "12 MG Road")
+    history = CustomerService().get_history(customer.id)
+    assert [bill.id for bill in history] == [second, first]
+    assert history[0].items[0].quantity == 2
+    assert CustomerService().names_for_bills(history) == {first: "Asha R.", second: "Asha R."}
+
+
+def test_lookups_are_prefix_range_scans():
+    for phone, name in (("9000000001", "Ravi Kumar"), ("9000000002", "ravina 50%_off"), ("9100000000", "Meera")):
+        _sell({"name": name, "phone": phone})
+    service = CustomerService()
+    assert service.lookup_phone("90") == []  # Below the typeahead minimum
+    assert [c.name for c in service.lookup_phone("900")] == ["Ravi Kumar", "ravina 50%_off"]
+    assert [c.name for c in service.search("RAVI")] == ["Ravi Kumar", "ravina 50%_off"]
+    assert [c.name for c in service.search("ravina 50%_")] == ["ravina 50%_off"]
+    assert [c.name for c in service.search("ravina 50_")] == []
+    assert [c.phone for c in service.search("91")] == ["9100000000"]
+
+    session = db.Session()
+    try:
+        plans = [" ".join(str(col) for col in row) for sql in (
+            "SELECT * FROM customers WHERE phone >= '900' AND phone < '900:'",
+            "SELECT * FROM customers WHERE name LIKE 'rav%'",
+            "SELECT * FROM bills WHERE customer_id = 1 ORDER BY timestamp DESC",
+        ) for row in session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    finally:
+        session.close()
+    assert all("USING" in plan and "INDEX" in plan for plan in plans), plans
+
+
+def test_billing_ui_autofills_a_known_phone(qtbot):
+    from src.billing_ui import BillingUi
+    _sell({"name": "Repeat Customer", "phone": "9812345678", "email": "repeat@example.com", "age": 55,
+           "gender": "Female", "address": "Market Street"})
+    ui = BillingUi(None)
+    qtbot.addWidget(ui)
+    ui.customer_phone.setText("981234567")
+    ui._on_customer_phone_edited("981234567")
+    assert ui.customer_name.text() == ""
+    assert list(ui._customer_matches) == ["9812345678  Repeat Customer"]
+    ui._on_customer_phone_edited("9812345678")
+    assert (ui.customer_name.text(), ui.customer_email.text(), ui.customer_address.text()) == \
+        ("Repeat Customer", "repeat@example.com", "Market Street")
+    assert ui.customer_age.value() == 55 and ui.customer_gender.currentText() == "Female"
+
+
+def test_unset_age_and_gender_keep_the_saved_values(qtbot):
+    from src.billing_ui import BillingUi
+    _sell({"name": "Known Customer", "phone": "9811111111", "age": 61, "gender": "Female"})
+    ui = BillingUi(None)
+    qtbot.addWidget(ui)
+    ui.customer_name.setText("Known Customer")
+    ui.customer_phone.setText("9811111111")
+    details = ui.customer_details()
+    assert "age" not in details and "gender" not in details  # The form defaults were never touched
+    _sell(details)
+    [customer] = db.find_customers(phone_prefix="9811111111")
+    assert (customer.age, customer.gender) == (61, "Female")
+
+    ui.customer_age.setValue(62)
+    ui.customer_gender.setCurrentText("Other")
+    assert (ui.customer_details()["age"], ui.customer_details()["gender"]) == (62, "Other")
+    ui.clear_customer_fields()
+    assert "age" not in ui.customer_details() and "gender" not in ui.customer_details()
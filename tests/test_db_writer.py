@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+import src.db as db_module
+from src.db import (Medicine, Session, add_artifact, add_medicine_async, add_order, autosave_draft, clear_all_orders,
+                    clear_autosave_draft, clear_inventory, delete_order, get_medicine_by_barcode, get_order,
+                    mark_artifact_compressed, remove_draft, update_bill_file_path, update_medicine, update_order,
+                    update_order_file_path, update_order_status, upsert_draft)
+from src.db_writer import DbWriter, WriteSignals
+
+
+def _insert(session, barcode, quantity=1):
+    session.add(Medicine(barcode=barcode, name=f"Writer {barcode}", quantity=quantity, manufacturer="Acme"))
+    session.flush()
+    return barcode
+
+
+@pytest.fixture
+def writer():
+    clear_inventory()
+    writer = DbWriter(Session, name="test-db-writer")
+    yield writer
+    writer.stop()
+    clear_inventory()
+
+
+def _block(writer):
+    """Occupy the writer so the next jobs queue up behind it."""
+    started, release = threading.Event(), threading.Event()
+
+    def hold(session):
+        started.set()
+        release.wait(5)
+
+    writer.submit(hold)
+    started.wait(5)
+    return release
+
+
+def test_queued_writes_share_one_commit(writer):
+    release = _block(writer)
+    futures = [writer.submit(_insert, f"W{i}") for i in range(10)]
+    release.set()
+    assert [f.result(5) for f in futures] == [f"W{i}" for i in range(10)]
+    assert writer.stats["largest_batch"] == 10
+    assert writer.stats["commits"] == 2 and writer.stats["jobs"] == 11
+
+
+def test_failing_job_does_not_fail_the_batch(writer):
+    release = _block(writer)
+    ok = writer.submit(_insert, "W1")
+    duplicate = writer.submit(_insert, "W1")  # Violates the unique barcode
+    other = writer.submit(_insert, "W2")
+    release.set()
+    assert ok.result(5) == "W1" and other.result(5) == "W2"
+    with pytest.raises(Exception, match="UNIQUE"):
+        duplicate.result(5)
+    assert writer.stats["fallbacks"] == 1
+    assert get_medicine_by_barcode("W1") and get_medicine_by_barcode("W2")
+
+
+def test_nested_submit_joins_the_running_transaction(writer):
+    def outer(session):
+        _insert(session, "W1")
+        return writer.run(_insert, "W2")
+
+    assert writer.run(outer) == "W2"
+    assert writer.stats["commits"] == 1
+    assert get_medicine_by_barcode("W2") is not None
+
+
+def test_public_write_functions_go_through_the_writer():
+    clear_inventory()
+    future = add_medicine_async("W9", "Async Med", 5, "2030-01-01", "Acme", 10, 3)
+    assert future.result(5) == (True, None)
+    assert update_medicine("W9", "Async Med", 7, "2030-01-01", "Acme", 10, 3) == (True, None)
+    assert update_medicine("MISSING", "X", 1, None, "", 0, 1) == (False, "Medicine not found")
+    assert get_medicine_by_barcode("W9").quantity == 7
+    clear_inventory()
+
+
+def test_order_draft_and_artifact_writes_go_through_the_writer():
+    jobs = db_module.writer.stats["jobs"]
+    order_id = add_order("2025-01-01 10:00:00", "", [{"barcode": "W1", "name": "Med", "quantity": 1}])
+    update_order(order_id, "Acme", [{"barcode": "W1", "name": "Med", "quantity": 2, "order_quantity": 4}])
+    update_order_file_path(order_id, "order.pdf")
+    assert get_order(order_id).file_path == "order.pdf" and get_order(order_id).meds[0].order_quantity == 4
+    assert update_order_status(order_id, "completed")
+    with pytest.raises(Exception, match="Only pending orders can be deleted"):
+        delete_order(order_id)
+    draft_id = upsert_draft("Later", {"items": []})
+    autosave_draft({"items": []})
+    clear_autosave_draft()
+    assert remove_draft(draft_id)
+    mark_artifact_compressed(add_artifact("order", order_id, "order.pdf", 10, "00"), "order.pdf.gz", 5)
+    update_bill_file_path(-1, "missing.pdf")
+    assert db_module.writer.stats["jobs"] == jobs + 12
+    clear_all_orders()
+
+
+def test_write_signals_report_results(writer, qtbot):
+    signals = WriteSignals()
+    with qtbot.waitSignal(signals.succeeded, timeout=5000) as blocker:
+        signals.watch(writer.submit(_insert, "W3"))
+    assert blocker.args == ["W3"]
+    with qtbot.waitSignal(signals.failed, timeout=5000) as blocker:
+        signals.watch(writer.submit(_insert, "W3"))
+    assert "UNIQUE" in blocker.args[0]
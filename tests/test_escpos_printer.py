@@ -0,0 +1,106 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import db
+from billing_service import BillingService
+from event_bus import ReceiptReady, bus
+from receipt_manager import ReceiptManager
+from escpos_printer import FEED_AND_CUT, INIT, EscPosPrinter, render_receipt
+
+PHARMACY = SimpleNamespace(name="Corner Pharmacy", address="1 Main Road", phone="0801234567", gst_number="29ABCDE")
+
+
+@pytest.fixture
+def spool(tmp_path):
+    path = tmp_path / "receipts.prn"
+    config.set_printer_settings(enabled=True, device=str(path), columns=32, pdf_receipts=False)
+    db.clear_all_bills()
+    yield path
+    db.clear_all_bills()
+
+
+def test_receipt_layout_fits_the_paper():
+    items = [{"name": "Paracetamol 500mg Tablets Strip of 15", "quantity": 2, "price": 12.5, "subtotal": 25.0}]
+    data = render_receipt(7, datetime.datetime(2024, 5, 2, 10, 30), items,
+                          {"subtotal": 25.0, "discount_amount": 0, "tax_amount": 1.25, "total": 26.25},
+                          PHARMACY, {"name": "Asha", "phone": "9876543210"}, columns=32)
+    assert data.startswith(INIT) and data.endswith(FEED_AND_CUT)
+    text = data.decode("cp437")
+    assert "CORNER PHARMACY" in text and "GSTIN: 29ABCDE" in text and "Customer: Asha (9876543210)" in text
+    assert "Bill #7" in text and "2024-05-02 10:30" in text and "Discount" not in text
+    printable = [line.split("\x1b")[0] for line in text.split("\n")[1:-1]]
+    assert max(len(line) for line in printable) <= 32
+    assert "TOTAL" in text and text.count("Rs.26.25") == 1
+    assert not render_receipt(1, "2024-05-02", [], {}, cut=False).endswith(FEED_AND_CUT)
+
+
+def test_finalize_prints_to_the_spool_and_reprints(spool):
+    service = BillingService()
+    result = service.finalize_bill([{"barcode": "P1", "name": "Printed", "price": 10, "quantity": 3}],
+                                   {"name": "Spool Customer"}, 0, 0, PHARMACY)
+    assert result["success"], result["error"]
+    assert result["print_result"][0] and result["pdf_path"] is None and result["send_results"] is None
+    first = spool.read_bytes()
+    assert f"Bill #{result['bill_id']}".encode() in first and b"Rs.30.00" in first
+    assert service.wait_for_receipts(timeout=60)
+    assert service.reprint_last_receipt()[0]
+    assert spool.read_bytes() == first * 2
+
+    assert EscPosPrinter(str(spool.parent / "missing" / "lp0")).send(first)[0] is False
+    config.set_printer_settings(enabled=False)
+    assert service.reprint_last_receipt() == (False, "No receipt printer configured.")
+
+
+@pytest.fixture
+def ready():
+    events = []
+    bus.subscribe(ReceiptReady, events.append)
+    yield events
+    bus.unsubscribe(ReceiptReady, events.append)
+
+
+def test_pdf_is_rendered_in_the_background(spool, ready):
+    config.set_printer_settings(pdf_receipts=True)
+    service = BillingService()
+    bill_ids = []
+    for barcode in ("P2", "P3"):
+        result = service.finalize_bill([{"barcode": barcode, "name": "Background", "price": 5, "quantity": 1}],
+                                       {"name": "Background Customer"}, 0, 0, PHARMACY)
+        assert result["success"] and result["print_result"][0]
+        bill_ids.append(result["bill_id"])
+    assert service.wait_for_receipts(timeout=60)
+    bills = {bill.id: bill for bill in db.get_bills_by_ids(bill_ids)}
+    assert [event.bill_id for event in ready] == bill_ids
+    assert all(event.pdf_path == bills[event.bill_id].file_path and event.pdf_path.endswith(".pdf") for event in ready)
+
+
+def test_receipt_is_delivered_without_pdf(spool, ready, monkeypatch):
+    delivered = []
+    monkeypatch.setattr(ReceiptManager, "send_receipt_to_customer",
+                        lambda self, customer, *args: delivered.append(customer["name"]) or [("Email", True, "sent")])
+    service = BillingService()
+    result = service.finalize_bill([{"barcode": "P4", "name": "Emailed", "price": 5, "quantity": 1}],
+                                   {"name": "Email Customer", "email": "a@example.com"}, 0, 0, PHARMACY)
+    assert result["success"] and service.wait_for_receipts(timeout=60)
+    assert delivered == ["Email Customer"]
+    assert ready == [ReceiptReady(result["bill_id"], None, [("Email", True, "sent")])]
+    assert not db.get_bills_by_ids([result["bill_id"]])[0].file_path
+
+
+def test_without_a_printer_the_pdf_is_rendered_in_the_background(ready, monkeypatch):
+    config.set_printer_settings(enabled=False, pdf_receipts=False)  # The PDF is the receipt, so it is always made
+    monkeypatch.setattr(ReceiptManager, "send_receipt_to_customer", lambda self, *args: [])
+    db.clear_all_bills()
+    service = BillingService()
+    result = service.finalize_bill([{"barcode": "P5", "name": "Counter", "price": 5, "quantity": 1}],
+                                   {"name": "Counter Customer"}, 0, 0, PHARMACY)
+    assert result["success"] and result["print_result"] is None
+    assert result["pdf_path"] is None and result["send_results"] is None
+    assert service.wait_for_receipts(timeout=60)
+    (event,) = ready
+    assert event.bill_id == result["bill_id"] and event.pdf_path.endswith(".pdf")
+    assert db.get_bills_by_ids([result["bill_id"]])[0].file_path == event.pdf_path
+    db.clear_all_bills()
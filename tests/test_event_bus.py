@@ -0,0 +1,88 @@
+import gc
+from unittest.mock import Mock
+
+import pytest
+
+import db
+from event_bus import BillCreated, EventBus, MedicineChanged, QtEventRelay, StockAdjusted, bus
+
+
+@pytest.fixture
+def received():
+    events = []
+    for event_type in (MedicineChanged, StockAdjusted, BillCreated):
+        bus.subscribe(event_type, events.append)
+    db.clear_inventory()
+    events.clear()
+    yield events
+    for event_type in (MedicineChanged, StockAdjusted, BillCreated):
+        bus.unsubscribe(event_type, events.append)
+    db.clear_inventory()
+
+
+def test_writes_publish_typed_events_after_commit(received):
+    db.add_medicine("E1", "Event Med", 10, None, "Acme", 10, 5)
+    db.add_medicine("E1", "Event Med", 5, None, "Acme", 10, 5)
+    ok, bill_id = db.commit_bill("2025-01-01 10:00:00", 20, [{"barcode": "E1", "name": "Event Med", "price": 10,
+                                                              "quantity": 2, "subtotal": 20}])
+    db.delete_medicine("E1")
+    db.update_medicine_quantity("MISSING", 3)  # Failed writes publish nothing
+    db.clear_inventory()
+    assert received == [
+        MedicineChanged(("E1",)),
+        StockAdjusted(("E1",), "receipt"),
+        StockAdjusted(("E1",), "sale"),
+        BillCreated(bill_id, "2025-01-01 10:00:00", 20),
+        MedicineChanged(("E1",), deleted=True),
+        MedicineChanged(None, deleted=True),
+    ]
+
+
+def test_bound_subscribers_are_held_weakly():
+    event_bus = EventBus()
+    subscriber = Mock()
+
+    class Screen:
+        def on_event(self, event):
+            subscriber(event)
+
+    screen = Screen()
+    event_bus.subscribe(MedicineChanged, screen.on_event)
+    event_bus.publish(MedicineChanged(("A",)))
+    del screen
+    gc.collect()
+    event_bus.publish(MedicineChanged(("B",)))
+    subscriber.assert_called_once_with(MedicineChanged(("A",)))
+    assert event_bus._subscribers[MedicineChanged] == []
+
+
+def test_relay_coalesces_bursts_into_one_batch(qtbot):
+    event_bus = EventBus()
+    batches = []
+    relay = QtEventRelay(batches.append, (StockAdjusted,), coalesce_ms=20, event_bus=event_bus)
+    for barcode in "ABC":
+        event_bus.publish(StockAdjusted((barcode,), "sale"))
+    qtbot.waitUntil(lambda: bool(batches), timeout=1000)
+    qtbot.wait(50)
+    assert batches == [[StockAdjusted((b,), "sale") for b in "ABC"]]
+    relay.deleteLater()
+
+
+def test_inventory_table_patches_changed_rows(qtbot, received):
+    from src.inventory_ui import InventoryUi
+    db.add_medicine("E1", "Event Med", 10, None, "Acme", 10, 5)
+    ui = InventoryUi(Mock())
+    qtbot.addWidget(ui)
+    ui.refresh_inventory_table()
+    ui.refresh_inventory_table = Mock()  # A patch must not fall back to a full reload
+
+    def rows():
+        table = ui.inventory_table
+        return {table.item(r, 0).text(): table.item(r, 2).text() for r in range(table.rowCount())}
+
+    db.update_medicine_quantity("E1", 3)
+    db.add_medicine("E2", "Second Med", 7, None, "Acme", 10, 5)
+    qtbot.waitUntil(lambda: rows() == {"E1": "3", "E2": "7"}, timeout=2000)
+    db.delete_medicine("E1")
+    qtbot.waitUntil(lambda: rows() == {"E2": "7"}, timeout=2000)
+    ui.refresh_inventory_table.assert_not_called()
@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+import db
+from inventory_columns import InventoryColumns
+
+TODAY = datetime.date.today()
+
+
+@pytest.fixture
+def columns():
+    db.clear_inventory()
+    db.add_medicine("C1", "Plenty", 50, TODAY + datetime.timedelta(days=365), "Acme", 10, 10)
+    db.add_medicine("C2", "Running Low", 3, TODAY + datetime.timedelta(days=365), "acme ", 20, 10)
+    db.add_medicine("C3", "Expired", 0, TODAY - datetime.timedelta(days=1), "Zeta", 5, 10)
+    db.add_medicine("C4", "Expiring", 20, TODAY + datetime.timedelta(days=10), None, 2.5, 10)
+    store = InventoryColumns()
+    yield store
+    store.close()
+    db.clear_inventory()
+
+
+def test_masks_match_inventory_filter_semantics(columns):
+    assert columns.select(stock="low") == {"C2"}
+    assert columns.select(stock="out") == {"C3"}
+    assert columns.select(stock="in") == {"C1", "C2", "C4"}
+    assert columns.select(expiry="expired") == {"C3"}
+    assert columns.select(expiry="expiring") == {"C4"}
+    assert columns.select(stock="in", expiry="valid") == {"C1", "C2", "C4"}
+    assert columns.select(manufacturer="ACME") == {"C1", "C2"}
+    assert columns.low_stock_barcodes() == ["C2", "C3"]
+    with pytest.raises(ValueError):
+        columns.mask(stock="plenty")
+
+
+def test_kpis_are_computed_from_columns(columns):
+    assert columns.stock_value() == pytest.approx(50 * 10 + 3 * 20 + 20 * 2.5)
+    assert columns.stock_value(columns.mask(manufacturer="zeta")) == 0
+    assert columns.manufacturer_counts() == {"Acme": 1, "acme ": 1, "Zeta": 1}
+    assert columns.manufacturers() == ["Acme", "Zeta", "acme "]
+    assert columns.status_counts() == {"total": 4, "low": 1, "out": 1, "in": 3,
+                                       "expired": 1, "expiring": 1, "valid": 3}
+
+
+def test_writes_patch_rows_incrementally(columns, monkeypatch):
+    len(columns)
+    db.update_medicine_quantity("C1", 5)
+    db.add_medicine("C5", "New", 7, None, "Nova", 1, 10)
+    db.delete_medicine("C3")
+
+    monkeypatch.setattr(db, "get_all_medicines", lambda: pytest.fail("incremental changes must not reload"))
+    assert columns.select(stock="low") == {"C1", "C2", "C5"}
+    assert columns.select(stock="out") == set()
+    assert columns.manufacturers() == ["Acme", "Nova", "acme "]
+    assert len(columns) == 4 and columns._size == 5  # One tombstone is below the compaction ratio
+
+    db.delete_medicine("C5")
+    assert len(columns) == 3 and columns._size == 3
+    assert columns.select(manufacturer="nova") == set() and columns.select(stock="low") == {"C1", "C2"}
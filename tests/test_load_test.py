@@ -0,0 +1,41 @@
+import logging
+
+import pytest
+
+import artifact_store
+from benchmarks import load_test
+from src.db import Bill, Medicine, Session
+
+
+@pytest.fixture
+def quiet_till(monkeypatch, tmp_path):
+    monkeypatch.setattr(artifact_store, "ARTIFACT_ROOT", str(tmp_path))
+    yield
+    logging.disable(logging.NOTSET)  # run_till silences logging for the run
+
+
+def _stock_and_bills():
+    session = Session()
+    try:
+        return dict(session.query(Medicine.barcode, Medicine.quantity).all()), session.query(Bill).count()
+    finally:
+        session.close()
+
+
+def test_till_sales_keep_stock_consistent(sample_inventory, quiet_till):
+    before, bills_before = _stock_and_bills()
+    barcodes = sorted(b for b, q in before.items() if q > 0)
+
+    result = load_test.run_till(0, 0.3, "stress", 1, barcodes)
+
+    assert result["sales"] > 0 and result["failed"] == 0
+    assert len(result["sale_ms"]) == result["sales"] and result["lookup_ms"]
+    assert load_test.check_consistency(before, result["sold"], bills_before, result["sales"]) == []
+
+
+def test_consistency_check_reports_lost_stock_updates_and_bills(sample_inventory):
+    before, bills_before = _stock_and_bills()
+    sold = {"SAMP001": 3}  # Recorded as sold but never written
+    violations = load_test.check_consistency(before, sold, bills_before, 1)
+    assert any(v.startswith("SAMP001: stock 10 - sold 3 = 7, found 10") for v in violations)
+    assert any(v.startswith("bills: 1 sales recorded but 0 bills written") for v in violations)
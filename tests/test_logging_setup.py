@@ -0,0 +1,88 @@
+import logging
+import queue
+
+from src.logging_setup import (
+    HotPathFilter,
+    LazyQueueHandler,
+    StructuredFormatter,
+    add_log_handler,
+    configure_logging,
+    shutdown_logging,
+)
+
+
+def _record(name="medibit.billing", level=logging.INFO, msg="event", args=()):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_sampling_keeps_one_in_n_and_reports_drops():
+    hot = HotPathFilter({"medibit.inventory.worker": {"sample": 3}})
+    records = [_record("medibit.inventory.worker") for _ in range(7)]
+    kept = [r for r in records if hot.filter(r)]
+    assert kept == [records[0], records[3], records[6]]
+    assert getattr(kept[1], "suppressed") == 2
+    # Other loggers and warnings are never dropped
+    assert hot.filter(_record("medibit.db"))
+    assert all(hot.filter(_record("medibit.inventory.worker", logging.WARNING)) for _ in range(5))
+
+
+def test_rate_limit_applies_to_child_loggers():
+    hot = HotPathFilter({"medibit.billing": {"rate": 0.001, "burst": 2}})
+    results = [hot.filter(_record("medibit.billing.checkout")) for _ in range(5)]
+    assert results == [True, True, False, False, False]
+
+
+def test_queue_handler_defers_formatting_of_immutable_args():
+    handler = LazyQueueHandler(queue.SimpleQueue())
+    lazy = handler.prepare(_record(msg="bill %s total %.2f", args=(7, 12.5)))
+    assert lazy.args == (7, 12.5)
+    items = [{"barcode": "B1"}]
+    eager = handler.prepare(_record(msg="items %s", args=(items,)))
+    items.append({"barcode": "B2"})
+    assert eager.args is None and eager.getMessage() == "items [{'barcode': 'B1'}]"
+
+
+def test_structured_formatter_appends_extra_fields():
+    record = _record(msg="Bill saved")
+    record.bill_id = 12
+    record.pdf_path = "receipts/a b.pdf"
+    text = StructuredFormatter("%(name)s: %(message)s").format(record)
+    assert text == "medibit.billing: Bill saved bill_id=12 pdf_path='receipts/a b.pdf'"
+
+
+def test_configure_logging_writes_through_listener(tmp_path):
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    try:
+        configure_logging(str(tmp_path), console=False)
+        assert configure_logging(str(tmp_path)) is configure_logging()
+        logging.getLogger("medibit.test").info("queued %s", "message", extra={"bill_id": 3})
+        shutdown_logging()
+        (log_file,) = tmp_path.glob("medibit_app_*.log")
+        assert "medibit.test: queued message bill_id=3" in log_file.read_text(encoding="utf-8")
+    finally:
+        shutdown_logging()
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
+
+
+def test_extra_log_files_are_written_by_the_listener(tmp_path):
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    slow = logging.getLogger("medibit.sql.slow")
+    try:
+        configure_logging(str(tmp_path), console=False)
+        path = str(tmp_path / "slow_queries.log")
+        assert add_log_handler(logging.FileHandler(path, delay=True), "medibit.sql.slow")
+        assert not add_log_handler(logging.FileHandler(path, delay=True), "medibit.sql.slow")
+        assert slow.handlers == []  # Nothing is written on the calling thread
+        slow.warning("slow statement")
+        logging.getLogger("medibit.test").warning("other")
+        shutdown_logging()
+        assert (tmp_path / "slow_queries.log").read_text(encoding="utf-8") == "slow statement\n"
+    finally:
+        shutdown_logging()
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
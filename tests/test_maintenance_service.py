@@ -0,0 +1,90 @@
+import datetime
+import sqlite3
+
+import pytest
+from PyQt5.QtCore import QEvent, Qt
+from PyQt5.QtGui import QKeyEvent
+from sqlalchemy import create_engine
+
+import config
+from maintenance_service import IdleMonitor, MaintenanceService
+from src.db import Base
+
+
+def _make_db(path, auto_vacuum):
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA auto_vacuum={auto_vacuum}")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO medicines (barcode, name, quantity, manufacturer) VALUES (?, ?, ?, ?)",
+                     [(f"B{i}", f"Medicine {i}", i, "x" * 200) for i in range(5000)])
+    conn.commit()
+    conn.execute("DELETE FROM medicines")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CONFIG_FILE", str(tmp_path / "config.json"))
+
+
+def test_run_reclaims_space_and_records_report(tmp_path, settings):
+    path = str(tmp_path / "live.db")
+    _make_db(path, "INCREMENTAL")
+    service = MaintenanceService(db_path=path, vacuum_step_pages=16)
+    ok, report = service.run(now=datetime.datetime(2025, 1, 1, 3, 0))
+    assert ok
+    assert report["vacuum"] == "incremental" and report["freed_pages"] > 100
+    assert report["reclaimed_bytes"] > 0 and report["size_after"] < report["size_before"]
+    assert report["statistics"] == "analyze" and report["quick_check"] == "ok"
+    assert service.free_ratio() == 0
+    saved = config.get_maintenance_settings()
+    assert saved["last_run"] == "2025-01-01T03:00:00" and saved["last_result"]["duration_ms"] >= 0
+
+    # Statistics exist now, so later runs only refresh stale ones
+    assert service.run()[1]["statistics"] == "optimize"
+
+
+def test_first_run_converts_database_to_incremental_vacuum(tmp_path, settings):
+    path = str(tmp_path / "legacy.db")
+    _make_db(path, "NONE")
+    ok, report = MaintenanceService(db_path=path).run()
+    assert ok and report["vacuum"] == "full" and report["reclaimed_bytes"] > 0
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.close()
+
+
+def test_run_stops_when_user_returns(tmp_path, settings):
+    path = str(tmp_path / "live.db")
+    _make_db(path, "INCREMENTAL")
+    ok, report = MaintenanceService(db_path=path).run(should_stop=lambda: True)
+    assert ok and report["interrupted"] and report["statistics"] is None
+    # An interrupted run is retried at the next idle period
+    assert config.get_maintenance_settings()["last_run"] is None
+
+
+def test_due_by_interval_or_free_space(tmp_path, settings):
+    path = str(tmp_path / "live.db")
+    _make_db(path, "INCREMENTAL")
+    service = MaintenanceService(db_path=path)
+    assert service.is_maintenance_due()
+    service.run()
+    now = datetime.datetime.now()
+    assert not service.is_maintenance_due(now)
+    assert service.is_maintenance_due(now + datetime.timedelta(hours=25))
+    config.set_maintenance_settings(enabled=False)
+    assert not service.is_maintenance_due(now + datetime.timedelta(days=30))
+
+
+def test_idle_monitor_resets_on_input(qtbot):
+    monitor = IdleMonitor()
+    monitor.last_activity -= 600
+    assert monitor.idle_seconds() >= 600
+    monitor.eventFilter(None, QEvent(QEvent.Paint))
+    assert monitor.idle_seconds() >= 600
+    monitor.eventFilter(None, QKeyEvent(QEvent.KeyPress, Qt.Key_A, Qt.NoModifier))
+    assert monitor.idle_seconds() < 1
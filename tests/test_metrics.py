@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+# Plain import: services and db.py record into this module's registry
+import metrics
+from src.db import get_all_medicines
+
+
+def test_timed_records_counts_errors_and_percentiles():
+    registry = metrics.MetricsRegistry()
+
+    @registry.timed("demo.work")
+    def work(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return 42
+
+    assert work() == 42
+    with pytest.raises(ValueError):
+        work(fail=True)
+    for seconds in [0.001 * i for i in range(1, 101)]:
+        registry.observe("demo.latency", seconds)
+
+    snapshot = registry.snapshot()
+    assert snapshot["demo.work"]["count"] == 2 and snapshot["demo.work"]["errors"] == 1
+    latency = snapshot["demo.latency"]
+    assert latency["p50_ms"] == pytest.approx(51, abs=1)
+    assert latency["p95_ms"] == pytest.approx(95, abs=1)
+    assert latency["max_ms"] == pytest.approx(100)
+    # Slowest operations come first
+    assert list(snapshot)[0] == "demo.latency"
+
+
+def test_instrumented_class_and_context_manager():
+    registry_before = metrics.registry.snapshot().get("demo_service.total", {}).get("count", 0)
+
+    @metrics.instrumented("demo_service")
+    class DemoService:
+        def total(self, values):
+            return sum(values)
+
+        @staticmethod
+        def double(value):
+            return value * 2
+
+    assert DemoService().total([1, 2]) == 3 and DemoService.double(4) == 8
+    with metrics.track("demo_service.block"):
+        pass
+    snapshot = metrics.registry.snapshot()
+    assert snapshot["demo_service.total"]["count"] == registry_before + 1
+    assert {"demo_service.double", "demo_service.block"} <= set(snapshot)
+
+
+def test_db_functions_are_instrumented():
+    get_all_medicines()
+    assert metrics.registry.snapshot()["db.get_all_medicines"]["count"] >= 1
+
+
+def test_export_json_and_prometheus(tmp_path):
+    registry = metrics.MetricsRegistry()
+    registry.observe("billing.finalize_bill", 0.003)
+    registry.observe("billing.finalize_bill", 0.2, error=True)
+
+    data = json.loads(open(registry.export(str(tmp_path / "m.json")), encoding="utf-8").read())
+    assert data["operations"]["billing.finalize_bill"]["count"] == 2
+
+    text = open(registry.export(str(tmp_path / "m.prom")), encoding="utf-8").read()
+    assert 'medibit_operation_duration_seconds_bucket{operation="billing.finalize_bill",le="0.005"} 1' in text
+    assert 'medibit_operation_duration_seconds_bucket{operation="billing.finalize_bill",le="+Inf"} 2' in text
+    assert 'medibit_operation_errors_total{operation="billing.finalize_bill"} 1' in text
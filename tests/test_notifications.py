@@ -132,3 +132,38 @@ def test_notification_settings_dialog_ui_feedback(qtbot, monkeypatch):
     qtbot.mouseClick(dialog.test_btn, Qt.LeftButton)
     qtbot.wait(100)
     assert 'failed' in dialog.status_label.text().lower()
+
+@patch('smtplib.SMTP')
+@patch('requests.post')
+def test_alert_digest_sends_one_message_per_channel(mock_post, mock_smtp, notif_manager):
+    mock_post.return_value.status_code = 201
+    class DummyMed:
+        def __init__(self, barcode, quantity, expiry=None):
+            self.name, self.barcode, self.quantity, self.expiry = f"Med {barcode}", barcode, quantity, expiry
+    sections = [("Out of stock", [DummyMed("1", 0)]), ("Low stock", []),
+                ("Expiring soon", [DummyMed("2", 9, "2030-01-01"), DummyMed("3", 4, "2030-01-02")])]
+    results = notif_manager.send_alert_digest(sections)
+    assert [(channel, success) for channel, success, _ in results] == [("Email", True), ("WhatsApp", True), ("SMS", True)]
+    assert mock_smtp.return_value.send_message.call_count == 1
+    whatsapp_body = mock_post.call_args_list[0].kwargs["data"]["Body"]
+    assert "Expiring soon (2)" in whatsapp_body and "expires 2030-01-02" in whatsapp_body and "Low stock" not in whatsapp_body
+    assert mock_post.call_args_list[1].kwargs["data"]["Body"] == "medibit alerts: Out of stock 1, Expiring soon 2"
+    assert all(call.kwargs["timeout"] for call in mock_post.call_args_list)
+
+
+@patch('smtplib.SMTP')
+@patch('requests.post')
+def test_alerts_and_summaries_share_the_senders(mock_post, mock_smtp, notif_manager):
+    mock_post.return_value.status_code = 200
+    class DummyMed:
+        name, barcode, quantity, manufacturer = "Med 1", "1", 2, None
+    assert notif_manager.send_whatsapp_alert([DummyMed()]) == (True, "WhatsApp alert sent to 1 recipients")
+    assert notif_manager.send_sms_alert([DummyMed()] * 4)[0]
+    assert "...and 1 more items" in mock_post.call_args.kwargs["data"]["Body"]
+    summary = {"total": 30.0, "count": 1, "avg": 30.0}
+    ok, msg = notif_manager.send_daily_sales_summary_email(summary, [{"time": "10:30", "total": 30.0}])
+    assert ok and msg.startswith("Daily sales summary email sent")
+    assert mock_smtp.call_args.kwargs["timeout"] and mock_smtp.return_value.send_message.call_count == 1
+    mock_post.return_value.status_code = 500
+    assert notif_manager.send_daily_sales_summary_whatsapp(summary, []) == \
+        (False, "WhatsApp daily sales summary failed for all recipients")
@@ -0,0 +1,46 @@
+import datetime
+import io
+
+import pdf_templates
+from src.order_manager import OrderManager
+from src.receipt_manager import ReceiptManager
+
+
+class Pharmacy:
+    name = "Template Pharmacy"
+    address = "1 Test Street"
+    phone = "1234567890"
+    email = "t@example.com"
+    gst_number = ""
+    license_number = "LIC-1"
+    website = ""
+
+
+def test_styles_are_built_once_until_invalidated():
+    styles = pdf_templates.get_styles()
+    assert pdf_templates.get_styles() is styles
+    pdf_templates.invalidate()
+    assert pdf_templates.get_styles() is not styles
+
+
+def test_receipt_header_is_cached_per_pharmacy():
+    pdf_templates.invalidate()
+    first = pdf_templates.receipt_header(Pharmacy())
+    second = pdf_templates.receipt_header(Pharmacy())
+    # Callers get their own flowables but share the parsed paragraph text
+    assert first[0] is not second[0]
+    assert first[0].frags is second[0].frags
+
+
+def test_render_receipt_and_order_to_memory():
+    items = [{"barcode": "B1", "name": "Aspirin", "price": 10.0, "quantity": 2, "subtotal": 20.0}]
+    buffer = io.BytesIO()
+    ReceiptManager().render_pdf_receipt(
+        buffer, {"name": "Customer"}, items, 2000, datetime.datetime(2024, 1, 1), "1", Pharmacy()
+    )
+    assert buffer.getvalue().startswith(b"%PDF")
+
+    order_items = [{"barcode": "B1", "name": "Aspirin", "quantity": 1, "order_quantity": 5}]
+    buffer = io.BytesIO()
+    OrderManager().render_pdf_order(buffer, order_items, "7", "2024-01-01 10:00:00", pharmacy_details=Pharmacy())
+    assert buffer.getvalue().startswith(b"%PDF")
@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+
+# Plain imports: db.py installs the monitor from these modules on its engine
+from order_service import OrderService
+from query_monitor import QueryBudgetExceeded, monitor
+from src.db import (BillRow, MedicineRow, add_bill, add_medicine, add_order, clear_all_bills, clear_all_orders,
+                    clear_inventory, get_all_bills, get_all_medicines, get_all_orders, get_bills_between, get_order,
+                    update_medicine_quantity)
+
+
+@pytest.fixture
+def orders():
+    clear_all_orders()
+    ids = [
+        add_order(f"2024-05-0{i} 10:00:00", "", [
+            {"barcode": f"Q{i}{j}", "name": f"Med {j}", "quantity": 1, "expiry": "2030-01-01",
+             "manufacturer": "Acme", "order_quantity": 5}
+            for j in range(3)
+        ])
+        for i in range(1, 6)
+    ]
+    yield ids
+    clear_all_orders()
+
+
+def test_get_all_orders_has_no_n_plus_one(orders):
+    with monitor.query_budget(2, "get_all_orders"):
+        result = get_all_orders()
+    assert len(result) == 5 and all(len(order.meds) == 3 for order in result)
+    with monitor.query_budget(2, "get_order"):
+        assert len(get_order(orders[0]).meds) == 3
+
+
+def test_list_reads_return_plain_rows_in_fixed_query_counts():
+    clear_inventory()
+    clear_all_bills()
+    for day in range(1, 4):
+        add_bill(f"2024-06-0{day} 10:00:00", 30, [
+            {"barcode": "R1", "name": "Row Med", "price": 10, "quantity": 1, "subtotal": 10} for _ in range(3)
+        ])
+    add_medicine("R1", "Row Med", 5, "2030-01-31", "Acme", 10, 2)
+    with monitor.query_budget(1, "get_all_medicines"):
+        medicines = get_all_medicines()
+    assert medicines == [MedicineRow(medicines[0].id, "R1", "Row Med", 5, datetime.date(2030, 1, 31), "Acme", 10, 2)]
+    with pytest.raises(AttributeError):
+        medicines[0].quantity = 1
+    with monitor.query_budget(2, "get_all_bills"):
+        bills = get_all_bills(limit=2)
+    assert [b.timestamp for b in bills] == ["2024-06-03 10:00:00", "2024-06-02 10:00:00"]
+    assert isinstance(bills[0], BillRow) and [item.quantity for item in bills[0].items] == [1, 1, 1]
+    with monitor.query_budget(3, "get_bills_between"):  # Plus the archive watermark lookup
+        assert len(get_bills_between("2024-06-02", "2024-06-03")) == 2
+    clear_inventory()
+    clear_all_bills()
+
+
+def test_budget_failure_lists_statements():
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with monitor.query_budget(1, "two reads"):
+            get_all_medicines()
+            get_all_medicines()
+    assert "two reads issued 2 queries (budget 1)" in str(excinfo.value)
+    assert "FROM medicines" in str(excinfo.value)
+
+
+def test_budgets_count_writes_run_on_the_writer_thread():
+    clear_inventory()
+    with monitor.query_budget(10, "add_medicine") as scope:
+        add_medicine("W1", "Written Med", 5, None, "Acme", 10, 2)
+    assert any(s.lstrip().startswith("INSERT INTO medicines") for s in scope.statements)
+    with pytest.raises(QueryBudgetExceeded, match="UPDATE medicines"):
+        with monitor.query_budget(0, "update_medicine_quantity"):
+            update_medicine_quantity("W1", 3)
+    clear_inventory()
+
+
+def test_service_calls_are_counted(orders):
+    OrderService().get_all()
+    stats = monitor.snapshot()["orders.get_all"]
+    assert stats["calls"] >= 1 and stats["max"] >= 2
+
+
+def test_slow_queries_capture_parameters_and_plan(orders):
+    threshold = monitor.slow_threshold_ms
+    monitor.slow_threshold_ms = 0
+    try:
+        monitor.slow_queries.clear()
+        get_order(orders[0])
+    finally:
+        monitor.slow_threshold_ms = threshold
+    entry = monitor.slow_queries[0]
+    assert "FROM orders" in entry["statement"]
+    assert str(orders[0]) in entry["parameters"]
+    assert entry["plan"] and any("orders" in line for line in entry["plan"])
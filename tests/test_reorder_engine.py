@@ -0,0 +1,78 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from reorder_engine import ReorderEngine
+from src.db import add_bill, add_medicine, clear_all_bills, clear_inventory
+from src.order_service import OrderService
+
+TODAY = datetime.date(2025, 3, 1)
+
+
+def _sell(barcode, quantity, day):
+    add_bill(f"{day} 10:00:00", 10 * quantity,
+             [{"barcode": barcode, "name": "Reorder Med", "price": 10, "quantity": quantity, "subtotal": 10 * quantity}])
+
+
+@pytest.fixture
+def catalog():
+    clear_inventory()
+    clear_all_bills()
+    for offset in range(1, 31):
+        day = TODAY - datetime.timedelta(days=offset)
+        _sell("R1", 4, day)
+        _sell("R3", 1, day)
+    _sell("GONE", 3, TODAY - datetime.timedelta(days=1))  # No longer in the catalog
+    _sell("R1", 100, TODAY)  # Today is not part of the history window
+    # Stock on hand is set after the history, since recording a sale decrements it
+    add_medicine("R1", "Steady Seller", 5, None, "Acme", 10, 10)  # Sells 4 a day
+    add_medicine("R2", "Never Sold", 2, None, "Acme", 10, 10)
+    add_medicine("R3", "Well Stocked", 500, None, "Acme", 10, 10)  # Sells 1 a day
+    yield
+    clear_inventory()
+    clear_all_bills()
+
+
+def test_demand_matrix_aggregates_history_per_sku_and_day(catalog):
+    engine = ReorderEngine(history_days=30)
+    matrix = engine.demand_matrix(np.array(["R1", "R2", "R3"]), TODAY)
+    assert matrix.shape == (3, 30)
+    assert matrix[0].tolist() == [4.0] * 30 and matrix[1].sum() == 0 and matrix[2].sum() == 30
+
+
+def test_forecast_suggests_quantities_for_the_whole_catalog(catalog):
+    result = ReorderEngine(method="sma", history_days=30, lead_time_days=7, review_days=14).forecast(TODAY)
+    by_barcode = {b: i for i, b in enumerate(result["barcode"])}
+    steady, never, stocked = by_barcode["R1"], by_barcode["R2"], by_barcode["R3"]
+    # Constant demand: no safety stock, cover 21 days of 4 a day minus the 5 on hand
+    assert result["daily_demand"][steady] == pytest.approx(4)
+    assert result["safety_stock"][steady] == pytest.approx(0)
+    assert result["suggested"][steady] == 21 * 4 - 5
+    assert result["needs_reorder"][steady]
+    # No sales history: top up to twice the threshold
+    assert result["suggested"][never] == 18 and result["needs_reorder"][never]
+    assert result["suggested"][stocked] == 0 and not result["needs_reorder"][stocked]
+
+
+def test_exponential_smoothing_weights_recent_days(catalog):
+    _sell("R3", 60, TODAY - datetime.timedelta(days=1))
+    sma = ReorderEngine(method="sma", history_days=30, sma_window_days=30).forecast(TODAY)
+    ema = ReorderEngine(method="ema", history_days=30, alpha=0.3).forecast(TODAY)
+    stocked = list(sma["barcode"]).index("R3")
+    assert ema["daily_demand"][stocked] > sma["daily_demand"][stocked] == pytest.approx(3)
+
+
+def test_suggest_quantities_and_order_service(catalog):
+    engine = ReorderEngine(history_days=30)
+    assert set(engine.suggest_quantities(today=TODAY)) == {"R1", "R2"}
+    assert engine.suggest_quantities(["R3", "MISSING"], today=TODAY) == {"R3": 1, "MISSING": 1}
+    # A few barcodes are forecast on their own, with the same numbers as the full catalog
+    full = engine.forecast(TODAY)
+    subset = engine.forecast(TODAY, ["R1", "MISSING"])
+    assert subset["barcode"].tolist() == ["R1"]
+    assert subset["suggested"][0] == full["suggested"][list(full["barcode"]).index("R1")]
+    with pytest.raises(ValueError):
+        ReorderEngine(method="arima")
+    service = OrderService()
+    assert set(service.suggest_order_quantities(["R1", "R2"])) == {"R1", "R2"}
@@ -0,0 +1,81 @@
+import csv
+import datetime
+import gzip
+import threading
+
+import pytest
+from openpyxl import load_workbook
+
+import db
+from archive_service import ArchiveService
+from sales_export import HEADERS, SalesExportService
+
+
+def _item(barcode, quantity, discount=0):
+    return {"barcode": barcode, "name": f"Med {barcode}", "price": 10, "quantity": quantity,
+            "subtotal": 10 * quantity - discount, "discount": discount}
+
+
+@pytest.fixture(autouse=True)
+def bills():
+    db.clear_all_bills()
+    db.add_bill("2024-03-01 10:00:00", 30, [_item("S1", 1), _item("S2", 2)])
+    db.add_bill("2024-03-02 11:00:00", 45, [_item("S3", 5, discount=5)])
+    db.add_bill("2024-04-01 09:00:00", 10, [_item("S1", 1)])
+    yield
+    db.clear_all_bills()
+
+
+def _read_csv(path, opener=open):
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_export_streams_every_line_in_range(tmp_path):
+    output = tmp_path / "sales.csv"
+    seen = []
+    ok, result = SalesExportService().export_lines("2024-03-01", "2024-03-31", str(output),
+                                                   progress=lambda done, total, msg: seen.append((done, total)))
+    assert ok, result
+    rows = _read_csv(output)
+    assert rows[0] == list(HEADERS)
+    assert [(r[1], r[2], r[4], r[6]) for r in rows[1:]] == [
+        ("2024-03-01 10:00:00", "S1", "1", "0"),
+        ("2024-03-01 10:00:00", "S2", "2", "0"),
+        ("2024-03-02 11:00:00", "S3", "5", "5"),
+    ]
+    assert seen[-1] == (3, 3)
+
+
+def test_gzip_and_xlsx_exports(tmp_path):
+    ok, result = SalesExportService().export_lines(None, None, str(tmp_path / "sales.csv.gz"))
+    assert ok, result
+    assert len(_read_csv(tmp_path / "sales.csv.gz", gzip.open)) == 5
+
+    ok, result = SalesExportService().export_lines(None, None, str(tmp_path / "sales.xlsx"))
+    assert ok, result
+    rows = list(load_workbook(tmp_path / "sales.xlsx", read_only=True).active.values)
+    assert rows[0] == HEADERS and rows[-1][2] == "S1" and len(rows) == 5
+
+
+def test_lines_come_in_batches_from_live_and_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "ARCHIVE_FILENAME", str(tmp_path / "archive.db"))
+    ArchiveService(db_path=db.DB_FILENAME, archive_path=db.ARCHIVE_FILENAME).archive(
+        older_than_days=10, now=datetime.datetime(2024, 4, 1, 12, 0))
+    assert db.get_archive_watermark("bills")
+    batches = list(db.iter_sales_lines(batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 1, 1]
+    assert [line[2] for batch in batches for line in batch] == ["S1", "S2", "S3", "S1"]
+    assert db.count_sales_lines() == 4
+
+
+def test_cancel_and_bad_input_leave_no_file(tmp_path):
+    cancel = threading.Event()
+    cancel.set()
+    output = tmp_path / "sales.csv"
+    assert SalesExportService().export_lines(None, None, str(output), cancel_event=cancel) == (False, "Cancelled")
+    assert not output.exists()
+    ok, result = SalesExportService().export_lines(None, None, str(tmp_path / "sales.pdf"))
+    assert not ok and "Unsupported" in result
+    ok, result = SalesExportService().export_lines("2030-01-01", "2030-01-31", str(output))
+    assert not ok and not output.exists()
@@ -0,0 +1,150 @@
+import datetime
+
+import pytest
+
+import src.db as db_module
+from src.db import (Session, StockMovement, StockSnapshot, add_bill, add_medicine, add_order, check_stock_ledger,
+                    clear_inventory, commit_bill, delete_medicine, get_latest_stock_snapshot, get_medicine_by_barcode,
+                    get_shrinkage, get_stock_movements, get_stock_on, get_stock_valuation, init_db,
+                    is_stock_snapshot_due, take_stock_snapshot, update_medicine, update_medicine_quantity,
+                    update_order_status)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Ledger clock: set clock.now to control movement and snapshot timestamps."""
+    class Clock:
+        now = "2025-01-01 09:00:00"
+    monkeypatch.setattr(db_module, "_now", lambda: Clock.now)
+    clear_inventory()
+    session = Session()
+    session.query(StockMovement).delete()
+    session.query(StockSnapshot).delete()
+    session.commit()
+    session.close()
+    yield Clock
+    clear_inventory()
+
+
+def _sell(barcode, quantity, price=10):
+    return commit_bill("2025-01-01 12:00:00", price * quantity,
+                       [{"barcode": barcode, "name": "Ledger Med", "price": price, "quantity": quantity,
+                         "subtotal": price * quantity}])
+
+
+def test_every_stock_change_writes_a_movement(clock):
+    add_medicine("L1", "Ledger Med", 10, "2030-01-01", "Acme", 10, 5)
+    add_medicine("L1", "Ledger Med", 5, "2030-01-01", "Acme", 10, 5)
+    ok, bill_id = _sell("L1", 4)
+    update_medicine_quantity("L1", 20, kind="receipt")
+    update_medicine("L1", "Ledger Med", 18, "2030-01-01", "Acme", 12, 5)
+    _sell("L1", 50)  # Stock never goes below zero, and the ledger records what was really sold
+
+    movements = [(m.kind, m.delta, m.quantity_after, m.ref) for m in get_stock_movements("L1")]
+    assert movements == [
+        ("receipt", 10, 10, None),
+        ("receipt", 5, 15, None),
+        ("sale", -4, 11, f"bill:{bill_id}"),
+        ("receipt", 9, 20, None),
+        ("adjustment", -2, 18, None),
+        ("sale", -18, 0, f"bill:{bill_id + 1}"),
+    ]
+    assert check_stock_ledger() == []
+
+
+def test_add_bill_records_sale_movements(clock):
+    add_medicine("L1", "Ledger Med", 10, None, "Acme", 10, 5)
+    bill_id = add_bill("2025-01-01 12:00:00", 30, [{"barcode": "L1", "name": "Ledger Med", "price": 10,
+                                                    "quantity": 3, "subtotal": 30}])
+    assert get_medicine_by_barcode("L1").quantity == 7
+    assert [(m.kind, m.delta, m.ref) for m in get_stock_movements("L1", kind="sale")] == [("sale", -3, f"bill:{bill_id}")]
+    assert get_stock_on() == {"L1": (7, 10)}
+    assert check_stock_ledger() == []
+
+
+def test_completing_an_order_records_receipt_movements(clock):
+    add_medicine("L1", "Ledger Med", 2, None, "Acme", 10, 5)
+    order_id = add_order("2025-01-01 10:00:00", "order.pdf", [
+        {"barcode": "L1", "name": "Ledger Med", "quantity": 2, "order_quantity": 8},
+        {"barcode": "GONE", "name": "Not Stocked", "quantity": 0, "order_quantity": 4},
+    ])
+    assert update_order_status(order_id, "completed")
+    assert update_order_status(order_id, "completed")  # Already completed, so no second receipt
+    assert get_medicine_by_barcode("L1").quantity == 10
+    assert [(m.kind, m.delta, m.quantity_after, m.ref) for m in get_stock_movements("L1", kind="receipt")] == [
+        ("receipt", 2, 2, None),
+        ("receipt", 8, 10, f"order:{order_id}"),
+    ]
+    assert get_stock_on() == {"L1": (10, 10)}
+    assert check_stock_ledger() == []
+    assert not update_order_status(-1, "completed")
+
+
+def test_new_database_gets_an_opening_snapshot(clock, monkeypatch, tmp_path):
+    monkeypatch.setattr(db_module, "DB_FILENAME", str(tmp_path / "new.db"))  # Take the fresh-database path
+    assert get_latest_stock_snapshot() is None
+    init_db()
+    assert get_latest_stock_snapshot() is not None
+
+
+def test_stock_on_date_uses_snapshot_and_later_movements(clock):
+    add_medicine("L1", "Ledger Med", 10, None, "Acme", 10, 5)
+    add_medicine("L2", "Other Med", 3, None, "Acme", 100, 5)
+    clock.now = "2025-01-02 09:00:00"
+    _sell("L1", 2)
+    clock.now = "2025-01-02 20:00:00"
+    assert take_stock_snapshot()[0]
+    clock.now = "2025-01-03 09:00:00"
+    _sell("L1", 3)
+    delete_medicine("L2")
+
+    assert get_stock_on("2025-01-01") == {"L1": (10, 10), "L2": (3, 100)}
+    assert get_stock_on("2025-01-02") == {"L1": (8, 10), "L2": (3, 100)}
+    assert get_stock_on("2025-01-03") == {"L1": (5, 10)}
+    assert get_stock_on() == {"L1": (5, 10)}
+    assert get_stock_on("2025-01-02", barcodes=["L2"]) == {"L2": (3, 100)}
+    assert get_stock_valuation("2025-01-02") == 8 * 10 + 3 * 100
+    assert check_stock_ledger() == []
+
+
+def test_old_snapshots_are_pruned_and_history_is_replayed_backwards(clock):
+    add_medicine("L1", "Ledger Med", 10, None, "Acme", 10, 5)
+    for day in range(2, 6):
+        clock.now = f"2025-01-0{day} 09:00:00"
+        _sell("L1", 1)
+        take_stock_snapshot(keep=2)
+    session = Session()
+    assert session.query(StockSnapshot.movement_id).distinct().count() == 2
+    session.close()
+    assert get_stock_on("2025-01-01") == {"L1": (10, 10)}
+    assert get_stock_on("2025-01-03") == {"L1": (8, 10)}
+
+
+def test_empty_catalog_snapshot_is_recorded(clock):
+    assert is_stock_snapshot_due()
+    assert take_stock_snapshot()[0]
+    later = datetime.datetime(2025, 1, 3, 9, 0)
+    assert not is_stock_snapshot_due(later)  # Nothing moved, so a new snapshot would be identical
+    assert get_stock_on() == {}
+    add_medicine("L1", "Ledger Med", 10, None, "Acme", 10, 5)
+    assert is_stock_snapshot_due(later)
+    assert get_stock_on("2025-01-01") == {"L1": (10, 10)}
+
+
+def test_shrinkage_counts_only_downward_adjustments(clock):
+    add_medicine("L1", "Ledger Med", 10, None, "Acme", 10, 5)
+    add_medicine("L2", "Other Med", 5, None, "Acme", 100, 5)
+    _sell("L1", 2)
+    update_medicine_quantity("L1", 6)  # Stock count found 2 missing
+    update_medicine_quantity("L2", 4)
+    delete_medicine("L2")
+    assert get_shrinkage("2025-01-01", "2025-01-01") == [("L2", 1, 100), ("L1", 2, 20)]
+
+
+def test_ledger_discrepancies_are_reported(clock):
+    add_medicine("L1", "Ledger Med", 10, None, "Acme", 10, 5)
+    session = Session()
+    session.query(db_module.Medicine).filter_by(barcode="L1").update({"quantity": 7})
+    session.commit()
+    session.close()
+    assert check_stock_ledger() == [("L1", 10, 7)]
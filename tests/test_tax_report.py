@@ -0,0 +1,69 @@
+import csv
+
+import pytest
+from openpyxl import load_workbook
+
+import db
+from billing_service import BillingService
+from cart import Cart, allocate
+from tax_report import HEADERS, NOT_RECORDED, TaxReportService
+
+
+@pytest.fixture(autouse=True)
+def no_bills():
+    db.clear_all_bills()
+    yield
+    db.clear_all_bills()
+
+
+def test_line_shares_add_up_to_bill_totals():
+    assert allocate(100, [1, 1, 1]) == [34, 33, 33]
+    assert allocate(7, [0, 0]) == [0, 0]
+    cart = Cart.from_items([{"barcode": b, "name": b, "price": p, "quantity": 1}
+                            for b, p in (("A", 10.01), ("B", 3.33), ("C", 99.99))])
+    items = cart.to_db_items(18, 7)
+    summary = cart.tax_summary(18, 7)
+    assert round(sum(i["tax_amount"] for i in items), 2) == summary["tax_amount"]
+    assert round(sum(i["taxable_value"] for i in items), 2) == summary["taxable_value"]
+    assert {i["tax_rate"] for i in items} == {18.0}
+    assert "tax_amount" not in cart.to_db_items()[0]
+
+
+def test_finalized_bills_store_tax_and_summarize_by_rate():
+    service = BillingService()
+    for tax, discount in ((12, 0), (12, 10), (5, 0)):
+        result = service.finalize_bill([{"barcode": "T1", "name": "Taxed", "price": 100, "quantity": 2}],
+                                       {"name": "Tax Customer"}, tax, discount)
+        assert result["success"], result["error"]
+    db.add_bill("2020-01-15 10:00:00", 50, [{"barcode": "T1", "name": "Old", "price": 50, "quantity": 1,
+                                             "subtotal": 50}])  # Recorded before tax was stored
+
+    rows = db.get_tax_summary()
+    assert [(r.period, r.tax_rate) for r in rows][0] == ("2020-01", None)
+    by_rate = {r.tax_rate: r for r in rows[1:]}
+    assert by_rate[12.0].bills == 2 and by_rate[12.0].taxable_value == 380
+    assert by_rate[12.0].tax_amount == 45.6 and by_rate[12.0].discount_amount == 20
+    assert by_rate[5.0].tax_amount == 10 and by_rate[5.0].total == 210
+
+    summary = TaxReportService().summary()
+    assert summary[0]["Tax Rate %"] == NOT_RECORDED and summary[0]["Taxable Value"] == 50
+    assert summary[-1]["Period"] == "Total" and summary[-1]["Total Tax"] == 55.6
+    assert summary[-1]["CGST"] + summary[-1]["SGST"] == 55.6
+
+
+def test_report_exports_csv_and_xlsx(tmp_path):
+    db.add_bill("2024-05-02 10:00:00", 112, [{"barcode": "T1", "name": "Taxed", "price": 100, "quantity": 1,
+                                              "subtotal": 100, "taxable_value": 100, "tax_rate": 12,
+                                              "tax_amount": 12}],
+                tax={"tax_rate": 12, "taxable_value": 100, "tax_amount": 12, "discount_amount": 0})
+    ok, result = TaxReportService().export("2024-05-01", "2024-05-31", str(tmp_path / "tax.csv"))
+    assert ok, result
+    with open(tmp_path / "tax.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(HEADERS) and rows[1][:5] == ["2024-05", "12.0", "1", "1", "100.0"]
+    assert rows[1][5:8] == ["6.0", "6.0", "12.0"]
+
+    ok, result = TaxReportService().export("2024-05-01", "2024-05-31", str(tmp_path / "tax.xlsx"))
+    assert ok, result
+    assert len(list(load_workbook(tmp_path / "tax.xlsx").active.values)) == 3
+    assert TaxReportService().export("2030-01-01", "2030-01-31", str(tmp_path / "none.csv"))[0] is False
@@ -0,0 +1,59 @@
+import datetime
+
+import pytest
+
+import db
+from watchlist import StockWatchlist
+
+TODAY = datetime.date.today()
+
+
+@pytest.fixture
+def watch():
+    db.clear_inventory()
+    db.add_medicine("W1", "Plenty", 50, TODAY + datetime.timedelta(days=365), "Acme", 10, 10)
+    db.add_medicine("W2", "Running Low", 3, TODAY + datetime.timedelta(days=365), "Acme", 10, 10)
+    db.add_medicine("W3", "Expired", 20, TODAY - datetime.timedelta(days=1), "Acme", 10, 10)
+    db.add_medicine("W4", "Expiring", 20, TODAY + datetime.timedelta(days=10), "Acme", 10, 10)
+    watchlist = StockWatchlist()
+    yield watchlist
+    watchlist.close()
+    db.clear_inventory()
+
+
+def test_initial_build_classifies_every_medicine(watch):
+    assert watch.counts() == {"low_stock": 1, "out_of_stock": 0, "expired": 1, "expiring_soon": 1}
+    assert watch.barcodes("expired") == {"W3"} and watch.barcodes("expiring_soon") == {"W4"}
+    assert [m.name for m in watch.medicines("low_stock")] == ["Running Low"]
+
+
+def test_writes_update_only_changed_barcodes(watch, monkeypatch):
+    watch.counts()
+    db.commit_bill("2025-01-01 10:00:00", 100, [{"barcode": "W1", "name": "Plenty", "price": 10, "quantity": 50,
+                                                 "subtotal": 500}])
+    db.update_medicine_threshold("W2", 2)
+    db.update_medicine("W3", "Expired", 20, TODAY + datetime.timedelta(days=400), "Acme", 10, 10)
+
+    refreshed = []
+    get_watch_levels = db.get_watch_levels
+    monkeypatch.setattr(db, "get_watch_levels", lambda barcodes=None: refreshed.append(barcodes) or get_watch_levels(barcodes))
+    assert watch.barcodes("low_stock") == {"W1"} and watch.barcodes("out_of_stock") == {"W1"}
+    assert watch.count("expired") == 0
+    assert refreshed == [{"W1", "W2", "W3"}]
+
+    db.delete_medicine("W4")
+    assert watch.count("expiring_soon") == 0
+
+
+def test_clear_and_date_rollover_rebuild(watch):
+    version = watch.version
+    watch.counts()
+    db.clear_inventory()
+    assert watch.counts() == {"low_stock": 0, "out_of_stock": 0, "expired": 0, "expiring_soon": 0}
+    assert watch.version > version
+
+    db.add_medicine("W5", "Tomorrow", 20, TODAY + datetime.timedelta(days=1), "Acme", 10, 10)
+    watch.rebuild(TODAY + datetime.timedelta(days=2))
+    assert watch._sets["expired"] == {"W5"}
+    # The next read notices the date is not today and rebuilds
+    assert watch.barcodes("expired") == set() and watch.barcodes("expiring_soon") == {"W5"}